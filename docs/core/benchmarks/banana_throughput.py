@@ -0,0 +1,89 @@
+"""
+Benchmark for the throughput of encoding and decoding large expressions with
+L{twisted.spread.banana.Banana}.
+
+Large lists of integers and of byte strings, and large byte strings, like
+the ones carried by Perspective Broker calls, are encoded, and decoded as
+they would be received from a connection, in 64KiB chunks.  The throughput
+of each is reported in megabytes of encoded data per second.
+"""
+from __future__ import print_function, division
+
+import sys
+import time
+
+from twisted.spread.banana import Banana, SIZE_LIMIT
+from twisted.test.proto_helpers import StringTransport
+
+CHUNK_SIZE = 2 ** 16
+
+
+
+def connect():
+    """
+    Create a L{Banana} connected to a transport and using no dialect.
+    """
+    protocol = Banana()
+    protocol.makeConnection(StringTransport())
+    protocol._selectDialect(b"none")
+    return protocol
+
+
+
+def encode(expression):
+    """
+    Encode an expression.
+
+    @return: The encoded expression.
+    @rtype: L{bytes}
+    """
+    protocol = connect()
+    protocol.sendEncoded(expression)
+    return protocol.transport.value()
+
+
+
+def decode(data):
+    """
+    Decode an expression from C{data}, delivered in chunks of L{CHUNK_SIZE}
+    bytes.
+    """
+    protocol = connect()
+    protocol.expressionReceived = lambda expression: None
+    for i in range(0, len(data), CHUNK_SIZE):
+        protocol.dataReceived(data[i:i + CHUNK_SIZE])
+
+
+
+def measure(function, argument, size, repeat):
+    """
+    Call C{function} with C{argument} C{repeat} times.
+
+    @return: The throughput, in megabytes of C{size} bytes per second.
+    """
+    started = time.time()
+    for i in range(repeat):
+        function(argument)
+    elapsed = time.time() - started
+    return size * repeat / elapsed / 1000000
+
+
+
+def main(args=None):
+    repeat = 10
+    if args:
+        repeat = int(args[0])
+
+    for name, expression in [
+        ("list of integers", list(range(SIZE_LIMIT // 4))),
+        ("list of byte strings", [b"x" * 30] * (SIZE_LIMIT // 64)),
+        ("list of large byte strings", [b"x" * (SIZE_LIMIT // 2)] * 16),
+    ]:
+        data = encode(expression)
+        print("%s: encode %.2f MB/s, decode %.2f MB/s" % (
+            name,
+            measure(encode, expression, len(data), repeat),
+            measure(decode, data, len(data), repeat)))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,168 @@
+"""
+Benchmark for L{twisted.internet.epollreactor.EPollReactor}'s lazy write
+removal mode.
+
+Over the loopback interface, with and without the mode, many connections
+exchange small requests and responses, and then many connections are each
+sent a stream of chunks written by a L{Cooperator}, one per tick.  The
+number of C{epoll_ctl} calls and the elapsed time are reported.
+
+Requests and responses gain nothing, since each connection stops writing a
+poll before it starts again.  Streams written once per reactor iteration
+start writing again before the next poll, and so save nearly all of their
+modifications.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.internet.epollreactor import EPollReactor
+from twisted.internet.protocol import Protocol, ServerFactory, ClientFactory
+from twisted.internet.task import Cooperator
+
+
+
+class CountingPoller(object):
+    """
+    Wrap an C{epoll} object, counting calls to C{register}, C{modify} and
+    C{unregister}.
+    """
+    def __init__(self, poller):
+        self._poller = poller
+        self.counts = {"register": 0, "modify": 0, "unregister": 0}
+
+
+    def register(self, fd, flags):
+        self.counts["register"] += 1
+        return self._poller.register(fd, flags)
+
+
+    def modify(self, fd, flags):
+        self.counts["modify"] += 1
+        return self._poller.modify(fd, flags)
+
+
+    def unregister(self, fd):
+        self.counts["unregister"] += 1
+        return self._poller.unregister(fd)
+
+
+    def poll(self, *args):
+        return self._poller.poll(*args)
+
+
+    def close(self):
+        return self._poller.close()
+
+
+
+class Echo(Protocol):
+    def dataReceived(self, data):
+        self.transport.write(data)
+
+
+
+class Client(Protocol):
+    def connectionMade(self):
+        self.remaining = self.factory.requests
+        self.transport.write(b"x" * 64)
+
+
+    def dataReceived(self, data):
+        self.remaining -= 1
+        if self.remaining:
+            self.transport.write(b"x" * 64)
+        else:
+            self.transport.loseConnection()
+
+
+    def connectionLost(self, reason):
+        self.factory.finished += 1
+        if self.factory.finished == self.factory.connections:
+            self.factory.reactor.stop()
+
+
+
+class Streamer(Protocol):
+    def connectionMade(self):
+        self.factory.cooperator.cooperate(self.stream())
+
+
+    def stream(self):
+        for i in range(self.factory.chunks):
+            self.transport.write(b"x" * 4096)
+            yield None
+        self.transport.loseConnection()
+
+
+
+class Sink(Protocol):
+    def connectionLost(self, reason):
+        self.factory.finished += 1
+        if self.factory.finished == self.factory.connections:
+            self.factory.reactor.stop()
+
+
+
+def benchmark(lazyWriteRemoval, name, serverFactory, clientFactory,
+              connections):
+    reactor = EPollReactor(lazyWriteRemoval=lazyWriteRemoval)
+    poller = reactor._poller = CountingPoller(reactor._poller)
+    serverFactory.reactor = clientFactory.reactor = reactor
+    port = reactor.listenTCP(0, serverFactory, interface="127.0.0.1")
+
+    clientFactory.connections = connections
+    clientFactory.finished = 0
+    for i in range(connections):
+        reactor.connectTCP("127.0.0.1", port.getHost().port, clientFactory)
+
+    before = time.time()
+    reactor.run(installSignalHandlers=False)
+    after = time.time()
+    print("lazyWriteRemoval=%-5s %s: "
+          "%.3fs, %d register, %d modify, %d unregister" % (
+              lazyWriteRemoval, name, after - before,
+              poller.counts["register"], poller.counts["modify"],
+              poller.counts["unregister"]))
+
+
+
+def echo(lazyWriteRemoval, connections, requests):
+    serverFactory = ServerFactory()
+    serverFactory.protocol = Echo
+    clientFactory = ClientFactory()
+    clientFactory.protocol = Client
+    clientFactory.requests = requests
+    benchmark(lazyWriteRemoval,
+              "%d connections x %d requests" % (connections, requests),
+              serverFactory, clientFactory, connections)
+
+
+
+def stream(lazyWriteRemoval, connections, chunks):
+    serverFactory = ServerFactory()
+    serverFactory.protocol = Streamer
+    serverFactory.chunks = chunks
+    serverFactory.cooperator = Cooperator(
+        scheduler=lambda f: serverFactory.reactor.callLater(0, f))
+    clientFactory = ClientFactory()
+    clientFactory.protocol = Sink
+    benchmark(lazyWriteRemoval,
+              "%d connections x %d streamed chunks" % (connections, chunks),
+              serverFactory, clientFactory, connections)
+
+
+
+def main(args=None):
+    connections = 100
+    requests = 100
+    if args:
+        connections, requests = map(int, args)
+    for lazyWriteRemoval in (False, True):
+        echo(lazyWriteRemoval, connections, requests)
+    for lazyWriteRemoval in (False, True):
+        stream(lazyWriteRemoval, connections // 2, requests * 10)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,225 @@
+"""
+Benchmark comparing the throughput of HTTP/2 and HTTP/1.1 on the same
+L{twisted.web.server.Site}.
+
+The same number of requests for a small and for a large resource are made
+over the loopback interface, either as concurrent streams on a single HTTP/2
+connection, negotiated with prior knowledge rather than TLS, or as keep-alive
+requests on as many HTTP/1.1 connections, and the elapsed time is reported.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+import h2.connection
+import h2.events
+import h2.settings
+
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred, inlineCallbacks
+from twisted.internet.protocol import Protocol, ClientFactory, ServerFactory
+from twisted.web.resource import Resource
+from twisted.web.server import Site
+from twisted.web.static import Data
+from twisted.web._http2 import H2Connection
+
+
+
+class H2ServerFactory(ServerFactory):
+    """
+    Serve a site over HTTP/2 without negotiation.
+    """
+
+    def __init__(self, site):
+        self.site = site
+
+
+    def buildProtocol(self, addr):
+        protocol = H2Connection()
+        protocol.requestFactory = self.site.requestFactory
+        protocol.site = self.site
+        protocol.factory = self.site
+        return protocol
+
+
+
+class H2Client(Protocol):
+    """
+    Make C{factory.requests} requests for C{factory.path}, with up to
+    C{factory.concurrency} streams open at a time.
+    """
+
+    def connectionMade(self):
+        self.conn = h2.connection.H2Connection(client_side=True)
+        self.conn.initiate_connection()
+        # Open the flow control windows as wide as a client downloading
+        # large files would, so that only the connection window needs to be
+        # kept open as data is received.
+        self.conn.update_settings(
+            {h2.settings.INITIAL_WINDOW_SIZE: 2 ** 31 - 1})
+        self.conn.increment_flow_control_window(2 ** 24)
+        self.started = 0
+        self.completed = 0
+        self.received = 0
+        for i in range(min(self.factory.concurrency, self.factory.requests)):
+            self.startRequest()
+        self.transport.write(self.conn.data_to_send())
+
+
+    def startRequest(self):
+        streamID = self.conn.get_next_available_stream_id()
+        self.conn.send_headers(streamID, [
+            (b':method', b'GET'), (b':authority', b'localhost'),
+            (b':scheme', b'http'), (b':path', self.factory.path)],
+            end_stream=True)
+        self.started += 1
+
+
+    def dataReceived(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                self.received += len(event.data)
+                if event.flow_controlled_length:
+                    self.conn.increment_flow_control_window(
+                        event.flow_controlled_length)
+            elif isinstance(event, h2.events.StreamEnded):
+                self.completed += 1
+                if self.started < self.factory.requests:
+                    self.startRequest()
+                elif self.completed == self.factory.requests:
+                    self.transport.loseConnection()
+        self.transport.write(self.conn.data_to_send())
+
+
+    def connectionLost(self, reason):
+        self.factory.done.callback(self.received)
+
+
+
+class HTTP11Client(Protocol):
+    """
+    Make C{factory.perConnection} keep-alive requests for C{factory.path},
+    one after the other.
+    """
+
+    def connectionMade(self):
+        self.buffer = b''
+        self.remaining = None
+        self.received = 0
+        self.completed = 0
+        self.request()
+
+
+    def request(self):
+        self.transport.write(
+            b'GET ' + self.factory.path + b' HTTP/1.1\r\n'
+            b'Host: localhost\r\n\r\n')
+
+
+    def dataReceived(self, data):
+        self.buffer += data
+        while True:
+            if self.remaining is None:
+                end = self.buffer.find(b'\r\n\r\n')
+                if end == -1:
+                    return
+                for line in self.buffer[:end].split(b'\r\n'):
+                    if line.lower().startswith(b'content-length:'):
+                        self.remaining = int(line.split(b':')[1])
+                self.buffer = self.buffer[end + 4:]
+            if len(self.buffer) < self.remaining:
+                return
+            self.received += self.remaining
+            self.buffer = self.buffer[self.remaining:]
+            self.remaining = None
+            self.completed += 1
+            if self.completed == self.factory.perConnection:
+                self.transport.loseConnection()
+                return
+            self.request()
+
+
+    def connectionLost(self, reason):
+        self.factory.done.callback(self.received)
+
+
+
+@inlineCallbacks
+def benchmark(port, path, requests, concurrency):
+    results = []
+
+    factory = ClientFactory()
+    factory.protocol = H2Client
+    factory.path = path
+    factory.requests = requests
+    factory.concurrency = concurrency
+    factory.done = Deferred()
+    before = time.time()
+    reactor.connectTCP("127.0.0.1", port.h2.getHost().port, factory)
+    received = yield factory.done
+    results.append(("HTTP/2", time.time() - before, received))
+
+    before = time.time()
+    received = 0
+    done = []
+    for i in range(concurrency):
+        factory = ClientFactory()
+        factory.protocol = HTTP11Client
+        factory.path = path
+        factory.perConnection = requests // concurrency
+        factory.done = Deferred()
+        done.append(factory.done)
+        reactor.connectTCP("127.0.0.1", port.http11.getHost().port, factory)
+    for d in done:
+        received += yield d
+    results.append(("HTTP/1.1", time.time() - before, received))
+
+    for name, elapsed, received in results:
+        print("%-8s %-7s %d requests, concurrency %d: %.3fs, %d req/s, "
+              "%d bytes" % (name, path.decode("ascii"), requests, concurrency,
+                            elapsed, requests / elapsed, received))
+
+
+
+class Ports(object):
+    """
+    The ports on which the site is served over each protocol.
+    """
+
+
+
+@inlineCallbacks
+def run(requests, concurrency):
+    root = Resource()
+    root.putChild(b"small", Data(b"x" * 100, "text/plain"))
+    root.putChild(b"large", Data(b"x" * 256 * 1024, "application/octet-stream"))
+    site = Site(root)
+    site.noisy = False
+    factory = H2ServerFactory(site)
+    factory.noisy = False
+    ports = Ports()
+    ports.h2 = reactor.listenTCP(0, factory, interface="127.0.0.1")
+    ports.http11 = reactor.listenTCP(0, site, interface="127.0.0.1")
+    try:
+        yield benchmark(ports, b"/small", requests, concurrency)
+        yield benchmark(ports, b"/large", requests // 10, concurrency)
+    finally:
+        yield ports.h2.stopListening()
+        yield ports.http11.stopListening()
+        reactor.stop()
+
+
+
+def main(args=None):
+    requests = 2000
+    concurrency = 20
+    if args:
+        requests = int(args[0])
+        if args[1:]:
+            concurrency = int(args[1])
+    reactor.callWhenRunning(run, requests, concurrency)
+    reactor.run()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
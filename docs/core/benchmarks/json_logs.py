@@ -0,0 +1,98 @@
+"""
+Benchmark for writing and reading JSON log files with
+L{twisted.logger.jsonFileLogObserver} and
+L{twisted.logger.eventsFromJSONLogFile}.
+
+Events with a few format strings are serialized with L{eventAsJSON} and
+written to a file, which is then read back both from a file object mapped
+into memory and from a stream read in chunks.  The throughput of each is
+reported.
+"""
+from __future__ import print_function, division
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+from twisted.logger import (
+    LogLevel, eventAsJSON, eventsFromJSONLogFile, jsonFileLogObserver
+)
+
+
+
+FORMATS = [
+    u"Received {count} bytes from {peer!r}",
+    u"{method} {uri} completed with {code} in {elapsed:.3f}s",
+    u"Connection lost: {reason}",
+]
+
+
+
+def makeEvents(count):
+    """
+    Create events like those logged by a server.
+
+    @return: The events.
+    @rtype: L{list} of L{dict}
+    """
+    return [
+        dict(
+            log_format=FORMATS[i % len(FORMATS)], log_level=LogLevel.info,
+            log_namespace="benchmark.server", log_source=None,
+            log_time=1466000000.0 + i, count=i, peer=("127.0.0.1", 8080),
+            method=u"GET", uri=u"/resource/%d" % (i,), code=200,
+            elapsed=i / 1000, reason=u"Connection was closed cleanly."
+        )
+        for i in range(count)
+    ]
+
+
+
+def main(args=None):
+    count = 100000
+    if args:
+        count = int(args[0])
+    events = makeEvents(count)
+
+    started = time.time()
+    for event in events:
+        eventAsJSON(dict(event))
+    elapsed = time.time() - started
+    print("eventAsJSON: %.0f events/s" % (count / elapsed,))
+
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        with io.open(path, "w", encoding="utf-8") as outFile:
+            observer = jsonFileLogObserver(outFile)
+            started = time.time()
+            for event in events:
+                observer(dict(event))
+            elapsed = time.time() - started
+        size = os.path.getsize(path)
+        print("jsonFileLogObserver: %.0f events/s, %.1f MB/s" % (
+            count / elapsed, size / elapsed / 1e6))
+
+        with io.open(path, "rb") as inFile:
+            started = time.time()
+            read = sum(1 for event in eventsFromJSONLogFile(inFile))
+            elapsed = time.time() - started
+        assert read == count
+        print("eventsFromJSONLogFile (mapped): %.0f events/s, %.1f MB/s" % (
+            count / elapsed, size / elapsed / 1e6))
+
+        with io.open(path, "rb") as inFile:
+            stream = io.BytesIO(inFile.read())
+        started = time.time()
+        read = sum(1 for event in eventsFromJSONLogFile(stream))
+        elapsed = time.time() - started
+        assert read == count
+        print("eventsFromJSONLogFile (stream): %.0f events/s, %.1f MB/s" % (
+            count / elapsed, size / elapsed / 1e6))
+    finally:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,120 @@
+"""
+Benchmark for the line-based protocols built on
+L{twisted.protocols.basic.LineReceiver}.
+
+Pipelined commands or responses are delivered in 64KiB chunks to an SMTP
+server, an IRC client, a POP3 server, an FTP server and a memcache client,
+and the time taken per line is reported for each.
+"""
+from __future__ import print_function, division
+
+import sys
+import time
+
+from twisted.internet import reactor
+from twisted.mail import pop3, smtp
+from twisted.protocols import ftp, memcache
+from twisted.test.proto_helpers import StringTransport
+from twisted.words.protocols import irc
+
+CHUNK_SIZE = 2 ** 16
+
+
+
+def smtpServer():
+    """
+    Create an SMTP server receiving I{HELO} commands.
+    """
+    server = smtp.SMTP()
+    server.makeConnection(StringTransport())
+    server.setTimeout(None)
+    return server, b"HELO example.com\r\n"
+
+
+
+def ircClient():
+    """
+    Create an IRC client receiving messages sent to a channel.
+    """
+    client = irc.IRCClient()
+    client.privmsg = lambda user, channel, message: None
+    client.makeConnection(StringTransport())
+    return client, b":a!b@c PRIVMSG #twisted :hello\r\n"
+
+
+
+def pop3Server():
+    """
+    Create a POP3 server receiving I{NOOP} commands from an authenticated
+    user.
+    """
+    server = pop3.POP3()
+    server.makeConnection(StringTransport())
+    server.setTimeout(None)
+    server.mbox = pop3.Mailbox()
+    return server, b"NOOP\r\n"
+
+
+
+def ftpServer():
+    """
+    Create an FTP server receiving I{NOOP} commands, which it refuses before
+    the user logs in.
+    """
+    server = ftp.FTP()
+    server.factory = ftp.FTPFactory()
+    server.makeConnection(StringTransport())
+    server.setTimeout(None)
+    return server, b"NOOP\r\n"
+
+
+
+def memcacheClient():
+    """
+    Create a memcache client receiving responses to I{get} commands, which
+    it has to send first.
+    """
+    client = memcache.MemCacheProtocol()
+    client.makeConnection(StringTransport())
+    return client, b"VALUE key 0 5\r\nhello\r\nEND\r\n"
+
+
+
+def deliver(protocol, data):
+    """
+    Deliver C{data} to C{protocol} in chunks of L{CHUNK_SIZE} bytes.
+    """
+    for i in range(0, len(data), CHUNK_SIZE):
+        protocol.dataReceived(data[i:i + CHUNK_SIZE])
+
+
+
+def main(args=None):
+    count = 20000
+    if args:
+        count = int(args[0])
+
+    for name, create in [
+        ("SMTP server", smtpServer),
+        ("IRC client", ircClient),
+        ("POP3 server", pop3Server),
+        ("FTP server", ftpServer),
+        ("memcache client", memcacheClient),
+    ]:
+        protocol, line = create()
+        if isinstance(protocol, memcache.MemCacheProtocol):
+            for i in range(count):
+                protocol.get(b"key")
+        data = line * count
+        started = time.time()
+        deliver(protocol, data)
+        # The FTP server pauses for each command, and resumes from the
+        # reactor once it has been handled.
+        while getattr(protocol, "paused", False):
+            reactor.iterate()
+        elapsed = time.time() - started
+        print("%s: %.3f usec per line" % (
+            name, elapsed / data.count(b"\r\n") * 1000000))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,6 +1,6 @@
-from __future__ import print_function
+from __future__ import print_function, division
 
-import math, time
+import time
 
 from twisted.protocols import basic
 
@@ -10,27 +10,28 @@ class CollectingLineReceiver(basic.LineReceiver):
         self.lineReceived = self.lines.append
 
 def deliver(proto, chunks):
-    map(proto.dataReceived, chunks)
+    for chunk in chunks:
+        proto.dataReceived(chunk)
 
 def benchmark(chunkSize, lineLength, numLines):
-    bytes = ('x' * lineLength + '\r\n') * numLines
-    chunkCount = len(bytes) / chunkSize + 1
+    bytes = (b'x' * lineLength + b'\r\n') * numLines
+    chunkCount = len(bytes) // chunkSize + 1
     chunks = []
-    for n in xrange(chunkCount):
+    for n in range(chunkCount):
         chunks.append(bytes[n*chunkSize:(n+1)*chunkSize])
-    assert ''.join(chunks) == bytes, (chunks, bytes)
+    assert b''.join(chunks) == bytes, (chunks, bytes)
     p = CollectingLineReceiver()
 
-    before = time.clock()
+    before = time.time()
     deliver(p, chunks)
-    after = time.clock()
+    after = time.time()
 
     assert bytes.splitlines() == p.lines, (bytes.splitlines(), p.lines)
 
     print('chunkSize:', chunkSize, end=' ')
     print('lineLength:', lineLength, end=' ')
     print('numLines:', numLines, end=' ')
-    print('CPU Time: ', after - before)
+    print('Time: ', after - before)
 
 
 
@@ -45,5 +46,9 @@ def main():
             for chunkSize in (51, 500, 5000):
                 benchmark(chunkSize, lineLength, numLines)
 
+    # Many short lines in each chunk, as pipelined requests arrive.
+    for numLines in 100000, 500000:
+        benchmark(65536, 10, numLines)
+
 if __name__ == '__main__':
     main()
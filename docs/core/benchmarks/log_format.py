@@ -0,0 +1,95 @@
+"""
+Benchmark for formatting log events with L{twisted.logger.formatEvent} and
+L{twisted.logger.formatEventAsClassicLogText}.
+
+Events with format strings like those Twisted logs are formatted by
+L{formatEvent}, which compiles each format string once, and by parsing the
+format string for each event like L{string.Formatter.vformat} does, for
+comparison.  The time per event is reported for each, and for formatting
+events as lines of a classic log file.
+"""
+from __future__ import print_function, division
+
+import sys
+import time
+
+from twisted.logger import (
+    LogLevel, formatEvent, formatEventAsClassicLogText
+)
+from twisted.logger._flatten import aFormatter
+from twisted.logger._format import CallMapping
+
+
+
+class Port(object):
+    """
+    A stand-in for a listening port, logged as an attribute of events.
+    """
+    number = 8080
+
+    def __repr__(self):
+        return "<Port of Site on 8080>"
+
+
+
+FORMATS = [
+    u"{log_source.__class__.__name__} starting on {port.number}",
+    u"Starting factory {factory!r}",
+    u"{method} {uri} completed with {code} in {elapsed:.3f}s",
+    u"Unhandled error in Deferred:",
+    u"(TCP Port {port.number} Closed)",
+    u"Stopping factory {factory!r}",
+    u"Received {count} bytes from {peer[0]}:{peer[1]}",
+    u"{count()} calls still pending",
+]
+
+
+
+def makeEvents(count):
+    """
+    Create events like those logged by a server.
+
+    @return: The events.
+    @rtype: L{list} of L{dict}
+    """
+    return [
+        dict(
+            log_format=FORMATS[i % len(FORMATS)], log_level=LogLevel.info,
+            log_namespace="benchmark.server", log_source=Port(),
+            log_time=1466000000.0 + i, port=Port(), factory=Port(),
+            method=u"GET", uri=u"/resource/%d" % (i,), code=200,
+            elapsed=i / 1000, count=lambda: 3, peer=("127.0.0.1", 8080),
+        )
+        for i in range(count)
+    ]
+
+
+
+def parseEachTime(event):
+    """
+    Format an event by parsing its format string, as L{formatEvent} did
+    before it compiled format strings.
+    """
+    return aFormatter.vformat(event["log_format"], (), CallMapping(event))
+
+
+
+def main(args=None):
+    count = 100000
+    if args:
+        count = int(args[0])
+    events = makeEvents(count)
+
+    for name, formatter in [
+        ("parsed for each event", parseEachTime),
+        ("formatEvent", formatEvent),
+        ("formatEventAsClassicLogText", formatEventAsClassicLogText),
+    ]:
+        started = time.time()
+        for event in events:
+            formatter(event)
+        elapsed = time.time() - started
+        print("%s: %.3f usec per event" % (name, elapsed / count * 1000000))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
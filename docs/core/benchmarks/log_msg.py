@@ -0,0 +1,56 @@
+"""
+Benchmark for the cost of logging messages with L{twisted.python.log.msg}
+and with L{twisted.logger.Logger}, as observed by a L{twisted.logger}
+observer.
+
+Messages are logged without keywords, which L{LogPublisher.msg} publishes
+as events built at once, with a keyword, which are translated for
+L{twisted.logger} observers, and by a L{Logger} like the ones of Twisted's
+ports and reactor.  The time per call is reported for each.
+"""
+from __future__ import print_function, division
+
+import sys
+import time
+
+from twisted.logger import Logger, LogPublisher as NewLogPublisher
+from twisted.python import log
+
+
+
+def measure(emit, calls):
+    """
+    Call C{emit} C{calls} times.
+
+    @return: The time taken per call, in seconds.
+    """
+    started = time.time()
+    for i in range(calls):
+        emit(i)
+    return (time.time() - started) / calls
+
+
+
+def main(args=None):
+    calls = 100000
+    if args:
+        calls = int(args[0])
+
+    events = []
+    publisher = NewLogPublisher(events.append)
+    legacy = log.LogPublisher(publishPublisher=publisher)
+    logger = Logger("benchmark.port", observer=publisher)
+
+    for name, emit in [
+        ("log.msg", lambda i: legacy.msg("(TCP Port %s Closed)" % (i,))),
+        ("log.msg with a keyword",
+         lambda i: legacy.msg("(TCP Port %s Closed)" % (i,), port=i)),
+        ("Logger.info",
+         lambda i: logger.info(u"(TCP Port {port} Closed)", port=i)),
+    ]:
+        perCall = measure(emit, calls)
+        print("%s: %.3f usec per call" % (name, perCall * 1000000))
+        del events[:]
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
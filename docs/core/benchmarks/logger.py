@@ -0,0 +1,61 @@
+"""
+Benchmark for the cost of calls to L{twisted.logger.Logger} methods for
+events which are filtered out by their log level, and of those which are
+emitted.
+
+A debug event is logged by a logger whose observer drops it, either after
+building it with a L{FilteringLogObserver}, or before building it when the
+logger is given the same predicate as its C{levelPredicate}.  The time per
+call is reported for each, and for an info event which is emitted.
+"""
+from __future__ import print_function, division
+
+import sys
+import time
+
+from twisted.logger import (
+    FilteringLogObserver, Logger, LogLevel, LogLevelFilterPredicate
+)
+
+
+
+def measure(log, method, calls):
+    """
+    Log an event C{calls} times.
+
+    @return: The time taken per call, in seconds.
+    """
+    emit = getattr(log, method)
+    started = time.time()
+    for i in range(calls):
+        emit("Received {count} bytes from {peer}", count=i, peer="client")
+    return (time.time() - started) / calls
+
+
+
+def main(args=None):
+    calls = 200000
+    if args:
+        calls = int(args[0])
+
+    emitted = []
+    predicate = LogLevelFilterPredicate(defaultLogLevel=LogLevel.info)
+    observer = FilteringLogObserver(emitted.append, [predicate])
+    filtered = Logger("benchmark.protocol", observer=observer)
+    gated = Logger(
+        "benchmark.protocol", observer=observer, levelPredicate=predicate
+    )
+
+    for name, log, method in [
+        ("filtered by the observer", filtered, "debug"),
+        ("gated by the logger", gated, "debug"),
+        ("emitted", gated, "info"),
+    ]:
+        perCall = measure(log, method, calls)
+        print("%s %s: %.3f usec per call" % (
+            method, name, perCall * 1000000))
+
+    assert len(emitted) == calls
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,160 @@
+"""
+Benchmark for Perspective Broker calls between brokers connected in memory.
+
+Reported are the latency of L{callRemote} round trips, the throughput of
+sending lists of L{pb.Copyable} objects, and the time taken to deliver
+updates to a L{pb.RemoteCache} of a L{pb.Cacheable}.  Serializing with
+L{twisted.spread.jelly} dominates the time taken by the last two.
+"""
+from __future__ import print_function, division
+
+import sys
+import time
+
+from twisted.spread import pb
+from twisted.test import iosim
+
+
+
+class Point(pb.Copyable):
+    """
+    An object copied by value.
+    """
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.label = "point"
+        self.tags = ("copied", "benchmark")
+
+
+
+class RemotePoint(pb.RemoteCopy):
+    """
+    A copy of a L{Point}.
+    """
+
+pb.setUnjellyableForClass(Point, RemotePoint)
+
+
+
+class Counter(pb.Cacheable):
+    """
+    An object cached by the brokers it is sent to, which are told about each
+    change of its value.
+    """
+    def __init__(self):
+        self.value = 0
+        self.observers = []
+
+
+    def getStateToCacheAndObserveFor(self, perspective, observer):
+        self.observers.append(observer)
+        return {"value": self.value}
+
+
+    def increment(self):
+        self.value += 1
+        for observer in self.observers:
+            observer.callRemote("setValue", self.value)
+
+
+
+class RemoteCounter(pb.RemoteCache):
+    """
+    A cache of a L{Counter}.
+    """
+    def observe_setValue(self, value):
+        self.value = value
+
+pb.setUnjellyableForClass(Counter, RemoteCounter)
+
+
+
+class Root(pb.Root):
+    """
+    The object published by the server.
+    """
+    def __init__(self):
+        self.counter = Counter()
+
+
+    def remote_echo(self, value):
+        return value
+
+
+    def remote_count(self, points):
+        return len(points)
+
+
+    def remote_getCounter(self):
+        return self.counter
+
+
+
+def connect():
+    """
+    Connect a client broker to a server broker publishing a L{Root}.
+
+    @return: The L{Root}, a reference to it for the client, and the
+        L{iosim.IOPump} delivering the data between the brokers.
+    """
+    root = Root()
+    serverFactory = pb.PBServerFactory(root)
+    clientFactory = pb.PBClientFactory()
+    server = serverFactory.buildProtocol(None)
+    client = clientFactory.buildProtocol(None)
+    pump = iosim.connect(
+        server, iosim.makeFakeServer(server),
+        client, iosim.makeFakeClient(client))
+    references = []
+    clientFactory.getRootObject().addCallback(references.append)
+    pump.flush()
+    return root, references[0], pump
+
+
+
+def measure(operation, count):
+    """
+    Call C{operation} C{count} times.
+
+    @return: The time taken per call, in seconds.
+    """
+    started = time.time()
+    for i in range(count):
+        operation()
+    return (time.time() - started) / count
+
+
+
+def main(args=None):
+    count = 1000
+    if args:
+        count = int(args[0])
+    root, reference, pump = connect()
+
+    def echo():
+        reference.callRemote("echo", 1)
+        pump.flush()
+    print("callRemote: %.1f usec per call" % (
+        measure(echo, count) * 1000000,))
+
+    points = [Point(i, -i) for i in range(count)]
+    def copy():
+        reference.callRemote("count", points)
+        pump.flush()
+    perCall = measure(copy, 10)
+    print("Copyable: %.1f usec per object, %d objects per second" % (
+        perCall / count * 1000000, count / perCall))
+
+    caches = []
+    reference.callRemote("getCounter").addCallback(caches.append)
+    pump.flush()
+    def update():
+        root.counter.increment()
+        pump.flush()
+    print("Cacheable: %.1f usec per update" % (
+        measure(update, count) * 1000000,))
+    assert caches[0].value == root.counter.value
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,121 @@
+"""
+Benchmark for the traversal of resource trees.
+
+Two equivalent sites with 400 routes, eight segments deep and each including
+two parameters, are built: one from nested L{twisted.web.resource.Resource}
+instances with a dynamic C{getChild} for the parameters, and one from a
+L{twisted.web.router.Router}.  The resource for every route is then looked up
+repeatedly with L{twisted.web.resource.getChildForRequest}, and the elapsed
+time is reported.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.web.resource import Resource, getChildForRequest
+from twisted.web.router import Router
+
+
+
+class Request(object):
+    """
+    Just enough of a request for traversal.
+    """
+
+    def __init__(self, path):
+        self.prepath = []
+        self.postpath = path[1:].split(b'/')
+
+
+
+class Node(Resource):
+    """
+    A resource with static children, and a child for any other segment if
+    it has a parameter, which is recorded on the request.
+    """
+    parameter = None
+
+    def getChild(self, path, request):
+        if self.parameter is None:
+            return Resource.getChild(self, path, request)
+        name, child = self.parameter
+        try:
+            arguments = request.routeArguments
+        except AttributeError:
+            arguments = request.routeArguments = {}
+        arguments[name] = path
+        return child
+
+
+
+def paths():
+    """
+    Return the route and a matching path for every route of the site.
+    """
+    result = []
+    for service in range(20):
+        for collection in range(20):
+            route = ("/api/v1/orgs/{org}/service%d/{id}/collection%d/items" %
+                     (service, collection)).encode("ascii")
+            path = route.replace(b"{org}", b"acme").replace(b"{id}", b"42")
+            result.append((route, path))
+    return result
+
+
+
+def buildTree(routes):
+    """
+    Build a tree of nested L{Node}s for C{routes}.
+    """
+    root = Node()
+    for route, path in routes:
+        node = root
+        for segment in route[1:].split(b'/'):
+            if segment.startswith(b'{'):
+                if node.parameter is None:
+                    node.parameter = (segment[1:-1], Node())
+                node = node.parameter[1]
+            else:
+                child = node.children.get(segment)
+                if child is None:
+                    child = Node()
+                    node.putChild(segment, child)
+                node = child
+    return root
+
+
+
+def buildRouter(routes):
+    """
+    Build a L{Router} for C{routes}.
+    """
+    router = Router()
+    for route, path in routes:
+        router.addRoute(route, Resource())
+    return router
+
+
+
+def benchmark(name, root, routes, iterations):
+    before = time.time()
+    for i in range(iterations):
+        for route, path in routes:
+            getChildForRequest(root, Request(path))
+    elapsed = time.time() - before
+    lookups = iterations * len(routes)
+    print("%-6s %d lookups: %.3fs, %.2fus per lookup" % (
+        name, lookups, elapsed, elapsed / lookups * 1000000))
+
+
+
+def main(args=None):
+    iterations = 100
+    if args:
+        iterations = int(args[0])
+    routes = paths()
+    benchmark("tree", buildTree(routes), routes, iterations)
+    benchmark("router", buildRouter(routes), routes, iterations)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,91 @@
+"""
+Benchmark for the flattening of L{twisted.web.template} templates.
+
+A table of nested tables, in which most of the markup is static, is rendered
+repeatedly from the template as loaded and as compiled for
+L{twisted.web.template.Element.render}, and the elapsed time is reported.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.web.template import (
+    Element, XMLString, TagLoader, renderer, flatten)
+
+
+TEMPLATE = """\
+<html xmlns:t="http://twistedmatrix.com/ns/twisted.web.template/0.1">
+<head><title>Benchmark</title><link rel="stylesheet" href="style.css" /></head>
+<body>
+<h1>Report</h1>
+<table class="outer">
+<thead><tr><th>Section</th><th>Details</th></tr></thead>
+<tbody>
+<tr t:render="sections">
+<td class="name"><t:slot name="name" /></td>
+<td>
+<table class="inner">
+<thead><tr><th>Key</th><th>Value</th><th>Notes</th></tr></thead>
+<tbody>
+<tr t:render="rows">
+<td><t:slot name="key" /></td>
+<td><em><t:slot name="value" /></em></td>
+<td><span class="note">Nothing to report &amp; nothing to add.</span></td>
+</tr>
+</tbody>
+</table>
+</td>
+</tr>
+</tbody>
+</table>
+</body>
+</html>
+"""
+
+
+
+class Report(Element):
+    """
+    Render 20 sections of 20 rows each.
+    """
+
+    @renderer
+    def sections(self, request, tag):
+        for i in range(20):
+            yield tag.clone().fillSlots(name="Section %d" % (i,))
+
+
+    @renderer
+    def rows(self, request, tag):
+        for i in range(20):
+            yield tag.clone().fillSlots(key="key %d" % (i,), value=str(i))
+
+
+
+def benchmark(loader, iterations):
+    """
+    Flatten a L{Report} with the given loader and return the elapsed time and
+    the number of writes made.
+    """
+    writes = []
+    before = time.time()
+    for i in range(iterations):
+        flatten(None, Report(loader), writes.append)
+    return time.time() - before, len(writes) // iterations
+
+
+
+def main(args=None):
+    iterations = 50
+    if args:
+        iterations = int(args[0])
+    loader = XMLString(TEMPLATE)
+    loaded = TagLoader(loader.load())
+    for name, loader in [("loaded", loaded), ("compiled", loader)]:
+        elapsed, writes = benchmark(loader, iterations)
+        print("%-8s %d renders: %.3fs, %d writes per render" % (
+            name, iterations, elapsed, writes))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,99 @@
+"""
+Benchmark for the memory used by each open request to a
+L{twisted.web.server.Site}.
+
+Many connections each send a request, with a query string and cookies, for
+a resource which never finishes responding, as long-polling resources do.
+The memory allocated while they are received, per request, is reported.  It
+is measured with L{tracemalloc} where it is available, and from the maximum
+resident set size of the process otherwise.
+"""
+from __future__ import print_function, division
+
+import gc
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+    import resource as _resource
+
+from twisted.internet.address import IPv4Address
+from twisted.test.proto_helpers import StringTransport
+from twisted.web.resource import Resource
+from twisted.web.server import NOT_DONE_YET, Site
+
+
+
+class LongPoll(Resource):
+    """
+    A resource keeping the requests for it open.
+    """
+    isLeaf = True
+
+    def __init__(self):
+        Resource.__init__(self)
+        self.requests = []
+
+
+    def render_GET(self, request):
+        self.requests.append(request)
+        return NOT_DONE_YET
+
+
+
+REQUEST = (b"GET /poll?channel=updates&since=1234567890 HTTP/1.1\r\n"
+           b"Host: localhost\r\n"
+           b"User-Agent: benchmark\r\n"
+           b"Accept: */*\r\n"
+           b"Cookie: TWISTED_SESSION=0123456789abcdef; theme=dark\r\n"
+           b"\r\n")
+
+
+
+def memory():
+    """
+    Return the memory in use, in bytes.
+    """
+    gc.collect()
+    if tracemalloc is not None:
+        return tracemalloc.get_traced_memory()[0]
+    return _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+
+def main(args=None):
+    requests = 20000
+    if args:
+        requests = int(args[0])
+    poll = LongPoll()
+    root = Resource()
+    root.putChild(b"poll", poll)
+    site = Site(root)
+
+    # Build the connections beforehand, so that only the requests are
+    # measured.
+    channels = []
+    for i in range(requests):
+        address = IPv4Address('TCP', '127.0.0.1', 10000 + i % 50000)
+        channel = site.buildProtocol(address)
+        channel.makeConnection(StringTransport(peerAddress=address))
+        channels.append(channel)
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+    before = memory()
+    started = time.time()
+    for channel in channels:
+        channel.dataReceived(REQUEST)
+    elapsed = time.time() - started
+    used = memory() - before
+
+    assert len(poll.requests) == requests
+    print("%d open requests: %.3fs, %d bytes per request" % (
+        requests, elapsed, used / requests))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
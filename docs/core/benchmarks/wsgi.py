@@ -0,0 +1,106 @@
+"""
+Benchmark for L{twisted.web.wsgi.WSGIResource}'s buffered write mode.
+
+A WSGI application producing either a large body in large chunks or a body
+made of many small chunks is requested repeatedly over the loopback
+interface, with and without a C{bufferSize}, and the elapsed time is
+reported.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred, inlineCallbacks
+from twisted.internet.protocol import Protocol, ClientFactory
+from twisted.python.threadpool import ThreadPool
+from twisted.web.server import Site
+from twisted.web.wsgi import WSGIResource
+
+
+
+def largeApplication(environ, startResponse):
+    """
+    Respond with 4MB in 64KB chunks.
+    """
+    startResponse('200 OK', [('Content-Type', 'application/octet-stream')])
+    chunk = b'x' * 65536
+    for i in range(64):
+        yield chunk
+
+
+
+def chunkyApplication(environ, startResponse):
+    """
+    Respond with 20000 chunks of 100 bytes.
+    """
+    startResponse('200 OK', [('Content-Type', 'text/plain')])
+    chunk = b'x' * 99 + b'\n'
+    for i in range(20000):
+        yield chunk
+
+
+
+class Download(Protocol):
+    """
+    Send an HTTP/1.0 request and count the bytes received until the server
+    closes the connection.
+    """
+    def connectionMade(self):
+        self.received = 0
+        self.transport.write(b'GET / HTTP/1.0\r\n\r\n')
+
+
+    def dataReceived(self, data):
+        self.received += len(data)
+
+
+    def connectionLost(self, reason):
+        self.factory.done.callback(self.received)
+
+
+
+@inlineCallbacks
+def benchmark(application, bufferSize, requests):
+    threadpool = ThreadPool()
+    threadpool.start()
+    resource = WSGIResource(reactor, threadpool, application, bufferSize)
+    port = reactor.listenTCP(0, Site(resource), interface="127.0.0.1")
+    before = time.time()
+    received = 0
+    for i in range(requests):
+        factory = ClientFactory()
+        factory.protocol = Download
+        factory.done = Deferred()
+        reactor.connectTCP("127.0.0.1", port.getHost().port, factory)
+        received += yield factory.done
+    after = time.time()
+    yield port.stopListening()
+    threadpool.stop()
+    print("%-17s bufferSize=%-6s %d requests: %.3fs, %d bytes" % (
+        application.__name__, bufferSize, requests, after - before,
+        received))
+
+
+
+@inlineCallbacks
+def run(requests):
+    try:
+        for application in (largeApplication, chunkyApplication):
+            for bufferSize in (None, 65536):
+                yield benchmark(application, bufferSize, requests)
+    finally:
+        reactor.stop()
+
+
+
+def main(args=None):
+    requests = 10
+    if args:
+        requests = int(args[0])
+    reactor.callWhenRunning(run, requests)
+    reactor.run()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
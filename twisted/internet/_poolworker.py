@@ -0,0 +1,58 @@
+# -*- test-case-name: twisted.internet.test.test_processpool -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Main program for the worker processes of a
+L{twisted.internet.processpool.ProcessPool}.
+
+Run as C{python -m twisted.internet._poolworker <protocol>}, where
+C{<protocol>} is the fully qualified name of a
+L{twisted.internet.processpool.ProcessPoolWorker} subclass.
+"""
+
+from __future__ import absolute_import, division
+
+import errno
+import os
+import sys
+
+from twisted.internet.protocol import FileWrapper
+from twisted.internet.processpool import _WORKER_AMP_STDIN, _WORKER_AMP_STDOUT
+from twisted.python.reflect import namedAny
+
+
+
+def main(argv=None, _fdopen=os.fdopen, _read=os.read):
+    """
+    Serve AMP requests from the parent process until it closes our input.
+
+    @param argv: The command line; by default, C{sys.argv}.
+
+    @param _fdopen: If specified, the function to use in place of
+        C{os.fdopen}.
+
+    @param _read: If specified, the function to use in place of C{os.read}.
+    """
+    if argv is None:
+        argv = sys.argv
+    protocol = namedAny(argv[1])()
+    protocolOut = _fdopen(_WORKER_AMP_STDOUT, "wb")
+    protocol.makeConnection(FileWrapper(protocolOut))
+
+    while True:
+        try:
+            data = _read(_WORKER_AMP_STDIN, 65536)
+        except (IOError, OSError) as e:
+            if e.args[0] == errno.EINTR:
+                continue
+            raise
+        if not data:
+            break
+        protocol.dataReceived(data)
+        protocolOut.flush()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -21,10 +21,12 @@ from twisted.internet.interfaces import IReactorCore, IReactorTime, IReactorThre
 from twisted.internet.interfaces import IResolverSimple, IReactorPluggableResolver
 from twisted.internet.interfaces import IConnector, IDelayedCall
 from twisted.internet import fdesc, main, error, abstract, defer, threads
+from twisted.internet.instrumentation import LoopIteration, _clock
 from twisted.python import log, failure, reflect
 from twisted.python.compat import unicode, iteritems
 from twisted.python.runtime import seconds as runtimeSeconds, platform
 from twisted.internet.defer import Deferred, DeferredList
+from twisted.logger import Logger, globalMetrics
 
 # This import is for side-effects!  Even if you don't see any code using it
 # in this module, don't delete it.
@@ -32,6 +34,23 @@ from twisted.python import threadable
 
 
 @implementer(IDelayedCall)
+def _unbindGauge(name, function):
+    """
+    Stop a gauge of L{globalMetrics} from sampling a function, unless it has
+    been given another one since, so that it does not keep alive or report
+    on an object which is no longer in use.
+
+    @param name: The name of the gauge.
+    @type name: L{str} (native string)
+
+    @param function: The function the gauge may be sampling.
+    """
+    gauge = globalMetrics.gauge(name)
+    if gauge.function == function:
+        gauge.function = None
+
+
+
 class DelayedCall:
 
     # enable .debug to record creator call stack, and it will be logged if
@@ -461,15 +480,41 @@ class ReactorBase(object):
     @ivar _registerAsIOThread: A flag controlling whether the reactor will
         register the thread it is running in as the I/O thread when it starts.
         If C{True}, registration will be done, otherwise it will not be.
+
+    @ivar _loopCollector: The
+        L{ILoopCollector<twisted.internet.instrumentation.ILoopCollector>}
+        measurements of the main loop are reported to, or L{None} if the
+        reactor is not instrumented.  See
+        L{twisted.internet.instrumentation.instrumentReactor}.
+
+    @ivar _slowCallThreshold: The duration, in seconds, from which a callback
+        is reported to C{_loopCollector} as a slow call.
+
+    @ivar _iterationLag: How late the latest timed call run by the last
+        instrumented call to L{runUntilCurrent} was.
+
+    @ivar _pollWaited: The time the last instrumented poll spent waiting for
+        events, or L{None} if the reactor does not measure it.
+
+    @ivar _readyCount: The number of file descriptors reported ready by the
+        last instrumented poll, or L{None} if the reactor does not count them.
     """
 
     _registerAsIOThread = True
 
+    _loopCollector = None
+    _slowCallThreshold = 0.05
+    _iterationLag = 0.0
+    _pollWaited = None
+    _readyCount = None
+
     _stopped = True
     installed = False
     usingThreads = False
     resolver = BlockingResolver()
 
+    _log = Logger()
+
     __name__ = "twisted.internet.reactor"
 
     def __init__(self):
@@ -582,6 +627,7 @@ class ReactorBase(object):
         self._stopped = True
         self._justStopped = True
         self._startedBefore = True
+        _unbindGauge("twisted_reactor_delayed_calls", self._countDelayedCalls)
 
 
     def crash(self):
@@ -686,9 +732,26 @@ class ReactorBase(object):
         self._stopped = False
         if self._registerAsIOThread:
             threadable.registerAsIOThread()
+        globalMetrics.gauge(
+            "twisted_reactor_delayed_calls",
+            u"Calls scheduled by the running reactor, including cancelled "
+            u"calls not removed yet.",
+            function=self._countDelayedCalls)
         self.fireSystemEvent('startup')
 
 
+    def _countDelayedCalls(self):
+        """
+        Sample the I{twisted_reactor_delayed_calls} gauge, until the reactor
+        is stopped.
+
+        @return: The number of calls scheduled, including cancelled calls
+            not removed yet.
+        @rtype: L{int}
+        """
+        return len(self._pendingTimedCalls) + len(self._newTimedCalls)
+
+
     def _reallyStartRunning(self):
         """
         Method called to transition to the running state.  This should happen
@@ -787,6 +850,7 @@ class ReactorBase(object):
     def runUntilCurrent(self):
         """Run all pending timed calls.
         """
+        collector = self._loopCollector
         if self.threadCallQueue:
             # Keep track of how many calls we actually make, as we're
             # making them, in case another call is added to the queue
@@ -795,9 +859,12 @@ class ReactorBase(object):
             total = len(self.threadCallQueue)
             for (f, a, kw) in self.threadCallQueue:
                 try:
-                    f(*a, **kw)
+                    if collector is None:
+                        f(*a, **kw)
+                    else:
+                        self._timeCall(collector, "thread", f, a, kw)
                 except:
-                    log.err()
+                    self._log.failure(u"Unhandled Error")
                 count += 1
                 if count == total:
                     break
@@ -809,6 +876,7 @@ class ReactorBase(object):
         self._insertNewDelayedCalls()
 
         now = self.seconds()
+        lag = 0.0
         while self._pendingTimedCalls and (self._pendingTimedCalls[0].time <= now):
             call = heappop(self._pendingTimedCalls)
             if call.cancelled:
@@ -822,9 +890,14 @@ class ReactorBase(object):
 
             try:
                 call.called = 1
-                call.func(*call.args, **call.kw)
+                if collector is None:
+                    call.func(*call.args, **call.kw)
+                else:
+                    lag = max(lag, now - call.time)
+                    self._timeCall(collector, "timed", call.func, call.args,
+                                   call.kw)
             except:
-                log.deferr()
+                self._log.failure(u"Unhandled Error")
                 if hasattr(call, "creator"):
                     e = "\n"
                     e += " C: previous exception occurred in " + \
@@ -832,7 +905,7 @@ class ReactorBase(object):
                     e += " C:"
                     e += "".join(call.creator).rstrip().replace("\n","\n C:")
                     e += "\n"
-                    log.msg(e)
+                    self._log.info(u"{creator}", creator=e)
 
 
         if (self._cancellations > 50 and
@@ -842,10 +915,60 @@ class ReactorBase(object):
                                        if not x.cancelled]
             heapify(self._pendingTimedCalls)
 
+        if collector is not None:
+            self._iterationLag = lag
+
         if self._justStopped:
             self._justStopped = False
             self.fireSystemEvent("shutdown")
 
+
+    def _timeCall(self, collector, kind, f, args, kw):
+        """
+        Call a function, reporting it to C{collector} if it takes longer than
+        the slow-call threshold.
+
+        @param collector: The reactor's
+            L{ILoopCollector<twisted.internet.instrumentation.ILoopCollector>}.
+
+        @param kind: The kind of call, as passed to
+            L{ILoopCollector.slowCall
+            <twisted.internet.instrumentation.ILoopCollector.slowCall>}.
+
+        @param f: The function to call.
+        @param args: The positional arguments to pass to C{f}.
+        @param kw: The keyword arguments to pass to C{f}.
+        """
+        started = _clock()
+        try:
+            f(*args, **kw)
+        finally:
+            duration = _clock() - started
+            if duration >= self._slowCallThreshold:
+                collector.slowCall(kind, f, duration)
+
+
+    def _instrumentedIteration(self, collector):
+        """
+        Run one iteration of the main loop and report its measurements to
+        C{collector}.
+
+        @param collector: The reactor's
+            L{ILoopCollector<twisted.internet.instrumentation.ILoopCollector>}.
+        """
+        started = _clock()
+        self._iterationLag = 0.0
+        self._pollWaited = self._readyCount = None
+        self.runUntilCurrent()
+        t2 = self.timeout()
+        t = self.running and t2
+        self.doIteration(t)
+        collector.iterationCompleted(LoopIteration(
+            _clock() - started, self._pollWaited, self._iterationLag,
+            self._readyCount,
+            len(self._pendingTimedCalls) + len(self._newTimedCalls) -
+            self._cancellations))
+
     # IReactorProcess
 
     def _checkProcessArgs(self, args, env):
@@ -957,11 +1080,25 @@ class ReactorBase(object):
             from twisted.python import threadpool
             self.threadpool = threadpool.ThreadPool(
                 0, 10, 'twisted.internet.reactor')
+            globalMetrics.gauge(
+                "twisted_reactor_threadpool_queue_depth",
+                u"Calls waiting for a thread of the reactor threadpool.",
+                function=self._countThreadPoolQueue)
             self._threadpoolStartupID = self.callWhenRunning(
                 self.threadpool.start)
             self.threadpoolShutdownID = self.addSystemEventTrigger(
                 'during', 'shutdown', self._stopThreadPool)
 
+        def _countThreadPoolQueue(self):
+            """
+            Sample the I{twisted_reactor_threadpool_queue_depth} gauge, until
+            the threadpool is stopped.
+
+            @return: The number of calls waiting for a thread.
+            @rtype: L{int}
+            """
+            return self.threadpool.q.qsize()
+
         def _uninstallHandler(self):
             pass
 
@@ -980,6 +1117,8 @@ class ReactorBase(object):
                     pass
             self._threadpoolStartupID = None
             self.threadpoolShutdownID = None
+            _unbindGauge("twisted_reactor_threadpool_queue_depth",
+                         self._countThreadPoolQueue)
             self.threadpool.stop()
             self.threadpool = None
 
@@ -1199,6 +1338,10 @@ class _SignalReactorMixin(object):
         while self._started:
             try:
                 while self._started:
+                    collector = self._loopCollector
+                    if collector is not None:
+                        self._instrumentedIteration(collector)
+                        continue
                     # Advance simulation time in delayed event
                     # processors.
                     self.runUntilCurrent()
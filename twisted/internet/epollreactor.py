@@ -22,6 +22,7 @@ from twisted.internet.interfaces import IReactorFDSet
 
 from twisted.python import log
 from twisted.internet import posixbase
+from twisted.internet.instrumentation import _clock
 
 
 
@@ -212,6 +213,24 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
     @ivar _continuousPolling: A L{_ContinuousPolling} instance, used to handle
         file descriptors (e.g. filesystem files) that are not supported by
         C{epoll(7)}.
+
+    @ivar _lazyWriteRemoval: Whether a file descriptor which stops watching
+        for write readiness but is still read from stays registered with
+        C{_poller} for write readiness until C{_poller} next reports it
+        writable.  A transport whose producer writes on every reactor
+        iteration, such as one fed by a L{Cooperator
+        <twisted.internet.task.Cooperator>}, flips between writing and not
+        writing once per iteration; with this set, starting to write again
+        before the next poll costs no C{epoll_ctl(EPOLL_CTL_MOD)} call at all.
+        The write readiness reported for a descriptor which is no longer
+        written to is not dispatched: it is dropped from C{_poller} then.
+        Descriptors which are added, or removed entirely, are registered or
+        unregistered immediately, so that a descriptor number reused after
+        C{close} is never confused with its previous owner.
+
+    @ivar _registered: A dictionary mapping each file descriptor registered
+        with C{_poller} to the event mask it is registered for, when
+        C{_lazyWriteRemoval} is set.
     """
 
     # Attributes for _PollLikeMixin
@@ -219,10 +238,13 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
     _POLL_IN = EPOLLIN
     _POLL_OUT = EPOLLOUT
 
-    def __init__(self):
+    def __init__(self, lazyWriteRemoval=False):
         """
         Initialize epoll object, file descriptor tracking dictionaries, and the
         base class.
+
+        @param lazyWriteRemoval: See L{EPollReactor._lazyWriteRemoval}.
+        @type lazyWriteRemoval: L{bool}
         """
         # Create the poller we're going to use.  The 1024 here is just a hint
         # to the kernel, it is not a hard maximum.  After Linux 2.6.8, the size
@@ -232,6 +254,8 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         self._writes = set()
         self._selectables = {}
         self._continuousPolling = _ContinuousPolling(self)
+        self._lazyWriteRemoval = lazyWriteRemoval
+        self._registered = {}
         posixbase.PosixReactorBase.__init__(self)
 
 
@@ -242,6 +266,8 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         It takes care of adding it if  new or modifying it if already added
         for another state (read -> read/write for example).
         """
+        if self._lazyWriteRemoval:
+            return self._lazyAdd(xer, primary, selectables, event)
         fd = xer.fileno()
         if fd not in primary:
             flags = event
@@ -296,6 +322,25 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
                 raise
 
 
+    def _lazyAdd(self, xer, primary, selectables, event):
+        """
+        L{_add} for reactors which remove write readiness lazily: the poller
+        is only modified if the descriptor is not registered for C{event}
+        already.
+        """
+        fd = xer.fileno()
+        if fd not in primary:
+            registered = self._registered.get(fd)
+            if registered is None:
+                self._poller.register(fd, event)
+                self._registered[fd] = event
+            elif not registered & event:
+                self._poller.modify(fd, registered | event)
+                self._registered[fd] = registered | event
+            primary.add(fd)
+            selectables[fd] = xer
+
+
     def _remove(self, xer, primary, other, selectables, event, antievent):
         """
         Private method for removing a descriptor from the event loop.
@@ -310,6 +355,8 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
                     break
             else:
                 return
+        if self._lazyWriteRemoval:
+            return self._lazyRemove(fd, primary, other, selectables, event)
         if fd in primary:
             if fd in other:
                 flags = antievent
@@ -322,6 +369,45 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             primary.remove(fd)
 
 
+    def _lazyRemove(self, fd, primary, other, selectables, event):
+        """
+        L{_remove} for reactors which remove write readiness lazily: a
+        descriptor which is no longer watched for any event is unregistered
+        immediately, one which stops being read from stops watching for read
+        readiness immediately, and one which stops being written to but is
+        still read from stays registered for write readiness, see
+        L{_doReadOrWriteLazily}.
+        """
+        if fd in primary:
+            if fd in other:
+                if event == EPOLLIN:
+                    self._poller.modify(fd, EPOLLOUT)
+                    self._registered[fd] = EPOLLOUT
+            else:
+                del selectables[fd]
+                del self._registered[fd]
+                self._poller.unregister(fd)
+            primary.remove(fd)
+
+
+    def _doReadOrWriteLazily(self, selectable, fd, event):
+        """
+        L{_doReadOrWrite} for reactors which remove write readiness lazily:
+        write readiness reported for a descriptor which is no longer written
+        to is not dispatched, and unless handling the rest of the event makes
+        it start writing again, the descriptor stops watching for it.
+        """
+        if not event & EPOLLOUT or fd in self._writes:
+            self._doReadOrWrite(selectable, fd, event)
+            return
+        event &= ~EPOLLOUT
+        if event:
+            self._doReadOrWrite(selectable, fd, event)
+        if fd not in self._writes and self._registered.get(fd, 0) & EPOLLOUT:
+            self._poller.modify(fd, EPOLLIN)
+            self._registered[fd] = EPOLLIN
+
+
     def removeReader(self, reader):
         """
         Remove a Selectable for notification of data available to read.
@@ -371,6 +457,9 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         if timeout is None:
             timeout = -1  # Wait indefinitely.
 
+        collector = self._loopCollector
+        if collector is not None:
+            started = _clock()
         try:
             # Limit the number of events to the number of io objects we're
             # currently tracking (because that's maybe a good heuristic) and
@@ -386,7 +475,16 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             # loudly.
             raise
 
-        _drdw = self._doReadOrWrite
+        if collector is not None:
+            self._pollWaited = _clock() - started
+            self._readyCount = len(l)
+            self._instrumentedDispatch(collector, l)
+            return
+
+        if self._lazyWriteRemoval:
+            _drdw = self._doReadOrWriteLazily
+        else:
+            _drdw = self._doReadOrWrite
         for fd, event in l:
             try:
                 selectable = self._selectables[fd]
@@ -395,14 +493,45 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             else:
                 log.callWithLogger(selectable, _drdw, selectable, fd, event)
 
+
+    def _instrumentedDispatch(self, collector, events):
+        """
+        Dispatch the events returned by a poll, reporting selectables whose
+        event handling takes longer than the slow-call threshold.
+
+        @param collector: The reactor's
+            L{ILoopCollector<twisted.internet.instrumentation.ILoopCollector>}.
+
+        @param events: The C{(fd, event)} pairs returned by the poll.
+        """
+        if self._lazyWriteRemoval:
+            _drdw = self._doReadOrWriteLazily
+        else:
+            _drdw = self._doReadOrWrite
+        threshold = self._slowCallThreshold
+        for fd, event in events:
+            try:
+                selectable = self._selectables[fd]
+            except KeyError:
+                pass
+            else:
+                started = _clock()
+                log.callWithLogger(selectable, _drdw, selectable, fd, event)
+                duration = _clock() - started
+                if duration >= threshold:
+                    collector.slowCall("io", selectable, duration)
+
     doIteration = doPoll
 
 
-def install():
+def install(lazyWriteRemoval=False):
     """
     Install the epoll() reactor.
+
+    @param lazyWriteRemoval: See L{EPollReactor._lazyWriteRemoval}.
+    @type lazyWriteRemoval: L{bool}
     """
-    p = EPollReactor()
+    p = EPollReactor(lazyWriteRemoval)
     from twisted.internet.main import installReactor
     installReactor(p)
 
@@ -0,0 +1,191 @@
+# -*- test-case-name: twisted.internet.test.test_instrumentation -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Opt-in instrumentation of the reactor's main loop.
+
+An instrumented reactor reports every iteration of its main loop and every
+callback which runs for longer than a threshold to an L{ILoopCollector}.
+Reactors which are not instrumented pay for a single attribute check per
+iteration.
+
+For example, to log every callback which blocks the reactor for more than a
+tenth of a second::
+
+    from twisted.internet import reactor
+    from twisted.internet.instrumentation import (
+        instrumentReactor, LoggingLoopCollector)
+    instrumentReactor(reactor, LoggingLoopCollector(0.1), 0.1)
+
+@since: 16.4
+"""
+
+from __future__ import absolute_import, division
+
+import time
+
+from zope.interface import Interface, implementer
+
+from twisted.logger import Logger
+
+
+
+# The clock used to measure durations.
+_clock = getattr(time, "perf_counter", time.time)
+
+
+
+class ILoopCollector(Interface):
+    """
+    An object which receives measurements from an instrumented reactor.
+
+    Methods of this interface are called in the reactor thread, inside the
+    main loop, so they should be cheap and must not raise exceptions.
+    """
+
+    def iterationCompleted(iteration):
+        """
+        An iteration of the main loop has completed.
+
+        @param iteration: Measurements of the iteration.
+        @type iteration: L{LoopIteration}
+        """
+
+
+    def slowCall(kind, callable, duration):
+        """
+        A callback run by the reactor took at least the reactor's slow-call
+        threshold to return.
+
+        @param kind: C{"timed"} for a L{IDelayedCall
+            <twisted.internet.interfaces.IDelayedCall>}'s function,
+            C{"thread"} for a callable passed to C{callFromThread}, or
+            C{"io"} for a selectable's C{doRead} or C{doWrite}.
+        @type kind: native L{str}
+
+        @param callable: The function which was called, or for C{"io"} calls,
+            the selectable.
+
+        @param duration: How long the call took, in seconds.
+        @type duration: L{float}
+        """
+
+
+
+class LoopIteration(object):
+    """
+    Measurements of a single iteration of a reactor's main loop.
+
+    @ivar duration: The time taken by the whole iteration, in seconds.
+    @type duration: L{float}
+
+    @ivar waited: The part of C{duration} spent blocked waiting for events,
+        or L{None} if the reactor does not report it.
+    @type waited: L{float} or L{None}
+
+    @ivar lag: How late the latest timed call run during the iteration was,
+        in seconds; 0 if no timed call was run.
+    @type lag: L{float}
+
+    @ivar readyCount: The number of file descriptors reported ready, or
+        L{None} if the reactor does not report it.
+    @type readyCount: L{int} or L{None}
+
+    @ivar timerCount: The number of timed calls pending at the end of the
+        iteration.
+    @type timerCount: L{int}
+    """
+
+    def __init__(self, duration, waited, lag, readyCount, timerCount):
+        self.duration = duration
+        self.waited = waited
+        self.lag = lag
+        self.readyCount = readyCount
+        self.timerCount = timerCount
+
+
+    @property
+    def busy(self):
+        """
+        The part of the iteration spent running callbacks rather than waiting
+        for events, in seconds.
+        """
+        if self.waited is None:
+            return self.duration
+        return self.duration - self.waited
+
+
+
+@implementer(ILoopCollector)
+class LoggingLoopCollector(object):
+    """
+    An L{ILoopCollector} which emits a warning through L{twisted.logger} for
+    each slow call and for each iteration which stalled the loop.
+
+    @ivar threshold: The busy time or lag, in seconds, above which an
+        iteration is considered to have stalled the loop.
+    @type threshold: L{float}
+    """
+
+    def __init__(self, threshold=0.05, logger=None):
+        """
+        @param threshold: See L{LoggingLoopCollector.threshold}.
+
+        @param logger: The L{Logger} to emit events with; by default, one
+            whose namespace is this module.
+        """
+        if logger is None:
+            logger = Logger()
+        self.threshold = threshold
+        self._log = logger
+
+
+    def iterationCompleted(self, iteration):
+        if iteration.busy >= self.threshold or iteration.lag >= self.threshold:
+            self._log.warn(
+                "Reactor loop stalled: busy for {busy:.6f}s, timed calls "
+                "{lag:.6f}s late, {readyCount} descriptors ready, "
+                "{timerCount} timed calls pending",
+                busy=iteration.busy, lag=iteration.lag,
+                readyCount=iteration.readyCount,
+                timerCount=iteration.timerCount)
+
+
+    def slowCall(self, kind, callable, duration):
+        self._log.warn(
+            "Reactor {kind} call {callable!r} took {duration:.6f}s",
+            kind=kind, callable=callable, duration=duration)
+
+
+
+def instrumentReactor(reactor, collector, slowCallThreshold=0.05):
+    """
+    Start reporting measurements of a reactor's main loop.
+
+    @param reactor: A reactor based on
+        L{twisted.internet.base.ReactorBase}.
+
+    @param collector: The L{ILoopCollector} to report to.
+
+    @param slowCallThreshold: The duration, in seconds, from which a callback
+        is reported to C{collector} as a slow call.
+    @type slowCallThreshold: L{float}
+    """
+    reactor._slowCallThreshold = slowCallThreshold
+    reactor._loopCollector = collector
+
+
+
+def uninstrumentReactor(reactor):
+    """
+    Stop reporting measurements of a reactor's main loop.
+
+    @param reactor: A reactor previously passed to L{instrumentReactor}.
+    """
+    reactor._loopCollector = None
+
+
+
+__all__ = ["ILoopCollector", "LoopIteration", "LoggingLoopCollector",
+           "instrumentReactor", "uninstrumentReactor"]
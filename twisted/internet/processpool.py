@@ -0,0 +1,709 @@
+# -*- test-case-name: twisted.internet.test.test_processpool -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A pool of warm worker processes which run functions on behalf of the reactor.
+
+L{twisted.internet.threads.deferToThread} is the right tool for blocking I/O,
+but CPU-bound work run in a thread still holds the GIL and so still competes
+with the reactor.  A L{ProcessPool} instead keeps a fixed number of child
+Python processes running and talks to each of them using
+L{twisted.protocols.amp}, so that work can be spread over every core while
+results are still delivered as L{Deferred}s in the reactor thread.
+
+Functions (and their arguments and results) are transferred using L{pickle},
+so they must be importable by name in the worker process.  Applications which
+prefer an explicit schema may subclass L{ProcessPoolWorker}, add responders
+for their own L{amp.Command}s and send those with L{ProcessPool.callRemote}.
+
+@since: 16.4
+"""
+
+from __future__ import absolute_import, division
+
+import os
+import sys
+import pickle
+import traceback
+from collections import deque
+
+from twisted.internet import defer
+from twisted.internet.protocol import ProcessProtocol
+from twisted.logger import Logger
+from twisted.protocols import amp
+from twisted.python.compat import intToBytes
+from twisted.python.failure import Failure
+from twisted.python.reflect import qual
+
+
+
+# File descriptor numbers used to set up the AMP pipes with each worker.
+_WORKER_AMP_STDIN = 3
+
+_WORKER_AMP_STDOUT = 4
+
+
+
+class WorkerCrashed(Exception):
+    """
+    The worker process running a call exited before returning a result.
+
+    @ivar reason: The L{Failure} describing how the process ended.
+    """
+
+    def __init__(self, reason):
+        Exception.__init__(self, reason)
+        self.reason = reason
+
+
+
+class BacklogFull(Exception):
+    """
+    A call was submitted to a L{ProcessPool} whose backlog of calls waiting
+    for a worker had already reached L{ProcessPool.maxBacklog}.
+    """
+
+
+
+class PoolStopped(Exception):
+    """
+    A call was submitted to a L{ProcessPool} which has been stopped.
+    """
+
+
+
+class RemoteError(Exception):
+    """
+    A function run in a worker process raised an exception which could not be
+    pickled and so could not be sent back to the parent as-is.
+
+    @ivar exceptionType: The fully qualified name of the type of the original
+        exception.
+    @type exceptionType: L{str}
+
+    @ivar remoteTraceback: The formatted traceback from the worker process.
+    @type remoteTraceback: L{str}
+    """
+
+    def __init__(self, exceptionType, message, remoteTraceback):
+        Exception.__init__(self, exceptionType, message)
+        self.exceptionType = exceptionType
+        self.message = message
+        self.remoteTraceback = remoteTraceback
+
+
+    def __reduce__(self):
+        return (self.__class__,
+                (self.exceptionType, self.message, self.remoteTraceback))
+
+
+
+class _ChunkedBytes(amp.Argument):
+    """
+    An AMP argument for byte strings of any length.
+
+    AMP values are limited to L{amp.MAX_VALUE_LENGTH} bytes.  Values of this
+    type are split across several keys: the argument's own key carries the
+    number of chunks and C{<name>.<n>} carries the I{n}th chunk.
+    """
+
+    def toBox(self, name, strings, objects, proto):
+        value = self.retrieve(
+            objects, amp._wireNameToPythonIdentifier(name), proto)
+        size = amp.MAX_VALUE_LENGTH
+        chunks = [value[i:i + size] for i in range(0, len(value), size)]
+        strings[name] = intToBytes(len(chunks))
+        for i, chunk in enumerate(chunks):
+            strings[name + b"." + intToBytes(i)] = chunk
+
+
+    def fromBox(self, name, strings, objects, proto):
+        count = int(self.retrieve(strings, name, proto))
+        objects[amp._wireNameToPythonIdentifier(name)] = b"".join([
+            strings.pop(name + b"." + intToBytes(i)) for i in range(count)])
+
+
+
+class CallFunction(amp.Command):
+    """
+    Run a pickled function call in a worker process.
+
+    C{call} is a pickled C{(function, args, kwargs)} tuple.  The response's
+    C{result} is the pickled return value if C{success} is true and the
+    pickled exception otherwise.
+    """
+    arguments = [(b"call", _ChunkedBytes())]
+    response = [(b"success", amp.Boolean()),
+                (b"result", _ChunkedBytes())]
+
+
+
+class ProcessPoolWorker(amp.AMP):
+    """
+    The worker-side protocol of a L{ProcessPool}.
+
+    Each worker process runs one call at a time, synchronously, so responders
+    added by subclasses must not return L{Deferred}s which fire later.
+    """
+
+    def callFunction(self, call):
+        """
+        Unpickle and run a function call, and pickle its outcome.
+
+        @param call: A pickled C{(function, args, kwargs)} tuple.
+        @type call: L{bytes}
+
+        @return: The response to L{CallFunction}.
+        @rtype: L{dict}
+        """
+        try:
+            f, args, kwargs = pickle.loads(call)
+            result = f(*args, **kwargs)
+        except:
+            return {"success": False, "result": self._pickleException()}
+        try:
+            result = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        except:
+            return {"success": False, "result": self._pickleException()}
+        return {"success": True, "result": result}
+
+    CallFunction.responder(callFunction)
+
+
+    def _pickleException(self):
+        """
+        Pickle the exception currently being handled, replacing it with a
+        L{RemoteError} if it cannot be pickled.
+
+        @return: The pickled exception.
+        @rtype: L{bytes}
+        """
+        excType, excValue = sys.exc_info()[:2]
+        formatted = traceback.format_exc()
+        try:
+            return pickle.dumps(excValue, pickle.HIGHEST_PROTOCOL)
+        except:
+            return pickle.dumps(
+                RemoteError(qual(excType), str(excValue), formatted),
+                pickle.HIGHEST_PROTOCOL)
+
+
+
+class _WorkerTransport(object):
+    """
+    A minimal transport used by the parent side of a worker's AMP connection
+    to write to the worker's AMP input pipe.
+    """
+
+    def __init__(self, transport):
+        self._transport = transport
+
+
+    def write(self, data):
+        self._transport.writeToChild(_WORKER_AMP_STDIN, data)
+
+
+    def writeSequence(self, sequence):
+        for data in sequence:
+            self._transport.writeToChild(_WORKER_AMP_STDIN, data)
+
+
+    def loseConnection(self):
+        self._transport.closeChildFD(_WORKER_AMP_STDIN)
+
+
+    def getPeer(self):
+        return None
+
+
+    def getHost(self):
+        return None
+
+
+
+class _WorkerProcess(ProcessProtocol):
+    """
+    The parent side of a single worker process.
+
+    @ivar amp: The L{amp.AMP} connected to the worker.
+
+    @ivar ended: Whether the worker process has exited.
+    """
+
+    _log = Logger()
+
+    def __init__(self, pool):
+        self._pool = pool
+        self.amp = amp.AMP()
+        self.ended = False
+
+
+    def connectionMade(self):
+        self.amp.makeConnection(_WorkerTransport(self.transport))
+
+
+    def childDataReceived(self, childFD, data):
+        if childFD == _WORKER_AMP_STDOUT:
+            self.amp.dataReceived(data)
+        else:
+            ProcessProtocol.childDataReceived(self, childFD, data)
+
+
+    def outReceived(self, data):
+        self._log.info("Process pool worker output: {data!r}", data=data)
+
+
+    def errReceived(self, data):
+        self._log.error("Process pool worker error output: {data!r}",
+                        data=data)
+
+
+    def processEnded(self, reason):
+        self.ended = True
+        self.amp.connectionLost(reason)
+        self._pool._workerEnded(self, reason)
+
+
+    def close(self):
+        """
+        Ask the worker process to exit by closing its AMP input pipe.
+        """
+        self.amp.transport.loseConnection()
+
+
+
+class Statistics(object):
+    """
+    Statistics about a L{ProcessPool}'s current and past activity.
+
+    @ivar idleWorkerCount: The number of running workers waiting for work.
+    @type idleWorkerCount: L{int}
+
+    @ivar busyWorkerCount: The number of workers running a call.
+    @type busyWorkerCount: L{int}
+
+    @ivar backloggedWorkCount: The number of calls waiting for a worker.
+    @type backloggedWorkCount: L{int}
+
+    @ivar completedCount: The number of calls which have returned a result.
+    @type completedCount: L{int}
+
+    @ivar failedCount: The number of calls which have failed, including those
+        whose worker crashed.
+    @type failedCount: L{int}
+
+    @ivar restartCount: The number of workers started to replace workers
+        which exited unexpectedly.
+    @type restartCount: L{int}
+    """
+
+    def __init__(self, idleWorkerCount, busyWorkerCount, backloggedWorkCount,
+                 completedCount, failedCount, restartCount):
+        self.idleWorkerCount = idleWorkerCount
+        self.busyWorkerCount = busyWorkerCount
+        self.backloggedWorkCount = backloggedWorkCount
+        self.completedCount = completedCount
+        self.failedCount = failedCount
+        self.restartCount = restartCount
+
+
+
+def _cpuCount():
+    """
+    @return: The number of CPUs in this machine, or 1 if it cannot be
+        determined.
+    @rtype: L{int}
+    """
+    import multiprocessing
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+
+class ProcessPool(object):
+    """
+    A fixed-size pool of worker processes.
+
+    Each worker runs at most one call at a time, so at most L{size} calls run
+    concurrently; further calls wait in a backlog, in order, until a worker
+    becomes idle.  Workers which exit unexpectedly are replaced and the call
+    they were running fails with L{WorkerCrashed}.
+
+    @ivar size: The number of worker processes.
+    @type size: L{int}
+
+    @ivar maxBacklog: The maximum number of calls allowed to wait for a
+        worker, or L{None} for no limit.
+    @type maxBacklog: L{int} or L{None}
+
+    @ivar started: Whether L{start} has been called and L{stop} has not.
+    @type started: L{bool}
+
+    @ivar restartDelay: The number of seconds to wait before replacing a
+        worker which exited unexpectedly.  The delay doubles with each
+        consecutive unexpected exit, up to L{maxRestartDelay}.
+    @type restartDelay: L{float}
+
+    @ivar maxRestartDelay: The longest delay before replacing a worker, in
+        seconds.
+    @type maxRestartDelay: L{float}
+
+    @ivar crashLimit: The number of consecutive unexpected worker exits,
+        without a call completing in between, after which the calls waiting
+        for a worker fail with L{WorkerCrashed} rather than waiting for a
+        worker which may never start.
+    @type crashLimit: L{int}
+
+    @ivar _workerProtocol: The fully qualified name of the
+        L{ProcessPoolWorker} subclass which workers run.
+
+    @ivar _idle: The workers waiting for work.
+
+    @ivar _busy: The workers currently running a call.
+
+    @ivar _pending: A C{deque} of C{(command, kwargs, deferred)} calls waiting
+        for a worker.
+
+    @ivar _stopping: Whether L{stop} has been called.
+
+    @ivar _stopWaiters: The L{Deferred}s returned by L{stop} which have not
+        fired yet.
+
+    @ivar _crashes: The number of consecutive unexpected worker exits.
+
+    @ivar _restartCalls: The L{IDelayedCall}s which will replace workers.
+    """
+
+    _log = Logger()
+
+    restartDelay = 0.1
+    maxRestartDelay = 60.0
+    crashLimit = 5
+
+    def __init__(self, size=None, maxBacklog=None, workerProtocol=None,
+                 reactor=None):
+        """
+        @param size: The number of worker processes; by default, the number
+            of CPUs.
+        @type size: L{int}
+
+        @param maxBacklog: See L{ProcessPool.maxBacklog}.
+
+        @param workerProtocol: The fully qualified name of a
+            L{ProcessPoolWorker} subclass to run in the workers; by default,
+            L{ProcessPoolWorker}.
+        @type workerProtocol: L{str}
+
+        @param reactor: The L{IReactorProcess} provider used to spawn the
+            workers; by default, the global reactor.
+        """
+        if size is None:
+            size = _cpuCount()
+        if workerProtocol is None:
+            workerProtocol = qual(ProcessPoolWorker)
+        if reactor is None:
+            from twisted.internet import reactor
+        self.size = size
+        self.maxBacklog = maxBacklog
+        self.started = False
+        self._workerProtocol = workerProtocol
+        self._reactor = reactor
+        self._workers = set()
+        self._idle = set()
+        self._busy = set()
+        self._pending = deque()
+        self._stopping = False
+        self._stopWaiters = []
+        self._completed = 0
+        self._failed = 0
+        self._restarts = 0
+        self._crashes = 0
+        self._restartCalls = []
+
+
+    def start(self):
+        """
+        Spawn the worker processes.
+        """
+        self.started = True
+        for i in range(self.size):
+            self._spawnWorker()
+        self._dispatch()
+
+
+    def stop(self):
+        """
+        Stop accepting new calls and exit the workers once every call already
+        submitted has completed.
+
+        @return: A L{Deferred} which fires when every worker has exited.
+        """
+        d = defer.Deferred()
+        self._stopWaiters.append(d)
+        if not self._stopping:
+            self._stopping = True
+            if not self._pending:
+                for worker in list(self._idle):
+                    self._idle.remove(worker)
+                    worker.close()
+        self._checkStopped()
+        return d
+
+
+    def _checkStopped(self):
+        """
+        Fire the L{Deferred}s returned by L{stop} if every worker has exited,
+        failing the calls which no worker is left to run.
+        """
+        if self._stopping and not self._pending:
+            self._cancelRestarts()
+        if (self._stopping and not self._workers and
+                not self._restartCalls):
+            self._failPending(PoolStopped(
+                "The pool stopped before a worker could run the call."))
+            self.started = False
+            waiters, self._stopWaiters = self._stopWaiters, []
+            for d in waiters:
+                d.callback(None)
+
+
+    def _spawnWorker(self):
+        """
+        Spawn a new worker process and add it to the idle set.
+        """
+        worker = _WorkerProcess(self)
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join(sys.path)
+        args = [sys.executable, "-m", "twisted.internet._poolworker",
+                self._workerProtocol]
+        childFDs = {0: "w", 1: "r", 2: "r",
+                    _WORKER_AMP_STDIN: "w", _WORKER_AMP_STDOUT: "r"}
+        self._reactor.spawnProcess(worker, sys.executable, args=args,
+                                   env=env, childFDs=childFDs)
+        self._workers.add(worker)
+        self._idle.add(worker)
+
+
+    def _workerEnded(self, worker, reason):
+        """
+        Forget a worker which has exited, replacing it if it exited
+        unexpectedly.
+
+        @param worker: The L{_WorkerProcess} which exited.
+
+        @param reason: The L{Failure} describing how it exited.
+        """
+        self._workers.discard(worker)
+        self._idle.discard(worker)
+        self._busy.discard(worker)
+        if self.started and (not self._stopping or self._pending):
+            self._log.failure("Process pool worker exited unexpectedly",
+                              reason)
+            self._crashes += 1
+            if self._crashes >= self.crashLimit:
+                self._failPending(WorkerCrashed(reason))
+            if not self._stopping or self._pending:
+                delay = min(self.restartDelay * 2 ** (self._crashes - 1),
+                            self.maxRestartDelay)
+                self._restartCalls.append(
+                    self._reactor.callLater(delay, self._restartWorker))
+        self._checkStopped()
+
+
+    def _restartWorker(self):
+        """
+        Replace a worker which exited unexpectedly, if the pool still needs
+        it.
+        """
+        self._restartCalls.pop(0)
+        if self.started and (not self._stopping or self._pending):
+            self._restarts += 1
+            self._spawnWorker()
+            self._dispatch()
+        self._checkStopped()
+
+
+    def _cancelRestarts(self):
+        """
+        Cancel the replacement of workers which have not been replaced yet.
+        """
+        restartCalls, self._restartCalls = self._restartCalls, []
+        for call in restartCalls:
+            call.cancel()
+
+
+    def _failPending(self, exception):
+        """
+        Fail every call waiting for a worker.
+
+        @param exception: The exception to fail the calls with.
+        """
+        pending, self._pending = self._pending, deque()
+        for command, kwargs, d in pending:
+            self._failed += 1
+            d.errback(exception)
+
+
+    def callRemote(self, command, **kwargs):
+        """
+        Send an AMP command to the next available worker.
+
+        @param command: An L{amp.Command} subclass for which the pool's
+            worker protocol has a responder.
+
+        @param kwargs: The command's arguments.
+
+        @return: A L{Deferred} which fires with the command's response, or
+            fails with L{WorkerCrashed}, L{BacklogFull} or L{PoolStopped}.
+        """
+        if self._stopping:
+            return defer.fail(PoolStopped())
+        if (self.maxBacklog is not None and
+                len(self._pending) >= self.maxBacklog):
+            return defer.fail(BacklogFull())
+        d = defer.Deferred()
+        self._pending.append((command, kwargs, d))
+        self._dispatch()
+        return d
+
+
+    def callFunction(self, f, *args, **kwargs):
+        """
+        Call a function in the next available worker.
+
+        @param f: The function to call.  It, C{args}, C{kwargs} and its result
+            must all be picklable.
+
+        @return: A L{Deferred} which fires with the result of C{f}, or fails
+            with the exception it raised.
+        """
+        try:
+            call = pickle.dumps((f, args, kwargs), pickle.HIGHEST_PROTOCOL)
+        except:
+            return defer.fail()
+        d = self.callRemote(CallFunction, call=call)
+        d.addCallback(self._unpickleResult)
+        return d
+
+
+    def _unpickleResult(self, response):
+        """
+        Convert a L{CallFunction} response into a result or a L{Failure}.
+        """
+        result = pickle.loads(response["result"])
+        if response["success"]:
+            return result
+        return Failure(result, type(result))
+
+
+    def _dispatch(self):
+        """
+        Send backlogged calls to idle workers.
+        """
+        while self.started and self._pending and self._idle:
+            worker = self._idle.pop()
+            command, kwargs, d = self._pending.popleft()
+            self._busy.add(worker)
+            result = worker.amp.callRemote(command, **kwargs)
+            result.addBoth(self._finished, worker, d)
+
+
+    def _finished(self, result, worker, d):
+        """
+        Record the outcome of a call, deliver it and reuse its worker.
+        """
+        if worker.ended:
+            if isinstance(result, Failure):
+                result = Failure(WorkerCrashed(result))
+        else:
+            self._crashes = 0
+            self._busy.discard(worker)
+            if self._stopping and not self._pending:
+                worker.close()
+            else:
+                self._idle.add(worker)
+        if isinstance(result, Failure):
+            self._failed += 1
+        else:
+            self._completed += 1
+        d.callback(result)
+        self._dispatch()
+
+
+    def statistics(self):
+        """
+        Get statistics about this pool's activity.
+
+        @return: A L{Statistics} describing the pool at the time of the call.
+        """
+        return Statistics(len(self._idle), len(self._busy),
+                          len(self._pending), self._completed, self._failed,
+                          self._restarts)
+
+
+
+def deferToProcessPool(pool, f, *args, **kwargs):
+    """
+    Call a function in a worker of the given pool.
+
+    @param pool: A started L{ProcessPool}.
+
+    @param f: The function to call.
+    @param *args: positional arguments to pass to f.
+    @param **kwargs: keyword arguments to pass to f.
+
+    @return: A L{Deferred} which fires with the result of C{f}, or fails with
+        the exception it raised.
+    """
+    return pool.callFunction(f, *args, **kwargs)
+
+
+
+_defaultPool = None
+
+def _getDefaultPool():
+    """
+    Get the process pool used by L{deferToProcess}, starting it if necessary.
+
+    The pool is stopped when the global reactor shuts down.
+
+    @return: The default L{ProcessPool}.
+    """
+    global _defaultPool
+    if _defaultPool is None:
+        from twisted.internet import reactor
+        _defaultPool = pool = ProcessPool(reactor=reactor)
+        pool.start()
+        def stopPool():
+            global _defaultPool
+            _defaultPool = None
+            return pool.stop()
+        reactor.addSystemEventTrigger("during", "shutdown", stopPool)
+    return _defaultPool
+
+
+
+def deferToProcess(f, *args, **kwargs):
+    """
+    Run a function in a worker process and return the result as a Deferred.
+
+    The worker belongs to a default L{ProcessPool} with one worker per CPU,
+    started on first use.
+
+    @param f: The function to call.
+    @param *args: positional arguments to pass to f.
+    @param **kwargs: keyword arguments to pass to f.
+
+    @return: A L{Deferred} which fires with the result of C{f}, or fails with
+        the exception it raised.
+    """
+    return deferToProcessPool(_getDefaultPool(), f, *args, **kwargs)
+
+
+
+__all__ = ["ProcessPool", "ProcessPoolWorker", "CallFunction", "Statistics",
+           "WorkerCrashed", "BacklogFull", "PoolStopped", "RemoteError",
+           "deferToProcess", "deferToProcessPool"]
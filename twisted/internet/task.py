@@ -10,6 +10,7 @@ from __future__ import division, absolute_import
 
 __metaclass__ = type
 
+import heapq
 import sys
 import time
 import warnings
@@ -360,11 +361,55 @@ class _Timer(object):
 
 
 _EPSILON = 0.00000001
+_STEP_QUANTUM = 0.001
+_RUNNING = object()
 def _defaultScheduler(x):
     from twisted.internet import reactor
     return reactor.callLater(_EPSILON, x)
 
 
+class TaskStatistics(object):
+    """
+    Accounting information about a L{CooperativeTask}.
+
+    @ivar task: The L{CooperativeTask} described.
+    @type task: L{CooperativeTask}
+
+    @ivar weight: The task's share of its L{Cooperator} relative to other
+        tasks of the same priority.
+    @type weight: L{float}
+
+    @ivar priority: The task's priority.
+    @type priority: L{int}
+
+    @ivar steps: The number of times the task's iterator has been advanced.
+    @type steps: L{int}
+
+    @ivar runTime: The total number of seconds spent advancing the task's
+        iterator.
+    @type runTime: L{float}
+
+    @ivar deadline: The number of seconds the task should wait at most for
+        its next unit of work, or L{None} if it has no deadline.
+    @type deadline: L{float} or L{None}
+
+    @ivar missedDeadlines: The number of units of work which started after
+        the task's deadline.
+    @type missedDeadlines: L{int}
+    """
+
+    def __init__(self, task, weight, priority, steps, runTime, deadline,
+                 missedDeadlines):
+        self.task = task
+        self.weight = weight
+        self.priority = priority
+        self.steps = steps
+        self.runTime = runTime
+        self.deadline = deadline
+        self.missedDeadlines = missedDeadlines
+
+
+
 class CooperativeTask(object):
     """
     A L{CooperativeTask} is a task object inside a L{Cooperator}, which can be
@@ -399,22 +444,80 @@ class CooperativeTask(object):
         C{StopIteration}.
 
     @type _completionState: L{TaskFinished}
+
+    @ivar _weight: This task's share of its L{Cooperator} relative to other
+        tasks of the same priority.
+
+    @ivar _priority: This task's priority; tasks with a higher priority are
+        always run before tasks with a lower one.
+
+    @ivar _steps: The number of times C{_iterator} has been advanced.
+
+    @ivar _runTime: The total time spent advancing C{_iterator}, in seconds.
+
+    @ivar _pass: This task's virtual time in its L{Cooperator}: the work it
+        has been charged for, divided by its weight.  The runnable task with
+        the lowest C{_pass} in the highest priority is run next.
+
+    @ivar _entry: This task's current entry in its L{Cooperator}'s run queue,
+        C{_RUNNING} while it is being run, or L{None} if it is not scheduled.
+
+    @ivar _deadline: The number of seconds this task should wait at most for
+        its next unit of work once it is runnable, or L{None}.
+
+    @ivar _due: The time by which this task's next unit of work should start,
+        or L{None} if it has no deadline.
+
+    @ivar _deadlineEntry: This task's current entry in its L{Cooperator}'s
+        deadline queue, or L{None}.
+
+    @ivar _missedDeadlines: The number of units of work which started after
+        C{_due}.
     """
 
-    def __init__(self, iterator, cooperator):
+    def __init__(self, iterator, cooperator, weight=1, priority=0,
+                 deadline=None):
         """
         A private constructor: to create a new L{CooperativeTask}, see
         L{Cooperator.cooperate}.
         """
+        if weight <= 0:
+            raise ValueError("weight must be positive, not %r" % (weight,))
+        if deadline is not None and deadline < 0:
+            raise ValueError(
+                "deadline must not be negative, not %r" % (deadline,))
         self._iterator = iterator
         self._cooperator = cooperator
         self._deferreds = []
         self._pauseCount = 0
         self._completionState = None
         self._completionResult = None
+        self._weight = weight
+        self._priority = priority
+        self._steps = 0
+        self._runTime = 0.0
+        self._pass = 0.0
+        self._entry = None
+        self._deadline = deadline
+        self._due = None
+        self._deadlineEntry = None
+        self._missedDeadlines = 0
         cooperator._addTask(self)
 
 
+    def statistics(self):
+        """
+        Get accounting information about this task.
+
+        @return: a L{TaskStatistics} describing the work done by this task so
+            far.
+        @rtype: L{TaskStatistics}
+        """
+        return TaskStatistics(self, self._weight, self._priority,
+                              self._steps, self._runTime, self._deadline,
+                              self._missedDeadlines)
+
+
     def whenDone(self):
         """
         Get a L{defer.Deferred} notification of when this task is complete.
@@ -558,8 +661,38 @@ class Cooperator(object):
         doing the next thing, repeat (i.e. serializing a sequence of
         asynchronous tasks)
 
+    Tasks are scheduled by priority and weighted fair share.  A task is only
+    run when no task with a higher priority is runnable, and tasks of the same
+    priority share the L{Cooperator} in proportion to their weights.  Each
+    unit of work is charged to its task according to how long it took, in
+    multiples of a millisecond and never less than one, so tasks whose units
+    of work are short get more of them and equally weighted tasks whose units
+    of work are all short are run round-robin.
+
+    A task may also have a deadline: the longest it should wait for its next
+    unit of work once it is runnable.  A task which has waited longer than
+    that is run before the other tasks of its priority and of lower
+    priorities, the most overdue first, whatever its share.  Deadlines which
+    were missed anyway, because the L{Cooperator} was busy with tasks of a
+    higher priority or with other overdue tasks, or because ticks are too far
+    apart, are counted in L{TaskStatistics.missedDeadlines}.
+
     Multiple L{Cooperator}s do not cooperate with each other, so for most
     cases you should use the L{global cooperator<task.cooperate>}.
+
+    @ivar _queue: A heap of C{[-priority, pass, sequence, task]} entries for
+        the runnable tasks.  Entries of tasks which have been removed since
+        are left in place and skipped when they reach the top.
+
+    @ivar _deadlines: A heap of C{[due, sequence, task]} entries for the
+        runnable tasks which have a deadline, skipped in the same way.
+
+    @ivar _virtualTime: The pass of the task most recently run, used as the
+        starting pass of newly added or resumed tasks so that they do not
+        monopolize the L{Cooperator} to catch up with older ones.
+
+    @ivar _now: A no-argument callable returning the current time in seconds,
+        used to account for the time taken by each unit of work.
     """
 
     def __init__(self,
@@ -584,7 +717,11 @@ class Cooperator(object):
         L{Cooperator.start} is called.
         """
         self._tasks = []
-        self._metarator = iter(())
+        self._queue = []
+        self._deadlines = []
+        self._sequence = 0
+        self._virtualTime = 0.0
+        self._now = time.time
         self._terminationPredicateFactory = terminationPredicateFactory
         self._scheduler = scheduler
         self._delayedCall = None
@@ -592,7 +729,8 @@ class Cooperator(object):
         self._started = started
 
 
-    def coiterate(self, iterator, doneDeferred=None):
+    def coiterate(self, iterator, doneDeferred=None, weight=1, priority=0,
+                  deadline=None):
         """
         Add an iterator to the list of iterators this L{Cooperator} is
         currently running.
@@ -604,24 +742,57 @@ class Cooperator(object):
             the completion deferred.  It is suggested that you use the default,
             which creates a new Deferred for you.
 
+        @param weight: See L{cooperate}.
+
+        @param priority: See L{cooperate}.
+
+        @param deadline: See L{cooperate}.
+
         @return: a Deferred that will fire when the iterator finishes.
         """
         if doneDeferred is None:
             doneDeferred = defer.Deferred()
-        CooperativeTask(iterator, self).whenDone().chainDeferred(doneDeferred)
+        CooperativeTask(iterator, self, weight, priority, deadline
+                        ).whenDone().chainDeferred(doneDeferred)
         return doneDeferred
 
 
-    def cooperate(self, iterator):
+    def cooperate(self, iterator, weight=1, priority=0, deadline=None):
         """
         Start running the given iterator as a long-running cooperative task, by
         calling next() on it as a periodic timed event.
 
         @param iterator: the iterator to invoke.
 
+        @param weight: This task's share of the L{Cooperator} relative to
+            other tasks of the same priority; a task with a weight of 2 is
+            given twice as much time as a task with a weight of 1.
+        @type weight: L{int} or L{float}
+
+        @param priority: This task's priority.  While any task with a higher
+            priority is runnable, this task is not run.
+        @type priority: L{int}
+
+        @param deadline: The number of seconds this task should wait at most
+            for its next unit of work once it is runnable, or L{None}.  Once
+            it has waited that long, it is run before the other tasks of its
+            priority and of lower priorities.
+        @type deadline: L{float} or L{None}
+
         @return: a L{CooperativeTask} object representing this task.
         """
-        return CooperativeTask(iterator, self)
+        return CooperativeTask(iterator, self, weight, priority, deadline)
+
+
+    def statistics(self):
+        """
+        Get accounting information about the tasks currently scheduled by
+        this L{Cooperator}.  Paused tasks are not included.
+
+        @return: a L{TaskStatistics} for each scheduled task.
+        @rtype: L{list} of L{TaskStatistics}
+        """
+        return [taskObj.statistics() for taskObj in self._tasks]
 
 
     def _addTask(self, task):
@@ -634,6 +805,8 @@ class Cooperator(object):
             task._completeWith(SchedulerStopped(), Failure(SchedulerStopped()))
         else:
             self._tasks.append(task)
+            task._pass = max(task._pass, self._virtualTime)
+            self._enqueue(task)
             self._reschedule()
 
 
@@ -642,24 +815,55 @@ class Cooperator(object):
         Remove a L{CooperativeTask} from this L{Cooperator}.
         """
         self._tasks.remove(task)
+        task._entry = None
+        task._deadlineEntry = None
         # If no work left to do, cancel the delayed call:
-        if not self._tasks and self._delayedCall:
-            self._delayedCall.cancel()
-            self._delayedCall = None
+        if not self._tasks:
+            self._queue = []
+            self._deadlines = []
+            if self._delayedCall:
+                self._delayedCall.cancel()
+                self._delayedCall = None
 
 
-    def _tasksWhileNotStopped(self):
+    def _enqueue(self, task):
         """
-        Yield all L{CooperativeTask} objects in a loop as long as this
-        L{Cooperator}'s termination condition has not been met.
+        Add a runnable L{CooperativeTask} to the run queue.
         """
-        terminator = self._terminationPredicateFactory()
-        while self._tasks:
-            for t in self._metarator:
-                yield t
-                if terminator():
-                    return
-            self._metarator = iter(self._tasks)
+        self._sequence += 1
+        task._entry = [-task._priority, task._pass, self._sequence, task]
+        heapq.heappush(self._queue, task._entry)
+        if task._deadline is not None:
+            task._due = self._now() + task._deadline
+            task._deadlineEntry = [task._due, self._sequence, task]
+            heapq.heappush(self._deadlines, task._deadlineEntry)
+
+
+    def _nextTask(self):
+        """
+        Remove the next task to run from the run queues.
+
+        @return: the overdue L{CooperativeTask} with the earliest deadline, if
+            no runnable task has a higher priority, or else the runnable
+            L{CooperativeTask} with the highest priority and the lowest pass.
+        """
+        queue = self._queue
+        while queue[0][-1]._entry is not queue[0]:
+            heapq.heappop(queue)
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][-1]._deadlineEntry is not deadlines[0]:
+            heapq.heappop(deadlines)
+        if deadlines:
+            due, sequence, task = deadlines[0]
+            if due <= self._now() and -task._priority <= queue[0][0]:
+                heapq.heappop(deadlines)
+                task._deadlineEntry = None
+                task._entry = _RUNNING
+                return task
+        task = heapq.heappop(queue)[-1]
+        task._entry = _RUNNING
+        task._deadlineEntry = None
+        return task
 
 
     def _tick(self):
@@ -667,8 +871,23 @@ class Cooperator(object):
         Run one scheduler tick.
         """
         self._delayedCall = None
-        for taskObj in self._tasksWhileNotStopped():
+        terminator = self._terminationPredicateFactory()
+        while self._tasks:
+            taskObj = self._nextTask()
+            self._virtualTime = taskObj._pass
+            started = self._now()
+            if taskObj._due is not None and started > taskObj._due:
+                taskObj._missedDeadlines += 1
             taskObj._oneWorkUnit()
+            elapsed = self._now() - started
+            taskObj._steps += 1
+            taskObj._runTime += elapsed
+            taskObj._pass += (max(1.0, elapsed / _STEP_QUANTUM) /
+                              taskObj._weight)
+            if taskObj._entry is _RUNNING:
+                self._enqueue(taskObj)
+            if terminator():
+                break
         self._reschedule()
 
 
@@ -702,6 +921,8 @@ class Cooperator(object):
             taskObj._completeWith(SchedulerStopped(),
                                   Failure(SchedulerStopped()))
         self._tasks = []
+        self._queue = []
+        self._deadlines = []
         if self._delayedCall is not None:
             self._delayedCall.cancel()
             self._delayedCall = None
@@ -721,7 +942,7 @@ class Cooperator(object):
 
 _theCooperator = Cooperator()
 
-def coiterate(iterator):
+def coiterate(iterator, weight=1, priority=0, deadline=None):
     """
     Cooperatively iterate over the given iterator, dividing runtime between it
     and all other iterators which have been passed to this function and not yet
@@ -729,13 +950,20 @@ def coiterate(iterator):
 
     @param iterator: the iterator to invoke.
 
+    @param weight: See L{Cooperator.cooperate}.
+
+    @param priority: See L{Cooperator.cooperate}.
+
+    @param deadline: See L{Cooperator.cooperate}.
+
     @return: a Deferred that will fire when the iterator finishes.
     """
-    return _theCooperator.coiterate(iterator)
+    return _theCooperator.coiterate(iterator, weight=weight,
+                                    priority=priority, deadline=deadline)
 
 
 
-def cooperate(iterator):
+def cooperate(iterator, weight=1, priority=0, deadline=None):
     """
     Start running the given iterator as a long-running cooperative task, by
     calling next() on it as a periodic timed event.
@@ -748,9 +976,16 @@ def cooperate(iterator):
 
     @param iterator: the iterator to invoke.
 
+    @param weight: See L{Cooperator.cooperate}.
+
+    @param priority: See L{Cooperator.cooperate}.
+
+    @param deadline: See L{Cooperator.cooperate}.
+
     @return: a L{CooperativeTask} object representing this task.
     """
-    return _theCooperator.cooperate(iterator)
+    return _theCooperator.cooperate(iterator, weight=weight,
+                                    priority=priority, deadline=deadline)
 
 
 
@@ -942,6 +1177,6 @@ __all__ = [
 
     'Clock',
 
-    'SchedulerStopped', 'Cooperator', 'coiterate',
+    'SchedulerStopped', 'Cooperator', 'coiterate', 'TaskStatistics',
 
     'deferLater', 'react']
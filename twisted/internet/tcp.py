@@ -88,6 +88,7 @@ from twisted.python.util import untilConcludes
 from twisted.internet.error import CannotListenError
 from twisted.internet import abstract, main, interfaces, error
 from twisted.internet.protocol import Protocol
+from twisted.logger import globalMetrics
 
 # Not all platforms have, or support, this flag.
 _AI_NUMERICSERV = getattr(socket, "AI_NUMERICSERV", 0)
@@ -100,6 +101,15 @@ else:
     _portNameType = (str, unicode)
 
 
+_connectionsAccepted = globalMetrics.counter(
+    "twisted_tcp_connections_accepted_total",
+    u"TCP connections accepted by listening ports.")
+_bytesRead = globalMetrics.counter(
+    "twisted_tcp_bytes_read_total", u"Bytes read from TCP connections.")
+_bytesWritten = globalMetrics.counter(
+    "twisted_tcp_bytes_written_total", u"Bytes written to TCP connections.")
+
+
 
 class _SocketCloser(object):
     """
@@ -205,6 +215,7 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
             else:
                 return main.CONNECTION_LOST
 
+        _bytesRead.increment(len(data))
         return self._dataReceived(data)
 
 
@@ -237,12 +248,14 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         limitedData = lazyByteSlice(data, 0, self.SEND_LIMIT)
 
         try:
-            return untilConcludes(self.socket.send, limitedData)
+            sent = untilConcludes(self.socket.send, limitedData)
         except socket.error as se:
             if se.args[0] in (EWOULDBLOCK, ENOBUFS):
                 return 0
             else:
                 return main.CONNECTION_LOST
+        _bytesWritten.increment(sent)
+        return sent
 
 
     def _closeWriteConnection(self):
@@ -1070,6 +1083,7 @@ class Port(base.BasePort, _SocketCloser):
                 s = self.sessionno
                 self.sessionno = s+1
                 transport = self.transport(skt, protocol, addr, self, s, self.reactor)
+                _connectionsAccepted.increment()
                 protocol.makeConnection(transport)
             else:
                 self.numberAccepts = self.numberAccepts+20
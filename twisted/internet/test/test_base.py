@@ -17,6 +17,8 @@ from twisted.python.threadpool import ThreadPool
 from twisted.internet.interfaces import IReactorTime, IReactorThreads
 from twisted.internet.error import DNSLookupError
 from twisted.internet.base import ThreadedResolver, DelayedCall
+from twisted.internet.base import ReactorBase
+from twisted.logger import globalLogPublisher, globalMetrics
 from twisted.internet.task import Clock
 from twisted.trial.unittest import TestCase
 
@@ -270,3 +272,125 @@ class DelayedCallTests(TestCase):
         self.assertTrue(self.zero != self.one)
         self.assertFalse(self.zero != self.zero)
         self.assertFalse(self.one != self.one)
+
+
+
+class NonWakingReactor(ReactorBase):
+    """
+    A reactor which does not wake up, for testing L{ReactorBase} without a
+    running event loop.
+    """
+
+    def installWaker(self):
+        pass
+
+
+    def wakeUp(self):
+        pass
+
+
+
+class ReactorMetricsTests(TestCase):
+    """
+    Tests for the gauges L{ReactorBase} registers in L{globalMetrics}.
+    """
+
+    def setUp(self):
+        for name in ["twisted_reactor_delayed_calls",
+                     "twisted_reactor_threadpool_queue_depth"]:
+            gauge = globalMetrics.gauge(name)
+            self.addCleanup(setattr, gauge, "function", gauge.function)
+        self.reactor = NonWakingReactor()
+
+
+    def test_delayedCalls(self):
+        """
+        Once the reactor is started, the I{twisted_reactor_delayed_calls}
+        gauge samples the number of calls it has scheduled.
+        """
+        self.reactor.startRunning()
+        gauge = globalMetrics.gauge("twisted_reactor_delayed_calls")
+        self.assertEqual(0, gauge.sample())
+        self.reactor.callLater(1, lambda: None)
+        self.reactor.callLater(2, lambda: None)
+        self.assertEqual(2, gauge.sample())
+
+
+    def test_delayedCallsUnboundOnStop(self):
+        """
+        Once the reactor is stopped, the I{twisted_reactor_delayed_calls}
+        gauge no longer samples it, so that it does not keep the reactor
+        alive.
+        """
+        self.reactor.startRunning()
+        self.reactor.callLater(1, lambda: None)
+        self.reactor.stop()
+        gauge = globalMetrics.gauge("twisted_reactor_delayed_calls")
+        self.assertIsNone(gauge.function)
+        self.assertEqual(0, gauge.sample())
+
+
+    def test_delayedCallsOtherReactor(self):
+        """
+        Stopping a reactor does not unbind the
+        I{twisted_reactor_delayed_calls} gauge from another reactor started
+        since.
+        """
+        self.reactor.startRunning()
+        other = NonWakingReactor()
+        other.startRunning()
+        other.callLater(1, lambda: None)
+        self.reactor.stop()
+        gauge = globalMetrics.gauge("twisted_reactor_delayed_calls")
+        self.assertEqual(1, gauge.sample())
+
+
+    def test_threadpoolQueueDepth(self):
+        """
+        The I{twisted_reactor_threadpool_queue_depth} gauge samples the
+        number of calls waiting for a thread of the threadpool of the
+        reactor.
+        """
+        self.reactor.callInThread(lambda: None)
+        self.addCleanup(self.reactor._stopThreadPool)
+        gauge = globalMetrics.gauge("twisted_reactor_threadpool_queue_depth")
+        self.assertEqual(1, gauge.sample())
+
+
+    def test_threadpoolQueueDepthUnboundOnStop(self):
+        """
+        Once the threadpool of the reactor is stopped, the
+        I{twisted_reactor_threadpool_queue_depth} gauge no longer samples the
+        reactor.
+        """
+        self.reactor.callInThread(lambda: None)
+        self.reactor._stopThreadPool()
+        gauge = globalMetrics.gauge("twisted_reactor_threadpool_queue_depth")
+        self.assertIsNone(gauge.function)
+        self.assertEqual(0, gauge.sample())
+
+
+
+class TimedCallFailureTests(TestCase):
+    """
+    Tests for the logging of failures of timed calls by L{ReactorBase}.
+    """
+
+    def test_failureLogged(self):
+        """
+        A failure raised by a timed call is logged as a failure event by the
+        logger of the reactor.
+        """
+        events = []
+        globalLogPublisher.addObserver(events.append)
+        self.addCleanup(globalLogPublisher.removeObserver, events.append)
+        reactor = NonWakingReactor()
+        reactor.callLater(0, lambda: 1 // 0)
+        reactor.runUntilCurrent()
+
+        [event] = [event for event in events if "log_failure" in event]
+        self.assertEqual(
+            "twisted.internet.test.test_base.NonWakingReactor",
+            event["log_namespace"])
+        self.assertTrue(event["log_failure"].check(ZeroDivisionError))
+        self.assertEqual(1, len(self.flushLoggedErrors(ZeroDivisionError)))
@@ -9,9 +9,10 @@ from __future__ import division, absolute_import
 
 from twisted.trial.unittest import TestCase
 try:
-    from twisted.internet.epollreactor import _ContinuousPolling
+    from select import EPOLLIN, EPOLLOUT
+    from twisted.internet.epollreactor import _ContinuousPolling, EPollReactor
 except ImportError:
-    _ContinuousPolling = None
+    _ContinuousPolling = EPollReactor = None
 from twisted.internet.task import Clock
 from twisted.internet.error import ConnectionDone
 
@@ -22,12 +23,17 @@ class Descriptor(object):
     Records reads and writes, as if it were a C{FileDescriptor}.
     """
 
-    def __init__(self):
+    def __init__(self, fd=1):
         self.events = []
+        self.fd = fd
 
 
     def fileno(self):
-        return 1
+        return self.fd
+
+
+    def logPrefix(self):
+        return "Descriptor"
 
 
     def doRead(self):
@@ -246,3 +252,174 @@ class ContinuousPollingTests(TestCase):
 
     if _ContinuousPolling is None:
         skip = "epoll not supported in this environment."
+
+
+
+class RecordingPoller(object):
+    """
+    A stand-in for C{epoll} which records the calls made to it.
+
+    @ivar events: The C{(fd, event)} pairs the next poll returns.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.events = []
+
+
+    def register(self, fd, flags):
+        self.calls.append(("register", fd, flags))
+
+
+    def modify(self, fd, flags):
+        self.calls.append(("modify", fd, flags))
+
+
+    def unregister(self, fd):
+        self.calls.append(("unregister", fd))
+
+
+    def poll(self, timeout, maxEvents):
+        events, self.events = self.events, []
+        return events
+
+
+
+class LazyWriteRemovalTests(TestCase):
+    """
+    Tests for an L{EPollReactor} created with C{lazyWriteRemoval=True}.
+    """
+
+    if EPollReactor is None:
+        skip = "epoll is not supported in this environment."
+
+    def setUp(self):
+        """
+        Create a reactor removing write readiness lazily, and replace its
+        poller with a L{RecordingPoller} once the waker has been registered.
+        """
+        self.reactor = EPollReactor(lazyWriteRemoval=True)
+        realPoller = self.reactor._poller
+        self.addCleanup(realPoller.close)
+        self.addCleanup(self.reactor.waker.connectionLost, None)
+        self.poller = self.reactor._poller = RecordingPoller()
+        self.descriptor = Descriptor(fd=1000)
+
+
+    def readAndStopWriting(self):
+        """
+        Register C{self.descriptor} for reading and writing, then stop it
+        writing.
+        """
+        self.reactor.addReader(self.descriptor)
+        self.reactor.addWriter(self.descriptor)
+        self.reactor.removeWriter(self.descriptor)
+
+
+    def test_addModifies(self):
+        """
+        A descriptor which is not registered yet is registered immediately,
+        and watching it for another event modifies its registration
+        immediately.
+        """
+        self.reactor.addReader(self.descriptor)
+        self.reactor.addWriter(self.descriptor)
+        self.assertEqual([("register", 1000, EPOLLIN),
+                          ("modify", 1000, EPOLLIN | EPOLLOUT)],
+                         self.poller.calls)
+        self.assertIn(self.descriptor, self.reactor.getWriters())
+
+
+    def test_removeWriterLazily(self):
+        """
+        A descriptor which stops writing but is still read from stays
+        registered for write readiness, and so starting to write again does
+        not touch the poller.
+        """
+        self.readAndStopWriting()
+        self.assertNotIn(self.descriptor, self.reactor.getWriters())
+        self.reactor.addWriter(self.descriptor)
+        self.assertEqual([("register", 1000, EPOLLIN),
+                          ("modify", 1000, EPOLLIN | EPOLLOUT)],
+                         self.poller.calls)
+        self.assertIn(self.descriptor, self.reactor.getWriters())
+
+
+    def test_writeReadiness(self):
+        """
+        Write readiness of a descriptor which is written to is dispatched.
+        """
+        self.reactor.addReader(self.descriptor)
+        self.reactor.addWriter(self.descriptor)
+        self.poller.events = [(1000, EPOLLIN | EPOLLOUT)]
+        self.reactor.doPoll(0)
+        self.assertEqual(["read", "write"], self.descriptor.events)
+
+
+    def test_spuriousWriteReadiness(self):
+        """
+        Write readiness of a descriptor which is no longer written to is not
+        dispatched, and the descriptor stops watching for it.
+        """
+        self.readAndStopWriting()
+        self.poller.events = [(1000, EPOLLOUT)]
+        self.reactor.doPoll(0)
+        self.assertEqual([], self.descriptor.events)
+        self.assertEqual(("modify", 1000, EPOLLIN), self.poller.calls[-1])
+        self.poller.events = [(1000, EPOLLIN | EPOLLOUT)]
+        self.reactor.doPoll(0)
+        self.assertEqual(["read"], self.descriptor.events)
+        self.assertEqual(3, len(self.poller.calls))
+
+
+    def test_writeAgainWhileReading(self):
+        """
+        A descriptor which starts writing again while handling read readiness
+        reported together with spurious write readiness stays registered for
+        write readiness, and is written to once it is reported again.
+        """
+        self.readAndStopWriting()
+        def doRead():
+            self.descriptor.events.append("read")
+            self.reactor.addWriter(self.descriptor)
+        self.descriptor.doRead = doRead
+        self.poller.events = [(1000, EPOLLIN | EPOLLOUT)]
+        self.reactor.doPoll(0)
+        self.assertEqual(["read"], self.descriptor.events)
+        self.assertEqual(2, len(self.poller.calls))
+        self.assertIn(self.descriptor, self.reactor.getWriters())
+
+
+    def test_removeReaderWhileWriting(self):
+        """
+        A descriptor which stops being read from while it is written to stops
+        watching for read readiness immediately.
+        """
+        self.reactor.addReader(self.descriptor)
+        self.reactor.addWriter(self.descriptor)
+        self.reactor.removeReader(self.descriptor)
+        self.assertEqual(("modify", 1000, EPOLLOUT), self.poller.calls[-1])
+
+
+    def test_removeImmediately(self):
+        """
+        A descriptor which is no longer watched for any event is unregistered
+        immediately, even if it was still registered for write readiness.
+        """
+        self.readAndStopWriting()
+        self.reactor.removeReader(self.descriptor)
+        self.assertEqual(("unregister", 1000), self.poller.calls[-1])
+        self.assertNotIn(self.descriptor, self.reactor.getReaders())
+
+
+    def test_reuseDescriptorNumber(self):
+        """
+        A new descriptor with the number of one which was removed is
+        registered afresh.
+        """
+        self.reactor.addReader(self.descriptor)
+        self.reactor.removeReader(self.descriptor)
+        self.reactor.addWriter(Descriptor(fd=1000))
+        self.assertEqual([("register", 1000, EPOLLIN), ("unregister", 1000),
+                          ("register", 1000, EPOLLOUT)],
+                         self.poller.calls)
@@ -0,0 +1,253 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.internet.instrumentation}.
+"""
+
+from __future__ import absolute_import, division
+
+import os
+
+from zope.interface import implementer
+from zope.interface.verify import verifyObject
+
+from twisted.internet.abstract import FileDescriptor
+from twisted.internet.instrumentation import (
+    ILoopCollector, LoopIteration, LoggingLoopCollector, instrumentReactor,
+    uninstrumentReactor)
+from twisted.internet.test.reactormixins import ReactorBuilder
+from twisted.logger import Logger, LogLevel, formatEvent
+from twisted.trial.unittest import SynchronousTestCase
+
+
+
+@implementer(ILoopCollector)
+class RecordingCollector(object):
+    """
+    An L{ILoopCollector} which records everything reported to it.
+    """
+
+    def __init__(self):
+        self.iterations = []
+        self.slowCalls = []
+
+
+    def iterationCompleted(self, iteration):
+        self.iterations.append(iteration)
+
+
+    def slowCall(self, kind, callable, duration):
+        self.slowCalls.append((kind, callable, duration))
+
+
+
+class InstrumentationTestsBuilder(ReactorBuilder):
+    """
+    Tests for reactors instrumented with
+    L{twisted.internet.instrumentation.instrumentReactor}.
+    """
+
+    skippedReactors = dict.fromkeys([
+        "twisted.internet.glib2reactor.Glib2Reactor",
+        "twisted.internet.gtk2reactor.Gtk2Reactor",
+        "twisted.internet.gtk2reactor.PortableGtkReactor",
+        "twisted.internet.gireactor.GIReactor",
+        "twisted.internet.gireactor.PortableGIReactor",
+        "twisted.internet.gtk3reactor.Gtk3Reactor",
+        "twisted.internet.gtk3reactor.PortableGtk3Reactor",
+        "twisted.internet.cfreactor.CFReactor"],
+        "Reactor does not use ReactorBase.mainLoop.")
+
+    def buildInstrumentedReactor(self):
+        """
+        Build a reactor instrumented with a L{RecordingCollector} and a
+        slow-call threshold of 0, so that every call is reported.
+        """
+        reactor = self.buildReactor()
+        collector = RecordingCollector()
+        instrumentReactor(reactor, collector, 0)
+        return reactor, collector
+
+
+    def test_slowTimedCall(self):
+        """
+        Timed calls taking at least the threshold are reported as C{"timed"}
+        slow calls.
+        """
+        reactor, collector = self.buildInstrumentedReactor()
+        def f():
+            reactor.stop()
+        reactor.callLater(0, f)
+        self.runReactor(reactor)
+        self.assertIn(("timed", f),
+                      [(kind, c) for (kind, c, d) in collector.slowCalls])
+        for kind, c, duration in collector.slowCalls:
+            self.assertTrue(duration >= 0)
+
+
+    def test_slowThreadCall(self):
+        """
+        Calls passed to C{callFromThread} taking at least the threshold are
+        reported as C{"thread"} slow calls.
+        """
+        reactor, collector = self.buildInstrumentedReactor()
+        def f():
+            reactor.stop()
+        reactor.callWhenRunning(reactor.callFromThread, f)
+        self.runReactor(reactor)
+        self.assertIn(("thread", f),
+                      [(kind, c) for (kind, c, d) in collector.slowCalls])
+
+
+    def test_iterations(self):
+        """
+        Every iteration of the main loop is reported with its duration, the
+        lateness of its timed calls and the number of pending timed calls.
+        """
+        reactor, collector = self.buildInstrumentedReactor()
+        reactor.callLater(1000, lambda: None)
+        reactor.callLater(0, reactor.stop)
+        self.runReactor(reactor)
+        self.assertTrue(collector.iterations)
+        for iteration in collector.iterations:
+            self.assertIsInstance(iteration, LoopIteration)
+            self.assertTrue(iteration.duration >= 0)
+            self.assertTrue(iteration.lag >= 0)
+            self.assertTrue(iteration.timerCount >= 1)
+
+
+    def test_uninstrument(self):
+        """
+        After L{uninstrumentReactor}, nothing is reported.
+        """
+        reactor, collector = self.buildInstrumentedReactor()
+        uninstrumentReactor(reactor)
+        reactor.callLater(0, reactor.stop)
+        self.runReactor(reactor)
+        self.assertEqual(([], []),
+                         (collector.iterations, collector.slowCalls))
+
+
+
+class PipeReader(FileDescriptor):
+    """
+    A L{FileDescriptor} for the read end of a pipe which stops the reactor
+    once it has read from it.
+    """
+
+    def __init__(self, reactor, fd):
+        FileDescriptor.__init__(self, reactor)
+        self.fd = fd
+
+
+    def fileno(self):
+        return self.fd
+
+
+    def doRead(self):
+        os.read(self.fd, 1)
+        self.reactor.removeReader(self)
+        self.reactor.stop()
+
+
+
+class EPollInstrumentationTestsBuilder(ReactorBuilder):
+    """
+    Tests for the measurements taken by an instrumented
+    L{twisted.internet.epollreactor.EPollReactor}.
+    """
+
+    _reactors = ["twisted.internet.epollreactor.EPollReactor"]
+
+    def test_ioMeasurements(self):
+        """
+        The time spent waiting for events and the number of ready file
+        descriptors are reported, and selectables whose event handling takes
+        at least the threshold are reported as C{"io"} slow calls.
+        """
+        reactor = self.buildReactor()
+        collector = RecordingCollector()
+        instrumentReactor(reactor, collector, 0)
+        r, w = os.pipe()
+        self.addCleanup(os.close, r)
+        self.addCleanup(os.close, w)
+        reader = PipeReader(reactor, r)
+        reactor.addReader(reader)
+        os.write(w, b"x")
+        self.runReactor(reactor)
+        self.assertIn(("io", reader),
+                      [(kind, c) for (kind, c, d) in collector.slowCalls])
+        self.assertTrue(
+            max(i.readyCount for i in collector.iterations) >= 1)
+        for iteration in collector.iterations:
+            self.assertTrue(0 <= iteration.waited <= iteration.duration)
+
+
+
+class LoopIterationTests(SynchronousTestCase):
+    """
+    Tests for L{LoopIteration}.
+    """
+
+    def test_busy(self):
+        """
+        L{LoopIteration.busy} is the part of the iteration not spent waiting,
+        or the whole iteration if the waiting time is unknown.
+        """
+        self.assertEqual(0.25, LoopIteration(1.0, 0.75, 0, 1, 1).busy)
+        self.assertEqual(1.0, LoopIteration(1.0, None, 0, None, 1).busy)
+
+
+
+class LoggingLoopCollectorTests(SynchronousTestCase):
+    """
+    Tests for L{LoggingLoopCollector}.
+    """
+
+    def setUp(self):
+        self.events = []
+        self.collector = LoggingLoopCollector(
+            0.5, Logger(observer=self.events.append))
+
+
+    def test_interface(self):
+        """
+        L{LoggingLoopCollector} provides L{ILoopCollector}.
+        """
+        self.assertTrue(verifyObject(ILoopCollector, self.collector))
+
+
+    def test_slowCall(self):
+        """
+        Each slow call is logged as a warning.
+        """
+        self.collector.slowCall("timed", "f", 0.75)
+        [event] = self.events
+        self.assertEqual(LogLevel.warn, event["log_level"])
+        self.assertEqual(
+            ("timed", "f", 0.75),
+            (event["kind"], event["callable"], event["duration"]))
+        self.assertEqual("Reactor timed call 'f' took 0.750000s",
+                         formatEvent(event))
+
+
+    def test_stalledIteration(self):
+        """
+        Iterations which are busy or late for at least the threshold are
+        logged as warnings; other iterations are not logged.
+        """
+        self.collector.iterationCompleted(LoopIteration(1.0, 0.75, 0, 1, 2))
+        self.assertEqual([], self.events)
+        self.collector.iterationCompleted(LoopIteration(1.0, 0.25, 0, 1, 2))
+        self.collector.iterationCompleted(LoopIteration(0, 0, 0.5, 1, 2))
+        self.assertEqual(2, len(self.events))
+        self.assertEqual(
+            "Reactor loop stalled: busy for 0.750000s, timed calls "
+            "0.000000s late, 1 descriptors ready, 2 timed calls pending",
+            formatEvent(self.events[0]))
+
+
+
+globals().update(InstrumentationTestsBuilder.makeTestCaseClasses())
+globals().update(EPollInstrumentationTestsBuilder.makeTestCaseClasses())
@@ -0,0 +1,538 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.internet.processpool}.
+"""
+
+from __future__ import absolute_import, division
+
+import os
+import pickle
+
+from twisted.internet import reactor
+from twisted.internet.defer import gatherResults
+from twisted.internet.error import ProcessTerminated
+from twisted.internet.interfaces import IReactorProcess
+from twisted.internet.task import Clock
+from twisted.internet.processpool import (
+    ProcessPool, ProcessPoolWorker, WorkerCrashed, BacklogFull, PoolStopped,
+    RemoteError, deferToProcessPool, _ChunkedBytes)
+from twisted.internet import _poolworker
+from twisted.protocols import amp
+from twisted.python.failure import Failure
+from twisted.test.iosim import connectedServerAndClient
+from twisted.test.proto_helpers import StringTransport
+from twisted.trial.unittest import SynchronousTestCase, TestCase
+
+
+
+def add(a, b):
+    """
+    Return the sum of C{a} and C{b}.
+    """
+    return a + b
+
+
+
+def getPid():
+    """
+    Return the process ID of the calling process.
+    """
+    return os.getpid()
+
+
+
+def fail():
+    """
+    Raise a L{ZeroDivisionError}.
+    """
+    1 // 0
+
+
+
+class UnpicklableError(Exception):
+    """
+    An exception which cannot be pickled.
+    """
+
+    def __reduce__(self):
+        raise TypeError("cannot pickle")
+
+
+
+def failUnpicklably():
+    """
+    Raise an L{UnpicklableError}.
+    """
+    raise UnpicklableError("broken")
+
+
+
+def crash():
+    """
+    Exit the calling process immediately.
+    """
+    os._exit(1)
+
+
+
+class Echo(amp.Command):
+    """
+    Return the given value.
+    """
+    arguments = [(b"value", amp.Unicode())]
+    response = [(b"value", amp.Unicode())]
+
+
+
+class EchoWorker(ProcessPoolWorker):
+    """
+    A worker protocol which also responds to L{Echo}.
+    """
+
+    def echo(self, value):
+        return {"value": value}
+
+    Echo.responder(echo)
+
+
+
+class Big(amp.Command):
+    """
+    Send a large value.
+    """
+    arguments = [(b"data", _ChunkedBytes())]
+    response = [(b"length", amp.Integer())]
+
+
+
+class BigLocator(amp.AMP):
+    """
+    Remember the value sent with L{Big}.
+    """
+
+    def big(self, data):
+        self.data = data
+        return {"length": len(data)}
+
+    Big.responder(big)
+
+
+
+class ChunkedBytesTests(SynchronousTestCase):
+    """
+    Tests for L{_ChunkedBytes}.
+    """
+
+    def test_roundTrip(self):
+        """
+        Values longer than L{amp.MAX_VALUE_LENGTH}, including exact multiples
+        of it, are split into several keys and reassembled.
+        """
+        for length in (0, 1, amp.MAX_VALUE_LENGTH, amp.MAX_VALUE_LENGTH * 2,
+                       amp.MAX_VALUE_LENGTH * 3 + 7):
+            strings = amp.AmpBox()
+            _ChunkedBytes().toBox(
+                b"data", strings, {"data": b"x" * length}, None)
+            objects = {}
+            _ChunkedBytes().fromBox(b"data", strings, objects, None)
+            self.assertEqual({"data": b"x" * length}, objects)
+            self.assertEqual({}, strings)
+
+
+    def test_overAMP(self):
+        """
+        L{_ChunkedBytes} values can be sent over an AMP connection.
+        """
+        client, server, pump = connectedServerAndClient(BigLocator, amp.AMP)
+        data = (bytes(bytearray(range(256))) * 800)[:200000]
+        d = client.callRemote(Big, data=data)
+        pump.flush()
+        self.assertEqual({"length": 200000}, self.successResultOf(d))
+        self.assertEqual(data, server.data)
+
+
+
+class ProcessPoolWorkerTests(SynchronousTestCase):
+    """
+    Tests for L{ProcessPoolWorker}.
+    """
+
+    def call(self, f, *args, **kwargs):
+        response = ProcessPoolWorker().callFunction(
+            pickle.dumps((f, args, kwargs)))
+        return response["success"], pickle.loads(response["result"])
+
+
+    def test_success(self):
+        """
+        The pickled return value of the function is returned.
+        """
+        self.assertEqual((True, 3), self.call(add, 1, b=2))
+
+
+    def test_exception(self):
+        """
+        The pickled exception raised by the function is returned.
+        """
+        success, result = self.call(fail)
+        self.assertFalse(success)
+        self.assertIsInstance(result, ZeroDivisionError)
+
+
+    def test_unpicklableException(self):
+        """
+        An exception which cannot be pickled is replaced by a
+        L{RemoteError}.
+        """
+        success, result = self.call(failUnpicklably)
+        self.assertFalse(success)
+        self.assertIsInstance(result, RemoteError)
+        self.assertEqual(
+            "twisted.internet.test.test_processpool.UnpicklableError",
+            result.exceptionType)
+        self.assertIn("UnpicklableError", result.remoteTraceback)
+
+
+    def test_unpicklableResult(self):
+        """
+        A result which cannot be pickled is reported as an error.
+        """
+        success, result = self.call(UnpicklableError)
+        self.assertFalse(success)
+        self.assertIsInstance(result, Exception)
+
+
+
+class ProcessPoolTests(TestCase):
+    """
+    Tests for L{ProcessPool} using real worker processes.
+    """
+
+    if not IReactorProcess.providedBy(reactor):
+        skip = "Reactor does not support processes."
+
+    def startPool(self, **kwargs):
+        """
+        Start a pool which will be stopped when the test ends.
+        """
+        pool = ProcessPool(reactor=reactor, **kwargs)
+        pool.start()
+        self.addCleanup(pool.stop)
+        return pool
+
+
+    def test_callFunction(self):
+        """
+        L{deferToProcessPool} runs the function in a worker process and
+        fires with its result.
+        """
+        pool = self.startPool(size=1)
+        d = gatherResults([deferToProcessPool(pool, add, 2, b=3),
+                           deferToProcessPool(pool, getPid)])
+        def check(results):
+            self.assertEqual(5, results[0])
+            self.assertNotEqual(os.getpid(), results[1])
+        return d.addCallback(check)
+
+
+    def test_exception(self):
+        """
+        An exception raised by the function fails the L{Deferred}.
+        """
+        pool = self.startPool(size=1)
+        return self.assertFailure(pool.callFunction(fail), ZeroDivisionError)
+
+
+    def test_largeArguments(self):
+        """
+        Arguments and results larger than an AMP value are transferred.
+        """
+        pool = self.startPool(size=1)
+        data = b"x" * (amp.MAX_VALUE_LENGTH * 3)
+        d = pool.callFunction(add, data, b"y")
+        return d.addCallback(self.assertEqual, data + b"y")
+
+
+    def test_crash(self):
+        """
+        A call whose worker exits fails with L{WorkerCrashed}, and the worker
+        is replaced.
+        """
+        pool = self.startPool(size=1)
+        d = self.assertFailure(pool.callFunction(crash), WorkerCrashed)
+        d.addCallback(lambda ignored: pool.callFunction(add, 1, 1))
+        def check(result):
+            self.assertEqual(2, result)
+            self.assertEqual(1, pool.statistics().restartCount)
+            self.assertEqual(1, pool.statistics().failedCount)
+            self.flushLoggedErrors()
+        return d.addCallback(check)
+
+
+    def test_backlog(self):
+        """
+        At most L{ProcessPool.size} calls run at once and the rest wait in
+        the backlog, which is bounded by L{ProcessPool.maxBacklog}.
+        """
+        pool = self.startPool(size=2, maxBacklog=1)
+        calls = [pool.callFunction(add, i, i) for i in range(3)]
+        stats = pool.statistics()
+        self.assertEqual(
+            (0, 2, 1),
+            (stats.idleWorkerCount, stats.busyWorkerCount,
+             stats.backloggedWorkCount))
+        self.failureResultOf(pool.callFunction(add, 1, 1), BacklogFull)
+        def check(results):
+            self.assertEqual([0, 2, 4], results)
+            stats = pool.statistics()
+            self.assertEqual(
+                (2, 0, 0, 3),
+                (stats.idleWorkerCount, stats.busyWorkerCount,
+                 stats.backloggedWorkCount, stats.completedCount))
+        return gatherResults(calls).addCallback(check)
+
+
+    def test_callRemote(self):
+        """
+        L{ProcessPool.callRemote} sends an AMP command to a worker running
+        the configured worker protocol.
+        """
+        pool = self.startPool(
+            size=1, workerProtocol=
+            "twisted.internet.test.test_processpool.EchoWorker")
+        d = pool.callRemote(Echo, value=u"hello")
+        return d.addCallback(self.assertEqual, {"value": u"hello"})
+
+
+    def test_stop(self):
+        """
+        L{ProcessPool.stop} lets backlogged calls complete, fails later calls
+        with L{PoolStopped} and fires once every worker has exited.
+        """
+        pool = ProcessPool(size=1, reactor=reactor)
+        pool.start()
+        first = pool.callFunction(add, 1, 2)
+        second = pool.callFunction(add, 3, 4)
+        stopped = pool.stop()
+        self.failureResultOf(pool.callFunction(add, 1, 1), PoolStopped)
+        d = gatherResults([first, second, stopped])
+        def check(results):
+            self.assertEqual([3, 7, None], results)
+            self.assertFalse(pool.started)
+            self.assertEqual(0, pool.statistics().idleWorkerCount)
+        return d.addCallback(check)
+
+
+
+class FakeProcessTransport(StringTransport):
+    """
+    A transport for a fake worker process, recording what is written to it.
+    """
+
+    def writeToChild(self, childFD, data):
+        self.write(data)
+
+
+    def closeChildFD(self, childFD):
+        self.loseConnection()
+
+
+
+class FakeProcessReactor(Clock):
+    """
+    A reactor which pretends to spawn processes.
+
+    @ivar processes: The protocols of the spawned processes.
+    """
+
+    def __init__(self):
+        Clock.__init__(self)
+        self.processes = []
+
+
+    def spawnProcess(self, processProtocol, executable, args=(), env={},
+                     path=None, uid=None, gid=None, usePTY=0,
+                     childFDs=None):
+        processProtocol.makeConnection(FakeProcessTransport())
+        self.processes.append(processProtocol)
+
+
+
+class ProcessPoolRestartTests(SynchronousTestCase):
+    """
+    Tests for the replacement of the workers of a L{ProcessPool} which exit
+    unexpectedly, and for stopping a pool which has no workers.
+    """
+
+    def setUp(self):
+        self.reactor = FakeProcessReactor()
+        self.pool = ProcessPool(size=1, reactor=self.reactor)
+        self.pool.restartDelay = 1
+        self.pool.crashLimit = 3
+
+
+    def crash(self):
+        """
+        End the last worker spawned, as if it had crashed.
+        """
+        self.reactor.processes[-1].processEnded(
+            Failure(ProcessTerminated(1)))
+
+
+    def complete(self):
+        """
+        Run the calls sent to the last worker spawned in a
+        L{ProcessPoolWorker}, and deliver its responses.
+        """
+        process = self.reactor.processes[-1]
+        worker = ProcessPoolWorker()
+        transport = StringTransport()
+        worker.makeConnection(transport)
+        worker.dataReceived(process.transport.value())
+        process.amp.dataReceived(transport.value())
+
+
+    def assertRestartedAfter(self, delay):
+        """
+        Assert that the last worker spawned is replaced after C{delay}
+        seconds, and not before.
+        """
+        spawned = len(self.reactor.processes)
+        self.reactor.advance(delay - 0.5)
+        self.assertEqual(spawned, len(self.reactor.processes))
+        self.reactor.advance(0.5)
+        self.assertEqual(spawned + 1, len(self.reactor.processes))
+
+
+    def test_restartBackoff(self):
+        """
+        Workers which exit unexpectedly are replaced after a delay which
+        doubles with each consecutive exit.
+        """
+        self.pool.start()
+        self.assertEqual(1, len(self.reactor.processes))
+        for delay in [1, 2, 4]:
+            self.crash()
+            self.assertRestartedAfter(delay)
+        self.assertEqual(3, self.pool.statistics().restartCount)
+        self.assertEqual(3, len(self.flushLoggedErrors(ProcessTerminated)))
+
+
+    def test_maxRestartDelay(self):
+        """
+        The delay before replacing a worker is at most
+        L{ProcessPool.maxRestartDelay}.
+        """
+        self.pool.maxRestartDelay = 3
+        self.pool.crashLimit = 10
+        self.pool.start()
+        for delay in [1, 2, 3, 3]:
+            self.crash()
+            self.assertRestartedAfter(delay)
+        self.flushLoggedErrors(ProcessTerminated)
+
+
+    def test_crashLimit(self):
+        """
+        After L{ProcessPool.crashLimit} consecutive unexpected exits, the
+        calls waiting for a worker fail with L{WorkerCrashed}.
+        """
+        self.pool.start()
+        calls = [self.pool.callFunction(add, 1, 2) for i in range(4)]
+        self.crash()
+        self.failureResultOf(calls[0], WorkerCrashed)
+        self.reactor.advance(1)
+        self.crash()
+        self.failureResultOf(calls[1], WorkerCrashed)
+        self.reactor.advance(2)
+        self.assertNoResult(calls[2])
+        self.assertNoResult(calls[3])
+        self.crash()
+        self.failureResultOf(calls[2], WorkerCrashed)
+        self.failureResultOf(calls[3], WorkerCrashed)
+        self.assertEqual(4, self.pool.statistics().failedCount)
+        self.assertEqual(0, self.pool.statistics().backloggedWorkCount)
+        self.flushLoggedErrors(ProcessTerminated)
+
+
+    def test_completedCallResetsBackoff(self):
+        """
+        A call completed by a worker resets the delay before replacing a
+        worker to L{ProcessPool.restartDelay}.
+        """
+        self.pool.start()
+        self.crash()
+        self.assertRestartedAfter(1)
+        self.crash()
+        self.assertRestartedAfter(2)
+        d = self.pool.callFunction(add, 1, 2)
+        self.complete()
+        self.assertEqual(3, self.successResultOf(d))
+        self.crash()
+        self.assertRestartedAfter(1)
+        self.flushLoggedErrors(ProcessTerminated)
+
+
+    def test_stopCancelsRestart(self):
+        """
+        L{ProcessPool.stop} cancels the replacement of a worker and fires
+        once the workers have exited.
+        """
+        self.pool.start()
+        self.crash()
+        stopped = self.pool.stop()
+        self.successResultOf(stopped)
+        self.assertEqual([], self.reactor.getDelayedCalls())
+        self.flushLoggedErrors(ProcessTerminated)
+
+
+    def test_stopBeforeStart(self):
+        """
+        L{ProcessPool.stop} called on a pool which was never started fails
+        the calls submitted to it with L{PoolStopped}.
+        """
+        d = self.pool.callFunction(add, 1, 2)
+        stopped = self.pool.stop()
+        self.assertIsInstance(
+            self.failureResultOf(d, PoolStopped).value.args[0], str)
+        self.assertIsNone(self.successResultOf(stopped))
+        self.assertEqual([], self.reactor.processes)
+
+
+
+class WorkerMainTests(SynchronousTestCase):
+    """
+    Tests for L{_poolworker.main}.
+    """
+
+    def test_main(self):
+        """
+        L{_poolworker.main} feeds data read from the AMP input pipe to the
+        named protocol and flushes its output, until the input is closed.
+        """
+        reads = []
+        def read(fd, size):
+            reads.append(fd)
+            if len(reads) == 1:
+                return b"data"
+            return b""
+        opened = []
+        class File(object):
+            def write(self, data):
+                pass
+            def flush(self):
+                opened.append("flush")
+        def fdopen(fd, mode):
+            opened.append((fd, mode))
+            return File()
+        received = []
+        EchoWorker.dataReceived = received.append
+        self.addCleanup(delattr, EchoWorker, "dataReceived")
+        _poolworker.main(
+            ["", "twisted.internet.test.test_processpool.EchoWorker"],
+            _fdopen=fdopen, _read=read)
+        self.assertEqual([b"data"], received)
+        self.assertEqual([(4, "wb"), "flush"], opened)
+        self.assertEqual([3, 3], reads)
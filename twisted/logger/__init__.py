@@ -63,7 +63,7 @@ __all__ = [
     "LimitedHistoryLogObserver",
 
     # From ._file
-    "FileLogObserver", "textFileLogObserver",
+    "FileLogObserver", "textFileLogObserver", "ThreadedFileLogObserver",
 
     # From ._filter
     "PredicateResult", "ILogFilterPredicate",
@@ -84,6 +84,10 @@ __all__ = [
     # From ._json
     "eventAsJSON", "eventFromJSON",
     "jsonFileLogObserver", "eventsFromJSONLogFile",
+
+    # From ._metrics
+    "Counter", "Gauge", "Histogram", "MetricsRegistry", "globalMetrics",
+    "PeriodicMetricsLogger",
 ]
 
 from ._levels import InvalidLogLevelError, LogLevel
@@ -100,7 +104,9 @@ from ._observer import ILogObserver, LogPublisher
 
 from ._buffer import LimitedHistoryLogObserver
 
-from ._file import FileLogObserver, textFileLogObserver
+from ._file import (
+    FileLogObserver, textFileLogObserver, ThreadedFileLogObserver
+)
 
 from ._filter import (
     PredicateResult, ILogFilterPredicate, FilteringLogObserver,
@@ -121,3 +127,8 @@ from ._json import (
     eventAsJSON, eventFromJSON,
     jsonFileLogObserver, eventsFromJSONLogFile
 )
+
+from ._metrics import (
+    Counter, Gauge, Histogram, MetricsRegistry, globalMetrics,
+    PeriodicMetricsLogger
+)
@@ -3,13 +3,22 @@
 # See LICENSE for details.
 
 """
-File log observer.
+File log observers.
 """
 
+import threading
+from time import time
+
+try:
+    from Queue import Queue, Empty, Full
+except ImportError:
+    from queue import Queue, Empty, Full
+
 from zope.interface import implementer
 
 from twisted.python.compat import ioType, unicode
 from ._observer import ILogObserver
+from ._levels import LogLevel
 from ._format import formatTime
 from ._format import timeFormatRFC3339
 from ._format import formatEventAsClassicLogText
@@ -47,6 +56,20 @@ class FileLogObserver(object):
         @param event: An event.
         @type event: L{dict}
         """
+        self._writeText(self._formatForFile(event))
+
+
+    def _formatForFile(self, event):
+        """
+        Format an event as it is written to file, followed by its traceback if
+        it has a failure.
+
+        @param event: An event.
+        @type event: L{dict}
+
+        @return: The formatted event.
+        @rtype: L{unicode}
+        """
         text = self.formatEvent(event)
 
         if text is None:
@@ -59,6 +82,16 @@ class FileLogObserver(object):
                 traceback = u"(UNABLE TO OBTAIN TRACEBACK FROM EVENT)\n"
             text = u"\n".join((text, traceback))
 
+        return text
+
+
+    def _writeText(self, text):
+        """
+        Write formatted events to file, and flush it.
+
+        @param text: The formatted events.
+        @type text: L{unicode}
+        """
         if self._encoding is not None:
             text = text.encode(self._encoding)
 
@@ -91,3 +124,161 @@ def textFileLogObserver(outFile, timeFormat=timeFormatRFC3339):
         )
 
     return FileLogObserver(outFile, formatEvent)
+
+
+
+_STOP = object()
+
+
+
+@implementer(ILogObserver)
+class ThreadedFileLogObserver(object):
+    """
+    Log observer that formats events as a L{FileLogObserver} does when they
+    are observed, but leaves encoding them and writing them to its file to a
+    thread of its own.  Writing to the file then does not hold up the thread
+    emitting events, usually the reactor thread, and all the events queued
+    while the writing thread was busy are written and flushed at once::
+
+        observer = ThreadedFileLogObserver(
+            jsonFileLogObserver(io.open("log.json", "a"))
+        )
+        reactor.addSystemEventTrigger("after", "shutdown", observer.stop)
+
+    Events are still formatted when they are observed, since they may refer
+    to objects which are not safe to use from another thread, or which
+    change later.
+
+    When C{maxQueueSize} formatted events are waiting to be written, the
+    events observed are dropped, and a warning giving how many were dropped
+    is written once there is room for it.
+
+    The writing thread is started when the observer is created, and is a
+    daemon thread: call L{stop} to write the events still queued before the
+    process exits.
+
+    @ivar dropped: The number of events dropped because too many were queued
+        or because the observer was stopped.
+    @type dropped: L{int}
+
+    @ivar failed: The number of events lost because writing them raised an
+        exception.
+    @type failed: L{int}
+
+    @ivar maxBatchSize: The maximum number of formatted events written at
+        once.
+    @type maxBatchSize: L{int}
+
+    @since: 16.4
+    """
+    maxBatchSize = 1000
+
+    def __init__(self, fileObserver, maxQueueSize=10000):
+        """
+        @param fileObserver: The observer formatting events and writing them
+            to its file, such as one created by L{textFileLogObserver} or
+            L{jsonFileLogObserver <twisted.logger.jsonFileLogObserver>}.  It
+            should not be used by anything else.
+        @type fileObserver: L{FileLogObserver}
+
+        @param maxQueueSize: The maximum number of formatted events waiting to
+            be written.
+        @type maxQueueSize: L{int}
+        """
+        self._fileObserver = fileObserver
+        self._queue = Queue(maxQueueSize)
+        self._stopped = False
+        self._unreported = 0
+        self.dropped = 0
+        self.failed = 0
+        self._thread = threading.Thread(
+            target=self._writeQueued, name="ThreadedFileLogObserver"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+
+    def __call__(self, event):
+        """
+        Format an event, and queue it to be written to file.
+
+        @param event: An event.
+        @type event: L{dict}
+        """
+        if self._stopped:
+            self.dropped += 1
+            return
+
+        text = self._fileObserver._formatForFile(event)
+        if not text:
+            return
+
+        try:
+            if self._unreported:
+                self._queue.put_nowait(self._droppedWarning())
+                self._unreported = 0
+            self._queue.put_nowait(text)
+        except Full:
+            self.dropped += 1
+            self._unreported += 1
+
+
+    def _droppedWarning(self):
+        """
+        Format a warning giving the number of events dropped since the last
+        one.
+
+        @return: The formatted warning.
+        @rtype: L{unicode}
+        """
+        return self._fileObserver._formatForFile(dict(
+            log_format=(
+                u"Dropped {log_dropped} log events because too many were "
+                u"waiting to be written."
+            ),
+            log_dropped=self._unreported,
+            log_level=LogLevel.warn,
+            log_namespace=__name__,
+            log_source=None,
+            log_time=time(),
+        ))
+
+
+    def _writeQueued(self):
+        """
+        Write the formatted events queued, in batches, until L{stop} is
+        called.  This runs in the writing thread.
+        """
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.maxBatchSize:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            stopping = _STOP in batch
+            if stopping:
+                batch.remove(_STOP)
+            if batch:
+                try:
+                    self._fileObserver._writeText(u"".join(batch))
+                except Exception:
+                    self.failed += len(batch)
+            if stopping:
+                return
+
+
+    def stop(self):
+        """
+        Write the events still queued, and stop the writing thread.  Events
+        observed afterwards are dropped.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        if self._unreported:
+            self._queue.put(self._droppedWarning())
+            self._unreported = 0
+        self._queue.put(_STOP)
+        self._thread.join()
@@ -141,6 +141,14 @@ class LogLevelFilterPredicate(object):
     the log level for the event's namespace.
 
     Events that not not have a log level or namespace are also dropped.
+
+    It may also be given to L{Logger<twisted.logger.Logger>}s as their
+    C{levelPredicate}, so that they drop the events it would filter out
+    before building them.
+
+    @ivar _logLevelCache: A cache mapping the namespaces whose log level was
+        looked up to that level, which is cleared whenever log levels change.
+    @type _logLevelCache: L{dict}
     """
 
     def __init__(self, defaultLogLevel=LogLevel.info):
@@ -149,6 +157,7 @@ class LogLevelFilterPredicate(object):
         @type defaultLogLevel: L{LogLevel}
         """
         self._logLevelsByNamespace = {}
+        self._logLevelCache = {}
         self.defaultLogLevel = defaultLogLevel
         self.clearLogLevels()
 
@@ -169,22 +178,24 @@ class LogLevelFilterPredicate(object):
         @return: The log level for the specified namespace.
         @rtype: L{LogLevel}
         """
-        if not namespace:
-            return self._logLevelsByNamespace[None]
+        level = self._logLevelCache.get(namespace)
+        if level is not None:
+            return level
 
-        if namespace in self._logLevelsByNamespace:
-            return self._logLevelsByNamespace[namespace]
-
-        segments = namespace.split(".")
-        index = len(segments) - 1
+        level = self._logLevelsByNamespace[None]
+        if namespace:
+            segments = namespace.split(".")
+            index = len(segments)
 
-        while index > 0:
-            namespace = ".".join(segments[:index])
-            if namespace in self._logLevelsByNamespace:
-                return self._logLevelsByNamespace[namespace]
-            index -= 1
+            while index > 0:
+                prefix = ".".join(segments[:index])
+                if prefix in self._logLevelsByNamespace:
+                    level = self._logLevelsByNamespace[prefix]
+                    break
+                index -= 1
 
-        return self._logLevelsByNamespace[None]
+        self._logLevelCache[namespace] = level
+        return level
 
 
     def setLogLevelForNamespace(self, namespace, level):
@@ -204,6 +215,7 @@ class LogLevelFilterPredicate(object):
             self._logLevelsByNamespace[namespace] = level
         else:
             self._logLevelsByNamespace[None] = level
+        self._logLevelCache.clear()
 
 
     def clearLogLevels(self):
@@ -212,6 +224,7 @@ class LogLevelFilterPredicate(object):
         """
         self._logLevelsByNamespace.clear()
         self._logLevelsByNamespace[None] = self.defaultLogLevel
+        self._logLevelCache.clear()
 
 
     def __call__(self, event):
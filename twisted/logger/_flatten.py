@@ -15,6 +15,10 @@ from twisted.python.compat import unicode
 
 aFormatter = Formatter()
 
+_FLATTENING_PLANS_MAXIMUM = 1024
+_flatteningPlans = {}
+_flatFormattingPlans = {}
+
 
 
 class KeyFlattener(object):
@@ -64,27 +68,30 @@ class KeyFlattener(object):
 
 
 
-def flattenEvent(event):
+def _flatteningPlan(format):
     """
-    Flatten the given event by pre-associating format fields with specific
-    objects and callable results in a L{dict} put into the C{"log_flattened"}
-    key in the event.
-
-    @param event: A logging event.
-    @type event: L{dict}
+    Determine how to flatten the fields of events with a given format string.
+    Plans are cached, since an application only logs so many format strings;
+    should it log many more, the cache is emptied once it holds
+    C{_FLATTENING_PLANS_MAXIMUM} of them.
+
+    @param format: A format string.
+    @type format: L{unicode} or L{str}
+
+    @return: For each field of C{format}, its flattened key, its structured
+        key, the name of the field without any trailing C{"()"}, whether its
+        value is called, and the function converting its value to text.
+    @rtype: L{tuple} of L{tuple}
     """
-    if "log_format" not in event:
-        return
-
-    if "log_flattened" in event:
-        fields = event["log_flattened"]
-    else:
-        fields = {}
+    plan = _flatteningPlans.get(format)
+    if plan is not None:
+        return plan
 
     keyFlattener = KeyFlattener()
+    plan = []
 
     for (literalText, fieldName, formatSpec, conversion) in (
-        aFormatter.parse(event["log_format"])
+        aFormatter.parse(format)
     ):
         if fieldName is None:
             continue
@@ -95,24 +102,56 @@ def flattenEvent(event):
         flattenedKey = keyFlattener.flatKey(fieldName, formatSpec, conversion)
         structuredKey = keyFlattener.flatKey(fieldName, formatSpec, "")
 
-        if flattenedKey in fields:
-            # We've already seen and handled this key
-            continue
-
         if fieldName.endswith(u"()"):
             fieldName = fieldName[:-2]
             callit = True
         else:
             callit = False
 
-        field = aFormatter.get_field(fieldName, (), event)
-        fieldValue = field[0]
-
         if conversion == "r":
             conversionFunction = repr
         else:  # Above: if conversion is not "r", it's "s"
             conversionFunction = unicode
 
+        plan.append((
+            flattenedKey, structuredKey, fieldName, callit, conversionFunction
+        ))
+
+    plan = tuple(plan)
+    if len(_flatteningPlans) >= _FLATTENING_PLANS_MAXIMUM:
+        _flatteningPlans.clear()
+    _flatteningPlans[format] = plan
+    return plan
+
+
+
+def flattenEvent(event):
+    """
+    Flatten the given event by pre-associating format fields with specific
+    objects and callable results in a L{dict} put into the C{"log_flattened"}
+    key in the event.
+
+    @param event: A logging event.
+    @type event: L{dict}
+    """
+    if "log_format" not in event:
+        return
+
+    if "log_flattened" in event:
+        fields = event["log_flattened"]
+    else:
+        fields = {}
+
+    for (
+        flattenedKey, structuredKey, fieldName, callit, conversionFunction
+    ) in _flatteningPlan(event["log_format"]):
+        if flattenedKey in fields:
+            # We've already seen and handled this key
+            continue
+
+        field = aFormatter.get_field(fieldName, (), event)
+        fieldValue = field[0]
+
         if callit:
             fieldValue = fieldValue()
 
@@ -155,6 +194,41 @@ def extractField(field, event):
 
 
 
+def _flatFormattingPlan(format):
+    """
+    Determine how to format flattened events with a given format string.
+    Plans are cached like those of L{_flatteningPlan}.
+
+    @param format: A format string.
+    @type format: L{unicode} or L{str}
+
+    @return: For each literal text of C{format}, the text, and the flattened
+        key of the field following it, or L{None} if there is none.
+    @rtype: L{tuple} of L{tuple}
+    """
+    plan = _flatFormattingPlans.get(format)
+    if plan is not None:
+        return plan
+
+    keyFlattener = KeyFlattener()
+    plan = []
+    for literalText, fieldName, formatSpec, conversion in (
+        aFormatter.parse(format)
+    ):
+        if fieldName is None:
+            plan.append((literalText, None))
+        else:
+            plan.append((literalText, keyFlattener.flatKey(
+                fieldName, formatSpec, conversion or "s")))
+
+    plan = tuple(plan)
+    if len(_flatFormattingPlans) >= _FLATTENING_PLANS_MAXIMUM:
+        _flatFormattingPlans.clear()
+    _flatFormattingPlans[format] = plan
+    return plan
+
+
+
 def flatFormat(event):
     """
     Format an event which has been flattened with L{flattenEvent}.
@@ -167,12 +241,8 @@ def flatFormat(event):
     """
     fieldValues = event["log_flattened"]
     s = []
-    keyFlattener = KeyFlattener()
-    formatFields = aFormatter.parse(event["log_format"])
-    for literalText, fieldName, formatSpec, conversion in formatFields:
+    for literalText, key in _flatFormattingPlan(event["log_format"]):
         s.append(literalText)
-        if fieldName is not None:
-            key = keyFlattener.flatKey(
-                    fieldName, formatSpec, conversion or "s")
+        if key is not None:
             s.append(unicode(fieldValues[key]))
     return u"".join(s)
@@ -15,8 +15,17 @@ from twisted.python._tzhelper import FixedOffsetTimeZone
 
 from ._flatten import flatFormat, aFormatter
 
+try:
+    from _string import formatter_field_name_split as _fieldNameSplit
+except ImportError:
+    def _fieldNameSplit(fieldName):
+        return fieldName._formatter_field_name_split()
+
 timeFormatRFC3339 = "%Y-%m-%dT%H:%M:%S%z"
 
+_FORMATTING_PLANS_MAXIMUM = 1024
+_formattingPlans = {}
+
 
 
 def formatEvent(event):
@@ -250,6 +259,63 @@ class CallMapping(object):
 
 
 
+def _formattingPlan(formatString):
+    """
+    Compile a format string for L{formatWithCall}, so that the events logged
+    with it are formatted without parsing it again.  Plans are cached, since
+    an application only logs so many format strings; should it log many
+    more, the cache is emptied once it holds C{_FORMATTING_PLANS_MAXIMUM} of
+    them.
+
+    @param formatString: A PEP-3101 format string.
+    @type formatString: L{unicode}
+
+    @return: For each literal text of C{formatString}, the text, and the
+        replacement field following it, as the key of its value, whether the
+        value is called, the attributes and items to look up in the value,
+        the conversion, the format spec and whether the format spec has
+        replacement fields of its own; or L{None} instead of the field if
+        there is none.  L{False} if C{formatString} has positional fields,
+        which are left to L{unicode.format}.
+    @rtype: L{tuple} of L{tuple}, or L{False}
+    """
+    plan = _formattingPlans.get(formatString)
+    if plan is not None:
+        return plan
+
+    plan = []
+    for (literalText, fieldName, formatSpec, conversion) in (
+        aFormatter.parse(formatString)
+    ):
+        if fieldName is None:
+            plan.append((literalText, None))
+            continue
+
+        key, accessors = _fieldNameSplit(fieldName)
+        if not isinstance(key, (bytes, unicode)) or not key:
+            plan = False
+            break
+
+        if key.endswith(u"()"):
+            key = key[:-2]
+            callit = True
+        else:
+            callit = False
+
+        plan.append((literalText, (
+            key, callit, tuple(accessors), conversion, formatSpec,
+            u"{" in formatSpec,
+        )))
+    else:
+        plan = tuple(plan)
+
+    if len(_formattingPlans) >= _FORMATTING_PLANS_MAXIMUM:
+        _formattingPlans.clear()
+    _formattingPlans[formatString] = plan
+    return plan
+
+
+
 def formatWithCall(formatString, mapping):
     """
     Format a string like L{unicode.format}, but:
@@ -276,6 +342,31 @@ def formatWithCall(formatString, mapping):
     @return: The string with formatted values interpolated.
     @rtype: L{unicode}
     """
-    return unicode(
-        aFormatter.vformat(formatString, (), CallMapping(mapping))
-    )
+    plan = _formattingPlan(formatString)
+    if plan is False:
+        return unicode(
+            aFormatter.vformat(formatString, (), CallMapping(mapping))
+        )
+
+    text = []
+    for literalText, field in plan:
+        text.append(literalText)
+        if field is None:
+            continue
+
+        key, callit, accessors, conversion, formatSpec, nested = field
+        value = mapping[key]
+        if callit:
+            value = value()
+        for isAttribute, name in accessors:
+            if isAttribute:
+                value = getattr(value, name)
+            else:
+                value = value[name]
+        if conversion is not None:
+            value = aFormatter.convert_field(value, conversion)
+        if nested:
+            formatSpec = formatWithCall(formatSpec, mapping)
+        text.append(aFormatter.format_field(value, formatSpec))
+
+    return unicode(u"".join(text))
@@ -6,8 +6,10 @@
 Tools for saving and loading log events in a structured format.
 """
 
+import io
+import mmap
 import types
-from json import dumps, loads
+from json import JSONEncoder, loads
 from uuid import UUID
 
 from ._flatten import flattenEvent
@@ -16,7 +18,7 @@ from ._levels import LogLevel
 from ._logger import Logger
 from twisted.python.constants import NamedConstant
 
-from twisted.python.compat import unicode
+from twisted.python.compat import ioType, unicode
 from twisted.python.failure import Failure
 
 log = Logger()
@@ -163,6 +165,26 @@ def objectSaveHook(pythonObject):
 
 
 
+if bytes is str:
+    _encoder = JSONEncoder(
+        default=objectSaveHook, encoding="charmap", skipkeys=True
+    )
+else:
+    def _objectOrBytesSaveHook(unencodable):
+        """
+        Serialize an object not otherwise serializable by L{JSONEncoder}.
+
+        @param unencodable: An unencodable object.
+        @return: C{unencodable}, serialized
+        """
+        if isinstance(unencodable, bytes):
+            return unencodable.decode("charmap")
+        return objectSaveHook(unencodable)
+
+    _encoder = JSONEncoder(default=_objectOrBytesSaveHook, skipkeys=True)
+
+
+
 def eventAsJSON(event):
     """
     Encode an event as JSON, flattening it if necessary to preserve as much
@@ -179,24 +201,8 @@ def eventAsJSON(event):
         file.
     @rtype: L{unicode}
     """
-    if bytes is str:
-        kw = dict(default=objectSaveHook, encoding="charmap", skipkeys=True)
-    else:
-        def default(unencodable):
-            """
-            Serialize an object not otherwise serializable by L{dumps}.
-
-            @param unencodable: An unencodable object.
-            @return: C{unencodable}, serialized
-            """
-            if isinstance(unencodable, bytes):
-                return unencodable.decode("charmap")
-            return objectSaveHook(unencodable)
-
-        kw = dict(default=default, skipkeys=True)
-
     flattenEvent(event)
-    result = dumps(event, **kw)
+    result = _encoder.encode(event)
     if not isinstance(result, unicode):
         return unicode(result, "utf-8", "replace")
     return result
@@ -249,11 +255,38 @@ def jsonFileLogObserver(outFile, recordSeparator=u"\x1e"):
 
 
 
+def _mapFile(inFile):
+    """
+    Map the rest of a file into memory, if it is a regular file read as
+    L{bytes}.
+
+    @param inFile: A (readable) file-like object.
+
+    @return: The memory map of the whole file and the current position in it,
+        or L{None} if C{inFile} cannot be mapped.
+    @rtype: L{tuple} of L{mmap.mmap} and L{int}, or L{None}
+    """
+    if ioType(inFile) is not bytes:
+        return None
+    try:
+        position = inFile.tell()
+        mapped = mmap.mmap(inFile.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, EnvironmentError, ValueError,
+            io.UnsupportedOperation):
+        return None
+    return mapped, position
+
+
+
 def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
     """
     Load events from a file previously saved with L{jsonFileLogObserver}.
     Event records that are truncated or otherwise unreadable are ignored.
 
+    Events are decoded as they are iterated over.  Regular files opened in
+    binary mode are mapped into memory rather than read, and are left
+    positioned at their end once all events have been loaded.
+
     @param inFile: A (readable) file-like object.  Data read from C{inFile}
         should be L{unicode} or UTF-8 L{bytes}.
     @type inFile: iterable of lines
@@ -264,7 +297,7 @@ def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
     @type recordSeparator: L{unicode}
 
     @param bufferSize: The size of the read buffer used while reading from
-        C{inFile}.
+        C{inFile}, unless it is mapped into memory.
     @type bufferSize: integer
 
     @return: Log events as read from C{inFile}.
@@ -276,13 +309,13 @@ def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
         else:
             return s.encode("utf-8")
 
-    def eventFromBytearray(record):
+    def eventFromBytes(record):
         try:
-            text = bytes(record).decode("utf-8")
+            text = record.decode("utf-8")
         except UnicodeDecodeError:
             log.error(
                 u"Unable to decode UTF-8 for JSON record: {record!r}",
-                record=bytes(record)
+                record=record
             )
             return None
 
@@ -291,12 +324,26 @@ def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
         except ValueError:
             log.error(
                 u"Unable to read JSON record: {record!r}",
-                record=bytes(record)
+                record=record
             )
             return None
 
+    mapped = _mapFile(inFile)
+    if mapped is None:
+        buffer, position = b"", 0
+
+        def read():
+            return asBytes(inFile.read(bufferSize))
+    else:
+        buffer, position = mapped
+
+        def read():
+            return b""
+
     if recordSeparator is None:
-        first = asBytes(inFile.read(1))
+        if mapped is None:
+            buffer = asBytes(inFile.read(1))
+        first = buffer[position:position + 1]
 
         if first == b"\x1e":
             # This looks json-text-sequence compliant.
@@ -308,43 +355,59 @@ def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
 
     else:
         recordSeparator = asBytes(recordSeparator)
-        first = b""
 
     if recordSeparator == b"":
         recordSeparator = b"\n"  # Split on newlines below
 
-        eventFromRecord = eventFromBytearray
+        eventFromRecord = eventFromBytes
 
     else:
         def eventFromRecord(record):
-            if record[-1] == ord("\n"):
-                return eventFromBytearray(record)
+            if record.endswith(b"\n"):
+                return eventFromBytes(record)
             else:
                 log.error(
                     u"Unable to read truncated JSON record: {record!r}",
-                    record=bytes(record)
+                    record=record
                 )
             return None
 
-    buffer = bytearray(first)
-
-    while True:
-        newData = inFile.read(bufferSize)
-
-        if not newData:
-            if len(buffer) > 0:
-                event = eventFromRecord(buffer)
-                if event is not None:
-                    yield event
-            break
-
-        buffer += asBytes(newData)
-        records = buffer.split(recordSeparator)
-
-        for record in records[:-1]:
-            if len(record) > 0:
-                event = eventFromRecord(record)
-                if event is not None:
-                    yield event
-
-        buffer = records[-1]
+    # The end of the last record loaded from a mapped file.
+    loaded = position
+
+    try:
+        searchFrom = position
+        while True:
+            end = buffer.find(recordSeparator, searchFrom)
+            while end != -1:
+                record = buffer[position:end]
+                position = end + len(recordSeparator)
+                loaded = end
+                if record:
+                    event = eventFromRecord(record)
+                    if event is not None:
+                        yield event
+                end = buffer.find(recordSeparator, position)
+
+            newData = read()
+            if not newData:
+                break
+            # The record at the end of the buffer has no separator yet, so
+            # only look for one where the new data could complete it.
+            buffer = buffer[position:] + newData
+            searchFrom = max(
+                0, len(buffer) - len(newData) - len(recordSeparator) + 1
+            )
+            position = 0
+
+        if position < len(buffer):
+            record = buffer[position:]
+            loaded = len(buffer)
+            event = eventFromRecord(record)
+            if event is not None:
+                yield event
+    finally:
+        if mapped is not None:
+            # Leave the file after the records which were loaded.
+            inFile.seek(loaded)
+            buffer.close()
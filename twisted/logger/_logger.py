@@ -19,7 +19,15 @@ class Logger(object):
     A L{Logger} emits log messages to an observer.  You should instantiate it
     as a class or module attribute, as documented in L{this module's
     documentation <twisted.logger>}.
+
+    @ivar levelPredicate: A L{LogLevelFilterPredicate
+        <twisted.logger.LogLevelFilterPredicate>} giving the minimum log level
+        of the events this logger emits, or L{None} to emit events at every
+        level.  Events below that level are dropped before they are built, so
+        that logging them costs next to nothing; filter the observer with the
+        same predicate so that events from other sources are dropped as well.
     """
+    levelPredicate = None
 
     @staticmethod
     def _namespaceFromCallingContext():
@@ -32,7 +40,8 @@ class Logger(object):
         return currentframe(2).f_globals["__name__"]
 
 
-    def __init__(self, namespace=None, source=None, observer=None):
+    def __init__(self, namespace=None, source=None, observer=None,
+                 levelPredicate=None):
         """
         @param namespace: The namespace for this logger.  Uses a dotted
             notation, as used by python modules.  If not L{None}, then the name
@@ -47,6 +56,11 @@ class Logger(object):
         @param observer: The observer that this logger will send events to.
             If L{None}, use the L{global log publisher <globalLogPublisher>}.
         @type observer: L{ILogObserver}
+
+        @param levelPredicate: The predicate giving the minimum log level of
+            the events this logger emits, if any.
+        @type levelPredicate: L{LogLevelFilterPredicate
+            <twisted.logger.LogLevelFilterPredicate>}
         """
         if namespace is None:
             namespace = self._namespaceFromCallingContext()
@@ -60,6 +74,9 @@ class Logger(object):
         else:
             self.observer = observer
 
+        if levelPredicate is not None:
+            self.levelPredicate = levelPredicate
+
 
     def __get__(self, oself, type=None):
         """
@@ -89,6 +106,7 @@ class Logger(object):
             ".".join([type.__module__, type.__name__]),
             source,
             observer=self.observer,
+            levelPredicate=self.levelPredicate,
         )
 
 
@@ -96,6 +114,22 @@ class Logger(object):
         return "<%s %r>" % (self.__class__.__name__, self.namespace)
 
 
+    def _levelDisabled(self, level):
+        """
+        Determine whether events at the given level are dropped by
+        C{levelPredicate}.
+
+        @param level: a L{LogLevel}
+
+        @return: L{True} if events at C{level} are below the log level of this
+            logger's namespace, L{False} otherwise.
+        @rtype: L{bool}
+        """
+        priorities = LogLevel._levelPriorities
+        return priorities[level] < priorities[
+            self.levelPredicate.logLevelForNamespace(self.namespace)]
+
+
     def emit(self, level, format=None, **kwargs):
         """
         Emit a log event to all log observers at the given level.
@@ -111,7 +145,7 @@ class Logger(object):
             non-deterministic behavior from observers that schedule work for
             later execution.
         """
-        if level not in LogLevel.iterconstants():
+        if level not in LogLevel._levelPriorities:
             self.failure(
                 "Got invalid log level {invalidLevel!r} in {logger}.emit().",
                 Failure(InvalidLogLevelError(level)),
@@ -120,6 +154,9 @@ class Logger(object):
             )
             return
 
+        if self.levelPredicate is not None and self._levelDisabled(level):
+            return
+
         event = kwargs
         event.update(
             log_logger=self, log_level=level, log_namespace=self.namespace,
@@ -191,6 +228,9 @@ class Logger(object):
             non-deterministic behavior from observers that schedule work for
             later execution.
         """
+        if (self.levelPredicate is not None and
+                self._levelDisabled(LogLevel.debug)):
+            return
         self.emit(LogLevel.debug, format, **kwargs)
 
 
@@ -207,6 +247,9 @@ class Logger(object):
             non-deterministic behavior from observers that schedule work for
             later execution.
         """
+        if (self.levelPredicate is not None and
+                self._levelDisabled(LogLevel.info)):
+            return
         self.emit(LogLevel.info, format, **kwargs)
 
 
@@ -223,6 +266,9 @@ class Logger(object):
             non-deterministic behavior from observers that schedule work for
             later execution.
         """
+        if (self.levelPredicate is not None and
+                self._levelDisabled(LogLevel.warn)):
+            return
         self.emit(LogLevel.warn, format, **kwargs)
 
 
@@ -239,6 +285,9 @@ class Logger(object):
             non-deterministic behavior from observers that schedule work for
             later execution.
         """
+        if (self.levelPredicate is not None and
+                self._levelDisabled(LogLevel.error)):
+            return
         self.emit(LogLevel.error, format, **kwargs)
 
 
@@ -255,6 +304,9 @@ class Logger(object):
             non-deterministic behavior from observers that schedule work for
             later execution.
         """
+        if (self.levelPredicate is not None and
+                self._levelDisabled(LogLevel.critical)):
+            return
         self.emit(LogLevel.critical, format, **kwargs)
 
 
@@ -0,0 +1,407 @@
+# -*- test-case-name: twisted.logger.test.test_metrics -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Counters, gauges and histograms.
+
+Metrics are kept in a L{MetricsRegistry}, from which exporters collect them:
+L{PeriodicMetricsLogger} logs them, and
+L{MetricsResource <twisted.web.metrics.MetricsResource>} serves them to
+Prometheus.  Twisted keeps the metrics of its own internals in
+L{globalMetrics}::
+
+    from twisted.logger import globalMetrics
+
+    jobsDone = globalMetrics.counter(
+        "myapp_jobs_done_total", u"Jobs done.")
+
+    def doJob(job):
+        ...
+        jobsDone.increment()
+
+Updating a metric only changes a number, so that it can be done on hot
+paths; metrics are not locked, and are meant to be updated from the reactor
+thread.  Gauges may instead call a function to sample their value when they
+are collected.
+"""
+
+from bisect import bisect_left
+
+from ._logger import Logger
+
+
+
+class Counter(object):
+    """
+    A metric counting occurrences of something, or adding up amounts.
+
+    @ivar name: The name of the metric.
+    @type name: L{str} (native string)
+
+    @ivar help: The description of the metric.
+    @type help: L{unicode}
+
+    @ivar value: The count.
+    @type value: L{int} or L{float}
+
+    @since: 16.4
+    """
+    kind = "counter"
+
+    def __init__(self, name, help=u""):
+        """
+        @param name: The name of the metric.
+        @type name: L{str} (native string)
+
+        @param help: The description of the metric.
+        @type help: L{unicode}
+        """
+        self.name = name
+        self.help = help
+        self.value = 0
+
+
+    def increment(self, amount=1):
+        """
+        Add to the count.
+
+        @param amount: The amount to add.
+        @type amount: L{int} or L{float}
+        """
+        self.value += amount
+
+
+    def sample(self):
+        """
+        @return: The count.
+        @rtype: L{int} or L{float}
+        """
+        return self.value
+
+
+
+class Gauge(object):
+    """
+    A metric giving the current value of something.
+
+    @ivar name: The name of the metric.
+    @type name: L{str} (native string)
+
+    @ivar help: The description of the metric.
+    @type help: L{unicode}
+
+    @ivar function: A callable returning the value of the gauge when it is
+        sampled, or L{None} if its value is set with L{set}.
+
+    @since: 16.4
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help=u"", function=None):
+        """
+        @param name: The name of the metric.
+        @type name: L{str} (native string)
+
+        @param help: The description of the metric.
+        @type help: L{unicode}
+
+        @param function: A callable returning the value of the gauge when it
+            is sampled.
+        """
+        self.name = name
+        self.help = help
+        self.function = function
+        self._value = 0
+
+
+    def set(self, value):
+        """
+        Set the value of the gauge.
+
+        @param value: The value.
+        @type value: L{int} or L{float}
+        """
+        self._value = value
+
+
+    def sample(self):
+        """
+        @return: The value of the gauge.
+        @rtype: L{int} or L{float}
+        """
+        if self.function is not None:
+            return self.function()
+        return self._value
+
+
+
+class Histogram(object):
+    """
+    A metric counting observed values in buckets.
+
+    @ivar name: The name of the metric.
+    @type name: L{str} (native string)
+
+    @ivar help: The description of the metric.
+    @type help: L{unicode}
+
+    @ivar buckets: The upper bounds of the buckets, in increasing order.
+        Values larger than the last bound are only counted in C{count}.
+    @type buckets: L{tuple}
+
+    @ivar count: The number of values observed.
+    @type count: L{int}
+
+    @ivar sum: The sum of the values observed.
+    @type sum: L{int} or L{float}
+
+    @since: 16.4
+    """
+    kind = "histogram"
+
+    defaultBuckets = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+    )
+
+    def __init__(self, name, help=u"", buckets=defaultBuckets):
+        """
+        @param name: The name of the metric.
+        @type name: L{str} (native string)
+
+        @param help: The description of the metric.
+        @type help: L{unicode}
+
+        @param buckets: The upper bounds of the buckets, by default suitable
+            for durations in seconds.
+        @type buckets: iterable of L{int} or L{float}
+        """
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+
+    def observe(self, value):
+        """
+        Count a value in the bucket it belongs to.
+
+        @param value: The value.
+        @type value: L{int} or L{float}
+        """
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+    def sample(self):
+        """
+        @return: The number of values observed, as C{"count"}, their sum, as
+            C{"sum"}, and for each upper bound of the buckets, the number of
+            values not larger than it, as C{"buckets"}.
+        @rtype: L{dict}
+        """
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return dict(count=self.count, sum=self.sum, buckets=buckets)
+
+
+
+class MetricsRegistry(object):
+    """
+    A collection of metrics, each with a different name.
+
+    @since: 16.4
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+
+    def _metric(self, metricType, name, *args):
+        """
+        Look up a metric, or create it.
+
+        @param metricType: The type of the metric.
+
+        @param name: The name of the metric.
+        @type name: L{str} (native string)
+
+        @param args: The other arguments of C{metricType}.
+
+        @return: The metric.
+
+        @raise ValueError: If a metric of another type has this name.
+        """
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = metricType(name, *args)
+        elif type(metric) is not metricType:
+            raise ValueError(
+                "Metric %r is a %s, not a %s" % (
+                    name, metric.kind, metricType.kind))
+        return metric
+
+
+    def counter(self, name, help=u""):
+        """
+        Look up a L{Counter}, or create it.
+
+        @param name: The name of the metric.
+        @type name: L{str} (native string)
+
+        @param help: The description of the metric.
+        @type help: L{unicode}
+
+        @return: The counter.
+        @rtype: L{Counter}
+
+        @raise ValueError: If a metric of another type has this name.
+        """
+        return self._metric(Counter, name, help)
+
+
+    def gauge(self, name, help=u"", function=None):
+        """
+        Look up a L{Gauge}, or create it.
+
+        @param name: The name of the metric.
+        @type name: L{str} (native string)
+
+        @param help: The description of the metric.
+        @type help: L{unicode}
+
+        @param function: If not L{None}, the callable the gauge samples,
+            replacing any it already had.
+
+        @return: The gauge.
+        @rtype: L{Gauge}
+
+        @raise ValueError: If a metric of another type has this name.
+        """
+        gauge = self._metric(Gauge, name, help)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+
+    def histogram(self, name, help=u"", buckets=Histogram.defaultBuckets):
+        """
+        Look up a L{Histogram}, or create it.
+
+        @param name: The name of the metric.
+        @type name: L{str} (native string)
+
+        @param help: The description of the metric.
+        @type help: L{unicode}
+
+        @param buckets: The upper bounds of the buckets of the histogram, if
+            it is created.
+        @type buckets: iterable of L{int} or L{float}
+
+        @return: The histogram.
+        @rtype: L{Histogram}
+
+        @raise ValueError: If a metric of another type has this name.
+        """
+        return self._metric(Histogram, name, help, buckets)
+
+
+    def collect(self):
+        """
+        @return: The metrics, sorted by name.
+        @rtype: L{list} of L{Counter}, L{Gauge} and L{Histogram}
+        """
+        return [self._metrics[name] for name in sorted(self._metrics)]
+
+
+
+globalMetrics = MetricsRegistry()
+
+
+
+class PeriodicMetricsLogger(object):
+    """
+    An exporter logging the samples of the metrics of a registry at regular
+    intervals.
+
+    Each event has a C{"metrics"} key mapping the names of the metrics to
+    their samples, for observers of structured events, and is formatted as
+    their names and values.
+
+    @ivar interval: The number of seconds between events.
+    @type interval: L{float}
+
+    @since: 16.4
+    """
+
+    def __init__(self, registry=None, interval=60, log=None, clock=None):
+        """
+        @param registry: The registry of the metrics logged, by default
+            L{globalMetrics}.
+        @type registry: L{MetricsRegistry}
+
+        @param interval: The number of seconds between events.
+        @type interval: L{float}
+
+        @param log: The logger emitting the events.
+        @type log: L{Logger}
+
+        @param clock: The clock scheduling the events, by default the global
+            reactor.
+        @type clock: L{IReactorTime
+            <twisted.internet.interfaces.IReactorTime>} provider
+        """
+        if registry is None:
+            registry = globalMetrics
+        if log is None:
+            log = Logger()
+        self._registry = registry
+        self.interval = interval
+        self._log = log
+        self._clock = clock
+        self._call = None
+
+
+    def start(self):
+        """
+        Start logging the metrics.
+        """
+        from twisted.internet.task import LoopingCall
+        self._call = LoopingCall(self.logMetrics)
+        if self._clock is not None:
+            self._call.clock = self._clock
+        self._call.start(self.interval, now=False)
+
+
+    def stop(self):
+        """
+        Stop logging the metrics.
+        """
+        if self._call is not None and self._call.running:
+            self._call.stop()
+        self._call = None
+
+
+    def logMetrics(self):
+        """
+        Log the current samples of the metrics.
+        """
+        metrics = {}
+        summary = []
+        for metric in self._registry.collect():
+            sample = metrics[metric.name] = metric.sample()
+            if metric.kind == "histogram":
+                summary.append(u"{0}={1}/{2}".format(
+                    metric.name, sample["count"], sample["sum"]))
+            else:
+                summary.append(u"{0}={1}".format(metric.name, sample))
+        self._log.info(
+            u"Metrics: {summary}",
+            summary=u" ".join(summary), metrics=metrics,
+        )
@@ -5,7 +5,8 @@
 Test cases for L{twisted.logger._file}.
 """
 
-from io import StringIO
+import threading
+from io import BytesIO, StringIO
 
 from zope.interface.verify import verifyObject, BrokenMethodImplementation
 
@@ -16,6 +17,11 @@ from twisted.python.compat import unicode
 from .._observer import ILogObserver
 from .._file import FileLogObserver
 from .._file import textFileLogObserver
+from .._file import ThreadedFileLogObserver
+from .._format import formatEvent
+
+# How long to wait for the writer thread, in seconds.
+WAIT_TIMEOUT = 10
 
 
 
@@ -169,6 +175,232 @@ class TextFileLogObserverTests(TestCase):
 
 
 
+class ThreadedFileLogObserverTests(TestCase):
+    """
+    Tests for L{ThreadedFileLogObserver}.
+    """
+
+    def observerFor(self, outFile, maxQueueSize=10000):
+        """
+        Create a L{ThreadedFileLogObserver} writing formatted events to a
+        file, which is stopped after the test.
+
+        @param outFile: The file.
+
+        @param maxQueueSize: The maximum number of events queued.
+        @type maxQueueSize: L{int}
+
+        @return: The observer.
+        @rtype: L{ThreadedFileLogObserver}
+        """
+        observer = ThreadedFileLogObserver(
+            FileLogObserver(outFile, lambda e: formatEvent(e) + u"\n"),
+            maxQueueSize=maxQueueSize
+        )
+        self.addCleanup(observer.stop)
+        return observer
+
+
+    def test_interface(self):
+        """
+        L{ThreadedFileLogObserver} is an L{ILogObserver}.
+        """
+        observer = self.observerFor(StringIO())
+        try:
+            verifyObject(ILogObserver, observer)
+        except BrokenMethodImplementation as e:
+            self.fail(e)
+
+
+    def test_observeWrites(self):
+        """
+        L{ThreadedFileLogObserver} writes the events it observes, in order,
+        by the time L{ThreadedFileLogObserver.stop} returns.
+        """
+        fileHandle = BytesIO()
+        observer = self.observerFor(fileHandle)
+        for n in range(100):
+            observer(dict(log_format=u"event {n}", n=n))
+        observer.stop()
+
+        self.assertEqual(
+            fileHandle.getvalue(),
+            b"".join(b"event " + str(n).encode("ascii") + b"\n"
+                     for n in range(100))
+        )
+        self.assertFalse(observer._thread.is_alive())
+
+
+    def test_formattedWhenObserved(self):
+        """
+        Events are formatted when they are observed, rather than when they
+        are written.
+        """
+        fileHandle = BlockingFile()
+        observer = self.observerFor(fileHandle)
+        observer(dict(log_format=u"first"))
+        self.assertTrue(fileHandle.writing.wait(WAIT_TIMEOUT))
+        event = dict(log_format=u"{value}", value=u"before")
+        observer(event)
+        event["value"] = u"after"
+        fileHandle.release.set()
+        observer.stop()
+
+        self.assertEqual(fileHandle.written, [u"first\n", u"before\n"])
+
+
+    def test_batched(self):
+        """
+        The events queued while an earlier write is in progress are written
+        and flushed at once.
+        """
+        fileHandle = BlockingFile()
+        observer = self.observerFor(fileHandle)
+        observer(dict(log_format=u"first"))
+        self.assertTrue(fileHandle.writing.wait(WAIT_TIMEOUT))
+        for n in range(3):
+            observer(dict(log_format=u"{n}", n=n))
+        fileHandle.release.set()
+        observer.stop()
+
+        self.assertEqual(fileHandle.written, [u"first\n", u"0\n1\n2\n"])
+        self.assertEqual(fileHandle.flushes, 2)
+
+
+    def test_maxBatchSize(self):
+        """
+        No more than L{ThreadedFileLogObserver.maxBatchSize} events are
+        written at once.
+        """
+        fileHandle = BlockingFile()
+        observer = self.observerFor(fileHandle)
+        observer.maxBatchSize = 2
+        observer(dict(log_format=u"first"))
+        self.assertTrue(fileHandle.writing.wait(WAIT_TIMEOUT))
+        for n in range(3):
+            observer(dict(log_format=u"{n}", n=n))
+        fileHandle.release.set()
+        observer.stop()
+
+        self.assertEqual(
+            fileHandle.written, [u"first\n", u"0\n1\n", u"2\n"]
+        )
+
+
+    def test_dropped(self):
+        """
+        Events observed while C{maxQueueSize} events are waiting to be written
+        are dropped, and counted in L{ThreadedFileLogObserver.dropped}.  A
+        warning giving their number is written once there is room for it.
+        """
+        fileHandle = BlockingFile()
+        observer = self.observerFor(fileHandle, maxQueueSize=1)
+        observer(dict(log_format=u"first"))
+        self.assertTrue(fileHandle.writing.wait(WAIT_TIMEOUT))
+        observer(dict(log_format=u"queued"))
+        observer(dict(log_format=u"dropped"))
+        observer(dict(log_format=u"dropped"))
+        self.assertEqual(observer.dropped, 2)
+        fileHandle.release.set()
+        observer.stop()
+
+        self.assertEqual(
+            u"".join(fileHandle.written),
+            u"first\n"
+            u"queued\n"
+            u"Dropped 2 log events because too many were waiting to be "
+            u"written.\n"
+        )
+
+
+    def test_writeFailed(self):
+        """
+        Events whose writing raised an exception are counted in
+        L{ThreadedFileLogObserver.failed}, and later events are still
+        written.
+        """
+        fileHandle = BlockingFile()
+        observer = self.observerFor(fileHandle)
+        fileHandle.fail = True
+        observer(dict(log_format=u"failed"))
+        self.assertTrue(fileHandle.writing.wait(WAIT_TIMEOUT))
+        fileHandle.fail = False
+        observer(dict(log_format=u"written"))
+        fileHandle.release.set()
+        observer.stop()
+
+        self.assertEqual(observer.failed, 1)
+        self.assertEqual(fileHandle.written, [u"written\n"])
+
+
+    def test_stop(self):
+        """
+        Events observed after L{ThreadedFileLogObserver.stop} are dropped, and
+        stopping the observer again does nothing.
+        """
+        fileHandle = StringIO()
+        observer = self.observerFor(fileHandle)
+        observer.stop()
+        observer(dict(log_format=u"late"))
+        observer.stop()
+
+        self.assertEqual(observer.dropped, 1)
+        self.assertEqual(fileHandle.getvalue(), u"")
+
+
+
+class BlockingFile(object):
+    """
+    File whose writes wait for C{release} to be set.
+
+    @ivar writing: Set once a write has started.
+    @type writing: L{threading.Event}
+
+    @ivar release: Set to let writes complete.
+    @type release: L{threading.Event}
+
+    @ivar written: The data written.
+    @type written: L{list} of L{unicode}
+
+    @ivar fail: Whether writes which start now raise an exception.
+    @type fail: L{bool}
+    """
+
+    def __init__(self):
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        self.written = []
+        self.flushes = 0
+        self.fail = False
+
+
+    def write(self, data):
+        """
+        Write data, once writes are released.
+
+        @param data: data
+        @type data: L{unicode}
+
+        @raise IOError: If C{fail} was set when the write started, or if the
+            write is not released within L{WAIT_TIMEOUT} seconds.
+        """
+        fail = self.fail
+        self.writing.set()
+        if not self.release.wait(WAIT_TIMEOUT):
+            raise IOError("Write was never released")
+        if fail:
+            raise IOError("Disk full")
+        self.written.append(data)
+
+
+    def flush(self):
+        """
+        Flush buffers.
+        """
+        self.flushes += 1
+
+
+
 class DummyFile(object):
     """
     File that counts writes and flushes.
@@ -384,6 +384,45 @@ class LogLevelFilterPredicateTests(unittest.TestCase):
         )
 
 
+    def test_logLevelsCached(self):
+        """
+        Log levels looked up are cached until log levels are set or cleared.
+        """
+        predicate = LogLevelFilterPredicate()
+        namespace = "twext.web2.dav.test"
+
+        self.assertEqual(
+            predicate.logLevelForNamespace(namespace),
+            predicate.defaultLogLevel
+        )
+        self.assertEqual(
+            {namespace: predicate.defaultLogLevel}, predicate._logLevelCache
+        )
+
+        predicate.setLogLevelForNamespace("twext.web2", LogLevel.debug)
+        self.assertEqual(
+            predicate.logLevelForNamespace(namespace), LogLevel.debug
+        )
+        predicate.setLogLevelForNamespace(None, LogLevel.error)
+        predicate.setLogLevelForNamespace("twext.web2.dav", LogLevel.warn)
+        self.assertEqual(
+            predicate.logLevelForNamespace(namespace), LogLevel.warn
+        )
+        self.assertEqual(
+            predicate.logLevelForNamespace("twisted"), LogLevel.error
+        )
+
+        predicate.clearLogLevels()
+        self.assertEqual(
+            predicate.logLevelForNamespace(namespace),
+            predicate.defaultLogLevel
+        )
+        self.assertEqual(
+            predicate.logLevelForNamespace("twisted"),
+            predicate.defaultLogLevel
+        )
+
+
     def test_filtering(self):
         """
         Events are filtered based on log level/namespace.
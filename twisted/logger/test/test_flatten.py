@@ -20,8 +20,9 @@ from twisted.trial import unittest
 
 from .._format import formatEvent
 from .._flatten import (
-    flattenEvent, extractField, KeyFlattener, aFormatter
+    flattenEvent, extractField, KeyFlattener, aFormatter, flatFormat
 )
+from .. import _flatten
 
 
 
@@ -304,3 +305,53 @@ class FlatFormattingTests(unittest.TestCase):
                 'log_format': 'simple message',
             }
         )
+
+
+    def test_flatteningPlanCached(self):
+        """
+        L{flattenEvent} flattens events with the same format string by the
+        same cached plan, which gives the same result as for the first
+        event.
+        """
+        self.patch(_flatten, "_flatteningPlans", {})
+        logFormat = u"{x} {x!r} {y()} {x}"
+        events = [
+            dict(log_format=logFormat, x=n, y=lambda n=n: n * 2)
+            for n in range(2)
+        ]
+        for event in events:
+            flattenEvent(event)
+
+        self.assertEqual(list(_flatten._flatteningPlans), [logFormat])
+        self.assertEqual(formatEvent(events[0]), u"0 0 0 0")
+        self.assertEqual(formatEvent(events[1]), u"1 1 2 1")
+        self.assertEqual(events[1]["log_flattened"]["y()!s:"], u"2")
+        self.assertEqual(events[1]["log_flattened"]["x!:"], 1)
+
+
+    def test_flatteningPlansLimited(self):
+        """
+        The cache of flattening plans is emptied once it holds
+        C{_FLATTENING_PLANS_MAXIMUM} plans.
+        """
+        self.patch(_flatten, "_flatteningPlans", {})
+        self.patch(_flatten, "_FLATTENING_PLANS_MAXIMUM", 2)
+        for n in range(3):
+            flattenEvent(dict(log_format=u"{x} " + str(n), x=n))
+
+        self.assertEqual(list(_flatten._flatteningPlans), [u"{x} 2"])
+
+
+    def test_flatFormattingPlanCached(self):
+        """
+        L{flatFormat} formats flattened events with the same format string
+        by the same cached plan.
+        """
+        self.patch(_flatten, "_flatFormattingPlans", {})
+        logFormat = u"{x} and {x!r}: {y()}."
+        for n in range(2):
+            event = dict(log_format=logFormat, x=u"x", y=lambda n=n: n)
+            flattenEvent(event)
+            self.assertEqual(
+                u"x and {0!r}: {1}.".format(u"x", n), flatFormat(event))
+        self.assertEqual(list(_flatten._flatFormattingPlans), [logFormat])
@@ -19,6 +19,7 @@ from twisted.trial.unittest import SkipTest
 
 from twisted.python.compat import _PY3, unicode
 from .._levels import LogLevel
+from .. import _format
 from .._format import (
     formatEvent, formatUnformattableEvent, formatTime,
     formatEventAsClassicLogText, formatWithCall,
@@ -421,6 +422,66 @@ class FormatFieldTests(unittest.TestCase):
         )
 
 
+    def test_formatWithCallFields(self):
+        """
+        L{formatWithCall} looks up attributes and items of the values of
+        fields, and applies their conversions and format specs, including
+        format specs with fields of their own, like L{unicode.format}.
+        """
+        class Point(object):
+            x = 1.5
+            y = [u"a", u"b"]
+
+        mapping = dict(point=Point(), table={u"key": u"value"}, width=6)
+        for formatString in [
+            u"{point.x:.2f} {point.y[1]!r} {table[key]}",
+            u"{{literal}} {point.x:>{width}} {table[key]:^{width}.3}!",
+            u"",
+            u"No fields.",
+        ]:
+            self.assertEqual(
+                formatString.format(**mapping),
+                formatWithCall(formatString, mapping),
+            )
+
+
+    def test_formatWithCallPositional(self):
+        """
+        L{formatWithCall} fails like L{unicode.format} without arguments for
+        format strings with positional fields.
+        """
+        self.assertRaises(IndexError, formatWithCall, u"{0}", {})
+        self.assertRaises(
+            (IndexError, KeyError), formatWithCall, u"{} {x}", dict(x=1))
+
+
+    def test_formattingPlanCached(self):
+        """
+        L{formatWithCall} formats strings by cached plans, which give the
+        same result for each mapping.
+        """
+        self.patch(_format, "_formattingPlans", {})
+        formatString = u"{x} {y()} {x!r:>5}"
+        for n in range(2):
+            self.assertEqual(
+                u"{0} {1} {2!r:>5}".format(n, n * 2, n),
+                formatWithCall(formatString, dict(x=n, y=lambda: n * 2)),
+            )
+        self.assertEqual([formatString], list(_format._formattingPlans))
+
+
+    def test_formattingPlansLimited(self):
+        """
+        The cache of formatting plans is emptied once it holds
+        C{_FORMATTING_PLANS_MAXIMUM} plans.
+        """
+        self.patch(_format, "_formattingPlans", {})
+        self.patch(_format, "_FORMATTING_PLANS_MAXIMUM", 2)
+        for n in range(3):
+            formatEvent(dict(log_format=u"{x} " + unicode(n), x=n))
+        self.assertEqual([u"{x} 2"], list(_format._formattingPlans))
+
+
 
 class Unformattable(object):
     """
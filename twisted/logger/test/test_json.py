@@ -530,3 +530,79 @@ class LogFileReaderTests(TestCase):
 
             self.assertEqual(tuple(events), (event,))
             self.assertEqual(len(self.errorEvents), 0)
+
+
+    def test_readEventsMultiByteRecordSeparator(self):
+        """
+        L{eventsFromJSONLogFile} finds a record separator of several
+        characters split across reads.
+        """
+        with StringIO(
+            u'\x08\x08{"x": 1}\n'
+            u'\x08\x08{"y": 2}\n'
+        ) as fileHandle:
+            self._readEvents(
+                fileHandle, recordSeparator=u"\x08\x08", bufferSize=1
+            )
+            self.assertEqual(len(self.errorEvents), 0)
+
+
+    def _writeEvents(self):
+        """
+        Write the events read by L{_readEvents} to a file.
+
+        @return: The path of the file.
+        @rtype: L{str}
+        """
+        path = self.mktemp()
+        with open(path, "wb") as fileHandle:
+            fileHandle.write(b'\x1e{"x": 1}\n\x1e{"y": 2}\n')
+        return path
+
+
+    def test_readMappedFile(self):
+        """
+        L{eventsFromJSONLogFile} reads events from a regular file opened in
+        binary mode by mapping it into memory, and leaves the file at its end.
+        """
+        with open(self._writeEvents(), "rb") as fileHandle:
+            self._readEvents(fileHandle)
+            self.assertEqual(fileHandle.tell(), 20)
+            self.assertEqual(len(self.errorEvents), 0)
+
+
+    def test_readMappedFileFromPosition(self):
+        """
+        L{eventsFromJSONLogFile} reads the events of a mapped file from its
+        current position.
+        """
+        with open(self._writeEvents(), "rb") as fileHandle:
+            fileHandle.seek(10)
+            events = eventsFromJSONLogFile(fileHandle)
+
+            self.assertEqual(list(events), [{u"y": 2}])
+            self.assertEqual(len(self.errorEvents), 0)
+
+
+    def test_readMappedFileStopped(self):
+        """
+        If loading events from a mapped file stops early, the file is left
+        after the records which were loaded.
+        """
+        with open(self._writeEvents(), "rb") as fileHandle:
+            events = eventsFromJSONLogFile(fileHandle)
+
+            self.assertEqual(next(events), {u"x": 1})
+            events.close()
+            self.assertEqual(fileHandle.tell(), 10)
+
+
+    def test_readEmptyFile(self):
+        """
+        L{eventsFromJSONLogFile} reads no events from an empty file, which
+        cannot be mapped into memory.
+        """
+        path = self.mktemp()
+        open(path, "wb").close()
+        with open(path, "rb") as fileHandle:
+            self.assertEqual(list(eventsFromJSONLogFile(fileHandle)), [])
@@ -9,6 +9,7 @@ from twisted.trial import unittest
 
 from .._levels import InvalidLogLevelError
 from .._levels import LogLevel
+from .._filter import LogLevelFilterPredicate
 from .._format import formatEvent
 from .._logger import Logger
 from .._global import globalLogPublisher
@@ -252,3 +253,61 @@ class LoggerTests(unittest.TestCase):
 
         log = TestLogger(observer=publisher)
         log.info("Hello.", log_trace=[])
+
+
+    def test_levelPredicate(self):
+        """
+        Events below the log level given by C{levelPredicate} for the
+        namespace of the logger are dropped before they are emitted, and
+        changing log levels takes effect at once.
+        """
+        predicate = LogLevelFilterPredicate(defaultLogLevel=LogLevel.warn)
+        observed = []
+        log = Logger(
+            "twext.web2", observer=observed.append, levelPredicate=predicate
+        )
+
+        log.debug("debug")
+        log.info("info")
+        log.emit(LogLevel.info, "emitted info")
+        log.warn("warn")
+        log.critical("critical")
+        self.assertEqual(
+            ["warn", "critical"],
+            [event["log_format"] for event in observed]
+        )
+
+        del observed[:]
+        predicate.setLogLevelForNamespace("twext", LogLevel.debug)
+        log.debug("debug")
+        self.assertEqual(["debug"], [event["log_format"] for event in observed])
+
+
+    def test_levelPredicateNotCalled(self):
+        """
+        Events below the log level given by C{levelPredicate} are dropped
+        before L{Logger.emit} is called.
+        """
+        predicate = LogLevelFilterPredicate(defaultLogLevel=LogLevel.error)
+        log = TestLogger(levelPredicate=predicate)
+
+        log.info("info")
+        self.assertFalse(hasattr(log, "emitted"))
+        log.error("error")
+        self.assertEqual(log.emitted["format"], "error")
+
+
+    def test_descriptorLevelPredicate(self):
+        """
+        When used as a descriptor, the level predicate is propagated.
+        """
+        predicate = LogLevelFilterPredicate(defaultLogLevel=LogLevel.error)
+        observed = []
+
+        class MyObject(object):
+            log = Logger(observer=observed.append, levelPredicate=predicate)
+
+        self.assertIs(MyObject.log.levelPredicate, predicate)
+        MyObject().log.info("hello")
+        self.assertEqual([], observed)
+        self.assertIsNone(Logger().levelPredicate)
@@ -0,0 +1,230 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Test cases for L{twisted.logger._metrics}.
+"""
+
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from .._format import formatEvent
+from .._logger import Logger
+from .._metrics import Counter, Gauge, Histogram
+from .._metrics import MetricsRegistry, PeriodicMetricsLogger
+
+
+
+class CounterTests(TestCase):
+    """
+    Tests for L{Counter}.
+    """
+
+    def test_increment(self):
+        """
+        L{Counter.increment} adds one, or the amount given, to the count.
+        """
+        counter = Counter("things_total", u"Things.")
+        self.assertEqual(0, counter.sample())
+        counter.increment()
+        counter.increment(5)
+        self.assertEqual(6, counter.sample())
+        self.assertEqual(6, counter.value)
+        self.assertEqual("counter", counter.kind)
+
+
+
+class GaugeTests(TestCase):
+    """
+    Tests for L{Gauge}.
+    """
+
+    def test_set(self):
+        """
+        L{Gauge.sample} returns the value last given to L{Gauge.set}.
+        """
+        gauge = Gauge("things", u"Things.")
+        self.assertEqual(0, gauge.sample())
+        gauge.set(7)
+        gauge.set(3)
+        self.assertEqual(3, gauge.sample())
+        self.assertEqual("gauge", gauge.kind)
+
+
+    def test_function(self):
+        """
+        L{Gauge.sample} calls the function of the gauge, if it has one.
+        """
+        things = []
+        gauge = Gauge("things", function=lambda: len(things))
+        things.append(1)
+        self.assertEqual(1, gauge.sample())
+        things.append(2)
+        self.assertEqual(2, gauge.sample())
+
+
+
+class HistogramTests(TestCase):
+    """
+    Tests for L{Histogram}.
+    """
+
+    def test_observe(self):
+        """
+        L{Histogram.sample} returns the number and sum of the observed values,
+        and for each bucket the number of values not larger than its bound.
+        """
+        histogram = Histogram("sizes", buckets=[10, 1, 100])
+        for value in [0, 1, 2, 10, 50, 1000]:
+            histogram.observe(value)
+        self.assertEqual(
+            dict(count=6, sum=1063, buckets=[(1, 2), (10, 4), (100, 5)]),
+            histogram.sample())
+        self.assertEqual("histogram", histogram.kind)
+
+
+    def test_defaultBuckets(self):
+        """
+        The buckets of a L{Histogram} are by default those in
+        L{Histogram.defaultBuckets}.
+        """
+        histogram = Histogram("durations")
+        self.assertEqual(Histogram.defaultBuckets, histogram.buckets)
+
+
+
+class MetricsRegistryTests(TestCase):
+    """
+    Tests for L{MetricsRegistry}.
+    """
+
+    def test_create(self):
+        """
+        The methods of L{MetricsRegistry} create a metric of their type,
+        with the name and description given.
+        """
+        registry = MetricsRegistry()
+        counter = registry.counter("c", u"A counter.")
+        gauge = registry.gauge("g", u"A gauge.")
+        histogram = registry.histogram("h", u"A histogram.", buckets=[1])
+        self.assertIsInstance(counter, Counter)
+        self.assertIsInstance(gauge, Gauge)
+        self.assertIsInstance(histogram, Histogram)
+        self.assertEqual(
+            [("c", u"A counter."), ("g", u"A gauge."),
+             ("h", u"A histogram.")],
+            [(metric.name, metric.help) for metric in registry.collect()])
+        self.assertEqual((1,), histogram.buckets)
+
+
+    def test_lookUp(self):
+        """
+        The methods of L{MetricsRegistry} return the metric which already has
+        the name given.
+        """
+        registry = MetricsRegistry()
+        self.assertIs(registry.counter("c"), registry.counter("c"))
+        self.assertIs(registry.gauge("g"), registry.gauge("g"))
+        self.assertIs(registry.histogram("h"), registry.histogram("h"))
+
+
+    def test_otherType(self):
+        """
+        Looking up a metric of another type than the one with the same name
+        raises L{ValueError}.
+        """
+        registry = MetricsRegistry()
+        registry.counter("things")
+        self.assertRaises(ValueError, registry.gauge, "things")
+        self.assertRaises(ValueError, registry.histogram, "things")
+
+
+    def test_gaugeFunction(self):
+        """
+        L{MetricsRegistry.gauge} replaces the function of an existing gauge
+        if it is given one, and keeps it otherwise.
+        """
+        registry = MetricsRegistry()
+        gauge = registry.gauge("g", function=lambda: 1)
+        registry.gauge("g")
+        self.assertEqual(1, gauge.sample())
+        registry.gauge("g", function=lambda: 2)
+        self.assertEqual(2, gauge.sample())
+
+
+    def test_collectSorted(self):
+        """
+        L{MetricsRegistry.collect} returns the metrics sorted by name.
+        """
+        registry = MetricsRegistry()
+        registry.counter("b")
+        registry.gauge("c")
+        registry.counter("a")
+        self.assertEqual(
+            ["a", "b", "c"],
+            [metric.name for metric in registry.collect()])
+
+
+
+class PeriodicMetricsLoggerTests(TestCase):
+    """
+    Tests for L{PeriodicMetricsLogger}.
+    """
+
+    def setUp(self):
+        self.events = []
+        self.clock = Clock()
+        self.registry = MetricsRegistry()
+        self.exporter = PeriodicMetricsLogger(
+            self.registry, interval=10, clock=self.clock,
+            log=Logger(observer=self.events.append))
+
+
+    def test_logMetrics(self):
+        """
+        L{PeriodicMetricsLogger.logMetrics} logs an event with the samples
+        of the metrics by name, formatted as their names and values.
+        """
+        self.registry.counter("requests_total").increment(3)
+        self.registry.gauge("connections").set(2)
+        histogram = self.registry.histogram("durations", buckets=[1])
+        histogram.observe(0.5)
+        histogram.observe(2)
+        self.exporter.logMetrics()
+        [event] = self.events
+        self.assertEqual(
+            {"requests_total": 3, "connections": 2,
+             "durations": dict(count=2, sum=2.5, buckets=[(1, 1)])},
+            event["metrics"])
+        self.assertEqual(
+            u"Metrics: connections=2 durations=2/2.5 requests_total=3",
+            formatEvent(event))
+
+
+    def test_periodic(self):
+        """
+        L{PeriodicMetricsLogger.start} logs the metrics every C{interval}
+        seconds, from the end of the first interval, until
+        L{PeriodicMetricsLogger.stop} is called.
+        """
+        counter = self.registry.counter("ticks_total")
+        self.exporter.start()
+        self.assertEqual([], self.events)
+        for i in range(3):
+            counter.increment()
+            self.clock.advance(10)
+        self.exporter.stop()
+        self.clock.advance(10)
+        self.assertEqual(
+            [1, 2, 3],
+            [event["metrics"]["ticks_total"] for event in self.events])
+        self.assertEqual([], self.clock.getDelayedCalls())
+
+
+    def test_stopNotStarted(self):
+        """
+        L{PeriodicMetricsLogger.stop} does nothing if the exporter was not
+        started.
+        """
+        self.exporter.stop()
+        self.assertEqual([], self.events)
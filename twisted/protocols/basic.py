@@ -521,9 +521,22 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
     @cvar MAX_LENGTH: The maximum length of a line to allow (If a
                       sent line is longer than this, the connection is dropped).
                       Default is 16384.
+
+    @ivar _buffer: Bytes received, of which those from C{_bufferOffset} on
+        have not been delivered yet.
+    @type _buffer: C{bytes}
+
+    @ivar _bufferOffset: The offset within C{_buffer} of the first byte not
+        delivered yet.  Lines are delivered by advancing it rather than by
+        slicing them off C{_buffer}, which would copy the rest of the buffer
+        for each line; the delivered bytes are sliced off once the received
+        data has been handled, or while paused once they are most of
+        C{_buffer}.
+    @type _bufferOffset: C{int}
     """
     line_mode = 1
     _buffer = b''
+    _bufferOffset = 0
     _busyReceiving = False
     delimiter = b'\r\n'
     MAX_LENGTH = 16384
@@ -535,7 +548,19 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         @return: All of the cleared buffered data.
         @rtype: C{bytes}
         """
-        b, self._buffer = self._buffer, b""
+        return self._takeBuffer()
+
+
+    def _takeBuffer(self):
+        """
+        Empty the buffer.
+
+        @return: The bytes which were buffered and not delivered yet.
+        @rtype: C{bytes}
+        """
+        b = self._buffer[self._bufferOffset:]
+        self._buffer = b""
+        self._bufferOffset = 0
         return b
 
 
@@ -552,34 +577,42 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         try:
             self._busyReceiving = True
             self._buffer += data
-            while self._buffer and not self.paused:
+            # Callbacks may replace the buffer, by clearing it or by
+            # delivering more data while it is handled, so it is looked up
+            # again after each of them.
+            while len(self._buffer) > self._bufferOffset and not self.paused:
+                buffer = self._buffer
+                offset = self._bufferOffset
                 if self.line_mode:
-                    try:
-                        line, self._buffer = self._buffer.split(
-                            self.delimiter, 1)
-                    except ValueError:
-                        if len(self._buffer) > self.MAX_LENGTH:
-                            line, self._buffer = self._buffer, b''
+                    end = buffer.find(self.delimiter, offset)
+                    if end == -1:
+                        if len(buffer) - offset > self.MAX_LENGTH:
+                            line = self._takeBuffer()
                             return self.lineLengthExceeded(line)
                         return
-                    else:
-                        lineLength = len(line)
-                        if lineLength > self.MAX_LENGTH:
-                            exceeded = line + self.delimiter + self._buffer
-                            self._buffer = b''
-                            return self.lineLengthExceeded(exceeded)
-                        why = self.lineReceived(line)
-                        if (why or self.transport and
-                            self.transport.disconnecting):
-                            return why
+                    if end - offset > self.MAX_LENGTH:
+                        exceeded = self._takeBuffer()
+                        return self.lineLengthExceeded(exceeded)
+                    self._bufferOffset = end + len(self.delimiter)
+                    why = self.lineReceived(buffer[offset:end])
+                    if (why or self.transport and
+                        self.transport.disconnecting):
+                        return why
                 else:
-                    data = self._buffer
-                    self._buffer = b''
+                    data = self._takeBuffer()
                     why = self.rawDataReceived(data)
                     if why:
                         return why
         finally:
             self._busyReceiving = False
+            # While paused, the delivered bytes are only sliced off once they
+            # are most of the buffer, so resuming for each line of pipelined
+            # data does not copy the rest of it each time.
+            if self._bufferOffset and (
+                    not self.paused or
+                    self._bufferOffset * 2 >= len(self._buffer)):
+                self._buffer = self._buffer[self._bufferOffset:]
+                self._bufferOffset = 0
 
 
     def setLineMode(self, extra=b''):
@@ -292,6 +292,70 @@ a'''
         self.assertEqual(protocol.rest, b'')
 
 
+    def test_rawModeInBuffer(self):
+        """
+        When L{LineReceiver.setRawMode} is called by C{lineReceived}, the
+        rest of the data received is delivered to C{rawDataReceived} at once,
+        and the data given back to L{LineReceiver.setLineMode} is parsed for
+        lines.
+        """
+        class SwitchingReceiver(basic.LineReceiver):
+            def __init__(self):
+                self.received = []
+
+            def lineReceived(self, line):
+                self.received.append(line)
+                if line == b'raw':
+                    self.setRawMode()
+
+            def rawDataReceived(self, data):
+                self.received.append(data)
+                raw, rest = data.split(b'|', 1)
+                self.setLineMode(rest)
+
+        protocol = SwitchingReceiver()
+        protocol.dataReceived(b'one\r\nraw\r\nbytes|two\r\nthree\r\nfo')
+        protocol.dataReceived(b'ur\r\n')
+        self.assertEqual(
+            [b'one', b'raw', b'bytes|two\r\nthree\r\nfo', b'two', b'three',
+             b'four'],
+            protocol.received)
+
+
+    def test_dataReceivedWhileReceiving(self):
+        """
+        Data delivered to L{LineReceiver.dataReceived} by C{lineReceived} is
+        parsed after the data already received.
+        """
+        class ReentrantReceiver(basic.LineReceiver):
+            def __init__(self):
+                self.lines = []
+
+            def lineReceived(self, line):
+                self.lines.append(line)
+                if line == b'more':
+                    self.dataReceived(b'four\r\nfi')
+
+        protocol = ReentrantReceiver()
+        protocol.dataReceived(b'one\r\nmore\r\nthree\r\n')
+        protocol.dataReceived(b've\r\n')
+        self.assertEqual(
+            [b'one', b'more', b'three', b'four', b'five'], protocol.lines)
+
+
+    def test_deliveredDataReleased(self):
+        """
+        Once L{LineReceiver.dataReceived} returns, only the data which was
+        not delivered is kept in the buffer.
+        """
+        protocol = LineTester()
+        protocol.makeConnection(proto_helpers.StringTransport())
+        protocol.dataReceived(b'one\ntwo\nthr')
+        self.assertEqual(b'thr', protocol._buffer)
+        self.assertEqual(0, protocol._bufferOffset)
+        self.assertEqual(b'thr', protocol.clearLineBuffer())
+
+
     def test_stackRecursion(self):
         """
         Test switching modes many times on the same data.
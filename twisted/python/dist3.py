@@ -119,6 +119,7 @@ modules = [
     "twisted.internet._glibbase",
     "twisted.internet._newtls",
     "twisted.internet._pollingfile",
+    "twisted.internet._poolworker",
     "twisted.internet._posixstdio",
     "twisted.internet._posixserialport",
     "twisted.internet._signals",
@@ -137,6 +138,7 @@ modules = [
     "twisted.internet.gireactor",
     "twisted.internet.gtk3reactor",
     "twisted.internet.inotify",
+    "twisted.internet.instrumentation",
     "twisted.internet.interfaces",
     "twisted.internet.iocpreactor.__init__",
     "twisted.internet.iocpreactor.abstract",
@@ -151,6 +153,7 @@ modules = [
     "twisted.internet.pollreactor",
     "twisted.internet.posixbase",
     "twisted.internet.process",
+    "twisted.internet.processpool",
     "twisted.internet.protocol",
     "twisted.internet.reactor",
     "twisted.internet.selectreactor",
@@ -183,6 +186,7 @@ modules = [
     "twisted.logger._legacy",
     "twisted.logger._levels",
     "twisted.logger._logger",
+    "twisted.logger._metrics",
     "twisted.logger._observer",
     "twisted.logger._stdlib",
     "twisted.logger._util",
@@ -346,14 +350,19 @@ modules = [
     "twisted.web._newclient",
     "twisted.web._responses",
     "twisted.web._stan",
+    "twisted.web.caching",
     "twisted.web.demo",
     "twisted.web.error",
     "twisted.web.guard",
     "twisted.web._http2",
+    "twisted.web._multipart",
     "twisted.web.http_headers",
+    "twisted.web.metrics",
     "twisted.web.proxy",
     "twisted.web.resource",
+    "twisted.web.router",
     "twisted.web.script",
+    "twisted.web.sessions",
     "twisted.web.static",
     "twisted.web.tap",
     "twisted.web.template",
@@ -434,12 +443,14 @@ testModules = [
     "twisted.internet.test.test_inlinecb",
     "twisted.internet.test.test_iocp",
     "twisted.internet.test.test_inotify",
+    "twisted.internet.test.test_instrumentation",
     "twisted.internet.test.test_kqueuereactor",
     "twisted.internet.test.test_main",
     "twisted.internet.test.test_newtls",
     "twisted.internet.test.test_posixbase",
     "twisted.internet.test.test_posixprocess",
     "twisted.internet.test.test_process",
+    "twisted.internet.test.test_processpool",
     "twisted.internet.test.test_protocol",
     "twisted.internet.test.test_serialport",
     "twisted.internet.test.test_sigchld",
@@ -462,6 +473,7 @@ testModules = [
     "twisted.logger.test.test_legacy",
     "twisted.logger.test.test_levels",
     "twisted.logger.test.test_logger",
+    "twisted.logger.test.test_metrics",
     "twisted.logger.test.test_observer",
     "twisted.logger.test.test_stdlib",
     "twisted.logger.test.test_util",
@@ -584,6 +596,7 @@ testModules = [
     "twisted.trial.test.test_warning",
     "twisted.web.test._util",
     "twisted.web.test.test_agent",
+    "twisted.web.test.test_caching",
     "twisted.web.test.test_error",
     # The downloadPage tests weren't ported:
     "twisted.web.test.test_http",
@@ -591,10 +604,14 @@ testModules = [
     "twisted.web.test.test_flatten",
     "twisted.web.test.test_http_headers",
     "twisted.web.test.test_httpauth",
+    "twisted.web.test.test_metrics",
+    "twisted.web.test.test_multipart",
     "twisted.web.test.test_newclient",
     "twisted.web.test.test_proxy",
     "twisted.web.test.test_resource",
+    "twisted.web.test.test_router",
     "twisted.web.test.test_script",
+    "twisted.web.test.test_sessions",
     "twisted.web.test.test_stan",
     "twisted.web.test.test_static",
     "twisted.web.test.test_tap",
@@ -272,7 +272,25 @@ class LogPublisher:
         >>> log.msg('Started', system='Foo')
 
         """
-        actualEventDict = (context.get(ILogContext) or {}).copy()
+        logContext = context.get(ILogContext)
+        if (message and not kw and logContext is not None and
+                len(logContext) == 1 and "system" in logContext):
+            # Most messages are logged without keywords, in the default
+            # context or that of callWithLogger, so build their event at
+            # once with the keys _publishNew would otherwise add to it.
+            system = logContext["system"]
+            now = time.time()
+            eventDict = {
+                "system": system, "message": message, "time": now,
+                "isError": 0, "log_time": now, "log_format": u"{log_text}",
+                "log_level": NewLogLevel.info, "log_namespace": u"log_legacy",
+                "log_system": system,
+            }
+            eventDict["log_text"] = textFromEventDict(eventDict)
+            self._publishPublisher(eventDict)
+            return
+
+        actualEventDict = (logContext or {}).copy()
         actualEventDict.update(kw)
         actualEventDict['message'] = message
         actualEventDict['time'] = time.time()
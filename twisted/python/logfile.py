@@ -11,8 +11,24 @@ from __future__ import division, absolute_import
 
 # System Imports
 import os, glob, time, stat
+import calendar
+import gzip
+import re
+import shutil
+import threading
+
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 from twisted.python import threadable
+from twisted._threads import ThreadWorker
 
 
 
@@ -314,6 +330,287 @@ class DailyLogFile(BaseLogFile):
 threadable.synchronize(DailyLogFile)
 
 
+def _gzipFile(source, destination):
+    """
+    Compress a file with gzip.
+
+    @param source: The path of the file to compress.
+    @param destination: The path of the compressed file.
+    """
+    with open(source, "rb") as inFile:
+        with gzip.open(destination, "wb") as outFile:
+            shutil.copyfileobj(inFile, outFile)
+
+
+
+def _zstdFile(source, destination):
+    """
+    Compress a file with Zstandard.
+
+    @param source: The path of the file to compress.
+    @param destination: The path of the compressed file.
+    """
+    with open(source, "rb") as inFile:
+        with open(destination, "wb") as outFile:
+            zstandard.ZstdCompressor().copy_stream(inFile, outFile)
+
+
+
+def _startDaemonThread(target):
+    """
+    Run a function in a new daemon thread.
+
+    @param target: The function.
+    """
+    thread = threading.Thread(target=target, name="SegmentedLogFile")
+    thread.daemon = True
+    thread.start()
+
+
+
+class SegmentedLogFile(BaseLogFile):
+    """
+    A log file rotated once it reaches a given size or age, into segments
+    named after the time at which they were rotated, such as
+    C{twistd.log.20161018T120000.000000Z}, so that rotating it only renames
+    the current file.
+
+    Rotated segments are then compressed, and the oldest are removed once
+    there are too many of them, once they are too old, or once they take too
+    much space together.  This work is not done by L{write}, but by a
+    background worker, a daemon thread by default.
+
+    @ivar rotateLength: The size at which the log file rotates, or L{None}.
+    @type rotateLength: L{int}
+
+    @ivar rotateInterval: The number of seconds after which the log file
+        rotates, counted from when it was opened, or L{None}.
+    @type rotateInterval: L{float}
+
+    @ivar compression: The compression of rotated segments: C{"gzip"},
+        C{"zstd"}, which requires the C{zstandard} module, or L{None}.
+    @type compression: L{str}
+
+    @ivar maxSegments: The maximum number of rotated segments kept, or
+        L{None}.
+    @type maxSegments: L{int}
+
+    @ivar maxAge: The number of seconds for which rotated segments are kept,
+        counted from when they were rotated, or L{None}.
+    @type maxAge: L{float}
+
+    @ivar maxTotalSize: The maximum size of all the rotated segments kept
+        together, in bytes, or L{None}.
+    @type maxTotalSize: L{int}
+
+    @since: 16.4
+    """
+    _compressors = {
+        "gzip": (".gz", _gzipFile),
+        "zstd": (".zst", _zstdFile),
+    }
+
+    _segmentPattern = re.compile(
+        r"^(\d{8}T\d{6})\.(\d{6})Z(\.gz|\.zst)?$")
+
+    def __init__(self, name, directory, rotateLength=1000000,
+                 rotateInterval=None, defaultMode=None, compression="gzip",
+                 maxSegments=None, maxAge=None, maxTotalSize=None,
+                 worker=None):
+        """
+        Create a log file rotating into timestamped segments.
+
+        @param name: file name.
+        @type name: C{str}
+        @param directory: path of the log file.
+        @type directory: C{str}
+        @param rotateLength: size of the log file where it rotates. Default to
+            1M.
+        @type rotateLength: C{int}
+        @param rotateInterval: number of seconds after which the log file
+            rotates.
+        @type rotateInterval: C{float}
+        @param defaultMode: mode used to create the file.
+        @type defaultMode: C{int}
+        @param compression: compression of the rotated segments.
+        @type compression: C{str}
+        @param maxSegments: maximum number of rotated segments kept.
+        @type maxSegments: C{int}
+        @param maxAge: number of seconds for which rotated segments are kept.
+        @type maxAge: C{float}
+        @param maxTotalSize: maximum size of the rotated segments kept.
+        @type maxTotalSize: C{int}
+        @param worker: the worker compressing and removing rotated segments.
+            By default, a thread is started to do it.
+        @type worker: L{twisted._threads.IWorker}
+
+        @raise ValueError: if C{compression} is not supported.
+        """
+        if compression is not None:
+            if compression not in self._compressors:
+                raise ValueError(
+                    "Unknown log file compression: %r" % (compression,))
+            if compression == "zstd" and zstandard is None:
+                raise ValueError(
+                    "zstd log file compression requires zstandard")
+        self.rotateLength = rotateLength
+        self.rotateInterval = rotateInterval
+        self.compression = compression
+        self.maxSegments = maxSegments
+        self.maxAge = maxAge
+        self.maxTotalSize = maxTotalSize
+        if worker is None:
+            worker = ThreadWorker(_startDaemonThread, Queue())
+        self._worker = worker
+        BaseLogFile.__init__(self, name, directory, defaultMode)
+
+
+    def currentTime(self):
+        """
+        Return the current time, in seconds since the epoch.
+
+        This function primarily exists so you may overload it to make unit
+        testing possible.
+        """
+        return time.time()
+
+
+    def _openFile(self):
+        BaseLogFile._openFile(self)
+        self.size = self._file.tell()
+        self.openedAt = self.currentTime()
+
+
+    def shouldRotate(self):
+        """
+        Rotate when the log file is not empty, and either its size is larger
+        than rotateLength or it was opened rotateInterval seconds ago.
+        """
+        if not self.size:
+            return False
+        if self.rotateLength and self.size >= self.rotateLength:
+            return True
+        return bool(self.rotateInterval and
+                    self.currentTime() - self.openedAt >= self.rotateInterval)
+
+
+    def write(self, data):
+        """
+        Write some data to the file.
+        """
+        BaseLogFile.write(self, data)
+        self.size += len(data)
+
+
+    def rotate(self):
+        """
+        Rotate the file into a new segment and create a new one, and have the
+        segments compressed and removed in the background.
+
+        If it's not possible to open new logfile, this will fail silently,
+        and continue logging to old logfile.
+        """
+        if not (os.access(self.directory, os.W_OK) and
+                os.access(self.path, os.W_OK)):
+            return
+        stamp = int(self.currentTime() * 1000000)
+        while True:
+            segment = "%s.%s.%06dZ" % (
+                self.path,
+                time.strftime("%Y%m%dT%H%M%S",
+                              time.gmtime(stamp // 1000000)),
+                stamp % 1000000)
+            if not any(os.path.exists(segment + extension)
+                       for extension in ["", ".gz", ".zst"]):
+                break
+            stamp += 1
+        self._file.close()
+        os.rename(self.path, segment)
+        self._openFile()
+        self._worker.do(self._maintainSegments)
+
+
+    def listSegments(self):
+        """
+        Return the paths of the rotated segments, oldest first.
+
+        @return: the paths, with the time at which each was rotated.
+        @rtype: C{list} of C{tuple} of C{str} and C{float}
+        """
+        segments = {}
+        prefix = self.name + "."
+        for name in os.listdir(self.directory):
+            if not name.startswith(prefix):
+                continue
+            match = self._segmentPattern.match(name[len(prefix):])
+            if match is None:
+                continue
+            stamp, micros, extension = match.groups()
+            if (stamp, micros) in segments and extension:
+                # Not compressed yet, or not completely.
+                continue
+            segments[stamp, micros] = name
+        return [
+            (os.path.join(self.directory, segments[stamp, micros]),
+             calendar.timegm(time.strptime(stamp, "%Y%m%dT%H%M%S")) +
+             int(micros) / 1000000)
+            for (stamp, micros) in sorted(segments)
+        ]
+
+
+    def _maintainSegments(self):
+        """
+        Compress the rotated segments which are not compressed yet, and remove
+        the oldest segments which are not to be kept.  This runs in the
+        worker.
+        """
+        try:
+            segments = []
+            for path, rotatedAt in self.listSegments():
+                if self.compression is not None and not (
+                        path.endswith(".gz") or path.endswith(".zst")):
+                    extension, compress = self._compressors[self.compression]
+                    compress(path, path + extension)
+                    os.remove(path)
+                    path += extension
+                segments.append((path, rotatedAt, os.path.getsize(path)))
+
+            now = self.currentTime()
+            totalSize = sum(size for path, rotatedAt, size in segments)
+            for path, rotatedAt, size in segments:
+                if not (
+                    (self.maxSegments is not None and
+                     len(segments) > self.maxSegments) or
+                    (self.maxAge is not None and
+                     now - rotatedAt > self.maxAge) or
+                    (self.maxTotalSize is not None and
+                     totalSize > self.maxTotalSize)
+                ):
+                    break
+                os.remove(path)
+                segments = segments[1:]
+                totalSize -= size
+        except:
+            from twisted.python import log
+            log.err(None, "Unable to maintain log file segments")
+
+
+    def __getstate__(self):
+        state = BaseLogFile.__getstate__(self)
+        del state["size"]
+        del state["openedAt"]
+        del state["_worker"]
+        return state
+
+
+    def __setstate__(self, state):
+        state["_worker"] = ThreadWorker(_startDaemonThread, Queue())
+        BaseLogFile.__setstate__(self, state)
+
+threadable.synchronize(SegmentedLogFile)
+
+
+
 class LogReader:
     """Read from a log file."""
 
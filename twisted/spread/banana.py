@@ -12,26 +12,48 @@ for more details.
 @author: Glyph Lefkowitz
 """
 
-import copy, struct
+import copy, re, struct
 from io import BytesIO
 
 from twisted.internet import protocol
 from twisted.persisted import styles
 from twisted.python import log
-from twisted.python.compat import iterbytes, long, _bytesChr as chr
+from twisted.python.compat import long, _bytesChr as chr
 from twisted.python.reflect import fullyQualifiedName
 
 class BananaError(Exception):
     pass
 
 def int2b128(integer, stream):
-    if integer == 0:
-        stream(chr(0))
-        return
-    assert integer > 0, "can only encode positive integers"
+    assert integer >= 0, "can only encode positive integers"
+    stream(_int2b128(integer))
+
+
+
+# The encodings of the integers which fit in a single base 128 digit.
+_b128Digits = [chr(i) for i in range(128)]
+
+
+
+def _int2b128(integer):
+    """
+    Convert a positive integer into its base 128 representation, least
+    significant digit first, as L{int2b128} writes it.
+
+    @param integer: The integer to convert.
+    @type integer: L{int} or L{long}
+
+    @return: The integer encoded in a byte string.
+    @rtype: L{bytes}
+    """
+    if integer < 128:
+        return _b128Digits[integer]
+    digits = bytearray()
     while integer:
-        stream(chr(integer & 0x7f))
-        integer = integer >> 7
+        digits.append(integer & 0x7f)
+        integer >>= 7
+    return bytes(digits)
+
 
 
 def b1282int(st):
@@ -47,8 +69,7 @@ def b1282int(st):
     """
     e = 1
     i = 0
-    for char in iterbytes(st):
-        n = ord(char)
+    for n in bytearray(st):
         i += (n * e)
         e <<= 7
     return i
@@ -68,6 +89,9 @@ VOCAB    = chr(0x87)
 
 HIGH_BIT_SET = chr(0x80)
 
+# Finds the type byte ending the prefix of the next item.
+_findTypeByte = re.compile(b'[\x80-\xff]').search
+
 def setPrefixLimit(limit):
     """
     Set the limit on the prefix length for all Banana connections
@@ -173,79 +197,78 @@ class Banana(protocol.Protocol, styles.Ephemeral):
     buffer = b''
 
     def dataReceived(self, chunk):
+        """
+        Decode the items in the data received.
+
+        Items are decoded from an offset into the received data, which is
+        only sliced once per call, to keep the bytes which are not a complete
+        item yet for the next one.
+        """
         buffer = self.buffer + chunk
         listStack = self.listStack
         gotItem = self.gotItem
-        while buffer:
-            assert self.buffer != buffer, "This ain't right: %s %s" % (repr(self.buffer), repr(buffer))
-            self.buffer = buffer
-            pos = 0
-            for ch in iterbytes(buffer):
-                if ch >= HIGH_BIT_SET:
-                    break
-                pos = pos + 1
-            else:
-                if pos > self.prefixLimit:
-                    raise BananaError("Security precaution: more than %d bytes of prefix" % (self.prefixLimit,))
-                return
-            num = buffer[:pos]
-            typebyte = buffer[pos:pos+1]
-            rest = buffer[pos+1:]
-            if len(num) > self.prefixLimit:
-                raise BananaError("Security precaution: longer than %d bytes worth of prefix" % (self.prefixLimit,))
-            if typebyte == LIST:
-                num = b1282int(num)
-                if num > SIZE_LIMIT:
-                    raise BananaError("Security precaution: List too long.")
-                listStack.append((num, []))
-                buffer = rest
-            elif typebyte == STRING:
-                num = b1282int(num)
-                if num > SIZE_LIMIT:
-                    raise BananaError("Security precaution: String too long.")
-                if len(rest) >= num:
-                    buffer = rest[num:]
-                    gotItem(rest[:num])
-                else:
+        end = len(buffer)
+        pos = 0
+        try:
+            while pos < end:
+                match = _findTypeByte(buffer, pos)
+                if match is None:
+                    if end - pos > self.prefixLimit:
+                        raise BananaError("Security precaution: more than %d bytes of prefix" % (self.prefixLimit,))
                     return
-            elif typebyte == INT:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(num)
-            elif typebyte == LONGINT:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(num)
-            elif typebyte == LONGNEG:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(-num)
-            elif typebyte == NEG:
-                buffer = rest
-                num = -b1282int(num)
-                gotItem(num)
-            elif typebyte == VOCAB:
-                buffer = rest
-                num = b1282int(num)
-                item = self.incomingVocabulary[num]
-                if self.currentDialect == b'pb':
-                    # the sender issues VOCAB only for dialect pb
-                    gotItem(item)
+                typePos = match.start()
+                if typePos - pos > self.prefixLimit:
+                    raise BananaError("Security precaution: longer than %d bytes worth of prefix" % (self.prefixLimit,))
+                num = b1282int(buffer[pos:typePos])
+                typebyte = buffer[typePos:typePos + 1]
+                rest = typePos + 1
+                if typebyte == LIST:
+                    if num > SIZE_LIMIT:
+                        raise BananaError("Security precaution: List too long.")
+                    listStack.append((num, []))
+                    pos = rest
+                elif typebyte == STRING:
+                    if num > SIZE_LIMIT:
+                        raise BananaError("Security precaution: String too long.")
+                    if end - rest >= num:
+                        pos = rest + num
+                        gotItem(buffer[rest:pos])
+                    else:
+                        return
+                elif typebyte == INT:
+                    pos = rest
+                    gotItem(num)
+                elif typebyte == LONGINT:
+                    pos = rest
+                    gotItem(num)
+                elif typebyte == LONGNEG:
+                    pos = rest
+                    gotItem(-num)
+                elif typebyte == NEG:
+                    pos = rest
+                    gotItem(-num)
+                elif typebyte == VOCAB:
+                    pos = rest
+                    item = self.incomingVocabulary[num]
+                    if self.currentDialect == b'pb':
+                        # the sender issues VOCAB only for dialect pb
+                        gotItem(item)
+                    else:
+                        raise NotImplementedError(
+                            "Invalid item for pb protocol {0!r}".format(item))
+                elif typebyte == FLOAT:
+                    if end - rest >= 8:
+                        pos = rest + 8
+                        gotItem(struct.unpack("!d", buffer[rest:pos])[0])
+                    else:
+                        return
                 else:
-                    raise NotImplementedError(
-                        "Invalid item for pb protocol {0!r}".format(item))
-            elif typebyte == FLOAT:
-                if len(rest) >= 8:
-                    buffer = rest[8:]
-                    gotItem(struct.unpack("!d", rest[:8])[0])
-                else:
-                    return
-            else:
-                raise NotImplementedError(("Invalid Type Byte %r" % (typebyte,)))
-            while listStack and (len(listStack[-1][1]) == listStack[-1][0]):
-                item = listStack.pop()[1]
-                gotItem(item)
-        self.buffer = b''
+                    raise NotImplementedError(("Invalid Type Byte %r" % (typebyte,)))
+                while listStack and (len(listStack[-1][1]) == listStack[-1][0]):
+                    item = listStack.pop()[1]
+                    gotItem(item)
+        finally:
+            self.buffer = buffer[pos:]
 
 
     def expressionReceived(self, lst):
@@ -316,56 +339,68 @@ class Banana(protocol.Protocol, styles.Ephemeral):
 
         @return: L{None}
         """
-        encodeStream = BytesIO()
-        self._encode(obj, encodeStream.write)
-        value = encodeStream.getvalue()
-        self.transport.write(value)
+        fragments = []
+        self._encode(obj, fragments.append)
+        self.transport.write(b''.join(fragments))
 
 
     def _encode(self, obj, write):
-        if isinstance(obj, (list, tuple)):
-            if len(obj) > SIZE_LIMIT:
-                raise BananaError(
-                    "list/tuple is too long to send (%d)" % (len(obj),))
-            int2b128(len(obj), write)
-            write(LIST)
-            for elem in obj:
-                self._encode(elem, write)
-        elif isinstance(obj, (int, long)):
-            if obj < self._smallestLongInt or obj > self._largestLongInt:
-                raise BananaError(
-                    "int/long is too large to send (%d)" % (obj,))
-            if obj < self._smallestInt:
-                int2b128(-obj, write)
-                write(LONGNEG)
-            elif obj < 0:
-                int2b128(-obj, write)
-                write(NEG)
-            elif obj <= self._largestInt:
-                int2b128(obj, write)
-                write(INT)
-            else:
-                int2b128(obj, write)
-                write(LONGINT)
-        elif isinstance(obj, float):
-            write(FLOAT)
-            write(struct.pack("!d", obj))
-        elif isinstance(obj, bytes):
-            # TODO: an API for extending banana...
-            if self.currentDialect == b"pb" and obj in self.outgoingSymbols:
-                symbolID = self.outgoingSymbols[obj]
-                int2b128(symbolID, write)
-                write(VOCAB)
-            else:
+        """
+        Encode an object, writing its encoded representation.
+
+        The elements of lists and tuples are encoded from a stack of the
+        objects left to encode rather than by recursion, so deeply nested
+        lists do not exhaust the interpreter stack.
+
+        @param obj: An object to encode.
+
+        @param write: A callable taking L{bytes}, called with the fragments
+            of the encoded representation.
+
+        @raise BananaError: If the given object is not an instance of one of
+            the types supported by Banana.
+        """
+        pending = [obj]
+        pop = pending.pop
+        while pending:
+            obj = pop()
+            if isinstance(obj, (list, tuple)):
                 if len(obj) > SIZE_LIMIT:
                     raise BananaError(
-                        "byte string is too long to send (%d)" % (len(obj),))
-                int2b128(len(obj), write)
-                write(STRING)
-                write(obj)
-        else:
-            raise BananaError("Banana cannot send {0} objects: {1!r}".format(
-                fullyQualifiedName(type(obj)), obj))
+                        "list/tuple is too long to send (%d)" % (len(obj),))
+                write(_int2b128(len(obj)) + LIST)
+                pending.extend(reversed(obj))
+            elif isinstance(obj, (int, long)):
+                if obj < self._smallestLongInt or obj > self._largestLongInt:
+                    raise BananaError(
+                        "int/long is too large to send (%d)" % (obj,))
+                if obj < self._smallestInt:
+                    write(_int2b128(-obj) + LONGNEG)
+                elif obj < 0:
+                    write(_int2b128(-obj) + NEG)
+                elif obj <= self._largestInt:
+                    write(_int2b128(obj) + INT)
+                else:
+                    write(_int2b128(obj) + LONGINT)
+            elif isinstance(obj, float):
+                write(FLOAT + struct.pack("!d", obj))
+            elif isinstance(obj, bytes):
+                # TODO: an API for extending banana...
+                if (self.currentDialect == b"pb" and
+                        obj in self.outgoingSymbols):
+                    symbolID = self.outgoingSymbols[obj]
+                    write(_int2b128(symbolID) + VOCAB)
+                else:
+                    if len(obj) > SIZE_LIMIT:
+                        raise BananaError(
+                            "byte string is too long to send (%d)" %
+                            (len(obj),))
+                    write(_int2b128(len(obj)) + STRING)
+                    write(obj)
+            else:
+                raise BananaError(
+                    "Banana cannot send {0} objects: {1!r}".format(
+                        fullyQualifiedName(type(obj)), obj))
 
 
 # For use from the interactive interpreter
@@ -374,6 +374,11 @@ class _Jellier:
         self._ref_id = 1
         self.persistentStore = persistentStore
         self.invoker = invoker
+        # Whether the taster allows each type, and the qualified name of
+        # each class of instances and whether the taster allows it, so
+        # graphs of many objects of a few types only ask it once per type.
+        self._allowedTypes = {}
+        self._instancePlans = {}
 
 
     def _cook(self, object):
@@ -463,21 +468,21 @@ class _Jellier:
 
 
     def jelly(self, obj):
+        objType = type(obj)
+        allowed = self._allowedTypes.get(objType)
+        if allowed is None:
+            allowed = self.taster.isTypeAllowed(qual(objType))
+            self._allowedTypes[objType] = allowed
+        if allowed and objType in self.constantTypes:
+            # "Immutable" Types
+            return obj
         if isinstance(obj, Jellyable):
             preRef = self._checkMutable(obj)
             if preRef:
                 return preRef
             return obj.jellyFor(self)
-        objType = type(obj)
-        if self.taster.isTypeAllowed(qual(objType)):
-            # "Immutable" Types
-            if ((objType is str) or
-                (objType is int) or
-                (objType is float)):
-                return obj
-            elif not _PY3 and (objType is long):
-                return obj
-            elif objType is types.MethodType:
+        if allowed:
+            if objType is types.MethodType:
                 return ["method",
                         obj.im_func.__name__,
                         self.jelly(obj.im_self),
@@ -538,14 +543,19 @@ class _Jellier:
                      (_sets and objType is _sets.ImmutableSet):
                     sxp.extend(self._jellyIterable(frozenset_atom, obj))
                 else:
-                    className = qual(obj.__class__)
+                    cls = obj.__class__
+                    plan = self._instancePlans.get(cls)
+                    if plan is None:
+                        plan = (qual(cls), self.taster.isClassAllowed(cls))
+                        self._instancePlans[cls] = plan
+                    className, classAllowed = plan
                     persistent = None
                     if self.persistentStore:
                         persistent = self.persistentStore(obj, self)
                     if persistent is not None:
                         sxp.append(persistent_atom)
                         sxp.append(persistent)
-                    elif self.taster.isClassAllowed(obj.__class__):
+                    elif classAllowed:
                         sxp.append(className)
                         if hasattr(obj, "__getstate__"):
                             state = obj.__getstate__()
@@ -555,7 +565,7 @@ class _Jellier:
                     else:
                         self.unpersistable(
                             "instance of class %s deemed insecure" %
-                            qual(obj.__class__), sxp)
+                            className, sxp)
                 return self.preserve(obj, sxp)
         else:
             if objType is _OldStyleInstance:
@@ -621,6 +631,8 @@ class _Unjellier:
         self.references = {}
         self.postCallbacks = []
         self.invoker = invoker
+        # How to unjelly each type, see _planFor.
+        self._plans = {}
 
 
     def unjellyFull(self, obj):
@@ -634,52 +646,104 @@ class _Unjellier:
         if type(obj) is not list:
             return obj
         jelType = obj[0]
+        plan = self._plans.get(jelType)
+        if plan is None:
+            plan = self._plans[jelType] = self._planFor(jelType)
+        method, target = plan
+        return method(target, obj)
+
+
+    def _planFor(self, jelType):
+        """
+        Decide how to unjelly expressions of a type, checking that the taster
+        allows it.
+
+        The plan is remembered for the rest of the expression, so the taster
+        is asked, and the name of a class resolved, once per type.
+
+        @param jelType: The type of the expressions, their first element.
+
+        @raise InsecureJelly: If the taster does not allow the type.
+
+        @return: A method to call with C{target} and each expression, and
+            C{target}.
+        @rtype: 2-L{tuple}
+        """
         if not self.taster.isTypeAllowed(jelType):
             raise InsecureJelly(jelType)
         regClass = unjellyableRegistry.get(jelType)
         if regClass is not None:
-            if isinstance(regClass, _OldStyleClass):
-                inst = _Dummy() # XXX chomp, chomp
-                inst.__class__ = regClass
-                method = inst.unjellyFor
-            elif isinstance(regClass, type):
-                # regClass.__new__ does not call regClass.__init__
-                inst = regClass.__new__(regClass)
-                method = inst.unjellyFor
-            else:
-                method = regClass # this is how it ought to be done
-            val = method(self, obj)
-            if hasattr(val, 'postUnjelly'):
-                self.postCallbacks.append(inst.postUnjelly)
-            return val
+            return self._unjellyRegistered, regClass
         regFactory = unjellyableFactoryRegistry.get(jelType)
         if regFactory is not None:
-            state = self.unjelly(obj[1])
-            inst = regFactory(state)
-            if hasattr(inst, 'postUnjelly'):
-                self.postCallbacks.append(inst.postUnjelly)
-            return inst
+            return self._unjellyFactory, regFactory
         thunk = getattr(self, '_unjelly_%s'%jelType, None)
         if thunk is not None:
-            ret = thunk(obj[1:])
+            return self._unjellyThunk, thunk
+        nameSplit = jelType.split('.')
+        modName = '.'.join(nameSplit[:-1])
+        if not self.taster.isModuleAllowed(modName):
+            raise InsecureJelly(
+                "Module %s not allowed (in type %s)." % (modName, jelType))
+        clz = namedObject(jelType)
+        if not self.taster.isClassAllowed(clz):
+            raise InsecureJelly("Class %s not allowed." % jelType)
+        return self._unjellyInstance, clz
+
+
+    def _unjellyRegistered(self, regClass, obj):
+        """
+        Unjelly an expression of a type registered with
+        L{setUnjellyableForClass}.
+        """
+        if isinstance(regClass, _OldStyleClass):
+            inst = _Dummy() # XXX chomp, chomp
+            inst.__class__ = regClass
+            method = inst.unjellyFor
+        elif isinstance(regClass, type):
+            # regClass.__new__ does not call regClass.__init__
+            inst = regClass.__new__(regClass)
+            method = inst.unjellyFor
         else:
-            nameSplit = jelType.split('.')
-            modName = '.'.join(nameSplit[:-1])
-            if not self.taster.isModuleAllowed(modName):
-                raise InsecureJelly(
-                    "Module %s not allowed (in type %s)." % (modName, jelType))
-            clz = namedObject(jelType)
-            if not self.taster.isClassAllowed(clz):
-                raise InsecureJelly("Class %s not allowed." % jelType)
-            if hasattr(clz, "__setstate__"):
-                ret = _newInstance(clz)
-                state = self.unjelly(obj[1])
-                ret.__setstate__(state)
-            else:
-                state = self.unjelly(obj[1])
-                ret = _newInstance(clz, state)
-            if hasattr(clz, 'postUnjelly'):
-                self.postCallbacks.append(ret.postUnjelly)
+            method = regClass # this is how it ought to be done
+        val = method(self, obj)
+        if hasattr(val, 'postUnjelly'):
+            self.postCallbacks.append(inst.postUnjelly)
+        return val
+
+
+    def _unjellyFactory(self, regFactory, obj):
+        """
+        Unjelly an expression of a type registered with
+        L{setUnjellyableFactoryForClass}.
+        """
+        state = self.unjelly(obj[1])
+        inst = regFactory(state)
+        if hasattr(inst, 'postUnjelly'):
+            self.postCallbacks.append(inst.postUnjelly)
+        return inst
+
+
+    def _unjellyThunk(self, thunk, obj):
+        """
+        Unjelly an expression with one of the C{_unjelly_} methods.
+        """
+        return thunk(obj[1:])
+
+
+    def _unjellyInstance(self, clz, obj):
+        """
+        Unjelly an instance of a class allowed by the taster.
+        """
+        if hasattr(clz, "__setstate__"):
+            ret = _newInstance(clz)
+            state = self.unjelly(obj[1])
+            ret.__setstate__(state)
+        else:
+            state = self.unjelly(obj[1])
+            ret = _newInstance(clz, state)
+        if hasattr(clz, 'postUnjelly'):
+            self.postCallbacks.append(ret.postUnjelly)
         return ret
 
 
@@ -777,9 +841,11 @@ class _Unjellier:
 
 
     def _unjelly_list(self, lst):
-        l = list(range(len(lst)))
-        for elem in l:
-            self.unjellyInto(l, elem, lst[elem])
+        l = list(lst)
+        for elem, jel in enumerate(lst):
+            # Anything but a list is unjellied as itself.
+            if type(jel) is list:
+                self.unjellyInto(l, elem, jel)
         return l
 
 
@@ -821,6 +887,9 @@ class _Unjellier:
     def _unjelly_dictionary(self, lst):
         d = {}
         for k, v in lst:
+            if type(k) is not list and type(v) is not list:
+                d[k] = v
+                continue
             kvd = _DictKeyAndValue(d)
             self.unjellyInto(kvd, 0, k)
             self.unjellyInto(kvd, 1, v)
@@ -306,6 +306,39 @@ class BananaTests(BananaTestBase):
         assert self.result == foo, "%s!=%s" % (repr(self.result), repr(foo))
 
 
+    def test_partialItemBuffered(self):
+        """
+        Once L{banana.Banana.dataReceived} returns, only the bytes of the
+        item which has not been received completely are kept in its buffer.
+        """
+        received = []
+        self.enc.expressionReceived = received.append
+        self.enc.dataReceived(b'\x01\x81\x02\x81\x05\x82hel')
+        self.assertEqual([1, 2], received)
+        self.assertEqual(b'\x05\x82hel', self.enc.buffer)
+        self.enc.dataReceived(b'lo')
+        self.assertEqual([1, 2, b'hello'], received)
+        self.assertEqual(b'', self.enc.buffer)
+
+
+    def test_deeplyNestedList(self):
+        """
+        Lists nested more deeply than the recursion limit can be encoded and
+        decoded.
+        """
+        depth = sys.getrecursionlimit() * 2
+        nested = []
+        for i in range(depth):
+            nested = [nested]
+        encoded = self.encode(nested)
+        self.assertEqual(b'\x01\x80' * depth + b'\x00\x80', encoded)
+        self.enc.dataReceived(encoded)
+        result = self.result
+        for i in range(depth):
+            [result] = result
+        self.assertEqual([], result)
+
+
     def feed(self, data):
         """
         Feed the data byte per byte to the receiver.
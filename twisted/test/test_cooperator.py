@@ -709,3 +709,195 @@ class RunStateTests(unittest.TestCase):
 
 
 
+class FairShareTests(unittest.TestCase):
+    """
+    Tests for the weighted, prioritized scheduling of L{task.Cooperator} and
+    its accounting of the work done by each L{task.CooperativeTask}.
+    """
+
+    def setUp(self):
+        """
+        Create a cooperator with a fake scheduler, a fake clock and a
+        termination predicate that allows C{self.steps} units of work per
+        tick.
+        """
+        self.steps = 1
+        self.now = 0.0
+        self.scheduler = FakeScheduler()
+        self.cooperator = task.Cooperator(
+            scheduler=self.scheduler,
+            terminationPredicateFactory=self.terminationPredicate)
+        self.cooperator._now = lambda: self.now
+        self.addCleanup(self.cooperator.stop)
+        self.work = []
+
+
+    def terminationPredicate(self):
+        """
+        Allow C{self.steps} units of work.
+        """
+        remaining = [self.steps]
+        def terminate():
+            remaining[0] -= 1
+            return remaining[0] <= 0
+        return terminate
+
+
+    def worker(self, name, duration=0.0):
+        """
+        Record C{name} in C{self.work} and advance the fake clock by
+        C{duration} seconds, forever.
+        """
+        while True:
+            self.work.append(name)
+            self.now += duration
+            yield None
+
+
+    def tick(self, steps):
+        """
+        Run one tick of C{steps} units of work.
+        """
+        self.steps = steps
+        self.scheduler.pump()
+
+
+    def test_equalWeightsRoundRobin(self):
+        """
+        Tasks of equal weight and priority whose work is shorter than the
+        scheduling quantum are run round-robin, across ticks.
+        """
+        for name in "abc":
+            self.cooperator.cooperate(self.worker(name))
+        self.tick(4)
+        self.tick(5)
+        self.assertEqual(list("abcabcabc"), self.work)
+
+
+    def test_weights(self):
+        """
+        Tasks of the same priority are run in proportion to their weights.
+        """
+        self.cooperator.cooperate(self.worker("heavy"), weight=3)
+        self.cooperator.cooperate(self.worker("light"), weight=1)
+        self.tick(400)
+        self.assertEqual(300, self.work.count("heavy"))
+        self.assertEqual(100, self.work.count("light"))
+
+
+    def test_chargedForTime(self):
+        """
+        Each unit of work is charged for the time it took, so equally
+        weighted tasks whose units of work take longer are run less often.
+        """
+        self.cooperator.cooperate(self.worker("bulk", 0.005))
+        self.cooperator.cooperate(self.worker("interactive"))
+        self.tick(60)
+        self.assertEqual(10, self.work.count("bulk"))
+        self.assertEqual(50, self.work.count("interactive"))
+
+
+    def test_invalidWeight(self):
+        """
+        L{task.Cooperator.cooperate} raises L{ValueError} if given a weight
+        which is not positive.
+        """
+        self.assertRaises(ValueError, self.cooperator.cooperate,
+                          self.worker("a"), weight=0)
+        self.assertEqual([], self.cooperator.statistics())
+
+
+    def test_priority(self):
+        """
+        A task is not run while a task with a higher priority is runnable.
+        """
+        self.cooperator.cooperate(self.worker("low"), priority=-1)
+        high = self.cooperator.cooperate(self.worker("high"))
+        self.tick(3)
+        high.pause()
+        self.tick(2)
+        high.resume()
+        self.tick(1)
+        self.assertEqual(
+            ["high", "high", "high", "low", "low", "high"], self.work)
+
+
+    def test_newTaskStartsAtVirtualTime(self):
+        """
+        A task added after others have run does not get to run until it has
+        caught up with them.
+        """
+        self.cooperator.cooperate(self.worker("old"))
+        self.tick(10)
+        self.cooperator.cooperate(self.worker("new"))
+        self.tick(4)
+        self.assertEqual(["old"] * 10 + ["new", "old", "new", "old"],
+                         self.work)
+
+
+    def test_statistics(self):
+        """
+        L{task.CooperativeTask.statistics} reports the task's weight,
+        priority, number of units of work done and time spent on them.
+        L{task.Cooperator.statistics} reports the statistics of every
+        scheduled task.
+        """
+        slow = self.cooperator.cooperate(self.worker("slow", 0.25),
+                                         weight=2, priority=1)
+        fast = self.cooperator.cooperate(self.worker("fast"))
+        self.tick(3)
+        stats = slow.statistics()
+        self.assertIs(slow, stats.task)
+        self.assertEqual((2, 1, 3, 0.75, None, 0),
+                         (stats.weight, stats.priority, stats.steps,
+                          stats.runTime, stats.deadline,
+                          stats.missedDeadlines))
+        self.assertEqual(
+            [(slow, 3), (fast, 0)],
+            [(s.task, s.steps) for s in self.cooperator.statistics()])
+        slow.pause()
+        self.assertEqual(
+            [fast], [s.task for s in self.cooperator.statistics()])
+
+
+    def test_deadline(self):
+        """
+        A task which has waited for longer than its deadline is run before the
+        other tasks of its priority, whatever its share.
+        """
+        self.cooperator.cooperate(self.worker("bulk", 0.25), weight=100)
+        self.cooperator.cooperate(self.worker("interactive", 0.25),
+                                  deadline=0.5)
+        self.tick(9)
+        self.assertEqual(
+            ["bulk", "interactive", "bulk", "bulk", "interactive",
+             "bulk", "bulk", "interactive", "bulk"],
+            self.work)
+
+
+    def test_deadlineBelowPriority(self):
+        """
+        A task which has waited for longer than its deadline is not run while
+        a task with a higher priority is runnable, and the deadlines it
+        misses are counted in its statistics.
+        """
+        urgent = self.cooperator.cooperate(self.worker("urgent", 0.25),
+                                           deadline=0)
+        high = self.cooperator.cooperate(self.worker("high", 0.25),
+                                         priority=1)
+        self.tick(3)
+        high.pause()
+        self.tick(2)
+        self.assertEqual(["high"] * 3 + ["urgent"] * 2, self.work)
+        stats = urgent.statistics()
+        self.assertEqual((0, 1), (stats.deadline, stats.missedDeadlines))
+
+
+    def test_invalidDeadline(self):
+        """
+        L{task.Cooperator.cooperate} raises L{ValueError} if given a negative
+        deadline.
+        """
+        self.assertRaises(ValueError, self.cooperator.cooperate,
+                          self.worker("a"), deadline=-1)
+        self.assertEqual([], self.cooperator.statistics())
@@ -591,6 +591,98 @@ class JellyTests(unittest.TestCase):
 
 
 
+class CountingSecurityOptions(jelly.SecurityOptions):
+    """
+    Security options recording the questions they are asked.
+
+    @ivar questions: The name of the method and the argument of each call to
+        C{isTypeAllowed}, C{isModuleAllowed} and C{isClassAllowed}.
+    @type questions: L{list} of L{tuple}
+    """
+
+    def __init__(self):
+        jelly.SecurityOptions.__init__(self)
+        self.questions = []
+
+
+    def isTypeAllowed(self, typeName):
+        self.questions.append(("isTypeAllowed", typeName))
+        return jelly.SecurityOptions.isTypeAllowed(self, typeName)
+
+
+    def isModuleAllowed(self, moduleName):
+        self.questions.append(("isModuleAllowed", moduleName))
+        return jelly.SecurityOptions.isModuleAllowed(self, moduleName)
+
+
+    def isClassAllowed(self, klass):
+        self.questions.append(("isClassAllowed", klass))
+        return jelly.SecurityOptions.isClassAllowed(self, klass)
+
+
+
+class TypePlanTests(unittest.TestCase):
+    """
+    Tests for the plans of L{jelly.jelly} and L{jelly.unjelly}, which ask
+    the taster about each type once per call.
+    """
+
+    def setUp(self):
+        self.taster = CountingSecurityOptions()
+        self.taster.allowInstancesOf(SimpleJellyTest)
+        self.objects = [SimpleJellyTest(i, str(i)) for i in range(10)]
+
+
+    def test_jellyOncePerType(self):
+        """
+        L{jelly.jelly} asks the taster whether each type and each class of
+        instances is allowed once.
+        """
+        jelly.jelly(self.objects, self.taster)
+        self.assertEqual(
+            len(set(self.taster.questions)), len(self.taster.questions))
+        self.assertIn(
+            ("isClassAllowed", SimpleJellyTest), self.taster.questions)
+
+
+    def test_unjellyOncePerType(self):
+        """
+        L{jelly.unjelly} asks the taster whether each type, module and class
+        is allowed once.
+        """
+        jellied = jelly.jelly(self.objects)
+        unjellied = jelly.unjelly(jellied, self.taster)
+        self.assertEqual(
+            [(i, str(i)) for i in range(10)],
+            [(o.x, o.y) for o in unjellied])
+        self.assertEqual(
+            [("isTypeAllowed", "list"),
+             ("isTypeAllowed", "twisted.test.test_jelly.SimpleJellyTest"),
+             ("isModuleAllowed", "twisted.test.test_jelly"),
+             ("isClassAllowed", SimpleJellyTest),
+             ("isTypeAllowed", "dictionary")],
+            self.taster.questions)
+
+
+    def test_securityChanges(self):
+        """
+        Changes to the security options apply to the calls to
+        L{jelly.jelly} and L{jelly.unjelly} which follow.
+        """
+        taster = jelly.SecurityOptions()
+        taster.allowBasicTypes()
+        jellied = jelly.jelly(self.objects)
+        self.assertRaises(jelly.InsecureJelly, jelly.unjelly, jellied, taster)
+        self.assertEqual(
+            jelly.unpersistable_atom, jelly.jelly(self.objects, taster)[1][0])
+
+        taster.allowInstancesOf(SimpleJellyTest)
+        self.assertEqual(10, len(jelly.unjelly(jellied, taster)))
+        self.assertEqual(
+            jelly.jelly(self.objects), jelly.jelly(self.objects, taster))
+
+
+
 class JellyDeprecationTests(unittest.TestCase):
     """
     Tests for deprecated Jelly things
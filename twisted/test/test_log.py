@@ -26,6 +26,7 @@ from twisted.logger import (
     LoggingFile, LogLevel as NewLogLevel, LogBeginner,
     LogPublisher as NewLogPublisher
 )
+from twisted.logger._legacy import publishToNewObserver
 
 
 class FakeWarning(Warning):
@@ -380,6 +381,28 @@ class LogPublisherTests(LogPublisherTestCaseMixin,
         self.assertEqual(len(self.out), 1)
 
 
+    def test_messageEvent(self):
+        """
+        L{log.LogPublisher.msg} publishes messages logged without keywords
+        as the events L{publishToNewObserver} would make of them, with both
+        the keys of L{twisted.python.log} events and those of
+        L{twisted.logger} events.
+        """
+        events = []
+        publisher = NewLogPublisher(events.append)
+        lp = log.LogPublisher(publishPublisher=publisher)
+        log.callWithContext({"system": "some system"}, lp.msg, "Hello,", "all")
+        [event] = events
+
+        expected = []
+        publishToNewObserver(expected.append, {
+            "system": "some system", "message": ("Hello,", "all"),
+            "time": event["time"], "isError": 0,
+        }, log.textFromEventDict)
+        self.assertEqual(expected, [event])
+        self.assertEqual(u"Hello, all", event["log_text"])
+
+
     def testMultipleString(self):
         # Test some stupid behavior that will be deprecated real soon.
         # If you are reading this and trying to learn how the logging
@@ -5,6 +5,7 @@ from __future__ import division, absolute_import
 
 import contextlib
 import errno
+import gzip
 import os
 import pickle
 import stat
@@ -12,6 +13,7 @@ import time
 
 from twisted.trial import unittest
 from twisted.python import logfile, runtime
+from twisted._threads import ThreadWorker, createMemoryWorker
 
 
 class LogFileTests(unittest.TestCase):
@@ -612,3 +614,293 @@ class DailyLogFileTests(unittest.TestCase):
         self.assertEqual(self.path, copy.path)
         self.assertEqual(defaultMode, copy.defaultMode)
         self.assertEqual(log.lastDate, copy.lastDate)
+
+
+
+class RiggedSegmentedLogFile(logfile.SegmentedLogFile):
+    _clock = 0.0
+
+    def currentTime(self):
+        return self._clock
+
+
+
+class SegmentedLogFileTests(unittest.TestCase):
+    """
+    Tests for L{logfile.SegmentedLogFile}.
+    """
+    def setUp(self):
+        self.dir = self.mktemp()
+        os.makedirs(self.dir)
+        self.name = "test.log"
+        self.path = os.path.join(self.dir, self.name)
+        self.worker, self.perform = createMemoryWorker()
+
+
+    def logFile(self, **kwargs):
+        """
+        Create a L{RiggedSegmentedLogFile} whose segments are maintained by
+        C{self.worker}, and which is closed after the test.
+
+        @param kwargs: Keyword arguments for L{logfile.SegmentedLogFile}.
+
+        @return: The log file.
+        @rtype: L{RiggedSegmentedLogFile}
+        """
+        log = RiggedSegmentedLogFile(
+            self.name, self.dir, worker=self.worker, **kwargs)
+        self.addCleanup(log.close)
+        return log
+
+
+    def performAll(self):
+        """
+        Perform all the work given to C{self.worker}.
+        """
+        while self.perform():
+            pass
+
+
+    def read(self, path):
+        """
+        Read a log file or segment.
+
+        @param path: The path of the file.
+
+        @return: The contents of the file, decompressed.
+        @rtype: C{bytes}
+        """
+        if path.endswith(".gz"):
+            with gzip.open(path, "rb") as f:
+                return f.read()
+        with open(path, "rb") as f:
+            return f.read()
+
+
+    def test_rotateBySize(self):
+        """
+        Once it is larger than C{rotateLength}, the log file is renamed after
+        the time at which it rotates when data is next written.
+        """
+        log = self.logFile(rotateLength=10, compression=None)
+        log.write("123456789")
+        log.write("0")
+        log._clock = 1476792000.25
+        log.write("abc")
+        log.flush()
+
+        segment = self.path + ".20161018T120000.250000Z"
+        self.assertEqual(b"1234567890", self.read(segment))
+        self.assertEqual(b"abc", self.read(self.path))
+        self.assertEqual([(segment, 1476792000.25)], log.listSegments())
+
+
+    def test_noRenameCascade(self):
+        """
+        Rotating the log file again does not rename the earlier segments,
+        and segments rotated at the same time are told apart.
+        """
+        log = self.logFile(rotateLength=1, compression=None)
+        for second in range(3):
+            log._clock = second
+            log.write(str(second))
+        log.write("3")
+
+        self.assertEqual([
+            (self.path + ".19700101T000001.000000Z", 1),
+            (self.path + ".19700101T000002.000000Z", 2),
+            (self.path + ".19700101T000002.000001Z", 2.000001),
+        ], log.listSegments())
+        self.assertEqual(
+            [b"0", b"1", b"2"],
+            [self.read(path) for path, rotatedAt in log.listSegments()]
+        )
+
+
+    def test_rotateByInterval(self):
+        """
+        Once it was opened C{rotateInterval} seconds ago, the log file is
+        rotated when data is next written, unless it is empty.
+        """
+        log = self.logFile(
+            rotateLength=None, rotateInterval=60, compression=None)
+        log._clock = 100
+        log.write("")
+        log._clock = 30
+        log.write("123")
+        log._clock = 59.5
+        log.write("4")
+        self.assertEqual([], log.listSegments())
+        log._clock = 60
+        log.write("5")
+
+        self.assertEqual(
+            [self.path + ".19700101T000100.000000Z"],
+            [path for path, rotatedAt in log.listSegments()]
+        )
+        self.assertEqual(log.openedAt, 60)
+
+
+    def test_compressed(self):
+        """
+        Rotated segments are compressed with gzip by the worker, after which
+        only the compressed segment remains.
+        """
+        log = self.logFile(rotateLength=3)
+        log.write("123")
+        log.write("4")
+        segment = self.path + ".19700101T000000.000000Z"
+        self.assertTrue(os.path.exists(segment))
+        self.performAll()
+
+        self.assertFalse(os.path.exists(segment))
+        self.assertEqual(b"123", self.read(segment + ".gz"))
+        self.assertEqual([(segment + ".gz", 0)], log.listSegments())
+
+
+    def test_compressLeftover(self):
+        """
+        Segments which were not compressed, or not completely, when the
+        worker stopped are compressed again.
+        """
+        segment = self.path + ".19700101T000000.000000Z"
+        with open(segment, "wb") as f:
+            f.write(b"left over")
+        with open(segment + ".gz", "wb") as f:
+            f.write(b"\x1f\x8b")
+        log = self.logFile(rotateLength=3)
+        self.assertEqual([(segment, 0)], log.listSegments())
+        log.write("123")
+        log._clock = 1
+        log.write("4")
+        self.performAll()
+
+        self.assertEqual(
+            [b"left over", b"123"],
+            [self.read(path) for path, rotatedAt in log.listSegments()]
+        )
+
+
+    def test_unknownCompression(self):
+        """
+        An unknown compression is rejected.
+        """
+        self.assertRaises(
+            ValueError, logfile.SegmentedLogFile, self.name, self.dir,
+            compression="lzma")
+
+
+    def test_zstdCompressed(self):
+        """
+        Rotated segments may be compressed with Zstandard.
+        """
+        log = self.logFile(rotateLength=3, compression="zstd")
+        log.write("123")
+        log.write("4")
+        self.performAll()
+
+        segment = self.path + ".19700101T000000.000000Z.zst"
+        with open(segment, "rb") as f:
+            self.assertEqual(
+                b"123", logfile.zstandard.ZstdDecompressor().decompressobj()
+                .decompress(f.read()))
+    if logfile.zstandard is None:
+        test_zstdCompressed.skip = "zstandard is not installed"
+
+
+    def test_maxSegments(self):
+        """
+        The oldest segments are removed once there are more than
+        C{maxSegments}.
+        """
+        log = self.logFile(rotateLength=1, maxSegments=2)
+        for second in range(4):
+            log._clock = second
+            log.write(str(second))
+        self.performAll()
+
+        self.assertEqual(
+            [b"1", b"2"],
+            [self.read(path) for path, rotatedAt in log.listSegments()]
+        )
+
+
+    def test_maxAge(self):
+        """
+        Segments rotated more than C{maxAge} seconds ago are removed.
+        """
+        log = self.logFile(rotateLength=1, maxAge=10, compression=None)
+        for second in [0, 5, 10, 15, 20]:
+            log._clock = second
+            log.write(str(second))
+        self.performAll()
+
+        self.assertEqual(
+            [10, 15, 20], [rotatedAt for path, rotatedAt in log.listSegments()]
+        )
+
+
+    def test_maxTotalSize(self):
+        """
+        The oldest segments are removed while the rotated segments take more
+        than C{maxTotalSize} bytes together.
+        """
+        log = self.logFile(rotateLength=3, maxTotalSize=7, compression=None)
+        for second in range(4):
+            log._clock = second
+            log.write("abc")
+        self.performAll()
+
+        self.assertEqual(
+            [2, 3], [rotatedAt for path, rotatedAt in log.listSegments()]
+        )
+
+
+    def test_otherFilesIgnored(self):
+        """
+        Files which are not segments of the log file are ignored.
+        """
+        for name in [self.name + ".1", self.name + ".2016_10_18",
+                     "other.log.19700101T000000.000000Z"]:
+            with open(os.path.join(self.dir, name), "w") as f:
+                f.write("other")
+        log = self.logFile(maxSegments=0)
+        log.rotate()
+        self.performAll()
+
+        self.assertEqual([], log.listSegments())
+        self.assertEqual(4, len(os.listdir(self.dir)))
+
+
+    def test_defaultWorker(self):
+        """
+        By default, segments are maintained by a L{ThreadWorker}.
+        """
+        log = logfile.SegmentedLogFile(self.name, self.dir)
+        self.addCleanup(log.close)
+        self.addCleanup(log._worker.quit)
+        self.assertIsInstance(log._worker, ThreadWorker)
+
+
+    def test_persistence(self):
+        """
+        L{SegmentedLogFile} objects can be pickled and unpickled, which
+        preserves all the various attributes of the log file.
+        """
+        log = self.logFile(rotateLength=12, rotateInterval=60,
+                           compression=None, maxSegments=3, maxAge=4,
+                           maxTotalSize=5)
+        log.write("123")
+        log.flush()
+
+        copy = pickle.loads(pickle.dumps(log))
+        self.addCleanup(copy.close)
+        self.addCleanup(copy._worker.quit)
+
+        self.assertEqual(self.path, copy.path)
+        self.assertEqual(
+            (12, 60, None, 3, 4, 5),
+            (copy.rotateLength, copy.rotateInterval, copy.compression,
+             copy.maxSegments, copy.maxAge, copy.maxTotalSize))
+        self.assertEqual(3, copy.size)
+        self.assertIsInstance(copy._worker, ThreadWorker)
@@ -16,7 +16,7 @@ from twisted.trial import unittest
 
 from twisted.python.log import msg, err
 from twisted.internet import protocol, reactor, defer, interfaces
-from twisted.internet import error
+from twisted.internet import error, tcp
 from twisted.internet.address import IPv4Address
 from twisted.internet.interfaces import IHalfCloseableProtocol, IPullProducer
 from twisted.protocols import policies
@@ -912,6 +912,42 @@ class WriteDataTests(unittest.TestCase):
         return d.addCallback(check)
 
 
+    def test_metrics(self):
+        """
+        Accepting a connection, and reading and writing bytes, increment the
+        TCP counters of L{twisted.logger.globalMetrics}.
+        """
+        if reactor.__class__.__name__ == 'IOCPReactor':
+            raise unittest.SkipTest(
+                "iocpreactor has its own TCP transports, which do not update "
+                "these counters.")
+        counters = [tcp._connectionsAccepted, tcp._bytesRead,
+                    tcp._bytesWritten]
+        before = [counter.value for counter in counters]
+
+        f = protocol.Factory()
+        f.protocol = WriterProtocol
+        f.done = 0
+        f.problem = 0
+        wrappedF = WiredFactory(f)
+        p = reactor.listenTCP(0, wrappedF, interface="127.0.0.1")
+        self.addCleanup(p.stopListening)
+        clientF = WriterClientFactory()
+        wrappedClientF = WiredFactory(clientF)
+        reactor.connectTCP("127.0.0.1", p.getHost().port, wrappedClientF)
+
+        def check(ignored):
+            size = len(b"Hello Cleveland!\nGoodbye cruel world\n")
+            self.assertEqual(size, len(clientF.data))
+            self.assertEqual(
+                [1, size, size],
+                [counter.value - value
+                 for counter, value in zip(counters, before)])
+        d = defer.gatherResults([wrappedF.onDisconnect,
+                                 wrappedClientF.onDisconnect])
+        return d.addCallback(check)
+
+
     def test_writeAfterShutdownWithoutReading(self):
         """
         A TCP transport which is written to after the connection has been shut
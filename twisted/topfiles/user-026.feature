@@ -0,0 +1 @@
+twisted.internet.processpool.ProcessPool runs functions and AMP commands in a pool of warm worker processes, and twisted.internet.processpool.deferToProcess runs a function in a default pool and returns its result as a Deferred.
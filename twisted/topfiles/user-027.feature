@@ -0,0 +1 @@
+twisted.internet.task.Cooperator schedules its tasks by weighted fair share, priority and deadline, which cooperate() and coiterate() accept as weight, priority and deadline arguments, and accounts for the time each task takes.
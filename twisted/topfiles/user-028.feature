@@ -0,0 +1 @@
+twisted.internet.instrumentation.instrumentReactor reports the duration and timed call lag of each reactor iteration, and slow timed, thread and I/O calls, to an ILoopCollector.
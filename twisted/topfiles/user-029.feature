@@ -0,0 +1 @@
+twisted.internet.epollreactor.EPollReactor accepts lazyWriteRemoval=True, which keeps descriptors that stop writing registered for write readiness until it is next reported, so that transports written to on every reactor iteration no longer modify their epoll registration twice per iteration.
@@ -0,0 +1 @@
+twisted.logger.Logger accepts a levelPredicate, which drops events below the level set for its namespace before they are built, and twisted.logger.LogLevelFilterPredicate caches the level of each namespace.
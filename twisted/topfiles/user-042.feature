@@ -0,0 +1 @@
+twisted.logger.ThreadedFileLogObserver wraps a FileLogObserver and writes the events it observes from a separate thread, so that a slow disk does not block the reactor.
@@ -0,0 +1 @@
+twisted.logger.eventAsJSON, twisted.logger.eventFromJSON and twisted.logger.flattenEvent are faster.
@@ -0,0 +1 @@
+twisted.python.logfile.SegmentedLogFile rotates log files by size, age or both into segments named by the time of rotation.
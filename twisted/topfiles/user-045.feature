@@ -0,0 +1 @@
+twisted.logger provides Counter, Gauge and Histogram metrics kept in a MetricsRegistry, which PeriodicMetricsLogger logs and twisted.web.metrics.MetricsResource serves in the Prometheus text format.
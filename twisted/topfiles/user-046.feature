@@ -0,0 +1 @@
+twisted.logger.formatEvent parses each format string once.
@@ -0,0 +1 @@
+twisted.python.log.msg builds the events of messages logged without keywords in a single step, and the reactor logs failed timed and thread calls with twisted.logger.Logger.
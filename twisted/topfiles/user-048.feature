@@ -0,0 +1 @@
+twisted.protocols.basic.LineReceiver no longer copies its buffer for every line it delivers.
@@ -0,0 +1 @@
+twisted.spread.banana.Banana decodes without copying its buffer for every item, and encodes deeply nested lists without recursion.
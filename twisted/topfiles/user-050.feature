@@ -0,0 +1 @@
+twisted.spread.jelly asks its security options about each type once per call to jelly or unjelly.
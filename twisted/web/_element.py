@@ -178,8 +178,15 @@ class Element(object):
         separately as the object to lookup renderers on and call
         L{Element.renderer} to look them up.  The resulting object from this
         method is not directly associated with this L{Element}.)
+
+        Templates loaded from XML by L{twisted.web.template.XMLString} and
+        L{twisted.web.template.XMLFile} are compiled the first time they are
+        rendered, so that their static parts are only flattened once.
         """
         loader = self.loader
         if loader is None:
             raise MissingTemplateLoader(self)
+        loadCompiled = getattr(loader, '_loadCompiled', None)
+        if loadCompiled is not None:
+            return loadCompiled()
         return loader.load()
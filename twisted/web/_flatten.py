@@ -21,6 +21,8 @@ from twisted.web._stan import Tag, slot, voidElements, Comment, CDATA, CharRef
 from twisted.web.error import UnfilledSlot, UnsupportedType, FlattenerError
 from twisted.web.iweb import IRenderable
 
+# The amount of output flatten buffers before writing it out.
+_BUFFER_SIZE = 2 ** 16
 
 
 def escapeForContent(data):
@@ -150,6 +152,169 @@ def escapedComment(data):
 
 
 
+class _CompiledFragment(object):
+    """
+    A run of template content which has already been flattened.
+
+    Instances are created by L{_compileTemplate} in place of the parts of a
+    template which would be flattened to the same bytes each time, and are
+    written out unchanged by L{_flattenElement}.
+
+    @ivar data: The flattened content, quoted for inclusion in the contents of
+        a tag.
+    @type data: L{bytes}
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+    def __repr__(self):
+        return '_CompiledFragment(%r)' % (self.data,)
+
+
+
+def _flattenStatic(roots):
+    """
+    Flatten objects which do not depend on the request or on any renderer.
+
+    @param roots: A L{list} of objects for which L{_compile} returned a true
+        static flag.
+
+    @return: A L{_CompiledFragment} of their flattened form.
+    """
+    output = []
+    for _ in _flattenTree(None, roots, output.append):
+        raise AssertionError("Static content cannot produce a Deferred")
+    return _CompiledFragment(b''.join(output))
+
+
+
+def _compileChildren(roots, inContent):
+    """
+    Compile a sequence of objects, replacing each run of static objects with a
+    single L{_CompiledFragment}.
+
+    @param roots: The objects to compile.
+    @type roots: L{list} or L{tuple}
+
+    @param inContent: See L{_compile}.
+
+    @return: A 2-tuple of the compiled L{list}, and whether all of C{roots}
+        are static.
+    """
+    compiled = []
+    run = []
+    allStatic = True
+    for root in roots:
+        root, static = _compile(root, inContent)
+        if static:
+            run.append(root)
+            continue
+        allStatic = False
+        if isinstance(root, list):
+            # A compiled list or spliced tag: merge its fragments with the
+            # static objects around it.
+            items = root
+        else:
+            items = [root]
+        for item in items:
+            if isinstance(item, _CompiledFragment):
+                run.append(item)
+                continue
+            if run:
+                compiled.append(_flattenStatic(run))
+                run = []
+            compiled.append(item)
+    if allStatic:
+        return list(roots), True
+    if run:
+        compiled.append(_flattenStatic(run))
+    return compiled, False
+
+
+
+def _compile(root, inContent):
+    """
+    Compile part of a template.
+
+    @param root: The object to compile.
+
+    @param inContent: Whether C{root} is within the contents of a tag, where
+        strings are always quoted by L{escapeForContent}.  Elsewhere, such as
+        at the top level of a template, which may be flattened within an
+        attribute, strings depend on the context and are never static.
+
+    @return: A 2-tuple of an object to flatten in place of C{root} and a flag
+        which is true if C{root} is static, that is, if it always flattens to
+        the same bytes regardless of the request, slot data and renderer, in
+        which case the object returned is C{root} itself.
+    """
+    if isinstance(root, (bytes, unicode)):
+        return root, inContent
+    elif isinstance(root, (Comment, CDATA, CharRef, _CompiledFragment)):
+        return root, True
+    elif isinstance(root, Tag):
+        if root.render is not None:
+            # Renderers may inspect and change the children of their tag, so
+            # it is flattened as it was loaded.
+            return root, False
+        plain = not root.slotData
+        for value in root.attributes.values():
+            if not isinstance(value, (bytes, unicode)):
+                plain = False
+        children, childrenStatic = _compileChildren(
+            root.children, inContent or bool(root.tagName))
+        if plain and childrenStatic:
+            return root, True
+        if plain and inContent and root.tagName:
+            # Within the contents of another tag, the children of this one
+            # are flattened in the same context as the tag itself, so it can
+            # be spliced into its parent as its start and end tags around its
+            # compiled children.
+            marked = root.clone(False).clear()(u'\0')
+            start, end = _flattenStatic([marked]).data.split(b'\0')
+            return ([_CompiledFragment(start)] + children +
+                    [_CompiledFragment(end)]), False
+        if childrenStatic and children:
+            children = [_flattenStatic(children)]
+        root = root.clone(False)
+        root.children = children
+        return root, False
+    elif isinstance(root, (list, tuple)):
+        return _compileChildren(root, inContent)
+    return root, False
+
+
+
+def _compileTemplate(roots):
+    """
+    Compile a loaded template so that the parts of it which do not depend on
+    the request, on slot data or on a renderer are flattened only once.
+
+    Static tags, comments, character references and text are replaced by
+    L{_CompiledFragment}s, adjacent ones being merged into a single fragment.
+    Within the contents of another tag, a tag containing slots or other
+    dynamic content is replaced by fragments for its start and end tags
+    around its compiled children.  Tags with dynamic attributes are kept,
+    cloned with compiled children.  Tags with a renderer are kept unchanged,
+    children included, so that renderers are still given the
+    L{Tag <twisted.web.template.Tag>} they would be given without
+    compilation.  The template itself is not modified.
+
+    @param roots: The top-level objects of the template.
+    @type roots: L{list}
+
+    @return: A L{list} which flattens to the same bytes as C{roots}.
+    """
+    compiled, static = _compileChildren(roots, False)
+    if static and compiled:
+        compiled = [_flattenStatic(compiled)]
+    return compiled
+
+
+
 def _getSlotValue(name, slotData, default=None):
     """
     Find the value of the named slot in the given stack of slot data.
@@ -208,7 +373,9 @@ def _flattenElement(request, root, write, slotData, renderFactory,
                   renderFactory=renderFactory, write=write):
         return _flattenElement(request, newRoot, write, slotData,
                                renderFactory, dataEscaper)
-    if isinstance(root, (bytes, unicode)):
+    if isinstance(root, _CompiledFragment):
+        write(root.data)
+    elif isinstance(root, (bytes, unicode)):
         write(dataEscaper(root))
     elif isinstance(root, slot):
         slotValue = _getSlotValue(root.name, slotData, root.default)
@@ -270,7 +437,13 @@ def _flattenElement(request, root, write, slotData, renderFactory,
 
     elif isinstance(root, (tuple, list, GeneratorType)):
         for element in root:
-            yield keepGoing(element)
+            if element.__class__ is _CompiledFragment:
+                # Write compiled fragments directly rather than through
+                # another generator, since most of a compiled template is
+                # made of them.
+                write(element.data)
+            else:
+                yield keepGoing(element)
     elif isinstance(root, CharRef):
         escaped = '&#%d;' % (root.ordinal,)
         write(escaped.encode('ascii'))
@@ -330,7 +503,50 @@ def _flattenTree(request, root, write):
                 stack.append(element)
 
 
-def _writeFlattenedData(state, write, result):
+class _BufferedWriter(object):
+    """
+    Coalesce the many small strings produced by flattening into fewer, larger
+    writes.
+
+    @ivar _write: The callable to which buffered data is written.
+
+    @ivar _threshold: The number of buffered bytes at which they are written
+        without waiting for L{flush}.
+    """
+
+    def __init__(self, write, threshold=_BUFFER_SIZE):
+        self._write = write
+        self._threshold = threshold
+        self._buffer = []
+        self._size = 0
+
+
+    def write(self, data):
+        """
+        Buffer some data, writing out everything buffered if this brings it
+        over the threshold.
+
+        @type data: L{bytes}
+        """
+        self._buffer.append(data)
+        self._size += len(data)
+        if self._size >= self._threshold:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Write out everything buffered, if anything.
+        """
+        if self._buffer:
+            data = b''.join(self._buffer)
+            self._buffer = []
+            self._size = 0
+            self._write(data)
+
+
+
+def _writeFlattenedData(state, write, result, flush=None):
     """
     Take strings from an iterator and pass them to a writer function.
 
@@ -346,18 +562,26 @@ def _writeFlattenedData(state, write, result):
         an exception in a generator passed to C{state} or an errback from a
         L{Deferred} from state occurs.
 
+    @param flush: If not L{None}, a callable which will be invoked whenever
+        C{state} has produced a L{Deferred} or is exhausted, to write out any
+        data buffered by C{write}.
+
     @return: L{None}
     """
     while True:
         try:
-            element = next(state)
+            try:
+                element = next(state)
+            finally:
+                if flush is not None:
+                    flush()
         except StopIteration:
             result.callback(None)
         except:
             result.errback()
         else:
             def cby(original):
-                _writeFlattenedData(state, write, result)
+                _writeFlattenedData(state, write, result, flush)
                 return original
             element.addCallbacks(cby, result.errback)
         break
@@ -380,16 +604,20 @@ def flatten(request, root, write):
         L{list}, L{types.GeneratorType}, L{Deferred}, or something that provides
         L{IRenderable}.
 
-    @param write: A callable which will be invoked with each L{bytes} produced
-        by flattening C{root}.
+    @param write: A callable which will be invoked with the L{bytes} produced
+        by flattening C{root}.  Output is buffered, so that C{write} is called
+        with large strings: buffered output is written whenever it reaches 64
+        KiB, before waiting for any L{Deferred}, and once C{root} has been
+        completely flattened.
 
     @return: A L{Deferred} which will be called back when C{root} has been
         completely flattened into C{write} or which will be errbacked if an
         unexpected exception occurs.
     """
     result = Deferred()
-    state = _flattenTree(request, root, write)
-    _writeFlattenedData(state, write, result)
+    writer = _BufferedWriter(write)
+    state = _flattenTree(request, root, writer.write)
+    _writeFlattenedData(state, writer.write, result, writer.flush)
     return result
 
 
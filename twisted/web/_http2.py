@@ -29,6 +29,7 @@ import h2.connection
 import h2.errors
 import h2.events
 import h2.exceptions
+import h2.settings
 
 from twisted.internet.defer import Deferred
 from twisted.internet.interfaces import (
@@ -100,12 +101,50 @@ class H2Connection(Protocol, TimeoutMixin):
         L{collections.deque} queues, which contain either L{bytes} objects or
         C{_END_STREAM_SENTINEL}.
 
+    @ivar _outboundQueueSizes: A map of stream IDs to the number of bytes of
+        data in their C{_outboundStreamQueues}.
+    @type _outboundQueueSizes: A L{dict} mapping L{int} stream IDs to L{int}
+
     @ivar _sender: A handle to the data-sending loop, allowing it to be
         terminated if needed.
     @type _sender: L{twisted.internet.task.LoopingCall}
+
+    @ivar _batching: Whether outbound frames are being accumulated to be
+        written to the transport together, at the end of the current call to
+        L{dataReceived}.
+    @type _batching: L{bool}
+
+    @ivar _resumePending: Whether the data-sending loop is to be restarted
+        at the end of the current call to L{dataReceived}.
+    @type _resumePending: L{bool}
+
+    @ivar _flushCall: The delayed call which will write the outbound frames
+        accumulated outside of L{dataReceived} and the data-sending loop, if
+        any.
+    @type _flushCall: L{twisted.internet.interfaces.IDelayedCall} or L{None}
+
+    @ivar settings: HTTP/2 settings to advertise to the client in addition to
+        the defaults, or L{None}.  For example,
+        C{{h2.settings.INITIAL_WINDOW_SIZE: 2 ** 20}} allows clients to send
+        up to 1MB of each request body before waiting for the server.
+    @type settings: L{dict} mapping L{int} settings to L{int} values, or
+        L{None}
+
+    @ivar connectionWindowSize: The size of the flow control window for the
+        data received on the whole connection, if larger than the default of
+        65535 bytes, or L{None}.
+    @type connectionWindowSize: L{int} or L{None}
+
+    @ivar sendBatchSize: The number of bytes of data the data-sending loop
+        sends, interleaving streams according to their priority, before
+        writing them to the transport and letting the reactor run.
+    @type sendBatchSize: L{int}
     """
     factory = None
     site = None
+    settings = None
+    connectionWindowSize = None
+    sendBatchSize = 2 ** 16
 
     _log = Logger()
 
@@ -119,8 +158,12 @@ class H2Connection(Protocol, TimeoutMixin):
         self._consumerBlocked = None
         self._sendingDeferred = None
         self._outboundStreamQueues = {}
+        self._outboundQueueSizes = {}
         self._streamCleanupCallbacks = {}
         self._stillProducing = True
+        self._batching = False
+        self._resumePending = False
+        self._flushCall = None
 
         if reactor is None:
             from twisted.internet import reactor
@@ -139,6 +182,13 @@ class H2Connection(Protocol, TimeoutMixin):
         """
         self.setTimeout(self.timeOut)
         self.conn.initiate_connection()
+        if self.settings:
+            self.conn.update_settings(self.settings)
+        if self.connectionWindowSize is not None:
+            increment = (self.connectionWindowSize -
+                         self.conn.inbound_flow_control_window)
+            if increment > 0:
+                self.conn.increment_flow_control_window(increment)
         self.transport.write(self.conn.data_to_send())
 
 
@@ -151,6 +201,32 @@ class H2Connection(Protocol, TimeoutMixin):
         """
         self.resetTimeout()
 
+        # The state machine discards the frames it has not written yet when
+        # it receives some frames, such as GOAWAY, so write them first.
+        if self._flushCall is not None:
+            self._flush()
+
+        # Frames sent in response to the events, and by the requests they
+        # start, are written together at the end.
+        self._batching = True
+        try:
+            self._eventsReceived(data)
+        finally:
+            self._batching = False
+        if self._resumePending:
+            self._resumePending = False
+            self._resumeSending()
+        self._flush()
+
+
+    def _eventsReceived(self, data):
+        """
+        Handle the events triggered by a chunk of data received from the
+        transport.
+
+        @param data: The data received from the transport.
+        @type data: L{bytes}
+        """
         try:
             events = self.conn.receive_data(data)
         except h2.exceptions.ProtocolError:
@@ -174,15 +250,38 @@ class H2Connection(Protocol, TimeoutMixin):
                 self._handleWindowUpdate(event)
             elif isinstance(event, h2.events.PriorityUpdated):
                 self._handlePriorityUpdate(event)
+            elif isinstance(event, h2.events.RemoteSettingsChanged):
+                self._handleRemoteSettingsChanged(event)
             elif isinstance(event, h2.events.ConnectionTerminated):
                 self.transport.loseConnection()
                 self.connectionLost("Shutdown by remote peer")
 
+
+    def _flush(self):
+        """
+        Write the outbound frames accumulated by the HTTP/2 state machine to
+        the transport.
+        """
+        if self._flushCall is not None:
+            if self._flushCall.active():
+                self._flushCall.cancel()
+            self._flushCall = None
         dataToSend = self.conn.data_to_send()
         if dataToSend:
             self.transport.write(dataToSend)
 
 
+    def _flushSoon(self):
+        """
+        Arrange for the outbound frames accumulated by the HTTP/2 state
+        machine to be written to the transport, together with any others
+        accumulated before the reactor next runs.
+        """
+        if (not self._batching and self._flushCall is None and
+                self._stillProducing):
+            self._flushCall = self._reactor.callLater(0, self._flush)
+
+
     def timeoutConnection(self):
         """
         Called when the connection has been inactive for
@@ -226,6 +325,10 @@ class H2Connection(Protocol, TimeoutMixin):
         """
         self._stillProducing = False
         self.setTimeout(None)
+        if self._flushCall is not None:
+            if self._flushCall.active():
+                self._flushCall.cancel()
+            self._flushCall = None
 
         for stream in self.streams.values():
             stream.connectionLost(reason)
@@ -269,7 +372,9 @@ class H2Connection(Protocol, TimeoutMixin):
     #    iteration it asks the priority implementation which stream should send
     #    next, and pops a data frame off that stream's queue. If, after sending
     #    that frame, there is no data left on that stream's queue, the function
-    #    informs the priority implementation that the stream is blocked.
+    #    informs the priority implementation that the stream is blocked. Once
+    #    sendBatchSize bytes have been sent, everything sent is written to the
+    #    transport at once, and the loop lets the reactor run before going on.
     #
     # If all streams are blocked, or if there are no outstanding streams, the
     # _sendPrioritisedData function waits to be awoken when more data is ready
@@ -330,26 +435,58 @@ class H2Connection(Protocol, TimeoutMixin):
         if not self._stillProducing:
             return
 
-        stream = None
-
-        while stream is None:
-            try:
-                stream = next(self.priority)
-            except priority.DeadlockError:
-                # All streams are currently blocked or not progressing. Wait
-                # until a new one becomes available.
-                assert self._sendingDeferred is None
-                self._sendingDeferred = Deferred()
-                self._sendingDeferred.addCallback(self._sendPrioritisedData)
-                return
+        finished = []
+        sent = 0
+        try:
+            while sent < self.sendBatchSize:
+                try:
+                    stream = next(self.priority)
+                except priority.DeadlockError:
+                    # All streams are currently blocked or not progressing.
+                    # Wait until a new one becomes available.
+                    assert self._sendingDeferred is None
+                    self._sendingDeferred = Deferred()
+                    self._sendingDeferred.addCallback(
+                        self._sendPrioritisedData)
+                    return
+
+                # Wait behind the transport.
+                if self._consumerBlocked is not None:
+                    self._consumerBlocked.addCallback(
+                        self._sendPrioritisedData)
+                    return
+
+                sent += self._sendFrame(stream, finished)
+        finally:
+            # Write everything sent in this pass at once, before cleaning up
+            # the streams which ended in it.
+            self._flush()
+            for stream in finished:
+                if stream in self.streams:
+                    self._requestDone(stream)
+
+        self._reactor.callLater(0, self._sendPrioritisedData)
 
-        # Wait behind the transport.
-        if self._consumerBlocked is not None:
-            self._consumerBlocked.addCallback(self._sendPrioritisedData)
-            return
 
+    def _sendFrame(self, stream, finished):
+        """
+        Send a single data frame, or the end of the stream, from the outbound
+        queue of a stream.
+
+        @param stream: The ID of the stream.
+        @type stream: L{int}
+
+        @param finished: A list to which C{stream} is added if it ends, so
+            that its state may be cleaned up once the frames sent have been
+            written.
+        @type finished: L{list}
+
+        @return: The number of bytes of data sent.
+        @rtype: L{int}
+        """
+        queue = self._outboundStreamQueues[stream]
         remainingWindow = self.conn.local_flow_control_window(stream)
-        frameData = self._outboundStreamQueues[stream].popleft()
+        frameData = queue.popleft()
         maxFrameSize = min(self.conn.max_outbound_frame_size, remainingWindow)
 
         if frameData is _END_STREAM_SENTINEL:
@@ -357,35 +494,47 @@ class H2Connection(Protocol, TimeoutMixin):
             # ProtocolError because we really shouldn't encounter this problem.
             # If we do, that's a nasty bug.
             self.conn.end_stream(stream)
-            self.transport.write(self.conn.data_to_send())
-
-            # Clean up the stream
-            self._requestDone(stream)
-        else:
-            # Respect the max frame size.
-            if len(frameData) > maxFrameSize:
-                excessData = frameData[maxFrameSize:]
-                frameData = frameData[:maxFrameSize]
-                self._outboundStreamQueues[stream].appendleft(excessData)
-
-            # There's deliberately no error handling here, because this just
-            # absolutely should not happen.
-            # If for whatever reason the max frame length is zero and so we
-            # have no frame data to send, don't send any.
-            if frameData:
-                self.conn.send_data(stream, frameData)
-                self.transport.write(self.conn.data_to_send())
-
-            # If there's no data left, this stream is now blocked.
-            if not self._outboundStreamQueues[stream]:
-                self.priority.block(stream)
-
-            # Also, if the stream's flow control window is exhausted, tell it
-            # to stop.
-            if self.remainingOutboundWindow(stream) <= 0:
-                self.streams[stream].flowControlBlocked()
-
-        self._reactor.callLater(0, self._sendPrioritisedData)
+            # Take the stream out of the priority tree now, so that the
+            # streams depending on it share its weight for the rest of the
+            # pass, but leave the rest of the cleanup until the frames sent
+            # have been written.
+            self.priority.remove_stream(stream)
+            finished.append(stream)
+            return 0
+
+        # Respect the max frame size.
+        if len(frameData) > maxFrameSize:
+            excessData = frameData[maxFrameSize:]
+            frameData = frameData[:maxFrameSize]
+            queue.appendleft(excessData)
+
+        # There's deliberately no error handling here, because this just
+        # absolutely should not happen.
+        # If for whatever reason the max frame length is zero and so we
+        # have no frame data to send, don't send any.
+        if frameData:
+            self.conn.send_data(stream, frameData)
+            self._outboundQueueSizes[stream] -= len(frameData)
+
+        # If there's no data left, or no room in the flow control window for
+        # the data left, this stream is now blocked until more is written or
+        # the window is opened.
+        if not self._streamCanSend(stream):
+            self.priority.block(stream)
+
+        # Also, if the stream's flow control window is exhausted, tell it
+        # to stop.
+        if self.remainingOutboundWindow(stream) <= 0:
+            self.streams[stream].flowControlBlocked()
+
+        # If the connection's flow control window is exhausted, no stream can
+        # send data until it is opened.
+        if self.conn.outbound_flow_control_window <= 0:
+            for streamID, queue in self._outboundStreamQueues.items():
+                if queue and queue[0] is not _END_STREAM_SENTINEL:
+                    self.priority.block(streamID)
+
+        return len(frameData)
 
 
     # Internal functions.
@@ -405,6 +554,7 @@ class H2Connection(Protocol, TimeoutMixin):
         self.streams[event.stream_id] = stream
         self._streamCleanupCallbacks[event.stream_id] = Deferred()
         self._outboundStreamQueues[event.stream_id] = deque()
+        self._outboundQueueSizes[event.stream_id] = 0
 
         # Add the stream to the priority tree but immediately block it.
         try:
@@ -427,7 +577,13 @@ class H2Connection(Protocol, TimeoutMixin):
             received data.
         @type event: L{h2.events.DataReceived}
         """
-        stream = self.streams[event.stream_id]
+        stream = self.streams.get(event.stream_id)
+        if stream is None:
+            # The stream was reset after responding to it early; the data
+            # still counts against the connection window.
+            self.openStreamWindow(
+                event.stream_id, event.flow_controlled_length)
+            return
         stream.receiveDataChunk(event.data, event.flow_controlled_length)
 
 
@@ -440,7 +596,10 @@ class H2Connection(Protocol, TimeoutMixin):
             completed stream.
         @type event: L{h2.events.StreamEnded}
         """
-        stream = self.streams[event.stream_id]
+        stream = self.streams.get(event.stream_id)
+        if stream is None:
+            # The stream was reset after responding to it early.
+            return
         stream.requestComplete()
 
 
@@ -515,7 +674,9 @@ class H2Connection(Protocol, TimeoutMixin):
             # when a connection is lost, so that's what we do too.
             return
         else:
-            self.transport.write(self.conn.data_to_send())
+            # The headers are usually followed by data, which will be sent
+            # with them.
+            self._flushSoon()
 
 
     def writeDataToStream(self, streamID, data):
@@ -530,16 +691,14 @@ class H2Connection(Protocol, TimeoutMixin):
         @type data: L{bytes}
         """
         self._outboundStreamQueues[streamID].append(data)
+        self._outboundQueueSizes[streamID] += len(data)
 
         # There's obviously no point unblocking this stream and the sending
         # loop if the data can't actually be sent, so confirm that there's
         # some room to send data.
         if self.conn.local_flow_control_window(streamID) > 0:
             self.priority.unblock(streamID)
-            if self._sendingDeferred is not None:
-                d = self._sendingDeferred
-                self._sendingDeferred = None
-                d.callback(streamID)
+            self._resumeSending()
 
         if self.remainingOutboundWindow(streamID) <= 0:
             self.streams[streamID].flowControlBlocked()
@@ -554,10 +713,24 @@ class H2Connection(Protocol, TimeoutMixin):
         """
         self._outboundStreamQueues[streamID].append(_END_STREAM_SENTINEL)
         self.priority.unblock(streamID)
+        self._resumeSending()
+
+
+    def _resumeSending(self):
+        """
+        Restart the data-sending loop if it is waiting for a stream to have
+        data to send.
+
+        While frames are being received, the loop is only restarted once they
+        have all been handled.
+        """
         if self._sendingDeferred is not None:
+            if self._batching:
+                self._resumePending = True
+                return
             d = self._sendingDeferred
             self._sendingDeferred = None
-            d.callback(streamID)
+            d.callback(None)
 
 
     def abortRequest(self, streamID):
@@ -569,7 +742,7 @@ class H2Connection(Protocol, TimeoutMixin):
         @type streamID: L{int}
         """
         self.conn.reset_stream(streamID)
-        self.transport.write(self.conn.data_to_send())
+        self._flush()
         self._requestDone(streamID)
 
 
@@ -582,7 +755,12 @@ class H2Connection(Protocol, TimeoutMixin):
         @type streamID: L{int}
         """
         del self._outboundStreamQueues[streamID]
-        self.priority.remove_stream(streamID)
+        del self._outboundQueueSizes[streamID]
+        try:
+            self.priority.remove_stream(streamID)
+        except priority.MissingStreamError:
+            # The data-sending loop already removed it when ending the stream.
+            pass
         del self.streams[streamID]
         cleanupCallback = self._streamCleanupCallbacks.pop(streamID)
         cleanupCallback.callback(streamID)
@@ -601,16 +779,8 @@ class H2Connection(Protocol, TimeoutMixin):
             stream, including the data queued to be sent.
         @rtype: L{int}
         """
-        # TODO: This involves a fair bit of looping and computation for
-        # something that is called a lot. Consider caching values somewhere.
         windowSize = self.conn.local_flow_control_window(streamID)
-        sendQueue = self._outboundStreamQueues[streamID]
-        alreadyConsumed = sum(
-            len(chunk) for chunk in sendQueue
-            if chunk is not _END_STREAM_SENTINEL
-        )
-
-        return windowSize - alreadyConsumed
+        return windowSize - self._outboundQueueSizes[streamID]
 
 
     def _handleWindowUpdate(self, event):
@@ -637,17 +807,59 @@ class H2Connection(Protocol, TimeoutMixin):
             # If we haven't got any data to send, don't unblock the stream. If
             # we do, we'll eventually get an exception inside the
             # _sendPrioritisedData loop some time later.
-            if self._outboundStreamQueues.get(streamID):
-                self.priority.unblock(streamID)
             self.streams[streamID].windowUpdated()
+            if self._streamCanSend(streamID):
+                self.priority.unblock(streamID)
+                self._resumeSending()
         else:
-            # Update strictly applies to all streams.
-            for stream in self.streams.values():
-                stream.windowUpdated()
+            self._allWindowsUpdated()
+
+
+    def _streamCanSend(self, streamID):
+        """
+        Checks whether a stream has data to send which its flow control
+        window allows to be sent, or is ready to be ended.
+
+        @param streamID: The ID of the stream.
+        @type streamID: L{int}
+
+        @rtype: L{bool}
+        """
+        queue = self._outboundStreamQueues.get(streamID)
+        if not queue:
+            return False
+        return (queue[0] is _END_STREAM_SENTINEL or
+                self.conn.local_flow_control_window(streamID) > 0)
 
-                # If we still have data to send for this stream, unblock it.
-                if self._outboundStreamQueues.get(stream.streamID):
-                    self.priority.unblock(stream.streamID)
+
+    def _allWindowsUpdated(self):
+        """
+        Resume sending data on all streams, after the flow control windows of
+        all of them may have been opened.
+        """
+        # Iterate over a copy: resuming the sending loop may complete streams.
+        for stream in list(self.streams.values()):
+            stream.windowUpdated()
+
+            # If we still have data to send for this stream, unblock it.
+            if self._streamCanSend(stream.streamID):
+                self.priority.unblock(stream.streamID)
+        self._resumeSending()
+
+
+    def _handleRemoteSettingsChanged(self, event):
+        """
+        Internal handler for when the client changes its settings.
+
+        A change to the initial flow control window size changes the window
+        of every stream, without any window update.
+
+        @param event: The Hyper-h2 event that encodes information about the
+            changed settings.
+        @type event: L{h2.events.RemoteSettingsChanged}
+        """
+        if h2.settings.INITIAL_WINDOW_SIZE in event.changed_settings:
+            self._allWindowsUpdated()
 
 
     def getPeer(self):
@@ -690,8 +902,9 @@ class H2Connection(Protocol, TimeoutMixin):
             self.conn.increment_flow_control_window(
                 increment, stream_id=streamID
             )
-        except h2.exceptions.StreamClosedError:
-            # The stream got reset and we haven't worked it out yet. The stream
+        except (h2.exceptions.StreamClosedError, KeyError):
+            # The stream got reset and we haven't worked it out yet, or we
+            # reset it ourselves and the state machine forgot it. The stream
             # window doesn't matter now as all the data that can possibly be
             # received on the stream already has been. We still want to
             # increment the connection window though: the data received on this
@@ -704,7 +917,9 @@ class H2Connection(Protocol, TimeoutMixin):
             pass
 
         self.conn.increment_flow_control_window(increment, stream_id=None)
-        self.transport.write(self.conn.data_to_send())
+        # Don't keep the client waiting for the window to open.
+        if not self._batching:
+            self._flush()
 
 
     def _isSecure(self):
@@ -729,7 +944,7 @@ class H2Connection(Protocol, TimeoutMixin):
         """
         headers = [(b':status', b'100')]
         self.conn.send_headers(headers=headers, stream_id=streamID)
-        self.transport.write(self.conn.data_to_send())
+        self._flushSoon()
 
 
     def _respondToBadRequestAndDisconnect(self, streamID):
@@ -754,7 +969,34 @@ class H2Connection(Protocol, TimeoutMixin):
             stream_id=streamID,
             end_stream=True
         )
-        self.transport.write(self.conn.data_to_send())
+        self._flush()
+
+        stream = self.streams[streamID]
+        stream.connectionLost("Stream reset")
+        self._requestDone(streamID)
+
+
+    def _respondToBodyTooLargeAndDisconnect(self, streamID):
+        """
+        Respond to a request whose body is too large with a 413 response, and
+        reset its stream, so that the client stops sending the body.
+
+        @param streamID: The ID of the stream of the request.
+        @type streamID: L{int}
+        """
+        self.conn.send_headers(
+            headers=[(b':status', b'413')],
+            stream_id=streamID,
+            end_stream=True
+        )
+        try:
+            # A complete response was sent, so the stream is reset without
+            # error.
+            self.conn.reset_stream(streamID, h2.errors.NO_ERROR)
+        except h2.exceptions.StreamClosedError:
+            # The client had already sent the whole body.
+            pass
+        self._flush()
 
         stream = self.streams[streamID]
         stream.connectionLost("Stream reset")
@@ -895,7 +1137,6 @@ class H2Stream(object):
             else:
                 self._request.gotLength(None)
 
-        self._request.parseCookies()
         expectContinue = self._request.requestHeaders.getRawHeaders(b'expect')
         if expectContinue and expectContinue[0].lower() == b'100-continue':
             self._send100Continue()
@@ -1042,6 +1283,14 @@ class H2Stream(object):
         self._conn._respondToBadRequestAndDisconnect(self.streamID)
 
 
+    def _respondToBodyTooLargeAndDisconnect(self):
+        """
+        Respond to a request whose body is too large with a 413 response, and
+        reset the stream.
+        """
+        self._conn._respondToBodyTooLargeAndDisconnect(self.streamID)
+
+
     # Implementation: ITransport
     def write(self, data):
         """
@@ -0,0 +1,186 @@
+# -*- test-case-name: twisted.web.test.test_multipart -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Incremental parsing of I{multipart/form-data} request bodies.
+"""
+
+from __future__ import division, absolute_import
+
+from twisted.web.http_headers import Headers
+
+
+
+class MultipartError(Exception):
+    """
+    A multipart body is malformed.
+    """
+
+
+
+class MultipartParser(object):
+    """
+    A parser of I{multipart/form-data} bodies, as defined by RFC 7578, which
+    reports the headers and the data of each part as soon as they are
+    received rather than once the whole body is.
+
+    Only the end of the data received which might be the beginning of a
+    delimiter is kept, so the memory used does not grow with the size of the
+    parts.
+
+    @ivar maxHeaderSize: The maximum size of the headers of a part, in bytes.
+    @type maxHeaderSize: L{int}
+
+    @ivar maxPaddingSize: The maximum size of the whitespace allowed after a
+        delimiter, in bytes.
+    @type maxPaddingSize: L{int}
+
+    @ivar _delimiter: The delimiter preceding each part.
+    @type _delimiter: L{bytes}
+
+    @ivar _buffer: The data received which has not been parsed yet.
+    @type _buffer: L{bytes}
+
+    @ivar _state: The method parsing C{_buffer} in the current state, which
+        returns whether it made progress, or L{None} once the close delimiter
+        has been received.
+    """
+    maxHeaderSize = 16384
+    maxPaddingSize = 1024
+
+    def __init__(self, boundary, partBegan, partDataReceived, partEnded):
+        """
+        @param boundary: The boundary parameter of the I{Content-Type} of the
+            body.
+        @type boundary: L{bytes}
+
+        @param partBegan: Called with the L{Headers} of each part once they
+            are received.
+
+        @param partDataReceived: Called with each chunk of the data of the
+            current part, as L{bytes}.
+
+        @param partEnded: Called with no arguments at the end of each part.
+        """
+        if not boundary:
+            raise MultipartError("Empty multipart boundary")
+        self._delimiter = b"\r\n--" + boundary
+        self._partBegan = partBegan
+        self._partDataReceived = partDataReceived
+        self._partEnded = partEnded
+        # The body is parsed as if it started with a line break, so that the
+        # first delimiter looks like the following ones.
+        self._buffer = b"\r\n"
+        self._state = self._preamble
+
+
+    def dataReceived(self, data):
+        """
+        Parse some more of the body.
+
+        @param data: The next chunk of the body.
+        @type data: L{bytes}
+
+        @raise MultipartError: If the body is malformed.
+        """
+        if self._state is None:
+            # The epilogue is ignored.
+            return
+        self._buffer += data
+        while self._state is not None and self._state():
+            pass
+
+
+    def finish(self):
+        """
+        Check that the whole body was received.
+
+        @raise MultipartError: If the close delimiter was not received.
+        """
+        if self._state is not None:
+            raise MultipartError("Incomplete multipart body")
+
+
+    def _preamble(self):
+        """
+        Discard everything before the first delimiter.
+        """
+        index = self._buffer.find(self._delimiter)
+        if index == -1:
+            self._buffer = self._buffer[-len(self._delimiter) + 1:]
+            return False
+        self._buffer = self._buffer[index + len(self._delimiter):]
+        self._state = self._afterDelimiter
+        return True
+
+
+    def _afterDelimiter(self):
+        """
+        Parse the end of the line of a delimiter, which is either the close
+        delimiter or followed by the headers of a part.
+        """
+        if len(self._buffer) < 2:
+            return False
+        if self._buffer.startswith(b"--"):
+            self._buffer = b""
+            self._state = None
+            return False
+        index = self._buffer.find(b"\r\n")
+        if index == -1:
+            if len(self._buffer) > self.maxPaddingSize:
+                raise MultipartError("Multipart delimiter line too long")
+            return False
+        if self._buffer[:index].strip(b" \t"):
+            raise MultipartError("Malformed multipart delimiter")
+        self._buffer = self._buffer[index + 2:]
+        self._state = self._headers
+        return True
+
+
+    def _headers(self):
+        """
+        Parse the headers of a part.
+        """
+        if self._buffer.startswith(b"\r\n"):
+            block = b""
+            self._buffer = self._buffer[2:]
+        else:
+            index = self._buffer.find(b"\r\n\r\n")
+            if index == -1:
+                if len(self._buffer) > self.maxHeaderSize:
+                    raise MultipartError("Multipart headers too long")
+                return False
+            block = self._buffer[:index]
+            self._buffer = self._buffer[index + 4:]
+
+        headers = Headers()
+        for line in block.split(b"\r\n") if block else []:
+            name, sep, value = line.partition(b":")
+            name = name.strip()
+            if not sep or not name:
+                raise MultipartError("Malformed multipart header")
+            headers.addRawHeader(name, value.strip())
+        self._partBegan(headers)
+        self._state = self._body
+        return True
+
+
+    def _body(self):
+        """
+        Parse the data of a part, up to the next delimiter.
+        """
+        index = self._buffer.find(self._delimiter)
+        if index == -1:
+            # Keep what might be the beginning of the delimiter.
+            keep = len(self._delimiter) - 1
+            if len(self._buffer) > keep:
+                self._partDataReceived(self._buffer[:-keep])
+                self._buffer = self._buffer[-keep:]
+            return False
+        if index:
+            self._partDataReceived(self._buffer[:index])
+        self._buffer = self._buffer[index + len(self._delimiter):]
+        self._partEnded()
+        self._state = self._afterDelimiter
+        return True
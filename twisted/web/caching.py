@@ -0,0 +1,374 @@
+# -*- test-case-name: twisted.web.test.test_caching -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Caching of the responses rendered by resources.
+
+Wrapping a resource in a L{CachingResource} keeps the responses it renders
+to I{GET} requests in memory, so that the same requests are answered again
+without rendering it until they expire::
+
+    root.putChild(b"report", CachingResource(Report(), maxAge=30))
+
+Cached responses also answer conditional requests: a request whose
+I{If-None-Match} or I{If-Modified-Since} header matches the I{ETag} or
+I{Last-Modified} time of the response is answered with I{304 Not Modified},
+and without a body.
+
+@since: 16.4
+"""
+
+from __future__ import division, absolute_import
+
+__all__ = ['CachingResource']
+
+from collections import OrderedDict
+
+from zope.interface import implementer
+
+from twisted.python import failure
+from twisted.python.compat import intToBytes
+from twisted.python.components import proxyForInterface
+from twisted.web import http
+from twisted.web.iweb import _IRequestEncoder
+from twisted.web.resource import IResource
+from twisted.web.server import NOT_DONE_YET, Request
+
+
+
+class _CachedResponse(object):
+    """
+    A response kept by a L{CachingResource}.
+
+    @ivar key: The key of the response in the cache.
+    @type key: L{tuple}
+
+    @ivar code: The status code of the response.
+    @type code: L{int}
+
+    @ivar message: The status message of the response.
+    @type message: L{bytes}
+
+    @ivar headers: The names and values of the headers of the response.
+    @type headers: L{list} of L{tuple} of L{bytes} and L{list} of L{bytes}
+
+    @ivar etag: The entity tag of the response, or L{None}.
+
+    @ivar lastModified: The time at which the response was last modified, in
+        seconds since the epoch, or L{None}.
+
+    @ivar body: The body of the response.
+    @type body: L{bytes}
+
+    @ivar stored: The time at which the response was stored.
+    @type stored: L{float}
+
+    @ivar expires: The time at which the response expires.
+    @type expires: L{float}
+    """
+
+    def __init__(self, key, code, message, headers, etag, lastModified, body,
+                 stored, expires):
+        self.key = key
+        self.code = code
+        self.message = message
+        self.headers = headers
+        self.etag = etag
+        self.lastModified = lastModified
+        self.body = body
+        self.stored = stored
+        self.expires = expires
+
+
+
+@implementer(_IRequestEncoder)
+class _ResponseRecorder(object):
+    """
+    A request encoder recording the body of a response written by the
+    resource wrapped by a L{CachingResource}, so that it can be stored once
+    the response is finished.
+
+    @ivar _encoder: The encoder the request had, if the L{CachingResource} is
+        itself wrapped by an encoding resource, or L{None}.  Its input is
+        what is recorded, so that cached responses can be encoded for each
+        request.
+
+    @ivar _chunks: The data written so far, or L{None} if it is larger than
+        C{maxEntrySize}.
+    """
+
+    def __init__(self, cache, key, request, encoder):
+        self._cache = cache
+        self._key = key
+        self._request = request
+        self._encoder = encoder
+        self._chunks = []
+        self._size = 0
+
+
+    def encode(self, data):
+        if self._chunks is not None:
+            self._size += len(data)
+            if self._size > self._cache.maxEntrySize:
+                self._chunks = None
+            else:
+                self._chunks.append(data)
+        if self._encoder is not None:
+            return self._encoder.encode(data)
+        return data
+
+
+    def finish(self):
+        body = None
+        if self._chunks is not None:
+            body = b''.join(self._chunks)
+        self._cache._rendered(
+            self._key, self._request, body, self._encoder is not None)
+        if self._encoder is not None:
+            return self._encoder.finish()
+        return b''
+
+
+
+class CachingResource(proxyForInterface(IResource)):
+    """
+    Wrap a resource, keeping the responses it renders to I{GET} requests in
+    a bounded cache from which the same requests are answered, and answering
+    I{HEAD} and conditional requests from it as well.
+
+    Requests are the same if they are for the same URI and host, over the
+    same scheme, and have the same values for the request headers named by
+    the I{Vary} header of the response.  Only I{200 OK} responses without
+    cookies are stored.  They are kept for the number of seconds given by
+    the I{s-maxage} or I{max-age} directive of their I{Cache-Control}
+    header, or for C{maxAge} seconds if it has neither, and are not stored
+    at all if it has a I{no-store}, I{no-cache} or I{private} directive.
+
+    Several requests which are not cached are answered by rendering the
+    wrapped resource once: the others wait for the first to be rendered,
+    and are then answered from the cache.
+
+    Child resources are not wrapped, and only requests received by a
+    L{twisted.web.server.Request} are cached.  To compress responses, wrap
+    the L{CachingResource} with an
+    L{EncodingResourceWrapper<twisted.web.resource.EncodingResourceWrapper>}
+    rather than the other way around.
+
+    @ivar maxAge: The number of seconds for which a response without a
+        I{max-age} is kept.
+    @type maxAge: L{int}
+
+    @ivar maxEntries: The maximum number of responses kept.  Storing one
+        more response discards the least recently used.
+    @type maxEntries: L{int}
+
+    @ivar maxEntrySize: The maximum size of the body of a response kept, in
+        bytes.
+    @type maxEntrySize: L{int}
+
+    @ivar _entries: An L{OrderedDict} mapping keys to L{_CachedResponse}s,
+        the least recently used first.
+
+    @ivar _vary: An L{OrderedDict} mapping URIs to the lowercase names of the
+        request headers by which their responses vary, the least recently
+        stored first.
+
+    @ivar _pending: A L{dict} mapping the keys of the requests being
+        rendered to the L{list} of requests waiting for them.
+    """
+
+    def __init__(self, resource, maxAge=60, maxEntries=1000,
+                 maxEntrySize=1024 * 1024, reactor=None):
+        """
+        @param resource: The resource to wrap.
+        @type resource: L{IResource} provider
+
+        @param reactor: The reactor giving the time, by default the global
+            reactor.
+        """
+        super(CachingResource, self).__init__(resource)
+        if reactor is None:
+            from twisted.internet import reactor
+        self._reactor = reactor
+        self.maxAge = maxAge
+        self.maxEntries = maxEntries
+        self.maxEntrySize = maxEntrySize
+        self._entries = OrderedDict()
+        self._vary = OrderedDict()
+        self._pending = {}
+
+
+    def _key(self, request):
+        """
+        Compute the key of a request in the cache.
+        """
+        key = (request.isSecure(), request.getHeader(b'host'), request.uri)
+        for name in self._vary.get(request.uri, ()):
+            key += (b','.join(request.requestHeaders.getRawHeaders(name, [])),)
+        return key
+
+
+    def render(self, request):
+        """
+        Answer a request from the cache, or by rendering the wrapped resource
+        and storing its response.
+        """
+        if (request.method not in (b'GET', b'HEAD') or
+                not isinstance(request, Request) or request._inFakeHead):
+            return self.original.render(request)
+
+        key = self._key(request)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            if entry.expires > self._reactor.seconds():
+                self._entries[key] = entry
+                return self._respond(request, entry)
+        if request.method == b'HEAD':
+            return self.original.render(request)
+
+        waiting = self._pending.get(key)
+        if waiting is not None:
+            waiting.append(request)
+            request.notifyFinish().addErrback(
+                lambda ignored: waiting.remove(request)
+                if request in waiting else None)
+            return NOT_DONE_YET
+
+        self._pending[key] = []
+        request._encoder = _ResponseRecorder(
+            self, key, request, request._encoder)
+        request.notifyFinish().addErrback(
+            lambda ignored: self._renderAgain(
+                self._pending.pop(key, []), self))
+        return self.original.render(request)
+
+
+    def _respond(self, request, entry):
+        """
+        Set up the response to a request from a cached response.
+
+        @return: The body of the response.
+        @rtype: L{bytes}
+        """
+        request.setResponseCode(entry.code, entry.message)
+        for name, values in entry.headers:
+            request.responseHeaders.setRawHeaders(name, values)
+        request.setHeader(
+            b'age', intToBytes(int(self._reactor.seconds() - entry.stored)))
+
+        request.etag = entry.etag
+        request.lastModified = entry.lastModified
+        cached = None
+        if request.getHeader(b'if-none-match') is not None:
+            cached = request.setETag(entry.etag)
+        elif entry.lastModified is not None:
+            cached = request.setLastModified(entry.lastModified)
+        if cached is http.CACHED or request.method == b'HEAD':
+            return b''
+        return entry.body
+
+
+    def _rendered(self, key, request, body, encoded):
+        """
+        Store the response to a request if it can be, and answer the
+        requests waiting for it.
+
+        @param key: The key of the request when it was rendered.
+
+        @param body: The body of the response, or L{None} if it is too large
+            to be stored.
+
+        @param encoded: Whether the response is encoded by an encoder set up
+            before the request was rendered, in which case its encoding
+            headers are not stored.
+        """
+        waiting = self._pending.pop(key, [])
+        entry = self._store(request, body, encoded)
+        if entry is None:
+            # The others would not be cached either, so they are rendered at
+            # once.
+            self._renderAgain(waiting, self.original)
+            return
+        for other in waiting:
+            if self._key(other) != entry.key:
+                # The response varies by headers which were not known yet.
+                self._renderAgain([other], self)
+                continue
+            body = self._respond(other, entry)
+            if not (other.method == b'HEAD' or
+                    other.code in http.NO_BODY_CODES):
+                other.setHeader(b'content-length', intToBytes(len(body)))
+            other.write(body)
+            other.finish()
+
+
+    def _store(self, request, body, encoded):
+        """
+        Store the response to a request if it can be.
+
+        @return: The L{_CachedResponse} stored, or L{None}.
+        """
+        if body is None or request.code != http.OK or request.cookies:
+            return None
+        maxAge = self.maxAge
+        directives = b','.join(
+            request.responseHeaders.getRawHeaders(b'cache-control', []))
+        sharedMaxAge = None
+        for directive in directives.split(b','):
+            name, _, value = directive.strip().lower().partition(b'=')
+            if name in (b'no-store', b'no-cache', b'private'):
+                return None
+            try:
+                if name == b'max-age':
+                    maxAge = int(value.strip(b'"'))
+                elif name == b's-maxage':
+                    sharedMaxAge = int(value.strip(b'"'))
+            except ValueError:
+                return None
+        if sharedMaxAge is not None:
+            maxAge = sharedMaxAge
+        if maxAge <= 0:
+            return None
+
+        vary = []
+        for value in request.responseHeaders.getRawHeaders(b'vary', []):
+            vary.extend(name.strip().lower() for name in value.split(b','))
+        if b'*' in vary:
+            return None
+        self._vary.pop(request.uri, None)
+        self._vary[request.uri] = tuple(name for name in vary if name)
+        while len(self._vary) > self.maxEntries:
+            self._vary.popitem(last=False)
+
+        excluded = {b'date'}
+        if encoded:
+            excluded.update([b'content-encoding', b'content-length'])
+        headers = [
+            (name, values)
+            for name, values in request.responseHeaders.getAllRawHeaders()
+            if name.lower() not in excluded]
+        now = self._reactor.seconds()
+        entry = _CachedResponse(
+            self._key(request), request.code, request.code_message, headers,
+            request.etag, request.lastModified, body, now, now + maxAge)
+        self._entries.pop(entry.key, None)
+        self._entries[entry.key] = entry
+        while len(self._entries) > self.maxEntries:
+            self._entries.popitem(last=False)
+        return entry
+
+
+    def _renderAgain(self, requests, resource):
+        """
+        Render requests which were waiting for a response that cannot answer
+        them.
+
+        @param resource: Either this resource, to answer them from the cache
+            if possible, or the wrapped resource.
+        """
+        for request in requests:
+            try:
+                request.render(resource)
+            except:
+                request.processingFailed(failure.Failure())
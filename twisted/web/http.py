@@ -50,8 +50,9 @@ __all__ = [
     'urlparse', 'parse_qs', 'datetimeToString', 'datetimeToLogString', 'timegm',
     'stringToDatetime', 'toChunk', 'fromChunk', 'parseContentRange',
 
-    'StringTransport', 'HTTPClient', 'NO_BODY_CODES', 'Request',
-    'PotentialDataLoss', 'HTTPChannel', 'HTTPFactory',
+    'StringTransport', 'HTTPClient', 'NO_BODY_CODES', 'Request', 'FileUpload',
+    'PotentialDataLoss', 'HTTPChannel', 'HTTPFactory', 'AccessLogOverflow',
+    'BufferedLogFile',
     ]
 
 
@@ -64,6 +65,8 @@ import time
 import calendar
 import warnings
 import os
+import threading
+from collections import deque
 from io import BytesIO as StringIO
 
 try:
@@ -79,8 +82,8 @@ except ImportError:
         # cgi.parse_header requires a str
         key, pdict = cgi.parse_header(line.decode('charmap'))
 
-        # We want the key as bytes, and cgi.parse_multipart (which consumes
-        # pdict) expects a dict of str keys but bytes values
+        # We want the key as bytes, and a dict of str keys but bytes values,
+        # as on Python 2
         key = key.encode('charmap')
         pdict = {x:y.encode('charmap') for x, y in pdict.items()}
         return (key, pdict)
@@ -93,16 +96,19 @@ from twisted.python.compat import (
     _PY3, unicode, intToBytes, networkString, nativeString)
 from twisted.python.deprecate import deprecated
 from twisted.python import log
+from twisted.python.constants import NamedConstant, Names
 from twisted.python.versions import Version
 from twisted.python.components import proxyForInterface
 from twisted.internet import interfaces, protocol, address
 from twisted.internet.defer import Deferred
 from twisted.internet.interfaces import IProtocol
+from twisted.logger import globalMetrics
 from twisted.protocols import policies, basic
 
 from twisted.web.iweb import (
     IRequest, IAccessLogFormatter, INonQueuedRequestFactory)
 from twisted.web.http_headers import Headers
+from twisted.web._multipart import MultipartError, MultipartParser
 
 try:
     from twisted.web._http2 import H2Connection
@@ -543,6 +549,42 @@ NO_BODY_CODES = (204, 304)
 # Sentinel object that detects people explicitly passing `queued` to Request.
 _QUEUED_SENTINEL = object()
 
+_requestsServed = globalMetrics.counter(
+    "twisted_web_requests_total", u"HTTP requests served.")
+
+# The lowercase names of common request headers, mapped to themselves, so
+# that the requests received share them rather than each keeping copies.
+_commonHeaderNames = dict((name, name) for name in [
+    b'accept', b'accept-encoding', b'accept-language', b'authorization',
+    b'cache-control', b'connection', b'content-length', b'content-type',
+    b'cookie', b'expect', b'host', b'if-modified-since', b'if-none-match',
+    b'origin', b'pragma', b'range', b'referer', b'transfer-encoding',
+    b'upgrade', b'user-agent', b'x-forwarded-for', b'x-requested-with'])
+
+
+class FileUpload(object):
+    """
+    A file uploaded in a I{multipart/form-data} request body.
+
+    @ivar filename: The name of the file given by the client, which must not
+        be trusted as a path.
+    @type filename: L{bytes}
+
+    @ivar headers: The headers of the part of the body holding the file.
+    @type headers: L{http_headers.Headers}
+
+    @ivar file: The file-like object returned by L{Request.openUpload}, to
+        which the file was written.
+
+    @since: 16.4
+    """
+
+    def __init__(self, filename, headers, file):
+        self.filename = filename
+        self.headers = headers
+        self.file = file
+
+
 
 @implementer(interfaces.IConsumer)
 class Request:
@@ -556,6 +598,8 @@ class Request:
     @ivar uri: The full URI that was requested (includes arguments).
     @ivar path: The path only (arguments not included).
     @ivar args: All of the arguments, including URL and POST arguments.
+        Except for I{multipart/form-data} bodies, they are only parsed when
+        first accessed.
     @type args: A mapping of strings (the argument names) to lists of values.
                 i.e., ?foo=bar&foo=baz&quux=spam results in
                 {'foo': ['bar', 'baz'], 'quux': ['spam']}.
@@ -563,6 +607,27 @@ class Request:
     @ivar cookies: The cookies that will be sent in the response.
     @type cookies: L{list} of L{bytes}
 
+    @ivar received_cookies: The cookies received with the request, parsed by
+        L{parseCookies} when first accessed.
+    @type received_cookies: L{dict} mapping L{bytes} to L{bytes}
+
+    @ivar files: The files uploaded in a I{multipart/form-data} body, which
+        were written to the file-like objects returned by L{openUpload} as
+        they were received, rather than kept in C{args}.  They are closed
+        when the request finishes or its connection is lost.
+    @type files: L{dict} mapping L{bytes} to L{list} of L{FileUpload}
+
+    @ivar maxBodySize: The maximum size of the request body, in bytes, or
+        L{None} for no limit.  A request with a larger body is answered with
+        a I{413 Request Entity Too Large} response as soon as this is known,
+        without receiving the rest of the body, and is not processed.
+    @type maxBodySize: L{int} or L{None}
+
+    @ivar spoolUploads: Whether L{openUpload} writes the files uploaded in a
+        I{multipart/form-data} body to temporary files rather than keeping
+        them in C{args}.
+    @type spoolUploads: L{bool}
+
     @type requestHeaders: L{http_headers.Headers}
     @ivar requestHeaders: All received HTTP request headers.
 
@@ -578,6 +643,44 @@ class Request:
         which this request was received is closed and which is C{True} after
         that.
     @type _disconnected: C{bool}
+
+    @ivar _args: The arguments, or L{None} if they have not been parsed.
+
+    @ivar _query: The query string of the URI, from which C{args} are
+        parsed, or L{None} if the request has not been received.
+    @type _query: L{bytes}
+
+    @ivar _formPending: Whether C{args} are to be parsed from an
+        I{application/x-www-form-urlencoded} body as well.
+    @type _formPending: L{bool}
+
+    @ivar _receivedCookies: The received cookies, or L{None} if they have not
+        been parsed.
+
+    @ivar _bodyLength: The size of the body received so far, in bytes.
+    @type _bodyLength: L{int}
+
+    @ivar _bodyTooLarge: Whether the length of the body given by the request
+        headers is larger than C{maxBodySize}.
+    @type _bodyTooLarge: L{bool}
+
+    @ivar _bodyRejected: Whether the request was answered with a I{413}
+        response because its body is too large.
+    @type _bodyRejected: L{bool}
+
+    @ivar _multipart: The parser of a I{multipart/form-data} body, or L{None}.
+    @type _multipart: L{MultipartParser}
+
+    @ivar _multipartArgs: The form fields parsed from a I{multipart/form-data}
+        body, or L{None} if the body is not one.
+
+    @ivar _multipartError: Whether a I{multipart/form-data} body was found to
+        be malformed.
+    @type _multipartError: L{bool}
+
+    @ivar _part: The name of the part of a I{multipart/form-data} body being
+        received, the L{FileUpload} or the L{list} of chunks of data it is
+        written to, and its declared length or L{None}.
     """
     producer = None
     finished = 0
@@ -591,11 +694,24 @@ class Request:
     sentLength = 0 # content-length of response, or total bytes sent via chunking
     etag = None
     lastModified = None
-    args = None
     path = None
     content = None
     _forceSSL = 0
     _disconnected = False
+    _args = None
+    _query = None
+    _formPending = False
+    _receivedCookies = None
+    _files = None
+    maxBodySize = None
+    spoolUploads = False
+    _bodyLength = 0
+    _bodyTooLarge = False
+    _bodyRejected = False
+    _multipart = None
+    _multipartArgs = None
+    _multipartError = False
+    _part = None
 
     def __init__(self, channel, queued=_QUEUED_SENTINEL):
         """
@@ -606,7 +722,6 @@ class Request:
         self.notifications = []
         self.channel = channel
         self.requestHeaders = Headers()
-        self.received_cookies = {}
         self.responseHeaders = Headers()
         self.cookies = [] # outgoing cookies
         self.transport = self.channel.transport
@@ -626,6 +741,9 @@ class Request:
             self.unregisterProducer()
         self.channel.requestDone(self)
         del self.channel
+        if self._formPending:
+            # Parse the arguments in the body before it goes away.
+            self._getArgs()
         if self.content is not None:
             try:
                 self.content.close()
@@ -633,10 +751,29 @@ class Request:
                 # win32 suckiness, no idea why it does this
                 pass
             del self.content
+        self._closeUploads()
         for d in self.notifications:
             d.callback(None)
         self.notifications = []
 
+
+    def _closeUploads(self):
+        """
+        Close the files uploaded in a I{multipart/form-data} body, including
+        one which was only partly received.
+        """
+        uploads = []
+        if self._files is not None:
+            for files in self._files.values():
+                uploads.extend(files)
+        if self._part is not None and isinstance(self._part[1], FileUpload):
+            uploads.append(self._part[1])
+            self._part = None
+        for upload in uploads:
+            close = getattr(upload.file, 'close', None)
+            if close is not None:
+                close()
+
     # methods for channel - end users should not use these
 
     def noLongerQueued(self):
@@ -667,6 +804,11 @@ class Request:
             self.content = StringIO()
         else:
             self.content = tempfile.TemporaryFile()
+        if (length is not None and self.maxBodySize is not None and
+                length > self.maxBodySize):
+            # Rejected when the body starts to be received, since the
+            # channel may not be ready to respond yet.
+            self._bodyTooLarge = True
 
 
     def parseCookies(self):
@@ -675,6 +817,8 @@ class Request:
 
         This method is not intended for users.
         """
+        if self._receivedCookies is None:
+            self._receivedCookies = {}
         cookieheaders = self.requestHeaders.getRawHeaders(b"cookie")
 
         if cookieheaders is None:
@@ -686,18 +830,218 @@ class Request:
                     cook = cook.lstrip()
                     try:
                         k, v = cook.split(b'=', 1)
-                        self.received_cookies[k] = v
+                        self._receivedCookies[k] = v
                     except ValueError:
                         pass
 
 
+    def _getReceivedCookies(self):
+        """
+        Get the received cookies, parsing them if necessary.
+        """
+        if self._receivedCookies is None:
+            self.parseCookies()
+        return self._receivedCookies
+
+
+    def _setReceivedCookies(self, cookies):
+        self._receivedCookies = cookies
+
+    received_cookies = property(_getReceivedCookies, _setReceivedCookies)
+
+
+    def _getArgs(self):
+        """
+        Get the arguments, parsing them if necessary.
+        """
+        if self._args is None and self._query is not None:
+            args = parse_qs(self._query, 1)
+            if self._formPending and self.content is not None:
+                position = self.content.tell()
+                self.content.seek(0, 0)
+                args.update(parse_qs(self.content.read(), 1))
+                self.content.seek(position, 0)
+            self._formPending = False
+            self._args = args
+        return self._args
+
+
+    def _setArgs(self, args):
+        self._formPending = False
+        self._args = args
+
+    args = property(_getArgs, _setArgs)
+
+
+    def _getFiles(self):
+        """
+        Get the uploaded files.
+        """
+        if self._files is None:
+            self._files = {}
+        return self._files
+
+
+    def _setFiles(self, files):
+        self._files = files
+
+    files = property(_getFiles, _setFiles)
+
+
+    def openUpload(self, name, filename, headers):
+        """
+        Open the file to which a file uploaded in a I{multipart/form-data}
+        body is written as it is received.
+
+        Override this to stream uploads elsewhere, or to consume them as they
+        arrive.  The object returned must have a C{write} method, which is
+        called with each chunk of the file, and may have a C{seek} method,
+        which is called to rewind it once the whole file is received; it is
+        then added to C{files}.  It may also have a C{close} method, which
+        is called when the request finishes or its connection is lost, even
+        if the file was only partly received.
+
+        @param name: The name of the form field.
+        @type name: L{bytes}
+
+        @param filename: The name of the file given by the client.
+        @type filename: L{bytes}
+
+        @param headers: The headers of the part of the body holding the file.
+        @type headers: L{http_headers.Headers}
+
+        @return: A file-like object, or L{None} to keep the file in C{args}
+            like other fields.  By default, a temporary file if
+            C{spoolUploads} is set.
+
+        @since: 16.4
+        """
+        if self.spoolUploads:
+            return tempfile.TemporaryFile()
+        return None
+
+
     def handleContentChunk(self, data):
         """
         Write a chunk of data.
 
         This method is not intended for users.
         """
+        if self._bodyRejected:
+            return
+        if not self._bodyLength:
+            self._startMultipart()
+        self._bodyLength += len(data)
+        if self._bodyTooLarge or (self.maxBodySize is not None and
+                                  self._bodyLength > self.maxBodySize):
+            self._bodyRejected = True
+            self.channel._respondToBodyTooLargeAndDisconnect()
+            return
         self.content.write(data)
+        if self._multipart is not None:
+            try:
+                self._multipart.dataReceived(data)
+            except MultipartError:
+                self._multipart = None
+                self._multipartError = True
+
+
+    def _startMultipart(self):
+        """
+        Start parsing the body as it is received if it is a
+        I{multipart/form-data} one.
+        """
+        if self._multipartArgs is not None or self._multipartError:
+            return
+        ctype = self.requestHeaders.getRawHeaders(b'content-type')
+        if not ctype:
+            return
+        key, pdict = _parseHeader(ctype[0])
+        if key != b'multipart/form-data':
+            return
+        self._multipartArgs = {}
+        try:
+            self._multipart = MultipartParser(
+                pdict.get('boundary', b''), self._multipartPartBegan,
+                self._multipartDataReceived, self._multipartPartEnded)
+        except MultipartError:
+            self._multipartError = True
+
+
+    def _multipartPartBegan(self, headers):
+        """
+        Start receiving a part of a I{multipart/form-data} body.
+        """
+        disposition = headers.getRawHeaders(b'content-disposition')
+        if not disposition:
+            raise MultipartError("Part without a Content-Disposition")
+        key, pdict = _parseHeader(disposition[0])
+        name = pdict.get('name')
+        if key.lower() != b'form-data' or name is None:
+            raise MultipartError("Part without a form field name")
+        length = headers.getRawHeaders(b'content-length')
+        if length is not None:
+            try:
+                length = int(length[0])
+            except ValueError:
+                raise MultipartError("Invalid part Content-Length")
+        filename = pdict.get('filename')
+        upload = None
+        if filename is not None:
+            uploadFile = self.openUpload(name, filename, headers)
+            if uploadFile is not None:
+                upload = FileUpload(filename, headers, uploadFile)
+        self._part = (name, upload if upload is not None else [], length)
+
+
+    def _multipartDataReceived(self, data):
+        """
+        Receive some of the data of a part of a I{multipart/form-data} body.
+        """
+        name, target, length = self._part
+        if isinstance(target, FileUpload):
+            target.file.write(data)
+        else:
+            target.append(data)
+        if length is not None:
+            length -= len(data)
+            if length < 0:
+                raise MultipartError("Part longer than its Content-Length")
+            self._part = (name, target, length)
+
+
+    def _multipartPartEnded(self):
+        """
+        Finish receiving a part of a I{multipart/form-data} body.
+        """
+        name, target, length = self._part
+        self._part = None
+        if length:
+            raise MultipartError("Part shorter than its Content-Length")
+        if isinstance(target, FileUpload):
+            if getattr(target.file, 'seek', None) is not None:
+                target.file.seek(0, 0)
+            self.files.setdefault(name, []).append(target)
+        else:
+            self._multipartArgs.setdefault(name, []).append(b''.join(target))
+
+
+    def _finishMultipart(self):
+        """
+        Finish parsing a I{multipart/form-data} body.
+
+        @return: The form fields which were not uploaded files.
+        @rtype: L{dict}
+
+        @raise MultipartError: If the body is malformed.
+        """
+        if self._multipartError:
+            raise MultipartError("Malformed multipart body")
+        if self._multipart is None:
+            # No body.
+            return {}
+        self._multipart.finish()
+        return self._multipartArgs
 
 
     def requestReceived(self, command, path, version):
@@ -716,26 +1060,23 @@ class Request:
         @type version: C{bytes}
         @param version: The HTTP version of this request.
         """
+        if self._bodyRejected:
+            return
         self.content.seek(0,0)
-        self.args = {}
 
         self.method, self.uri = command, path
         self.clientproto = version
-        x = self.uri.split(b'?', 1)
-
-        if len(x) == 1:
-            self.path = self.uri
-        else:
-            self.path, argstring = x
-            self.args = parse_qs(argstring, 1)
+        self.path, _, self._query = self.uri.partition(b'?')
 
         # cache the client and server information, we'll need this later to be
         # serialized and sent with the request so CGIs will work remotely
         self.client = self.channel.getPeer()
         self.host = self.channel.getHost()
 
-        # Argument processing
-        args = self.args
+        # Argument processing.  Multipart bodies were parsed as they were
+        # received, and are only checked now, so that they can be rejected
+        # before the request is processed; everything else is parsed when
+        # args are first accessed.
         ctype = self.requestHeaders.getRawHeaders(b'content-type')
         if ctype is not None:
             ctype = ctype[0]
@@ -744,24 +1085,15 @@ class Request:
             mfd = b'multipart/form-data'
             key, pdict = _parseHeader(ctype)
             if key == b'application/x-www-form-urlencoded':
-                args.update(parse_qs(self.content.read(), 1))
+                self._formPending = True
             elif key == mfd:
                 try:
-                    cgiArgs = cgi.parse_multipart(self.content, pdict)
-
-                    if _PY3:
-                        # parse_multipart on Python 3 decodes the header bytes
-                        # as iso-8859-1 and returns a str key -- we want bytes
-                        # so encode it back
-                        self.args.update({x.encode('iso-8859-1'): y
-                                          for x, y in cgiArgs.items()})
-                    else:
-                        self.args.update(cgiArgs)
-                except:
+                    formArgs = self._finishMultipart()
+                except MultipartError:
                     # It was a bad request.
                     self.channel._respondToBadRequestAndDisconnect()
                     return
-            self.content.seek(0, 0)
+                self.args.update(formArgs)
 
         self.process()
 
@@ -880,6 +1212,7 @@ class Request:
             self.channel.factory.log(self)
 
         self.finished = 1
+        _requestsServed.increment()
         if not self.queued:
             self._cleanup()
 
@@ -1333,6 +1666,7 @@ class Request:
         self.channel = None
         if self.content is not None:
             self.content.close()
+        self._closeUploads()
         for d in self.notifications:
             d.errback(reason)
         self.notifications = []
@@ -1788,6 +2122,7 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
             return False
 
         header = header.lower()
+        header = _commonHeaderNames.get(header, header)
         data = data.strip()
         if header == b'content-length':
             try:
@@ -1862,7 +2197,6 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
 
     def allHeadersReceived(self):
         req = self.requests[-1]
-        req.parseCookies()
         self.persistent = self.checkPersistence(req, self._version)
         req.gotLength(self.length)
         # Handle 'Expect: 100-continue' with automated 100 response code,
@@ -2106,6 +2440,17 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         self.transport.loseConnection()
 
 
+    def _respondToBodyTooLargeAndDisconnect(self):
+        """
+        Respond to a request whose body is larger than its C{maxBodySize} with
+        a I{413 Request Entity Too Large} response and disconnect, without
+        receiving the rest of the body.
+        """
+        self.transport.write(
+            b"HTTP/1.1 413 Request Entity Too Large\r\n\r\n")
+        self.transport.loseConnection()
+
+
 
 def _escape(s):
     """
@@ -2320,6 +2665,10 @@ class _GenericHTTPChannelProtocol(proxyForInterface(IProtocol, "_channel")):
                 self._channel.site = self._site
                 self._channel.factory = self._factory
                 self._channel.timeOut = self._timeOut
+                if self._factory is not None:
+                    self._channel.settings = self._factory.h2Settings
+                    self._channel.connectionWindowSize = (
+                        self._factory.h2ConnectionWindowSize)
                 self._channel.makeConnection(transport)
             else:
                 # Only HTTP/2 and HTTP/1.1 are supported right now.
@@ -2340,6 +2689,152 @@ def _genericHTTPChannelProtocolFactory(self):
 
 
 
+class AccessLogOverflow(Names):
+    """
+    Policies for lines written to a full L{BufferedLogFile}.
+
+    @cvar drop: Discard the line.
+
+    @cvar block: Wait until the writer thread has made room for the line.
+        This blocks the reactor thread while the disk is stalled.
+
+    @cvar sample: Once the buffer is half full, keep only one out of every
+        C{sampleRate} lines, so that the log still shows a sample of the
+        requests during a stall, and discard lines once it is full.
+    """
+    drop = NamedConstant()
+    block = NamedConstant()
+    sample = NamedConstant()
+
+
+
+class BufferedLogFile(object):
+    """
+    A write-only file which buffers the lines written to it in memory and
+    writes them out in batches from a dedicated thread, so that writing a line
+    never waits for the disk.
+
+    @ivar capacity: The maximum number of lines buffered.
+    @type capacity: L{int}
+
+    @ivar overflow: What to do with lines written to a full buffer.
+    @type overflow: L{AccessLogOverflow} constant
+
+    @ivar sampleRate: See L{AccessLogOverflow.sample}.
+    @type sampleRate: L{int}
+
+    @ivar dropped: The number of lines discarded because the buffer was
+        full, or by sampling.
+    @type dropped: L{int}
+
+    @ivar _logFile: The file to which the buffered lines are written.
+
+    @ivar _buffer: The lines waiting to be written.
+    @type _buffer: L{deque} of L{bytes}
+
+    @ivar _condition: A L{threading.Condition} protecting C{_buffer} and
+        C{_closing}, notified when lines are added to an empty buffer, when
+        the writer thread takes the buffered lines, and when closing.
+
+    @ivar _closing: Whether L{close} has been called.
+
+    @ivar _overflowed: The number of lines written while the buffer was half
+        full, for sampling.
+
+    @ivar _thread: The writer thread.
+
+    @since: 16.4
+    """
+
+    def __init__(self, logFile, capacity=10000,
+                 overflow=AccessLogOverflow.drop, sampleRate=10):
+        """
+        Start the writer thread.
+
+        @param logFile: The file to which the buffered lines are written, and
+            which is closed by L{close}.  It is only used from the writer
+            thread.
+        """
+        self._logFile = logFile
+        self.capacity = capacity
+        self.overflow = overflow
+        self.sampleRate = sampleRate
+        self.dropped = 0
+        self._buffer = deque()
+        self._condition = threading.Condition()
+        self._closing = False
+        self._overflowed = 0
+        self._thread = threading.Thread(
+            target=self._writeLoop, name="BufferedLogFile writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+
+    def write(self, line):
+        """
+        Buffer a line to be written by the writer thread, applying the
+        overflow policy if the buffer is full.
+
+        @param line: The line, including its line separator.
+        @type line: L{bytes}
+        """
+        with self._condition:
+            buffered = len(self._buffer)
+            if buffered >= self.capacity:
+                if self.overflow is not AccessLogOverflow.block:
+                    self.dropped += 1
+                    return
+                while (len(self._buffer) >= self.capacity and
+                       not self._closing):
+                    self._condition.wait()
+            elif (self.overflow is AccessLogOverflow.sample and
+                  buffered >= self.capacity // 2):
+                self._overflowed += 1
+                if self._overflowed % self.sampleRate:
+                    self.dropped += 1
+                    return
+            if not self._buffer:
+                self._condition.notify_all()
+            self._buffer.append(line)
+
+
+    def _writeLoop(self):
+        """
+        Write out the buffered lines in batches until L{close} is called and
+        the buffer is empty.
+        """
+        while True:
+            with self._condition:
+                while not self._buffer and not self._closing:
+                    self._condition.wait()
+                if not self._buffer:
+                    return
+                batch = list(self._buffer)
+                self._buffer.clear()
+                self._condition.notify_all()
+            try:
+                self._logFile.write(b"".join(batch))
+                self._logFile.flush()
+            except:
+                log.err(None, "Error writing to the access log")
+
+
+    def close(self):
+        """
+        Write out all the buffered lines, stop the writer thread and close the
+        underlying file.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._logFile.close()
+        if self.dropped:
+            log.msg(format="Discarded %(dropped)d lines of the access log",
+                    dropped=self.dropped)
+
+
+
 class HTTPFactory(protocol.ServerFactory):
     """
     Factory for HTTP server.
@@ -2361,6 +2856,22 @@ class HTTPFactory(protocol.ServerFactory):
 
     @ivar _reactor: An L{IReactorTime} provider used to compute logging
         timestamps.
+
+    @ivar _logBufferSize: See the C{logBufferSize} parameter to L{__init__}.
+
+    @ivar _logOverflow: See the C{logOverflow} parameter to L{__init__}.
+
+    @ivar h2Settings: HTTP/2 settings to advertise to clients in addition to
+        the defaults, or L{None}.  For example,
+        C{{h2.settings.INITIAL_WINDOW_SIZE: 2 ** 20}} allows clients to send
+        up to 1MB of each request body before waiting for the server.
+    @type h2Settings: L{dict} mapping L{int} settings to L{int} values, or
+        L{None}
+
+    @ivar h2ConnectionWindowSize: The size of the flow control window for the
+        data received on each HTTP/2 connection, if larger than the default of
+        65535 bytes, or L{None}.
+    @type h2ConnectionWindowSize: L{int} or L{None}
     """
 
     protocol = _genericHTTPChannelProtocolFactory
@@ -2369,8 +2880,13 @@ class HTTPFactory(protocol.ServerFactory):
 
     timeOut = 60 * 60 * 12
 
+    h2Settings = None
+
+    h2ConnectionWindowSize = None
+
     def __init__(self, logPath=None, timeout=60*60*12, logFormatter=None,
-                 reactor=None):
+                 reactor=None, logBufferSize=None,
+                 logOverflow=AccessLogOverflow.drop):
         """
         @param logFormatter: An object to format requests into log lines for
             the access log.
@@ -2378,6 +2894,16 @@ class HTTPFactory(protocol.ServerFactory):
 
         @param reactor: A L{IReactorTime} provider used to compute logging
             timestamps.
+
+        @param logBufferSize: If not L{None}, the access log file at
+            C{logPath} is written through a L{BufferedLogFile} buffering up to
+            this many lines, so that logging requests does not wait for the
+            disk.
+        @type logBufferSize: L{int} or L{None}
+
+        @param logOverflow: What to do with lines logged while the
+            L{BufferedLogFile} is full.
+        @type logOverflow: L{AccessLogOverflow} constant
         """
         if not reactor:
             from twisted.internet import reactor
@@ -2390,6 +2916,8 @@ class HTTPFactory(protocol.ServerFactory):
         if logFormatter is None:
             logFormatter = combinedLogFormatter
         self._logFormatter = logFormatter
+        self._logBufferSize = logBufferSize
+        self._logOverflow = logOverflow
 
         # For storing the cached log datetime and the callback to update it
         self._logDateTime = None
@@ -2422,6 +2950,9 @@ class HTTPFactory(protocol.ServerFactory):
         if self.logPath:
             self._nativeize = False
             self.logFile = self._openLogFile(self.logPath)
+            if self._logBufferSize is not None:
+                self.logFile = BufferedLogFile(
+                    self.logFile, self._logBufferSize, self._logOverflow)
         else:
             self._nativeize = True
             self.logFile = log.logfile
@@ -95,6 +95,9 @@ class Headers(object):
         """
         if isinstance(name, unicode):
             return name.lower().encode('iso-8859-1')
+        if name.islower():
+            # Keep the name given rather than a copy of it.
+            return name
         return name.lower()
 
 
@@ -352,6 +352,111 @@ class IAccessLogFormatter(Interface):
 
 
 
+class ISessionStore(Interface):
+    """
+    A store of L{twisted.web.server.Session}s, which can be used as the
+    C{sessions} of a L{twisted.web.server.Site} in place of a L{dict}.
+
+    The sessions of a site using a store are not each scheduled to expire:
+    the site periodically asks the store for the sessions which have expired
+    instead.
+
+    @since: 16.4
+    """
+
+    def __getitem__(uid):
+        """
+        Get a session.
+
+        @param uid: The unique identifier of the session.
+        @type uid: L{bytes}
+
+        @return: The session.
+        @rtype: L{twisted.web.server.Session}
+
+        @raise KeyError: If there is no such session.
+        """
+
+
+    def __setitem__(uid, session):
+        """
+        Add a session.
+
+        @param uid: The unique identifier of the session.
+        @type uid: L{bytes}
+
+        @param session: The session.
+        @type session: L{twisted.web.server.Session}
+        """
+
+
+    def __delitem__(uid):
+        """
+        Remove a session.
+
+        @param uid: The unique identifier of the session.
+        @type uid: L{bytes}
+
+        @raise KeyError: If there is no such session.
+        """
+
+
+    def __contains__(uid):
+        """
+        Whether there is a session with a unique identifier.
+
+        @param uid: The unique identifier of the session.
+        @type uid: L{bytes}
+
+        @rtype: L{bool}
+        """
+
+
+    def __len__():
+        """
+        The number of sessions in the store.
+
+        @rtype: L{int}
+        """
+
+
+    def touch(session):
+        """
+        Record that a session in the store has been used, and any changes
+        made to it.  This is called whenever the session is touched, which
+        includes when the request using it has finished.  Sessions which are
+        no longer in the store are ignored.
+
+        The store may keep the session as it is and only write it out when
+        L{flush} is called.
+
+        @param session: The session.
+        @type session: L{twisted.web.server.Session}
+        """
+
+
+    def flush():
+        """
+        Write out the sessions touched since the last flush, if the store
+        does not write them out as soon as they are touched.  The site calls
+        this before each sweep for expired sessions, and when it stops.
+        """
+
+
+    def expired(now):
+        """
+        Find the sessions which have expired: those which have not been used
+        for their own C{sessionTimeout} seconds.
+
+        @param now: The current time, in seconds since the epoch.
+        @type now: L{float}
+
+        @return: The unique identifiers of the expired sessions.
+        @rtype: L{list} of L{bytes}
+        """
+
+
+
 class ICredentialFactory(Interface):
     """
     A credential factory defines a way to generate a particular kind of
@@ -784,7 +889,7 @@ class IAgentEndpointFactory(Interface):
 UNKNOWN_LENGTH = u"twisted.web.iweb.UNKNOWN_LENGTH"
 
 __all__ = [
-    "IUsernameDigestHash", "ICredentialFactory", "IRequest",
+    "IUsernameDigestHash", "ICredentialFactory", "IRequest", "ISessionStore",
     "IBodyProducer", "IRenderable", "IResponse", "_IRequestEncoder",
     "_IRequestEncoderFactory", "IClientRequest",
 
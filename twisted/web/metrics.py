@@ -0,0 +1,109 @@
+# -*- test-case-name: twisted.web.test.test_metrics -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Export of metrics to Prometheus.
+
+A L{MetricsResource} serves the metrics of a
+L{MetricsRegistry<twisted.logger.MetricsRegistry>}, by default those Twisted
+keeps of its own internals, in the Prometheus text format, for a Prometheus
+server to scrape::
+
+    root.putChild(b"metrics", MetricsResource())
+
+@since: 16.4
+"""
+
+from __future__ import division, absolute_import
+
+__all__ = ['MetricsResource', 'metricsAsPrometheusText']
+
+from twisted.logger import globalMetrics
+from twisted.python.compat import unicode
+from twisted.web.resource import Resource
+
+
+
+def _formatValue(value):
+    """
+    Format the value of a sample in the Prometheus text format.
+
+    @param value: The value.
+    @type value: L{int} or L{float}
+
+    @rtype: L{unicode}
+    """
+    if isinstance(value, float):
+        if value != value:
+            return u"NaN"
+        if value == float("inf"):
+            return u"+Inf"
+        if value == float("-inf"):
+            return u"-Inf"
+        return unicode(repr(value))
+    return unicode(value)
+
+
+
+def metricsAsPrometheusText(registry):
+    """
+    Format the metrics of a registry in the Prometheus text format, version
+    0.0.4.
+
+    @param registry: The registry.
+    @type registry: L{MetricsRegistry<twisted.logger.MetricsRegistry>}
+
+    @return: The formatted metrics.
+    @rtype: L{unicode}
+    """
+    lines = []
+    for metric in registry.collect():
+        name = unicode(metric.name)
+        if metric.help:
+            lines.append(u"# HELP {0} {1}".format(
+                name, metric.help.replace(u"\\", u"\\\\")
+                .replace(u"\n", u"\\n")))
+        lines.append(u"# TYPE {0} {1}".format(name, metric.kind))
+        sample = metric.sample()
+        if metric.kind == "histogram":
+            for bound, count in sample["buckets"]:
+                lines.append(u'{0}_bucket{{le="{1}"}} {2}'.format(
+                    name, _formatValue(bound), count))
+            lines.append(u'{0}_bucket{{le="+Inf"}} {1}'.format(
+                name, sample["count"]))
+            lines.append(u"{0}_sum {1}".format(
+                name, _formatValue(sample["sum"])))
+            lines.append(u"{0}_count {1}".format(name, sample["count"]))
+        else:
+            lines.append(u"{0} {1}".format(name, _formatValue(sample)))
+    return u"".join(line + u"\n" for line in lines)
+
+
+
+class MetricsResource(Resource):
+    """
+    A resource serving the metrics of a registry in the Prometheus text
+    format.
+    """
+    isLeaf = True
+
+    def __init__(self, registry=None):
+        """
+        @param registry: The registry, by default
+            L{globalMetrics<twisted.logger.globalMetrics>}.
+        @type registry: L{MetricsRegistry<twisted.logger.MetricsRegistry>}
+        """
+        Resource.__init__(self)
+        if registry is None:
+            registry = globalMetrics
+        self.registry = registry
+
+
+    def render_GET(self, request):
+        """
+        Respond with the current samples of the metrics.
+        """
+        request.setHeader(
+            b"content-type", b"text/plain; version=0.0.4; charset=utf-8")
+        return metricsAsPrometheusText(self.registry).encode("utf-8")
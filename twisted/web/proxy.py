@@ -17,15 +17,28 @@ and returns the result.
 
 Normally, a Proxy is used on the client end of an Internet connection, while a
 ReverseProxy is used on the server end.
+
+L{StreamingReverseProxyResource} is a ReverseProxy which reuses connections to
+a set of upstream servers, streams response bodies and balances requests
+between the servers.
 """
 from __future__ import absolute_import, division
 
-from twisted.python.compat import urllib_parse, urlquote
+from twisted.python import log
+from twisted.python.compat import urllib_parse, urlquote, nativeString
 from twisted.internet import reactor
-from twisted.internet.protocol import ClientFactory
+from twisted.internet.defer import CancelledError, Deferred, gatherResults
+from twisted.internet.error import ConnectError, DNSLookupError
+from twisted.internet.protocol import ClientFactory, Protocol
+from twisted.internet.task import LoopingCall
 from twisted.web.resource import Resource
 from twisted.web.server import NOT_DONE_YET
 from twisted.web.http import HTTPClient, Request, HTTPChannel, _QUEUED_SENTINEL
+from twisted.web.http import BAD_GATEWAY, PotentialDataLoss
+from twisted.web.http_headers import Headers
+from twisted.web.client import (
+    Agent, FileBodyProducer, HTTPConnectionPool, ResponseDone, readBody)
+from twisted.web._newclient import ResponseNeverReceived
 
 
 
@@ -301,3 +314,358 @@ class ReverseProxyResource(Resource):
             request.getAllHeaders(), request.content.read(), request)
         self.reactor.connectTCP(self.host, self.port, clientFactory)
         return NOT_DONE_YET
+
+
+
+# Headers which only apply to a single connection, and are not forwarded by
+# proxies (RFC 7230, section 6.1).
+_HOP_BY_HOP_HEADERS = frozenset([
+    b'connection', b'keep-alive', b'proxy-authenticate',
+    b'proxy-authorization', b'proxy-connection', b'te', b'trailer',
+    b'transfer-encoding', b'upgrade'])
+
+
+
+def _forwardedHeaders(headers):
+    """
+    Copy the end-to-end headers of a request or response.
+
+    @param headers: The headers received.
+    @type headers: L{Headers}
+
+    @return: A copy of C{headers} without hop-by-hop headers, including those
+        named by the I{Connection} header.
+    @rtype: L{Headers}
+    """
+    hopByHop = set(_HOP_BY_HOP_HEADERS)
+    for value in headers.getRawHeaders(b'connection', []):
+        for token in value.split(b','):
+            hopByHop.add(token.strip().lower())
+    forwarded = Headers()
+    for name, values in headers.getAllRawHeaders():
+        if name.lower() not in hopByHop:
+            forwarded.setRawHeaders(name, values)
+    return forwarded
+
+
+
+class _Upstream(object):
+    """
+    A server to which L{StreamingReverseProxyResource} forwards requests.
+
+    @ivar uri: The base URI of the server.
+    @type uri: L{bytes}
+
+    @ivar active: The number of requests forwarded to the server which have
+        not completed yet.
+    @type active: L{int}
+
+    @ivar downUntil: The time until which the server is considered down and
+        is not chosen, which is infinite if it failed a health check.
+    @type downUntil: L{float}
+    """
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.active = 0
+        self.downUntil = 0
+
+
+
+class _ProxiedBody(Protocol):
+    """
+    Stream the body of a response from an upstream server to a request,
+    pausing the upstream connection whenever the request's connection cannot
+    keep up.
+
+    @ivar request: The request to which the body is written.
+    @type request: L{Request}
+
+    @ivar done: A L{Deferred} fired when the body has been delivered.
+
+    @ivar _clientGone: Whether the request's connection has been lost.
+    """
+    _clientGone = False
+
+    def __init__(self, request, done):
+        self.request = request
+        self.done = done
+
+
+    def connectionMade(self):
+        self.request.registerProducer(self.transport, True)
+        self.request.notifyFinish().addErrback(self._clientLost)
+
+
+    def _clientLost(self, reason):
+        """
+        Stop receiving the body once the request's connection has been lost.
+        """
+        self._clientGone = True
+        self.transport.stopProducing()
+
+
+    def dataReceived(self, data):
+        if not self._clientGone:
+            self.request.write(data)
+
+
+    def connectionLost(self, reason):
+        if not self._clientGone:
+            self.request.unregisterProducer()
+            if reason.check(ResponseDone, PotentialDataLoss):
+                self.request.finish()
+            else:
+                # The body was truncated: the only way left to tell the
+                # client is to close its connection.
+                self.request.loseConnection()
+        self.done.callback(None)
+
+
+
+class StreamingReverseProxyResource(Resource):
+    """
+    Resource which forwards requests to one of a set of upstream servers,
+    over persistent connections.
+
+    Requests are made with an L{Agent} using an L{HTTPConnectionPool}, so that
+    connections to the upstream servers are kept open and reused.  Response
+    bodies are streamed to the client as they are received, with the upstream
+    connection paused whenever the client's connection cannot keep up.
+
+    Request bodies are not streamed: resources are only rendered once the
+    whole body has been received into C{request.content}, in memory or, for
+    large bodies, in a temporary file.  It is then sent upstream with a
+    L{FileBodyProducer}, so an upload reaches the upstream server only after
+    it has been received completely.
+
+    Each request is forwarded to the available upstream server with the
+    fewest requests in progress, taking them in turn when several have as few.
+    A server to which a request could not be sent is not available for
+    C{retryInterval} seconds.  Once L{startHealthChecks} has been called, a
+    server is also unavailable from the time it fails a health check until it
+    passes one.  If no server is available, requests are forwarded to all of
+    them in the same way.
+
+    Put this resource in the tree to cause everything below it to be relayed
+    to the upstream servers.
+
+    @ivar upstreams: The base URIs of the upstream servers.
+    @type upstreams: L{list} of L{bytes}
+
+    @ivar path: The base path of the requests forwarded.
+    @type path: L{bytes}
+
+    @ivar reactor: The reactor used for connections and timeouts.
+
+    @ivar agent: The L{IAgent} provider used to make upstream requests.
+
+    @ivar retryInterval: The time, in seconds, for which a server is not
+        chosen after a request could not be sent to it.
+    @type retryInterval: L{float}
+
+    @ivar healthCheckPath: The path requested from every server by health
+        checks, for which any response code below 400 counts as healthy.
+    @type healthCheckPath: L{bytes}
+
+    @ivar healthCheckInterval: The time, in seconds, between health checks,
+        which is also how long a check may take.
+    @type healthCheckInterval: L{float}
+
+    @since: 16.4
+    """
+    isLeaf = True
+
+    retryInterval = 10.0
+
+    def __init__(self, upstreams, path=b'', reactor=reactor, agent=None,
+                 healthCheckPath=b'/', healthCheckInterval=10.0):
+        """
+        @param upstreams: The base URIs of the upstream servers, without a
+            trailing slash, such as C{[b"http://10.0.0.1:8080"]}.
+        @type upstreams: L{list} of L{bytes}
+
+        @param path: The base path of the requests forwarded.  A request for
+            I{/foo} below this resource is forwarded for C{path + b"/foo"}.
+            Any required encoding of special characters should have been done
+            already.
+        @type path: L{bytes}
+
+        @param agent: The L{IAgent} provider used to make upstream requests.
+            By default, an L{Agent} with a persistent L{HTTPConnectionPool}.
+        """
+        Resource.__init__(self)
+        self.upstreams = upstreams
+        self._upstreams = [_Upstream(uri) for uri in upstreams]
+        self._next = 0
+        self.path = path
+        self.reactor = reactor
+        if agent is None:
+            pool = HTTPConnectionPool(reactor)
+            pool.maxPersistentPerHost = 10
+            agent = Agent(reactor, pool=pool)
+        self.agent = agent
+        self.healthCheckPath = healthCheckPath
+        self.healthCheckInterval = healthCheckInterval
+        self._healthChecks = None
+
+
+    def _chooseUpstream(self):
+        """
+        Choose the server to which to forward a request.
+
+        @rtype: L{_Upstream}
+        """
+        now = self.reactor.seconds()
+        candidates = [upstream for upstream in self._upstreams
+                      if upstream.downUntil <= now] or self._upstreams
+        start = self._next
+        self._next += 1
+        chosen = None
+        for i in range(len(candidates)):
+            upstream = candidates[(start + i) % len(candidates)]
+            if chosen is None or upstream.active < chosen.active:
+                chosen = upstream
+        return chosen
+
+
+    def render(self, request):
+        """
+        Render a request by forwarding it to an upstream server.
+        """
+        upstream = self._chooseUpstream()
+        rest = self.path
+        if request.postpath:
+            rest += b'/' + b'/'.join([
+                urlquote(segment, safe=b"").encode('utf-8')
+                for segment in request.postpath])
+        qs = urllib_parse.urlparse(request.uri)[4]
+        if qs:
+            rest += b'?' + qs
+
+        headers = _forwardedHeaders(request.requestHeaders)
+        # The agent sets the Host header for the upstream server.
+        headers.removeHeader(b'host')
+        clientIP = request.getClientIP()
+        if clientIP is not None:
+            headers.addRawHeader(b'x-forwarded-for', clientIP.encode('ascii'))
+
+        content = request.content
+        content.seek(0, 2)
+        bodyProducer = None
+        if content.tell() or request.requestHeaders.hasHeader(
+                b'content-length'):
+            content.seek(0, 0)
+            bodyProducer = FileBodyProducer(content)
+
+        upstream.active += 1
+        d = self.agent.request(
+            request.method, upstream.uri + rest, headers, bodyProducer)
+        # Give up on the upstream request if the client goes away before the
+        # response arrives.  Once it has arrived, this has no effect.
+        request.notifyFinish().addErrback(lambda reason: d.cancel())
+        d.addCallbacks(self._proxyResponse, self._upstreamFailed,
+                       callbackArgs=(request, upstream),
+                       errbackArgs=(request, upstream))
+        d.addErrback(log.err, "Error proxying a request")
+        return NOT_DONE_YET
+
+
+    def _completed(self, result, upstream):
+        """
+        Record the completion of a request forwarded to C{upstream}.
+        """
+        upstream.active -= 1
+        return result
+
+
+    def _proxyResponse(self, response, request, upstream):
+        """
+        Forward the response from an upstream server.
+        """
+        if upstream.downUntil != float('inf'):
+            upstream.downUntil = 0
+        request.setResponseCode(response.code, response.phrase)
+        # Only use the content type of the response, if it has one.
+        request.defaultContentType = None
+        for name, values in _forwardedHeaders(
+                response.headers).getAllRawHeaders():
+            request.responseHeaders.setRawHeaders(name, values)
+        done = Deferred()
+        done.addBoth(self._completed, upstream)
+        response.deliverBody(_ProxiedBody(request, done))
+
+
+    def _upstreamFailed(self, reason, request, upstream):
+        """
+        Respond with a I{502 Bad Gateway} error when no response could be
+        obtained from an upstream server.
+        """
+        self._completed(None, upstream)
+        if reason.check(CancelledError):
+            return
+        if reason.check(ResponseNeverReceived, ConnectError, DNSLookupError):
+            upstream.downUntil = max(
+                upstream.downUntil, self.reactor.seconds() + self.retryInterval)
+        log.err(reason, "Error forwarding a request to %s" % (
+            nativeString(upstream.uri),))
+        request.setResponseCode(BAD_GATEWAY)
+        request.responseHeaders.setRawHeaders(b"content-type", [b"text/html"])
+        request.write(b"<H1>Could not connect</H1>")
+        request.finish()
+
+
+    def startHealthChecks(self):
+        """
+        Start checking the health of the upstream servers every
+        C{healthCheckInterval} seconds, starting now.
+        """
+        self._healthChecks = LoopingCall(self._checkHealth)
+        self._healthChecks.clock = self.reactor
+        self._healthChecks.start(self.healthCheckInterval)
+
+
+    def stopHealthChecks(self):
+        """
+        Stop checking the health of the upstream servers.
+        """
+        if self._healthChecks is not None:
+            self._healthChecks.stop()
+            self._healthChecks = None
+
+
+    def _checkHealth(self):
+        """
+        Check the health of every upstream server.
+
+        @return: A L{Deferred} fired when all the checks are complete.
+        """
+        return gatherResults([self._checkUpstream(upstream)
+                              for upstream in self._upstreams])
+
+
+    def _checkUpstream(self, upstream):
+        """
+        Check the health of an upstream server, marking it down until it
+        passes a check if it fails this one.
+        """
+        d = self.agent.request(b'GET', upstream.uri + self.healthCheckPath)
+        timeout = self.reactor.callLater(self.healthCheckInterval, d.cancel)
+
+        def checked(response):
+            if timeout.active():
+                timeout.cancel()
+            if response.code < 400:
+                upstream.downUntil = 0
+            else:
+                upstream.downUntil = float('inf')
+            # Read the body so that the connection can be reused, but do not
+            # wait for it before the next check.
+            readBody(response).addErrback(lambda reason: None)
+
+        def failed(reason):
+            if timeout.active():
+                timeout.cancel()
+            upstream.downUntil = float('inf')
+
+        return d.addCallbacks(checked, failed)
@@ -0,0 +1,234 @@
+# -*- test-case-name: twisted.web.test.test_router -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A resource which dispatches requests through a table of routes.
+
+L{twisted.web.resource.getChildForRequest} finds the resource for a request
+by calling C{getChildWithDefault} once for each segment of its path.  A
+L{Router} instead indexes the routes added to it by their segments, and finds
+the route for a path with one dictionary lookup for each distinct I{shape} of
+route, that is, for each combination of a number of segments and the
+positions of the parameters among them.
+
+@since: 16.4
+"""
+
+from __future__ import division, absolute_import
+
+__all__ = ['Router']
+
+from operator import itemgetter
+
+from twisted.web.resource import Resource
+
+
+
+def _function(method):
+    """
+    Return the function underlying a method looked up on a class, which on
+    Python 2 is an unbound method and on Python 3 is the function itself.
+    """
+    return getattr(method, '__func__', method)
+
+
+
+_defaultGetChildWithDefault = _function(Resource.getChildWithDefault)
+
+
+
+def _noStaticSegments(segments):
+    """
+    The key of the routes of a shape made only of parameters.
+    """
+    return ()
+
+
+
+class _RouteShape(object):
+    """
+    The routes of a L{Router} with a given number of segments and parameters
+    in the same positions.
+
+    @ivar length: The number of segments of the routes.
+    @type length: L{int}
+
+    @ivar parameters: The positions of the parameters among the segments.
+    @type parameters: L{tuple} of L{int}
+
+    @ivar key: A callable returning, for a L{list} of at least C{length}
+        segments, the key of the route matching them in C{routes}.
+
+    @ivar routes: A L{dict} mapping the static segments of each route, as
+        returned by C{key}, to a 2-tuple of its resource and the names of its
+        parameters.
+    """
+    __slots__ = ('length', 'parameters', 'key', 'routes')
+
+    def __init__(self, length, parameters):
+        self.length = length
+        self.parameters = parameters
+        static = [i for i in range(length) if i not in parameters]
+        if static:
+            self.key = itemgetter(*static)
+        else:
+            self.key = _noStaticSegments
+        self.routes = {}
+
+
+    def precedence(self):
+        """
+        Return a key sorting shapes in the order in which they are tried:
+        longer ones first, then ones with static segments before
+        parameters.
+        """
+        return (-self.length,
+                tuple(i in self.parameters for i in range(self.length)))
+
+
+
+class Router(Resource):
+    """
+    A resource which finds its descendants in a table of routes.
+
+    Routes are added with L{addRoute}, for paths which may include
+    parameters, or with L{putChild}, for a single static segment::
+
+        router = Router()
+        router.addRoute(b"/users/{user}/posts", PostsResource())
+        router.putChild(b"static", File("/var/www/static"))
+
+    A request's path is resolved in one call, to the resource of the longest
+    route matching its beginning.  Of routes of the same length, the one
+    whose first parameter comes last is preferred, so that static segments
+    take precedence over parameters.  The values of the parameters of the
+    route are added to the request's C{routeArguments} L{dict}, mapping their
+    L{bytes} names to the L{bytes} segments which matched them.
+
+    If the path continues beyond the route, the remaining segments are
+    looked up in the C{children} of the route's resource, and their own
+    children, without any further method calls as long as they are
+    L{Resource} instances which do not override
+    L{Resource.getChildWithDefault}.  Any remaining segments are then left
+    for L{getChildForRequest<twisted.web.resource.getChildForRequest>} to
+    traverse as usual, so routes may lead to leaves and to resources with
+    dynamic children.
+
+    If no route matches the beginning of a path, L{getChild} is called with
+    its first segment.
+
+    @ivar _shapes: A L{dict} mapping the length and parameter positions of
+        routes to their L{_RouteShape}.
+
+    @ivar _orderedShapes: The values of C{_shapes}, in the order in which
+        they are tried.
+    """
+
+    def __init__(self):
+        Resource.__init__(self)
+        self._shapes = {}
+        self._orderedShapes = []
+
+
+    def _addRoute(self, segments, parameters, names, resource):
+        """
+        Add a route to the L{_RouteShape} for its segments and parameters,
+        creating it if necessary.
+        """
+        shape = self._shapes.get((len(segments), parameters))
+        if shape is None:
+            shape = _RouteShape(len(segments), parameters)
+            self._shapes[len(segments), parameters] = shape
+            self._orderedShapes.append(shape)
+            self._orderedShapes.sort(key=_RouteShape.precedence)
+        shape.routes[shape.key(segments)] = (resource, names)
+
+
+    def addRoute(self, path, resource):
+        """
+        Add a route.
+
+        @param path: The absolute path of the route, relative to the router.
+            Segments of the form C{{name}} are parameters, which match any
+            segment.  For example, C{b"/users/{user}"} matches requests for
+            C{b"users/alice"} below the router, with a C{user} parameter of
+            C{b"alice"}.  Any route's path may also be the beginning of
+            another's.
+        @type path: L{bytes}
+
+        @param resource: The resource for requests matching C{path}, which
+            replaces the resource of any route differing from it only by the
+            names of its parameters.
+        @type resource: L{IResource<twisted.web.resource.IResource>} provider
+
+        @raise ValueError: If C{path} does not start with C{b"/"}.
+        """
+        if not path.startswith(b'/'):
+            raise ValueError("Route paths must start with b'/': %r" % (path,))
+        segments = path[1:].split(b'/')
+        parameters = []
+        names = []
+        for i, segment in enumerate(segments):
+            if segment.startswith(b'{') and segment.endswith(b'}'):
+                parameters.append(i)
+                names.append(segment[1:-1])
+        self._addRoute(segments, tuple(parameters), tuple(names), resource)
+
+
+    def putChild(self, path, child):
+        """
+        Register a static child, as a route for the single segment C{path}.
+
+        @see: L{IResource.putChild<twisted.web.resource.IResource.putChild>}
+        """
+        Resource.putChild(self, path, child)
+        self._addRoute([path], (), (), child)
+
+
+    def getChildWithDefault(self, path, request):
+        """
+        Find the resource of the longest route matching C{path} followed by
+        the rest of C{request.postpath}, moving the segments it consumes from
+        C{request.postpath} to C{request.prepath}.
+
+        @see: L{IResource.getChildWithDefault
+            <twisted.web.resource.IResource.getChildWithDefault>}
+        """
+        postpath = request.postpath
+        segments = [path] + postpath
+        count = len(segments)
+        for shape in self._orderedShapes:
+            if shape.length <= count:
+                route = shape.routes.get(shape.key(segments))
+                if route is not None:
+                    break
+        else:
+            return self.getChild(path, request)
+
+        resource, names = route
+        if names:
+            try:
+                arguments = request.routeArguments
+            except AttributeError:
+                arguments = request.routeArguments = {}
+            for name, i in zip(names, shape.parameters):
+                arguments[name] = segments[i]
+
+        # Descend through static children, for as long as they are looked up
+        # the way Resource looks them up.
+        consumed = shape.length - 1
+        while (consumed < count - 1 and not resource.isLeaf and
+               isinstance(resource, Resource) and
+               _function(resource.__class__.getChildWithDefault) is
+               _defaultGetChildWithDefault):
+            child = resource.children.get(postpath[consumed])
+            if child is None:
+                break
+            resource = child
+            consumed += 1
+
+        if consumed:
+            request.prepath.extend(postpath[:consumed])
+            del postpath[:consumed]
+        return resource
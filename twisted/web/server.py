@@ -33,7 +33,7 @@ if _PY3:
         """
 else:
     from twisted.spread.pb import Copyable, ViewPoint
-from twisted.internet import address, interfaces
+from twisted.internet import address, interfaces, task
 from twisted.web import iweb, http, util
 from twisted.web.http import unquote
 from twisted.python import log, reflect, failure, components
@@ -100,6 +100,9 @@ class Request(Copyable, http.Request, components.Componentized):
 
     @ivar _secureSession: The L{Session} object representing the state that
         will be transmitted only over HTTPS.
+
+    @ivar _components: The L{dict} backing the adapter cache of
+        L{components.Componentized}, or L{None} until a component is used.
     """
 
     defaultContentType = b"text/html"
@@ -109,10 +112,22 @@ class Request(Copyable, http.Request, components.Componentized):
     __pychecker__ = 'unusednames=issuer'
     _inFakeHead = False
     _encoder = None
+    _components = None
 
     def __init__(self, *args, **kw):
+        # Componentized.__init__ is not called, see _adapterCache.
         http.Request.__init__(self, *args, **kw)
-        components.Componentized.__init__(self)
+
+
+    @property
+    def _adapterCache(self):
+        """
+        The adapter cache of L{components.Componentized}, which is only
+        created when first used since most requests never have components.
+        """
+        if self._components is None:
+            self._components = {}
+        return self._components
 
 
     def getStateToCopyFor(self, issuer):
@@ -126,6 +141,9 @@ class Request(Copyable, http.Request, components.Componentized):
         self.content.seek(0, 0)
         x['content_data'] = self.content.read()
         x['remote'] = ViewPoint(issuer, self)
+        x['_args'] = self.args
+        x['_formPending'] = False
+        x['_receivedCookies'] = self.received_cookies
 
         # Address objects aren't jellyable
         x['host'] = _addressToTuple(x['host'])
@@ -453,6 +471,10 @@ class Request(Copyable, http.Request, components.Componentized):
                 session = self.site.makeSession()
                 self.addCookie(cookiename, session.uid, path=b"/",
                                secure=secure)
+            if getattr(session, '_store', None) is not None:
+                # Let the store record the changes made to the session while
+                # handling this request.
+                self.notifyFinish().addBoth(lambda ignored: session.touch())
 
         session.touch()
         setattr(self, sessionAttribute, session)
@@ -604,10 +626,15 @@ class Session(components.Componentized):
     @ivar _reactor: An object providing L{IReactorTime} to use for scheduling
         expiration.
     @ivar sessionTimeout: timeout of a session, in seconds.
+
+    @ivar _store: The L{ISessionStore<twisted.web.iweb.ISessionStore>}
+        provider the session is kept in, which is told whenever it is
+        touched, or L{None} if the site keeps its sessions in a L{dict}.
     """
     sessionTimeout = 900
 
     _expireCall = None
+    _store = None
 
     def __init__(self, site, uid, reactor=None):
         """
@@ -664,6 +691,30 @@ class Session(components.Componentized):
         self.lastModified = self._reactor.seconds()
         if self._expireCall is not None:
             self._expireCall.reset(self.sessionTimeout)
+        if self._store is not None:
+            self._store.touch(self)
+
+
+    def __getstate__(self):
+        """
+        Get the state of the session to persist, which does not include its
+        site, reactor or expiration callbacks.
+        """
+        state = self.__dict__.copy()
+        for name in ('site', '_reactor', '_expireCall', '_store',
+                     'expireCallbacks'):
+            state.pop(name, None)
+        return state
+
+
+    def __setstate__(self, state):
+        """
+        Restore a persisted session, which is attached to a site again when
+        the site looks it up.
+        """
+        self.__dict__.update(state)
+        self.site = None
+        self.expireCallbacks = []
 
 
 version = networkString("TwistedWeb/%s" % (copyright.version,))
@@ -682,12 +733,29 @@ class Site(http.HTTPFactory):
         rendered pages. Default to C{True}.
     @ivar sessionFactory: factory for sessions objects. Default to L{Session}.
     @ivar sessionCheckTime: Deprecated.  See L{Session.sessionTimeout} instead.
+
+    @ivar sessions: The sessions of the site: a L{dict} mapping their unique
+        identifiers to them, in which case each session schedules its own
+        expiration, or an L{ISessionStore<twisted.web.iweb.ISessionStore>}
+        provider, such as those in L{twisted.web.sessions}, in which case
+        sessions are expired by a single periodic sweep, and L{sessionFactory}
+        is also called with the reactor of the site.
+
+    @ivar sessionSweepInterval: The interval, in seconds, at which the
+        sessions of a site using an L{ISessionStore
+        <twisted.web.iweb.ISessionStore>} are checked for expiration.
+    @type sessionSweepInterval: L{float}
+
+    @ivar _sessionSweep: The L{LoopingCall<twisted.internet.task.LoopingCall>}
+        expiring sessions, or L{None} if it is not running.
     """
     counter = 0
     requestFactory = Request
     displayTracebacks = True
     sessionFactory = Session
     sessionCheckTime = 1800
+    sessionSweepInterval = 60
+    _sessionSweep = None
     _entropy = os.urandom
 
     def __init__(self, resource, requestFactory=None, *args, **kwargs):
@@ -716,9 +784,24 @@ class Site(http.HTTPFactory):
     def __getstate__(self):
         d = self.__dict__.copy()
         d['sessions'] = {}
+        d.pop('_sessionSweep', None)
         return d
 
 
+    def stopFactory(self):
+        """
+        Stop expiring the sessions of the site.
+
+        @see: L{twisted.web.http.HTTPFactory.stopFactory}
+        """
+        http.HTTPFactory.stopFactory(self)
+        if self._sessionSweep is not None:
+            self._sessionSweep.stop()
+            self._sessionSweep = None
+        if iweb.ISessionStore.providedBy(self.sessions):
+            self.sessions.flush()
+
+
     def _mkuid(self):
         """
         (internal) Generate an opaque, unique ID for a user's session.
@@ -732,8 +815,14 @@ class Site(http.HTTPFactory):
         Generate a new Session instance, and store it for future reference.
         """
         uid = self._mkuid()
-        session = self.sessions[uid] = self.sessionFactory(self, uid)
-        session.startCheckingExpiration()
+        if not iweb.ISessionStore.providedBy(self.sessions):
+            session = self.sessions[uid] = self.sessionFactory(self, uid)
+            session.startCheckingExpiration()
+            return session
+        session = self.sessionFactory(self, uid, self._reactor)
+        self.sessions[uid] = session
+        session._store = self.sessions
+        self._startSweepingSessions()
         return session
 
 
@@ -746,7 +835,39 @@ class Site(http.HTTPFactory):
 
         @raise: L{KeyError} if the session is not found.
         """
-        return self.sessions[uid]
+        session = self.sessions[uid]
+        if iweb.ISessionStore.providedBy(self.sessions):
+            session.site = self
+            session._reactor = self._reactor
+            session._store = self.sessions
+            self._startSweepingSessions()
+        return session
+
+
+    def _startSweepingSessions(self):
+        """
+        Start periodically expiring the sessions in the store of the site,
+        unless it has already started.
+        """
+        if self._sessionSweep is None:
+            self._sessionSweep = task.LoopingCall(self._sweepSessions)
+            self._sessionSweep.clock = self._reactor
+            self._sessionSweep.start(self.sessionSweepInterval, now=False)
+
+
+    def _sweepSessions(self):
+        """
+        Write out the sessions touched since the last sweep, and expire the
+        sessions in the store of the site which have not been used for their
+        own L{Session.sessionTimeout} seconds.
+        """
+        self.sessions.flush()
+        for uid in self.sessions.expired(self._reactor.seconds()):
+            try:
+                self.getSession(uid).expire()
+            except KeyError:
+                # Expired meanwhile, possibly by another process.
+                pass
 
 
     def buildProtocol(self, addr):
@@ -0,0 +1,244 @@
+# -*- test-case-name: twisted.web.test.test_sessions -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Stores for the sessions of a L{twisted.web.server.Site}.
+
+By default, a site keeps its sessions in a L{dict}, and each of them
+schedules its own expiration with the reactor.  Setting the C{sessions} of a
+site to an L{ISessionStore<twisted.web.iweb.ISessionStore>} provider instead
+keeps them in that store, and expires them with a single periodic sweep::
+
+    site = Site(root)
+    site.sessions = MemorySessionStore(maxSessions=10000)
+
+L{MemorySessionStore} bounds the number of sessions kept in memory, and
+L{DirDBMSessionStore} persists them in a directory, so that they survive
+restarts and may be shared by several processes serving the same site.
+
+@since: 16.4
+"""
+
+from __future__ import division, absolute_import
+
+__all__ = ['MemorySessionStore', 'DirDBMSessionStore']
+
+import os
+from collections import OrderedDict
+
+from zope.interface import implementer
+
+from twisted.persisted import dirdbm
+from twisted.web.iweb import ISessionStore
+
+
+
+@implementer(ISessionStore)
+class MemorySessionStore(object):
+    """
+    A store keeping sessions in memory, in the order in which they were last
+    used.
+
+    @ivar maxSessions: The maximum number of sessions in the store, or
+        L{None} for no limit.  Adding a session to a full store expires the
+        least recently used session.
+    @type maxSessions: L{int} or L{None}
+
+    @ivar _sessions: An L{OrderedDict} mapping unique identifiers to
+        sessions, the least recently used first.
+    """
+
+    def __init__(self, maxSessions=None):
+        self.maxSessions = maxSessions
+        self._sessions = OrderedDict()
+
+
+    def __getitem__(self, uid):
+        return self._sessions[uid]
+
+
+    def __setitem__(self, uid, session):
+        self._sessions.pop(uid, None)
+        if self.maxSessions is not None:
+            while len(self._sessions) >= self.maxSessions:
+                oldest = next(iter(self._sessions.values()))
+                oldest.expire()
+                self._sessions.pop(oldest.uid, None)
+        self._sessions[uid] = session
+
+
+    def __delitem__(self, uid):
+        del self._sessions[uid]
+
+
+    def __contains__(self, uid):
+        return uid in self._sessions
+
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+    def __iter__(self):
+        return iter(list(self._sessions))
+
+
+    def touch(self, session):
+        """
+        Move a session to the end of the store.
+
+        @see: L{ISessionStore.touch}
+        """
+        if self._sessions.pop(session.uid, None) is not None:
+            self._sessions[session.uid] = session
+
+
+    def flush(self):
+        """
+        Do nothing, since sessions are kept as they are.
+
+        @see: L{ISessionStore.flush}
+        """
+
+
+    def expired(self, now):
+        """
+        Find the expired sessions by looking at every session, since sessions
+        may have different timeouts.
+
+        @see: L{ISessionStore.expired}
+        """
+        return [uid for uid, session in self._sessions.items()
+                if session.lastModified + session.sessionTimeout < now]
+
+
+
+@implementer(ISessionStore)
+class DirDBMSessionStore(object):
+    """
+    A store keeping pickled sessions in a directory.
+
+    New sessions are written to the directory at once, so that all the
+    processes using the same directory share them.  Sessions which are
+    touched are kept in memory and written out with those touched since on
+    the next L{flush}, that is on the site's next sweep for expired sessions
+    or when it stops, so that requests do not each pickle and write their
+    session on the reactor thread.  Other processes therefore see the
+    changes made to a session up to C{sessionSweepInterval} seconds late,
+    and they are lost if the process exits without stopping the site.
+
+    Each session is read from the directory whenever it is looked up, unless
+    it has been touched since the last flush.  The components and namespaces
+    of sessions in the store must be picklable, and the callbacks registered
+    with L{Session.notifyOnExpire<twisted.web.server.Session.notifyOnExpire>}
+    are only called if the session expires while it is looked up by the
+    process which registered them.
+
+    The time at which each session expires, according to its
+    C{sessionTimeout} when it was last written, is kept apart from it, so
+    that expired sessions are found without reading any sessions.
+
+    It cannot be used on Python 3 yet, since L{twisted.persisted.dirdbm} is
+    not ported.
+
+    @ivar _sessions: A L{dirdbm.Shelf} of the sessions.
+
+    @ivar _expiries: A L{dirdbm.DirDBM} of the time at which each session
+        expires, as a L{bytes} representation of a L{float}.
+
+    @ivar _touched: A L{dict} mapping the unique identifiers of the sessions
+        touched since the last flush to the sessions.
+    """
+
+    def __init__(self, directory):
+        """
+        @param directory: The path of the directory in which the sessions
+            are stored, which is created if it does not exist.
+        @type directory: L{str}
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._sessions = dirdbm.Shelf(os.path.join(directory, 'sessions'))
+        self._expiries = dirdbm.DirDBM(os.path.join(directory, 'expiries'))
+        self._touched = {}
+
+
+    def __getitem__(self, uid):
+        session = self._touched.get(uid)
+        if session is None:
+            session = self._sessions[uid]
+        return session
+
+
+    def __setitem__(self, uid, session):
+        self._touched.pop(uid, None)
+        self._sessions[uid] = session
+        self._expiries[uid] = repr(
+            session.lastModified + session.sessionTimeout)
+
+
+    def __delitem__(self, uid):
+        self._touched.pop(uid, None)
+        try:
+            del self._expiries[uid]
+        except KeyError:
+            pass
+        del self._sessions[uid]
+
+
+    def __contains__(self, uid):
+        return uid in self._sessions
+
+
+    def __len__(self):
+        return len(self._expiries)
+
+
+    def __iter__(self):
+        return iter(self._expiries.keys())
+
+
+    def touch(self, session):
+        """
+        Keep a session until the next flush.
+
+        @see: L{ISessionStore.touch}
+        """
+        if session.uid in self._touched or session.uid in self._expiries:
+            self._touched[session.uid] = session
+
+
+    def flush(self):
+        """
+        Write the sessions touched since the last flush to the directory,
+        unless they have been removed meanwhile, possibly by another process.
+
+        @see: L{ISessionStore.flush}
+        """
+        touched, self._touched = self._touched, {}
+        for uid, session in touched.items():
+            if uid in self._expiries:
+                self[uid] = session
+
+
+    def expired(self, now):
+        """
+        Find the expired sessions by reading the time at which each expires.
+
+        @see: L{ISessionStore.expired}
+        """
+        result = []
+        for uid in self._expiries.keys():
+            session = self._touched.get(uid)
+            if session is not None:
+                expiry = session.lastModified + session.sessionTimeout
+            else:
+                try:
+                    expiry = float(self._expiries[uid])
+                except KeyError:
+                    # Removed by another process.
+                    continue
+            if expiry < now:
+                result.append(uid)
+        return result
@@ -38,6 +38,7 @@ from twisted.python import log
 from twisted.python.compat import NativeStringIO, items
 from twisted.python.filepath import FilePath
 from twisted.web._stan import Tag, slot, Comment, CDATA, CharRef
+from twisted.web._flatten import _compileTemplate
 from twisted.web.iweb import ITemplateLoader
 
 TEMPLATE_NAMESPACE = 'http://twistedmatrix.com/ns/twisted.web.template/0.1'
@@ -386,6 +387,10 @@ class XMLString(object):
 
     @ivar _loadedTemplate: The loaded document.
     @type _loadedTemplate: a C{list} of Stan objects.
+
+    @ivar _compiledTemplate: The loaded document compiled by
+        L{_compileTemplate}, or L{None}, if not compiled yet.
+    @type _compiledTemplate: a C{list} of Stan objects, or L{None}.
     """
 
     def __init__(self, s):
@@ -399,6 +404,7 @@ class XMLString(object):
             s = s.decode('utf8')
 
         self._loadedTemplate = _flatsaxParse(NativeStringIO(s))
+        self._compiledTemplate = None
 
 
     def load(self):
@@ -411,6 +417,19 @@ class XMLString(object):
         return self._loadedTemplate
 
 
+    def _loadCompiled(self):
+        """
+        Return the document with its static parts flattened, first compiling
+        it if necessary.  This is what L{Element.render} renders.
+
+        @return: the compiled document.
+        @rtype: a C{list} of Stan objects.
+        """
+        if self._compiledTemplate is None:
+            self._compiledTemplate = _compileTemplate(self.load())
+        return self._compiledTemplate
+
+
 
 @implementer(ITemplateLoader)
 class XMLFile(object):
@@ -420,6 +439,10 @@ class XMLFile(object):
     @ivar _loadedTemplate: The loaded document, or L{None}, if not loaded.
     @type _loadedTemplate: a C{list} of Stan objects, or L{None}.
 
+    @ivar _compiledTemplate: The loaded document compiled by
+        L{_compileTemplate}, or L{None}, if not compiled yet.
+    @type _compiledTemplate: a C{list} of Stan objects, or L{None}.
+
     @ivar _path: The L{FilePath}, file object, or filename that is being
         loaded from.
     """
@@ -437,6 +460,7 @@ class XMLFile(object):
                 "since Twisted 12.1.  Pass a FilePath instead.",
                 category=DeprecationWarning, stacklevel=2)
         self._loadedTemplate = None
+        self._compiledTemplate = None
         self._path = path
 
 
@@ -470,6 +494,20 @@ class XMLFile(object):
         return self._loadedTemplate
 
 
+    def _loadCompiled(self):
+        """
+        Return the document with its static parts flattened, first loading
+        and compiling it if necessary.  This is what L{Element.render}
+        renders.
+
+        @return: the compiled document.
+        @rtype: a C{list} of Stan objects.
+        """
+        if self._compiledTemplate is None:
+            self._compiledTemplate = _compileTemplate(self.load())
+        return self._compiledTemplate
+
+
 
 # Last updated October 2011, using W3Schools as a reference. Link:
 # http://www.w3schools.com/html5/html5_reference.asp
@@ -0,0 +1,388 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.web.caching}.
+"""
+
+from __future__ import division, absolute_import
+
+import zlib
+
+from twisted.internet.error import ConnectionDone
+from twisted.internet.task import Clock
+from twisted.python import failure
+from twisted.python.compat import intToBytes
+from twisted.trial.unittest import SynchronousTestCase
+from twisted.web import http
+from twisted.web.caching import CachingResource
+from twisted.web.resource import EncodingResourceWrapper, Resource
+from twisted.web.server import GzipEncoderFactory, NOT_DONE_YET, Request, Site
+from twisted.web.test.requesthelper import DummyChannel
+
+
+
+class CountingResource(Resource):
+    """
+    A resource recording the requests it renders, and responding with the
+    number of requests rendered so far and the headers in C{headers}.
+
+    @ivar delayed: Whether the requests are left for the test to finish.
+    """
+    isLeaf = True
+    delayed = False
+
+    def __init__(self):
+        Resource.__init__(self)
+        self.rendered = []
+        self.headers = {}
+        self.etag = None
+        self.lastModified = None
+
+
+    def render_GET(self, request):
+        self.rendered.append(request)
+        for name, value in self.headers.items():
+            request.setHeader(name, value)
+        if self.etag is not None:
+            request.setETag(self.etag)
+        if self.lastModified is not None:
+            request.setLastModified(self.lastModified)
+        if self.delayed:
+            return NOT_DONE_YET
+        return b'response ' + intToBytes(len(self.rendered))
+
+
+    def render_POST(self, request):
+        return self.render_GET(request)
+
+
+
+class CachingResourceTests(SynchronousTestCase):
+    """
+    Tests for L{CachingResource}.
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        self.clock.advance(1000)
+        self.resource = CountingResource()
+        self.cache = CachingResource(self.resource, reactor=self.clock)
+        self.site = Site(self.cache)
+
+
+    def get(self, uri=b'/', method=b'GET', headers=()):
+        """
+        Make a request to the site.
+
+        @return: The request, and a function returning the status line,
+            headers and body of the response written so far.
+        """
+        channel = DummyChannel()
+        channel.site = self.site
+        request = Request(channel, False)
+        for name, value in headers:
+            request.requestHeaders.addRawHeader(name, value)
+        request.gotLength(0)
+        request.requestReceived(method, uri, b'HTTP/1.0')
+
+        def response():
+            head, _, body = channel.transport.written.getvalue().partition(
+                b'\r\n\r\n')
+            lines = head.split(b'\r\n')
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(b': ')
+                headers[name.lower()] = value
+            return lines[0], headers, body
+        return request, response
+
+
+    def test_cached(self):
+        """
+        A response is rendered once, and then answered from the cache along
+        with its headers and its age.
+        """
+        self.resource.headers[b'x-custom'] = b'yes'
+        self.get()
+        self.clock.advance(3)
+        request, response = self.get()
+        status, headers, body = response()
+        self.assertEqual(1, len(self.resource.rendered))
+        self.assertEqual(b'HTTP/1.0 200 OK', status)
+        self.assertEqual(b'response 1', body)
+        self.assertEqual(b'yes', headers[b'x-custom'])
+        self.assertEqual(b'10', headers[b'content-length'])
+        self.assertEqual(b'3', headers[b'age'])
+
+
+    def test_differentURIs(self):
+        """
+        Responses for different URIs are kept apart.
+        """
+        self.get(b'/a')
+        self.get(b'/a?x=1')
+        self.assertEqual(b'response 1', self.get(b'/a')[1]()[2])
+        self.assertEqual(b'response 2', self.get(b'/a?x=1')[1]()[2])
+        self.assertEqual(2, len(self.resource.rendered))
+
+
+    def test_maxAge(self):
+        """
+        A response without a I{max-age} is kept for C{maxAge} seconds.
+        """
+        self.cache.maxAge = 10
+        self.get()
+        self.clock.advance(9)
+        self.get()
+        self.assertEqual(1, len(self.resource.rendered))
+        self.clock.advance(1)
+        self.assertEqual(b'response 2', self.get()[1]()[2])
+
+
+    def test_cacheControlMaxAge(self):
+        """
+        A response is kept for the number of seconds given by its
+        I{s-maxage} or I{max-age} directive.
+        """
+        self.resource.headers[b'cache-control'] = b'public, max-age=5'
+        self.get()
+        self.clock.advance(4)
+        self.get()
+        self.assertEqual(1, len(self.resource.rendered))
+        self.resource.headers[b'cache-control'] = b'max-age=5, s-maxage=20'
+        self.clock.advance(1)
+        self.get()
+        self.clock.advance(19)
+        self.get()
+        self.assertEqual(2, len(self.resource.rendered))
+
+
+    def test_notStored(self):
+        """
+        Responses with a I{no-store}, I{no-cache} or I{private} directive,
+        which set cookies, or whose status is not I{200 OK} are not stored.
+        """
+        for directive in [b'no-store', b'no-cache', b'private, max-age=60']:
+            self.resource.headers[b'cache-control'] = directive
+            self.get()
+            self.get()
+        del self.resource.headers[b'cache-control']
+        self.assertEqual(6, len(self.resource.rendered))
+
+        self.resource.render_GET = lambda request: (
+            request.addCookie(b'a', b'b'), b'cookie')[1]
+        self.get(b'/cookie')
+        self.assertEqual(b'a=b', self.get(b'/cookie')[1]()[1][b'set-cookie'])
+
+        self.resource.render_GET = lambda request: (
+            request.setResponseCode(http.NOT_FOUND), b'missing')[1]
+        self.get(b'/missing')
+        self.assertEqual(
+            b'HTTP/1.0 404 Not Found', self.get(b'/missing')[1]()[0])
+
+        self.assertEqual({}, self.cache._entries)
+
+
+    def test_notGET(self):
+        """
+        Requests other than I{GET} and I{HEAD} are neither answered from the
+        cache nor stored.
+        """
+        self.get()
+        self.get(method=b'POST')
+        self.get(method=b'POST')
+        self.assertEqual(3, len(self.resource.rendered))
+
+
+    def test_head(self):
+        """
+        A I{HEAD} request is answered from the cache with the headers of the
+        response only.
+        """
+        self.get()
+        status, headers, body = self.get(method=b'HEAD')[1]()
+        self.assertEqual(1, len(self.resource.rendered))
+        self.assertEqual(b'HTTP/1.0 200 OK', status)
+        self.assertEqual(b'10', headers[b'content-length'])
+        self.assertEqual(b'', body)
+
+
+    def test_vary(self):
+        """
+        Requests with different values of the headers named by the I{Vary}
+        header of the response are answered by different responses.
+        """
+        self.resource.headers[b'vary'] = b'Accept-Language'
+        english = [(b'accept-language', b'en')]
+        french = [(b'accept-language', b'fr')]
+        self.get(headers=english)
+        self.get(headers=french)
+        self.assertEqual(b'response 1', self.get(headers=english)[1]()[2])
+        self.assertEqual(b'response 2', self.get(headers=french)[1]()[2])
+        self.assertEqual(2, len(self.resource.rendered))
+
+
+    def test_varyAll(self):
+        """
+        Responses which vary by everything are not stored.
+        """
+        self.resource.headers[b'vary'] = b'*'
+        self.get()
+        self.get()
+        self.assertEqual(2, len(self.resource.rendered))
+
+
+    def test_ifNoneMatch(self):
+        """
+        A request whose I{If-None-Match} header matches the entity tag of the
+        cached response is answered with I{304 Not Modified}, without
+        rendering the resource.
+        """
+        self.resource.etag = b'"abc"'
+        self.get()
+        status, headers, body = self.get(
+            headers=[(b'if-none-match', b'"abc"')])[1]()
+        self.assertEqual(b'HTTP/1.0 304 Not Modified', status)
+        self.assertEqual(b'"abc"', headers[b'etag'])
+        self.assertEqual(b'', body)
+        status, headers, body = self.get(
+            headers=[(b'if-none-match', b'"def"')])[1]()
+        self.assertEqual(b'HTTP/1.0 200 OK', status)
+        self.assertEqual(b'response 1', body)
+        self.assertEqual(1, len(self.resource.rendered))
+
+
+    def test_ifModifiedSince(self):
+        """
+        A request whose I{If-Modified-Since} header is not earlier than the
+        time at which the cached response was last modified is answered with
+        I{304 Not Modified}, without rendering the resource.
+        """
+        self.resource.lastModified = 100
+        self.get()
+        status, headers, body = self.get(
+            headers=[(b'if-modified-since', http.datetimeToString(100))])[1]()
+        self.assertEqual(b'HTTP/1.0 304 Not Modified', status)
+        self.assertEqual(b'', body)
+        status, headers, body = self.get(
+            headers=[(b'if-modified-since', http.datetimeToString(50))])[1]()
+        self.assertEqual(b'HTTP/1.0 200 OK', status)
+        self.assertEqual(http.datetimeToString(100), headers[b'last-modified'])
+        self.assertEqual(1, len(self.resource.rendered))
+
+
+    def test_leastRecentlyUsed(self):
+        """
+        Storing more than C{maxEntries} responses discards the least recently
+        used.
+        """
+        self.cache.maxEntries = 2
+        self.get(b'/a')
+        self.get(b'/b')
+        self.get(b'/a')
+        self.get(b'/c')
+        self.get(b'/a')
+        self.get(b'/c')
+        self.assertEqual(3, len(self.resource.rendered))
+        self.assertEqual(b'response 4', self.get(b'/b')[1]()[2])
+
+
+    def test_maxEntrySize(self):
+        """
+        Responses larger than C{maxEntrySize} are not stored.
+        """
+        self.cache.maxEntrySize = 9
+        self.get()
+        self.get()
+        self.assertEqual(2, len(self.resource.rendered))
+
+
+    def test_coalesced(self):
+        """
+        Requests received while the same request is rendered wait for it,
+        and are answered from its response.
+        """
+        self.resource.delayed = True
+        first, firstResponse = self.get()
+        others = [self.get() for i in range(2)]
+        self.assertEqual([first], self.resource.rendered)
+        self.assertEqual(b'', others[0][1]()[0])
+
+        first.write(b'delayed')
+        first.finish()
+        self.assertEqual(b'delayed', firstResponse()[2])
+        for request, response in others:
+            status, headers, body = response()
+            self.assertEqual(b'HTTP/1.0 200 OK', status)
+            self.assertEqual(b'7', headers[b'content-length'])
+            self.assertEqual(b'delayed', body)
+            self.assertTrue(request.finished)
+        self.assertEqual(1, len(self.resource.rendered))
+
+
+    def test_coalescedNotStored(self):
+        """
+        Requests waiting for a response which is not stored are rendered.
+        """
+        self.resource.delayed = True
+        self.resource.headers[b'cache-control'] = b'no-store'
+        first = self.get()[0]
+        self.get()
+        self.get()
+        first.finish()
+        self.assertEqual(3, len(self.resource.rendered))
+        self.assertEqual({}, self.cache._pending)
+
+
+    def test_coalescedVary(self):
+        """
+        Requests waiting for a response which varies by a request header
+        whose value differs from theirs are rendered.
+        """
+        self.resource.delayed = True
+        self.resource.headers[b'vary'] = b'Accept-Language'
+        first = self.get(headers=[(b'accept-language', b'en')])[0]
+        same = self.get(headers=[(b'accept-language', b'en')])[0]
+        other = self.get(headers=[(b'accept-language', b'fr')])[0]
+        first.finish()
+        self.assertTrue(same.finished)
+        self.assertFalse(other.finished)
+        self.assertEqual([first, other], self.resource.rendered)
+
+
+    def test_renderingInterrupted(self):
+        """
+        If the connection of the request being rendered is lost, a request
+        waiting for it is rendered instead, and a lost request stops waiting.
+        """
+        self.resource.delayed = True
+        first = self.get()[0]
+        lost = self.get()[0]
+        waiting = self.get()[0]
+        lost.connectionLost(failure.Failure(ConnectionDone()))
+        first.connectionLost(failure.Failure(ConnectionDone()))
+        self.assertEqual([first, waiting], self.resource.rendered)
+        waiting.write(b'done')
+        waiting.finish()
+        self.assertEqual(b'done', self.get()[1]()[2])
+
+
+    def test_encoded(self):
+        """
+        A L{CachingResource} wrapped by an encoding resource stores responses
+        before they are encoded, so that they are encoded again for each
+        request answered from the cache, if the request accepts it.
+        """
+        self.site.resource = EncodingResourceWrapper(
+            self.cache, [GzipEncoderFactory()])
+        gzip = [(b'accept-encoding', b'gzip')]
+        self.get(headers=gzip)
+        status, headers, body = self.get()[1]()
+        self.assertEqual(b'response 1', body)
+        self.assertNotIn(b'content-encoding', headers)
+        status, headers, body = self.get(headers=gzip)[1]()
+        self.assertEqual(b'gzip', headers[b'content-encoding'])
+        self.assertEqual(
+            b'response 1', zlib.decompress(body, 16 + zlib.MAX_WBITS))
+        self.assertEqual(1, len(self.resource.rendered))
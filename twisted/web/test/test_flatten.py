@@ -15,16 +15,20 @@ from collections import OrderedDict
 
 from zope.interface import implementer
 
+from twisted.python.compat import unicode
 from twisted.trial.unittest import TestCase
 from twisted.test.testutils import XMLAssertionMixin
 
-from twisted.internet.defer import passthru, succeed, gatherResults
+from twisted.internet.defer import (
+    Deferred, passthru, succeed, gatherResults)
 
 from twisted.web.iweb import IRenderable
 from twisted.web.error import UnfilledSlot, UnsupportedType, FlattenerError
 
 from twisted.web.template import tags, Tag, Comment, CDATA, CharRef, slot
 from twisted.web.template import Element, renderer, TagLoader, flattenString
+from twisted.web.template import XMLString, flatten
+from twisted.web._flatten import _CompiledFragment, _compileTemplate
 
 from twisted.web.test._util import FlattenTestCase
 
@@ -487,3 +491,235 @@ class FlattenerErrorTests(TestCase):
             "RuntimeError: reason\n" % (
                 HERE, f.__code__.co_firstlineno + 1,
                 HERE, g.__code__.co_firstlineno + 1))
+
+
+
+class CompileTemplateTests(FlattenTestCase):
+    """
+    Tests for L{_compileTemplate}.
+    """
+
+    def assertCompiledFlattensLikeOriginal(self, roots):
+        """
+        Assert that C{roots} compiled by L{_compileTemplate} flattens to the
+        same bytes as C{roots} itself, both at the top level and within an
+        attribute.
+
+        @return: The compiled form of C{roots}.
+        """
+        compiled = _compileTemplate(roots)
+        for wrap in [list, lambda roots: tags.a(href=roots)]:
+            self.assertEqual(
+                self.successResultOf(flattenString(None, wrap(roots))),
+                self.successResultOf(flattenString(None, wrap(compiled))))
+        return compiled
+
+
+    def test_staticTag(self):
+        """
+        A tag without any renderer, slot or other dynamic content is replaced
+        by a single L{_CompiledFragment}.
+        """
+        compiled = self.assertCompiledFlattensLikeOriginal(
+            [tags.div(tags.p('a & b', class_='c'), Comment('x'),
+                      CharRef(65), CDATA('<'))])
+        [fragment] = compiled
+        self.assertIsInstance(fragment, _CompiledFragment)
+
+
+    def test_dynamicTagChildren(self):
+        """
+        A tag containing a slot is kept, with each run of static children
+        merged into a single L{_CompiledFragment}.
+        """
+        compiled = self.assertCompiledFlattensLikeOriginal(
+            [tags.ul(tags.li('one'), tags.li('two'),
+                     slot('x', default='<x>'), tags.li('three'))])
+        [ul] = compiled
+        self.assertIsInstance(ul, Tag)
+        self.assertEqual(
+            [_CompiledFragment, slot, _CompiledFragment],
+            [child.__class__ for child in ul.children])
+        self.assertEqual(b'<li>one</li><li>two</li>', ul.children[0].data)
+
+
+    def test_nestedDynamicTag(self):
+        """
+        A tag without a renderer containing a slot within the contents of
+        another tag is spliced into them as its start and end tags around its
+        compiled children, merged with the static content around it.
+        """
+        compiled = self.assertCompiledFlattensLikeOriginal(
+            [tags.div(tags.p(slot('x', default='<y>'), class_='c'), 'z')])
+        [div] = compiled
+        self.assertEqual(
+            [_CompiledFragment, slot, _CompiledFragment],
+            [child.__class__ for child in div.children])
+        self.assertEqual(
+            [b'<p class="c">', b'</p>z'],
+            [div.children[0].data, div.children[2].data])
+
+
+    def test_renderTag(self):
+        """
+        A tag with a renderer is kept unchanged, children included, so that
+        the renderer is given the same L{Tag} as without compilation.
+        """
+        class RenderingElement(Element):
+            @renderer
+            def r(self, request, tag):
+                return tag('!')
+        span = tags.span(render='r')(tags.b('x'))
+        compiled = _compileTemplate([tags.div(span)])
+        [div] = compiled
+        self.assertIs(span, div.children[0])
+        self.assertEqual([Tag], [c.__class__ for c in span.children])
+        self.assertFlattensImmediately(
+            RenderingElement(TagLoader(compiled)),
+            b'<div><span><b>x</b>!</span></div>')
+
+
+    def test_rendererChangesChildren(self):
+        """
+        A renderer of a compiled template can read and change the children
+        of its tag, text and tags alike.
+        """
+        class Menu(Element):
+            loader = XMLString(
+                '<div xmlns:t="http://twistedmatrix.com/ns/'
+                'twisted.web.template/0.1"><h1 t:render="title">Hello, '
+                '<t:slot name="x" />world</h1><ul t:render="menu">'
+                '<li>one</li><li>two</li></ul></div>')
+
+            @renderer
+            def title(self, request, tag):
+                text = u''.join(
+                    child for child in tag.children
+                    if isinstance(child, unicode))
+                return tag.clear()(text.upper())
+
+            @renderer
+            def menu(self, request, tag):
+                items = [child for child in tag.children
+                         if isinstance(child, Tag) and child.tagName == 'li']
+                return tag.clear()(items[::-1])
+
+        self.assertFlattensImmediately(
+            Menu(),
+            b'<div><h1>HELLO, WORLD</h1>'
+            b'<ul><li>two</li><li>one</li></ul></div>')
+
+
+    def test_topLevelStrings(self):
+        """
+        Strings at the top level of a template or in a transparent tag there,
+        which may be flattened within an attribute, are not compiled.
+        """
+        roots = ['<a>', tags.transparent('<b>'), tags.p('<c>')]
+        compiled = self.assertCompiledFlattensLikeOriginal(roots)
+        self.assertEqual('<a>', compiled[0])
+        self.assertIsInstance(compiled[1], Tag)
+        self.assertIsInstance(compiled[2], _CompiledFragment)
+
+
+    def test_dynamicAttribute(self):
+        """
+        A tag with an attribute whose value is not a string is kept, and its
+        attributes are not compiled.
+        """
+        value = [slot('x', default='"')]
+        compiled = self.assertCompiledFlattensLikeOriginal(
+            [tags.p('y', title=value)])
+        [p] = compiled
+        self.assertIsInstance(p, Tag)
+        self.assertEqual(value, p.attributes['title'])
+
+
+    def test_originalUnchanged(self):
+        """
+        L{_compileTemplate} does not modify the template it compiles.
+        """
+        ul = tags.ul(tags.li('one'), slot('x'))
+        _compileTemplate([ul])
+        self.assertEqual(Tag, ul.children[0].__class__)
+
+
+    def test_xmlTemplate(self):
+        """
+        An L{Element} whose loader is an L{XMLString} renders the compiled
+        template, which is compiled once, while the loader still loads the
+        parsed template.
+        """
+        class Rows(Element):
+            loader = XMLString(
+                '<table xmlns:t="http://twistedmatrix.com/ns/'
+                'twisted.web.template/0.1"><tr><th>n</th></tr>'
+                '<tr t:render="rows"><td><t:slot name="n" /></td></tr>'
+                '</table>')
+
+            @renderer
+            def rows(self, request, tag):
+                return [tag.clone().fillSlots(n=str(n)) for n in range(2)]
+
+        loaded = Rows.loader.load()
+        self.assertIsInstance(loaded[0].children[0], Tag)
+        self.assertFlattensImmediately(
+            Rows(),
+            b'<table><tr><th>n</th></tr><tr><td>0</td></tr>'
+            b'<tr><td>1</td></tr></table>')
+        compiled = Rows.loader._loadCompiled()
+        self.assertIs(compiled, Rows.loader._loadCompiled())
+        self.assertIsInstance(compiled[0].children[0], _CompiledFragment)
+
+
+
+class BufferedFlattenTests(TestCase):
+    """
+    Tests for the buffering of output by L{flatten}.
+    """
+
+    def test_coalesced(self):
+        """
+        The output of L{flatten} is written in as few calls as possible.
+        """
+        written = []
+        d = flatten(None, tags.ul([tags.li(str(i)) for i in range(100)]),
+                    written.append)
+        self.successResultOf(d)
+        self.assertEqual(1, len(written))
+        self.assertTrue(written[0].startswith(b'<ul><li>0</li><li>1</li>'))
+
+
+    def test_threshold(self):
+        """
+        Buffered output is written whenever it reaches 64 KiB.
+        """
+        written = []
+        chunk = 'x' * 40000
+        d = flatten(None, [chunk, chunk, chunk], written.append)
+        self.successResultOf(d)
+        self.assertEqual([80000, 40000], [len(data) for data in written])
+
+
+    def test_flushedBeforeDeferred(self):
+        """
+        Buffered output is written before waiting for a L{Deferred}.
+        """
+        written = []
+        deferred = Deferred()
+        d = flatten(None, tags.p('a', deferred, 'c'), written.append)
+        self.assertEqual([b'<p>a'], written)
+        deferred.callback('b')
+        self.successResultOf(d)
+        self.assertEqual([b'<p>a', b'bc</p>'], written)
+
+
+    def test_flushedOnError(self):
+        """
+        Output buffered before an error is written before the L{Deferred}
+        returned by L{flatten} fails.
+        """
+        written = []
+        d = flatten(None, tags.p('a', object()), written.append)
+        self.assertEqual([b'<p>a'], written)
+        self.failureResultOf(d, FlattenerError)
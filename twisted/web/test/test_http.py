@@ -529,6 +529,26 @@ class GenericHTTPChannelTests(unittest.TestCase):
         test_http2_present.skip = "HTTP/2 support not present"
 
 
+    def test_http2Settings(self):
+        """
+        When HTTP/2 is negotiated, the L{HTTPFactory}'s C{h2Settings} and
+        C{h2ConnectionWindowSize} are given to the HTTP/2 connection.
+        """
+        factory = http.HTTPFactory(timeout=None)
+        factory.h2Settings = {4: 2 ** 20}
+        factory.h2ConnectionWindowSize = 2 ** 24
+        a = factory.buildProtocol(None)
+        b = StringTransport()
+        b.negotiatedProtocol = b'h2'
+        a.makeConnection(b)
+        a.dataReceived(b'')
+        self.addCleanup(a.connectionLost, IOError("all done"))
+        self.assertEqual(factory.h2Settings, a._channel.settings)
+        self.assertEqual(2 ** 24, a._channel.connectionWindowSize)
+    if not http.H2_ENABLED:
+        test_http2Settings.skip = "HTTP/2 support not present"
+
+
     def test_http2_absent(self):
         """
         If the transport reports that HTTP/2 is negotiated and HTTP/2 is not
@@ -1446,6 +1466,57 @@ Content-Type: application/x-www-form-urlencoded
         self.assertEqual(content, [networkString(query)])
 
 
+    def test_lazyFormArguments(self):
+        """
+        The arguments of a request are only parsed when first accessed,
+        without moving the position in its C{content}.
+        """
+        httpRequest = b'''\
+POST /?a=b HTTP/1.0
+Content-Length: 7
+Content-Type: application/x-www-form-urlencoded
+
+c=d&e=f'''
+        results = []
+        testcase = self
+        class MyRequest(http.Request):
+            def process(self):
+                results.append(self._args)
+                results.append(self.content.read(2))
+                results.append(self.args)
+                results.append(self.content.read())
+                testcase.didRequest = True
+                self.finish()
+
+        self.runRequest(httpRequest, MyRequest)
+        self.assertEqual(
+            [None, b"c=", {b"a": [b"b"], b"c": [b"d"], b"e": [b"f"]},
+             b"d&e=f"], results)
+
+
+    def test_formArgumentsAfterFinish(self):
+        """
+        The arguments in the body of a request are parsed before the body is
+        discarded when the request finishes, if they have not been accessed.
+        """
+        httpRequest = b'''\
+POST / HTTP/1.0
+Content-Length: 3
+Content-Type: application/x-www-form-urlencoded
+
+c=d'''
+        requests = []
+        testcase = self
+        class MyRequest(http.Request):
+            def process(self):
+                requests.append(self)
+                testcase.didRequest = True
+                self.finish()
+
+        self.runRequest(httpRequest, MyRequest)
+        self.assertEqual({b"c": [b"d"]}, requests[0].args)
+
+
     def test_missingContentDisposition(self):
         """
         If the C{Content-Disposition} header is missing, the request is denied
@@ -1468,10 +1539,6 @@ abasdfg
             channel.transport.value(),
             b"HTTP/1.1 400 Bad Request\r\n\r\n")
 
-    if _PY3:
-        test_missingContentDisposition.skip = (
-            "cgi.parse_multipart is much more error-tolerant on Python 3.")
-
 
     def test_multipartProcessingFailure(self):
         """
@@ -1530,6 +1597,256 @@ abasdfg
         self.assertEqual(processed[0].args, {b"text": [b"abasdfg"]})
 
 
+    def test_multipartIncomplete(self):
+        """
+        If a C{multipart/form-data} body ends before its close delimiter, the
+        request is denied as a bad request.
+        """
+        req = b'''\
+POST / HTTP/1.0
+Content-Type: multipart/form-data; boundary=AaB03x
+Content-Length: 66
+
+--AaB03x
+Content-Disposition: form-data; name="text"
+
+abasdfg
+'''
+        channel = self.runRequest(req, http.Request, success=False)
+        self.assertEqual(
+            channel.transport.value(),
+            b"HTTP/1.1 400 Bad Request\r\n\r\n")
+
+
+    def test_multipartUploadsSpooled(self):
+        """
+        If L{http.Request.spoolUploads} is set, the files uploaded in a
+        C{multipart/form-data} body are written to temporary files, which are
+        added to the C{files} of the request rather than to its C{args}, and
+        closed when the request finishes.
+        """
+        processed = []
+        contents = []
+        testcase = self
+        class MyRequest(http.Request):
+            spoolUploads = True
+
+            def process(self):
+                processed.append(self)
+                contents.append(self.files[b"file"][0].file.read())
+                testcase.didRequest = True
+                self.finish()
+        req = b'''\
+POST / HTTP/1.0
+Content-Type: multipart/form-data; boundary=AaB03x
+Content-Length: 204
+
+--AaB03x
+Content-Disposition: form-data; name="text"
+
+abasdfg
+--AaB03x
+Content-Disposition: form-data; name="file"; filename="a.txt"
+Content-Type: text/plain
+
+first line
+second line
+--AaB03x--
+'''
+        self.runRequest(req, MyRequest)
+        request = processed[0]
+        self.assertEqual({b"text": [b"abasdfg"]}, request.args)
+        [upload] = request.files[b"file"]
+        self.assertEqual(b"a.txt", upload.filename)
+        self.assertEqual(
+            [b"text/plain"], upload.headers.getRawHeaders(b"content-type"))
+        self.assertEqual([b"first line\r\nsecond line"], contents)
+        self.assertTrue(upload.file.closed)
+
+
+    def test_openUpload(self):
+        """
+        L{http.Request.openUpload} is called with the name, filename and
+        headers of each file uploaded in a C{multipart/form-data} body, and
+        the object it returns is written each chunk of the file as it is
+        received, before the request is processed.
+        """
+        opened = []
+        chunks = []
+        testcase = self
+        class Upload(object):
+            def write(self, data):
+                chunks.append(data)
+
+        class MyRequest(http.Request):
+            def openUpload(self, name, filename, headers):
+                opened.append((name, filename))
+                return Upload()
+
+            def process(self):
+                opened.append(self.files[b"file"][0].filename)
+                testcase.didRequest = True
+                self.finish()
+        req = b'''\
+POST / HTTP/1.0
+Content-Type: multipart/form-data; boundary=AaB03x
+Content-Length: 129
+
+--AaB03x
+Content-Disposition: form-data; name="file"; filename="a.bin"
+
+0123456789012345678901234567890123456789
+--AaB03x--
+'''
+        self.runRequest(req, MyRequest)
+        self.assertEqual([(b"file", b"a.bin"), b"a.bin"], opened)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            b"0123456789012345678901234567890123456789", b"".join(chunks))
+
+
+    def test_partialUploadClosedOnConnectionLost(self):
+        """
+        The object returned by L{http.Request.openUpload} is closed if the
+        connection is lost before the whole file is received.
+        """
+        closed = []
+        class Upload(object):
+            def write(self, data):
+                pass
+
+            def close(self):
+                closed.append(True)
+
+        class MyRequest(http.Request):
+            def openUpload(self, name, filename, headers):
+                return Upload()
+        req = b'''\
+POST / HTTP/1.0
+Content-Type: multipart/form-data; boundary=AaB03x
+Content-Length: 129
+
+--AaB03x
+Content-Disposition: form-data; name="file"; filename="a.bin"
+
+01234567890123456789
+'''
+        self.runRequest(req, MyRequest, success=False)
+        self.assertEqual([True], closed)
+
+
+    def test_uploadsInArgsByDefault(self):
+        """
+        Unless L{http.Request.openUpload} returns a file, uploaded files are
+        kept in C{args} like other form fields.
+        """
+        processed = []
+        testcase = self
+        class MyRequest(http.Request):
+            def process(self):
+                processed.append(self)
+                testcase.didRequest = True
+                self.finish()
+        req = b'''\
+POST / HTTP/1.0
+Content-Type: multipart/form-data; boundary=AaB03x
+Content-Length: 94
+
+--AaB03x
+Content-Disposition: form-data; name="file"; filename="a.txt"
+
+hello
+--AaB03x--
+'''
+        self.runRequest(req, MyRequest)
+        self.assertEqual({b"file": [b"hello"]}, processed[0].args)
+        self.assertEqual({}, processed[0].files)
+
+
+    def test_maxBodySize(self):
+        """
+        A request whose I{Content-Length} is larger than its
+        L{http.Request.maxBodySize} is answered with a I{413 Request Entity
+        Too Large} response as soon as its body starts to be received, and is
+        not processed.
+        """
+        testcase = self
+        class MyRequest(http.Request):
+            maxBodySize = 10
+
+            def process(self):
+                testcase.didRequest = True
+                self.finish()
+        req = b'''\
+POST / HTTP/1.0
+Content-Length: 11
+
+hello world'''
+        channel = self.runRequest(req, MyRequest, success=False)
+        self.assertEqual(
+            b"HTTP/1.1 413 Request Entity Too Large\r\n\r\n",
+            channel.transport.value())
+
+
+    def test_maxBodySizeChunked(self):
+        """
+        A request with a chunked body is answered with a I{413 Request Entity
+        Too Large} response once more than its L{http.Request.maxBodySize} is
+        received.
+        """
+        received = []
+        testcase = self
+        class MyRequest(http.Request):
+            maxBodySize = 10
+
+            def handleContentChunk(self, data):
+                received.append(data)
+                http.Request.handleContentChunk(self, data)
+
+            def process(self):
+                testcase.didRequest = True
+                self.finish()
+        req = b'''\
+POST / HTTP/1.1
+Transfer-Encoding: chunked
+
+6
+Hello,
+6
+ world
+0
+
+'''
+        channel = self.runRequest(req, MyRequest, success=False)
+        self.assertEqual(
+            b"HTTP/1.1 413 Request Entity Too Large\r\n\r\n",
+            channel.transport.value())
+        self.assertEqual(b"Hello, worl", b"".join(received))
+
+
+    def test_maxBodySizeNotExceeded(self):
+        """
+        A request whose body is no larger than its
+        L{http.Request.maxBodySize} is processed.
+        """
+        content = []
+        testcase = self
+        class MyRequest(http.Request):
+            maxBodySize = 11
+
+            def process(self):
+                content.append(self.content.read())
+                testcase.didRequest = True
+                self.finish()
+        req = b'''\
+POST / HTTP/1.0
+Content-Length: 11
+
+hello world'''
+        self.runRequest(req, MyRequest)
+        self.assertEqual([b"hello world"], content)
+
+
     def test_chunkedEncoding(self):
         """
         If a request uses the I{chunked} transfer encoding, the request body is
@@ -2257,6 +2574,18 @@ class RequestTests(unittest.TestCase, ResponseTestMixin):
         self.assertEqual(req.received_cookies, {})
 
 
+    def test_receivedCookiesLazy(self):
+        """
+        L{http.Request.received_cookies} are parsed from C{requestHeaders}
+        when first accessed.
+        """
+        req = http.Request(DummyChannel(), False)
+        req.requestHeaders.setRawHeaders(b"cookie", [b'test="lemur"'])
+        self.assertIsNone(req._receivedCookies)
+        self.assertEqual(req.received_cookies, {b"test": b'"lemur"'})
+        self.assertIs(req.received_cookies, req._receivedCookies)
+
+
     def test_parseCookies(self):
         """
         L{http.Request.parseCookies} extracts cookies from C{requestHeaders}
@@ -2452,6 +2781,18 @@ class RequestTests(unittest.TestCase, ResponseTestMixin):
         return finished
 
 
+    def test_finishCounted(self):
+        """
+        L{Request.finish} increments the I{twisted_web_requests_total}
+        counter.
+        """
+        before = http._requestsServed.value
+        request = http.Request(DummyChannel(), False)
+        request.gotLength(1)
+        request.finish()
+        self.assertEqual(before + 1, http._requestsServed.value)
+
+
     def test_writeAfterFinish(self):
         """
         Calling L{Request.write} after L{Request.finish} has been called results
@@ -1427,6 +1427,45 @@ class HTTP2ServerTests(unittest.TestCase, HTTP2TestHelpers):
         self.assertNotIn(1, a._streamCleanupCallbacks)
 
 
+    def test_respondWith413(self):
+        """
+        A request with a body larger than its C{maxBodySize} is answered with
+        a 413 error, and its stream is reset so that the client stops sending
+        the body, which is ignored.
+        """
+        class LimitedHandler(DummyHTTPHandler):
+            maxBodySize = 10
+
+        frameFactory = FrameFactory()
+        transport = StringTransport()
+        a = H2Connection()
+        a.requestFactory = LimitedHandler
+
+        requestFrames = buildRequestFrames(
+            self.postRequestHeaders, self.postRequestData, frameFactory)
+        a.makeConnection(transport)
+        a.dataReceived(frameFactory.clientConnectionPreface() +
+                       requestFrames[0].serialize())
+        cleanupCallback = a._streamCleanupCallbacks[1]
+        a.dataReceived(requestFrames[1].serialize())
+        a.dataReceived(b''.join(f.serialize() for f in requestFrames[2:]))
+
+        self.assertEqual(1, self.successResultOf(cleanupCallback))
+        self.assertNotIn(1, a.streams)
+        frames = framesFromBytes(transport.value())
+        headers = [f for f in frames
+                   if isinstance(f, hyperframe.frame.HeadersFrame)]
+        self.assertEqual(1, len(headers))
+        self.assertEqual([(b':status', b'413')], headers[0].data)
+        self.assertIn('END_STREAM', headers[0].flags)
+        resets = [f for f in frames
+                  if isinstance(f, hyperframe.frame.RstStreamFrame)]
+        self.assertEqual(1, len(resets))
+        self.assertEqual(h2.errors.NO_ERROR, resets[0].error_code)
+        self.assertEqual(
+            [], [f for f in frames if isinstance(f, hyperframe.frame.DataFrame)])
+
+
 
 class H2FlowControlTests(unittest.TestCase, HTTP2TestHelpers):
     """
@@ -1746,6 +1785,53 @@ class H2FlowControlTests(unittest.TestCase, HTTP2TestHelpers):
         return a._streamCleanupCallbacks[1].addCallback(validate)
 
 
+    def test_initialWindowSizeChanged(self):
+        """
+        A stream blocked behind flow control resumes sending when the client
+        enlarges the initial window size, which enlarges the window of every
+        stream.
+        """
+        f = FrameFactory()
+        b = StringTransport()
+        a = H2Connection()
+        a.requestFactory = DummyProducerHandler
+
+        # Shrink the window to 5 bytes, then send the request.
+        requestBytes = f.clientConnectionPreface()
+        requestBytes += f.buildSettingsFrame(
+            {h2.settings.INITIAL_WINDOW_SIZE: 5}
+        ).serialize()
+        requestBytes += buildRequestBytes(
+            self.getRequestHeaders, [], f
+        )
+        a.makeConnection(b)
+        a.dataReceived(requestBytes)
+
+        request = a.streams[1]._request
+        request.write(b"helloworld")
+        request.unregisterProducer()
+        request.finish()
+
+        reactor.callLater(
+            0,
+            a.dataReceived,
+            f.buildSettingsFrame(
+                {h2.settings.INITIAL_WINDOW_SIZE: 50}
+            ).serialize()
+        )
+
+        def validate(streamID):
+            frames = framesFromBytes(b.value())
+            self.assertTrue('END_STREAM' in frames[-1].flags)
+            dataChunks = [
+                f.data for f in frames
+                if isinstance(f, hyperframe.frame.DataFrame)
+            ]
+            self.assertEqual(dataChunks, [b"hello", b"world", b""])
+
+        return a._streamCleanupCallbacks[1].addCallback(validate)
+
+
     def test_responseWithoutBody(self):
         """
         We safely handle responses without bodies.
@@ -2287,6 +2373,152 @@ class HTTP2SchedulingTests(unittest.TestCase, HTTP2TestHelpers):
 
 
 
+class WriteCountingTransport(StringTransport):
+    """
+    A L{StringTransport} which counts the calls to its C{write} method.
+
+    @ivar writes: The number of calls to C{write}.
+    """
+    writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        StringTransport.write(self, data)
+
+
+
+class HTTP2BatchingTests(unittest.TestCase, HTTP2TestHelpers):
+    """
+    The L{H2Connection} object writes the frames it sends to its transport in
+    batches, and can be configured with larger settings than the defaults.
+    """
+    getRequestHeaders = [
+        (b':method', b'GET'),
+        (b':authority', b'localhost'),
+        (b':path', b'/chunked/4'),
+        (b':scheme', b'https'),
+    ]
+
+
+    def connect(self, requestBytes=b''):
+        """
+        Create a L{H2Connection} serving L{ChunkedHTTPHandler}s with a
+        L{task.Clock}, connect it to a L{WriteCountingTransport}, and send it
+        the connection preface followed by C{requestBytes}.
+
+        @return: A 3-tuple of the connection, its transport and its clock.
+        """
+        clock = task.Clock()
+        conn = H2Connection(clock)
+        conn.requestFactory = ChunkedHTTPHandler
+        transport = WriteCountingTransport()
+        conn.makeConnection(transport)
+        conn.dataReceived(FrameFactory().clientConnectionPreface() +
+                          requestBytes)
+        return conn, transport, clock
+
+
+    def test_settings(self):
+        """
+        L{H2Connection.settings} are advertised to the client with the default
+        settings, and the connection flow control window is opened to
+        L{H2Connection.connectionWindowSize}.
+        """
+        conn = H2Connection(task.Clock())
+        conn.settings = {h2.settings.INITIAL_WINDOW_SIZE: 2 ** 20,
+                         h2.settings.MAX_CONCURRENT_STREAMS: 50}
+        conn.connectionWindowSize = 2 ** 24
+        transport = StringTransport()
+        conn.makeConnection(transport)
+
+        frames = framesFromBytes(transport.value())
+        self.assertEqual(3, len(frames))
+        self.assertIsInstance(frames[1], hyperframe.frame.SettingsFrame)
+        self.assertEqual(conn.settings, frames[1].settings)
+        self.assertIsInstance(frames[2], hyperframe.frame.WindowUpdateFrame)
+        self.assertEqual(0, frames[2].stream_id)
+        self.assertEqual(2 ** 24 - 65535, frames[2].window_increment)
+
+
+    def test_defaultSettings(self):
+        """
+        By default, only the default settings are advertised.
+        """
+        conn = H2Connection(task.Clock())
+        transport = StringTransport()
+        conn.makeConnection(transport)
+        [frame] = framesFromBytes(transport.value())
+        self.assertIsInstance(frame, hyperframe.frame.SettingsFrame)
+
+
+    def test_batchedWrites(self):
+        """
+        The frames sent in response to the frames received in a call to
+        C{dataReceived} are written at once, and so are the data frames
+        sent by a pass of the data-sending loop.
+        """
+        f = FrameFactory()
+        conn, transport, clock = self.connect(
+            buildRequestBytes(self.getRequestHeaders, [], f))
+        # The settings, then the acknowledgement of the client's settings and
+        # the response headers.
+        self.assertEqual(2, transport.writes)
+
+        clock.advance(0)
+        self.assertEqual(3, transport.writes)
+        frames = framesFromBytes(transport.value())
+        self.assertEqual(
+            [ChunkedHTTPHandler.chunkData] * 4 + [b''],
+            [frame.data for frame in frames
+             if isinstance(frame, hyperframe.frame.DataFrame)])
+        self.assertTrue('END_STREAM' in frames[-1].flags)
+        self.assertNotIn(1, conn.streams)
+
+
+    def test_sendBatchSize(self):
+        """
+        The data-sending loop lets the reactor run once it has sent
+        L{H2Connection.sendBatchSize} bytes of data.
+        """
+        f = FrameFactory()
+        conn, transport, clock = self.connect()
+        conn.sendBatchSize = len(ChunkedHTTPHandler.chunkData) * 2
+        conn.dataReceived(buildRequestBytes(self.getRequestHeaders, [], f))
+        writes = transport.writes
+
+        clock.advance(0)
+        frames = framesFromBytes(transport.value())
+        self.assertEqual(
+            5, len([frame for frame in frames
+                    if isinstance(frame, hyperframe.frame.DataFrame)]))
+        # One write for each pass: two chunks, two chunks, then the end of
+        # the stream.
+        self.assertEqual(writes + 3, transport.writes)
+        self.assertNotIn(1, conn.streams)
+
+
+    def test_headersWrittenLater(self):
+        """
+        Headers sent outside of C{dataReceived} are written when the reactor
+        next runs, together with any data sent after them.
+        """
+        f = FrameFactory()
+        conn, transport, clock = self.connect()
+        conn.requestFactory = DummyProducerHandler
+        conn.dataReceived(buildRequestBytes(self.getRequestHeaders, [], f))
+        writes = transport.writes
+
+        request = conn.streams[1]._request
+        request.write(b"hello")
+        self.assertEqual(writes, transport.writes)
+        clock.advance(0)
+        self.assertEqual(writes + 1, transport.writes)
+        frames = framesFromBytes(transport.value())
+        self.assertIsInstance(frames[-2], hyperframe.frame.HeadersFrame)
+        self.assertEqual(b"hello", frames[-1].data)
+
+
+
 class HTTP2TimeoutTests(unittest.TestCase, HTTP2TestHelpers):
     """
     The L{H2Connection} object times out idle connections.
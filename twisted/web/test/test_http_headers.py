@@ -37,6 +37,17 @@ class BytesHeadersTests(TestCase):
         self.assertEqual(h.getRawHeaders(b"test"), rawValue)
 
 
+    def test_lowercaseNameKept(self):
+        """
+        L{Headers.setRawHeaders} keeps a L{bytes} name which is already
+        lowercase rather than a copy of it.
+        """
+        name = b"x-" + b"test"
+        h = Headers()
+        h.setRawHeaders(name, [b"value"])
+        self.assertIs(name, list(h._rawHeaders)[0])
+
+
     def test_rawHeadersTypeChecking(self):
         """
         L{Headers.setRawHeaders} requires values to be of type list.
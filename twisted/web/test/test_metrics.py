@@ -0,0 +1,131 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.web.metrics}.
+"""
+
+from __future__ import division, absolute_import
+
+from twisted.logger import MetricsRegistry, globalMetrics
+from twisted.trial.unittest import TestCase
+from twisted.web.metrics import MetricsResource, metricsAsPrometheusText
+from twisted.web.test._util import _render
+from twisted.web.test.requesthelper import DummyRequest
+
+
+
+class MetricsAsPrometheusTextTests(TestCase):
+    """
+    Tests for L{metricsAsPrometheusText}.
+    """
+
+    def test_empty(self):
+        """
+        A registry without metrics is formatted as an empty string.
+        """
+        self.assertEqual(u"", metricsAsPrometheusText(MetricsRegistry()))
+
+
+    def test_counterAndGauge(self):
+        """
+        Counters and gauges are formatted as their description, type and
+        value, sorted by name.
+        """
+        registry = MetricsRegistry()
+        registry.counter("requests_total", u"Requests.").increment(3)
+        registry.gauge("temperature", u"Degrees.").set(21.5)
+        self.assertEqual(
+            u"# HELP requests_total Requests.\n"
+            u"# TYPE requests_total counter\n"
+            u"requests_total 3\n"
+            u"# HELP temperature Degrees.\n"
+            u"# TYPE temperature gauge\n"
+            u"temperature 21.5\n",
+            metricsAsPrometheusText(registry))
+
+
+    def test_help(self):
+        """
+        Backslashes and line breaks are escaped in descriptions, and a metric
+        without a description has no I{HELP} line.
+        """
+        registry = MetricsRegistry()
+        registry.counter("a", u"One\\two\nthree")
+        registry.counter("b")
+        self.assertEqual(
+            u"# HELP a One\\\\two\\nthree\n"
+            u"# TYPE a counter\n"
+            u"a 0\n"
+            u"# TYPE b counter\n"
+            u"b 0\n",
+            metricsAsPrometheusText(registry))
+
+
+    def test_specialValues(self):
+        """
+        Infinite values and NaN are formatted as Prometheus expects.
+        """
+        registry = MetricsRegistry()
+        registry.gauge("a").set(float("inf"))
+        registry.gauge("b").set(float("-inf"))
+        registry.gauge("c").set(float("nan"))
+        self.assertEqual(
+            [u"a +Inf", u"b -Inf", u"c NaN"],
+            [line for line in metricsAsPrometheusText(registry).splitlines()
+             if not line.startswith(u"#")])
+
+
+    def test_histogram(self):
+        """
+        Histograms are formatted as their cumulative buckets, including the
+        I{+Inf} bucket, and their sum and count.
+        """
+        registry = MetricsRegistry()
+        histogram = registry.histogram(
+            "durations", u"Durations.", buckets=[0.5, 1])
+        for value in [0.25, 0.75, 3]:
+            histogram.observe(value)
+        self.assertEqual(
+            u"# HELP durations Durations.\n"
+            u"# TYPE durations histogram\n"
+            u'durations_bucket{le="0.5"} 1\n'
+            u'durations_bucket{le="1"} 2\n'
+            u'durations_bucket{le="+Inf"} 3\n'
+            u"durations_sum 4.0\n"
+            u"durations_count 3\n",
+            metricsAsPrometheusText(registry))
+
+
+
+class MetricsResourceTests(TestCase):
+    """
+    Tests for L{MetricsResource}.
+    """
+
+    def test_render(self):
+        """
+        L{MetricsResource} responds with the metrics of its registry in the
+        Prometheus text format.
+        """
+        registry = MetricsRegistry()
+        registry.counter("requests_total", u"Requests.").increment()
+        request = DummyRequest([b''])
+        d = _render(MetricsResource(registry), request)
+
+        def rendered(ignored):
+            self.assertEqual(
+                [b"text/plain; version=0.0.4; charset=utf-8"],
+                request.responseHeaders.getRawHeaders(b"content-type"))
+            self.assertEqual(
+                metricsAsPrometheusText(registry).encode("utf-8"),
+                b"".join(request.written))
+        d.addCallback(rendered)
+        return d
+
+
+    def test_globalMetrics(self):
+        """
+        L{MetricsResource} serves L{globalMetrics} by default.
+        """
+        self.assertIs(globalMetrics, MetricsResource().registry)
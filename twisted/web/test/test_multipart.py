@@ -0,0 +1,169 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.web._multipart}.
+"""
+
+from __future__ import division, absolute_import
+
+from twisted.python.compat import iterbytes
+from twisted.trial.unittest import SynchronousTestCase
+from twisted.web._multipart import MultipartError, MultipartParser
+
+
+
+BODY = (b"preamble\r\n"
+        b"--AaB03x\r\n"
+        b"Content-Disposition: form-data; name=\"text\"\r\n"
+        b"\r\n"
+        b"abasdfg\r\n"
+        b"--AaB03x  \r\n"
+        b"Content-Disposition: form-data; name=\"file\"; "
+        b"filename=\"a.txt\"\r\n"
+        b"Content-Type: text/plain\r\n"
+        b"\r\n"
+        b"line\r\n--AaB03 is not a delimiter\r\n"
+        b"--AaB03x\r\n"
+        b"\r\n"
+        b"\r\n"
+        b"--AaB03x--\r\n"
+        b"epilogue")
+
+
+
+class MultipartParserTests(SynchronousTestCase):
+    """
+    Tests for L{MultipartParser}.
+    """
+
+    def setUp(self):
+        self.events = []
+        self.parser = MultipartParser(
+            b"AaB03x", self.partBegan, self.partDataReceived, self.partEnded)
+
+
+    def partBegan(self, headers):
+        self.events.append(("began", sorted(headers.getAllRawHeaders())))
+
+
+    def partDataReceived(self, data):
+        if self.events[-1][0] == "data":
+            self.events[-1] = ("data", self.events[-1][1] + data)
+        else:
+            self.events.append(("data", data))
+
+
+    def partEnded(self):
+        self.events.append(("ended",))
+
+
+    def assertParsed(self):
+        """
+        Assert that C{BODY} was parsed.
+        """
+        self.parser.finish()
+        self.assertEqual([
+            ("began", [(b"Content-Disposition",
+                        [b"form-data; name=\"text\""])]),
+            ("data", b"abasdfg"),
+            ("ended",),
+            ("began", [(b"Content-Disposition",
+                        [b"form-data; name=\"file\"; filename=\"a.txt\""]),
+                       (b"Content-Type", [b"text/plain"])]),
+            ("data", b"line\r\n--AaB03 is not a delimiter"),
+            ("ended",),
+            ("began", []),
+            ("ended",),
+            ], self.events)
+
+
+    def test_parse(self):
+        """
+        A body received at once is parsed into the headers and data of each
+        part, ignoring the preamble, the epilogue and the whitespace after
+        delimiters.
+        """
+        self.parser.dataReceived(BODY)
+        self.assertParsed()
+
+
+    def test_parseByteByByte(self):
+        """
+        A body received one byte at a time is parsed the same way.
+        """
+        for byte in iterbytes(BODY):
+            self.parser.dataReceived(byte)
+        self.assertParsed()
+
+
+    def test_dataReportedEarly(self):
+        """
+        The data of a part is reported as it is received, except for the end
+        which might be the beginning of a delimiter, which is all that is
+        kept.
+        """
+        self.parser.dataReceived(
+            b"--AaB03x\r\n"
+            b"Content-Disposition: form-data; name=\"file\"\r\n"
+            b"\r\n"
+            b"0123456789012345678901234567890123456789")
+        self.assertEqual(("data", b"0123456789012345678901234567890"),
+                         self.events[-1])
+        self.assertEqual(b"123456789", self.parser._buffer)
+
+
+    def test_noDelimiter(self):
+        """
+        L{MultipartParser.finish} raises L{MultipartError} if no delimiter
+        was received.
+        """
+        self.parser.dataReceived(b"no delimiter\r\n")
+        self.assertRaises(MultipartError, self.parser.finish)
+        self.assertEqual([], self.events)
+
+
+    def test_incomplete(self):
+        """
+        L{MultipartParser.finish} raises L{MultipartError} if the close
+        delimiter was not received.
+        """
+        self.parser.dataReceived(BODY[:-22])
+        self.assertRaises(MultipartError, self.parser.finish)
+
+
+    def test_malformedDelimiter(self):
+        """
+        A delimiter followed by anything but whitespace is malformed.
+        """
+        self.assertRaises(
+            MultipartError, self.parser.dataReceived, b"--AaB03x!\r\n")
+
+
+    def test_malformedHeader(self):
+        """
+        A header line without a colon is malformed.
+        """
+        self.assertRaises(
+            MultipartError, self.parser.dataReceived,
+            b"--AaB03x\r\nno colon\r\n\r\n")
+
+
+    def test_headersTooLong(self):
+        """
+        Headers longer than L{MultipartParser.maxHeaderSize} are rejected
+        without waiting for their end.
+        """
+        self.parser.maxHeaderSize = 10
+        self.parser.dataReceived(b"--AaB03x\r\nX: 123")
+        self.assertRaises(
+            MultipartError, self.parser.dataReceived, b"45678")
+
+
+    def test_emptyBoundary(self):
+        """
+        An empty boundary is rejected.
+        """
+        self.assertRaises(
+            MultipartError, MultipartParser, b"", self.partBegan,
+            self.partDataReceived, self.partEnded)
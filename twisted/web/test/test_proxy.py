@@ -5,15 +5,29 @@
 Test for L{twisted.web.proxy}.
 """
 
+from io import BytesIO
+
+from zope.interface import implementer
+
 from twisted.trial.unittest import TestCase
 from twisted.test.proto_helpers import StringTransportWithDisconnection
-from twisted.test.proto_helpers import MemoryReactor
-
+from twisted.test.proto_helpers import MemoryReactor, StringTransport
+from twisted.internet.address import IPv4Address
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectionRefusedError
+from twisted.internet.task import Clock
+from twisted.python.failure import Failure
+
+from twisted.web.client import ResponseFailed
+from twisted.web.http_headers import Headers
+from twisted.web.iweb import IAgent
 from twisted.web.resource import Resource
-from twisted.web.server import Site
+from twisted.web.server import Site, NOT_DONE_YET
 from twisted.web.proxy import ReverseProxyResource, ProxyClientFactory
 from twisted.web.proxy import ProxyClient, ProxyRequest, ReverseProxyRequest
+from twisted.web.proxy import StreamingReverseProxyResource
 from twisted.web.test.test_web import DummyRequest
+from twisted.web._newclient import Response, ResponseNeverReceived
 
 
 class ReverseProxyResourceTests(TestCase):
@@ -563,3 +577,293 @@ class ReverseProxyRequestTests(TestCase):
         factory = reactor.tcpClients[0][2]
         self.assertIsInstance(factory, ProxyClientFactory)
         self.assertEqual(factory.headers, {b'host': b'example.com'})
+
+
+
+@implementer(IAgent)
+class FakeAgent(object):
+    """
+    An L{IAgent} which records its requests, to be answered by the test.
+
+    @ivar requests: A list of 5-tuples of the arguments of each request and
+        the L{Deferred} returned for it.
+
+    @ivar cancelled: The L{Deferred}s returned which have been cancelled.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.cancelled = []
+
+
+    def request(self, method, uri, headers=None, bodyProducer=None):
+        d = Deferred(self.cancelled.append)
+        self.requests.append((method, uri, headers, bodyProducer, d))
+        return d
+
+
+
+class StreamingRequest(DummyRequest):
+    """
+    A L{DummyRequest} with a body, which records its producer rather than
+    driving it.
+    """
+    client = IPv4Address('TCP', '10.0.0.2', 12345)
+
+    def __init__(self, postpath, uri=b'/', content=b''):
+        DummyRequest.__init__(self, postpath)
+        self.uri = uri
+        self.content = BytesIO(content)
+        self.producer = None
+        self.lostConnection = False
+
+
+    def registerProducer(self, producer, streaming):
+        self.producer = producer
+
+
+    def unregisterProducer(self):
+        self.producer = None
+
+
+    def loseConnection(self):
+        self.lostConnection = True
+
+
+
+class StreamingReverseProxyResourceTests(TestCase):
+    """
+    Tests for L{StreamingReverseProxyResource}.
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        self.agent = FakeAgent()
+        self.resource = StreamingReverseProxyResource(
+            [b'http://a:80', b'http://b:80'], b'/base', self.clock,
+            self.agent, b'/health')
+
+
+    def respond(self, d, code=200, headers=None):
+        """
+        Fire C{d} with a response.
+
+        @return: A 2-tuple of the response and the transport it is received
+            on.
+        """
+        transport = StringTransport()
+        response = Response._construct(
+            (b'HTTP', 1, 1), code, b'Phrase', Headers(headers or {}),
+            transport, None)
+        d.callback(response)
+        return response, transport
+
+
+    def test_forwardRequest(self):
+        """
+        Requests are forwarded to an upstream server, below the base path and
+        with the query string, without hop-by-hop headers and the I{Host}
+        header, and with an I{X-Forwarded-For} header.
+        """
+        request = StreamingRequest(
+            [b'a b', b'c'], b'/proxy/a%20b/c?x=1', b'body')
+        request.method = b'POST'
+        request.requestHeaders.setRawHeaders(b'host', [b'example.com'])
+        request.requestHeaders.setRawHeaders(b'connection', [b'x-private'])
+        request.requestHeaders.setRawHeaders(b'x-private', [b'secret'])
+        request.requestHeaders.setRawHeaders(b'keep-alive', [b'300'])
+        request.requestHeaders.setRawHeaders(b'accept', [b'text/plain'])
+        self.assertIs(NOT_DONE_YET, self.resource.render(request))
+
+        [(method, uri, headers, bodyProducer, d)] = self.agent.requests
+        self.assertEqual(b'POST', method)
+        self.assertEqual(b'http://a:80/base/a%20b/c?x=1', uri)
+        self.assertEqual(
+            [(b'Accept', [b'text/plain']),
+             (b'X-Forwarded-For', [b'10.0.0.2'])],
+            sorted(headers.getAllRawHeaders()))
+        self.assertEqual(4, bodyProducer.length)
+
+
+    def test_noBody(self):
+        """
+        Requests without a body are forwarded without a body producer.
+        """
+        self.resource.render(StreamingRequest([]))
+        self.assertIs(None, self.agent.requests[0][3])
+
+
+    def test_streamResponse(self):
+        """
+        The status and end-to-end headers of the response are copied, and its
+        body is written as it is received, with the upstream connection
+        registered as the request's producer until it is complete.
+        """
+        request = StreamingRequest([])
+        self.resource.render(request)
+        response, transport = self.respond(
+            self.agent.requests[0][4], 201,
+            {b'content-type': [b'text/plain'],
+             b'transfer-encoding': [b'chunked'],
+             b'x-upstream': [b'a']})
+        self.assertEqual((201, b'Phrase'),
+                         (request.responseCode, request.responseMessage))
+        self.assertIs(None, request.defaultContentType)
+        self.assertEqual(
+            [(b'Content-Type', [b'text/plain']), (b'X-Upstream', [b'a'])],
+            sorted(request.responseHeaders.getAllRawHeaders()))
+        self.assertIs(transport, request.producer)
+
+        response._bodyDataReceived(b'hello, ')
+        response._bodyDataReceived(b'world')
+        self.assertEqual([b'hello, ', b'world'], request.written)
+        self.assertEqual(0, request.finished)
+        response._bodyDataFinished()
+        self.assertEqual(1, request.finished)
+        self.assertIs(None, request.producer)
+
+
+    def test_truncatedResponse(self):
+        """
+        If the response body is truncated, the request's connection is
+        closed without finishing it.
+        """
+        request = StreamingRequest([])
+        self.resource.render(request)
+        response, transport = self.respond(self.agent.requests[0][4])
+        response._bodyDataFinished(Failure(ResponseFailed([])))
+        self.assertEqual(0, request.finished)
+        self.assertTrue(request.lostConnection)
+
+
+    def test_clientGoneBeforeResponse(self):
+        """
+        If the request's connection is lost before the response arrives, the
+        upstream request is cancelled.
+        """
+        request = StreamingRequest([])
+        self.resource.render(request)
+        d = self.agent.requests[0][4]
+        request.processingFailed(Failure(Exception("Connection lost")))
+        self.assertEqual([d], self.agent.cancelled)
+        self.assertIs(None, request.responseCode)
+        self.assertEqual(0, self.resource._upstreams[0].active)
+
+
+    def test_clientGoneDuringBody(self):
+        """
+        If the request's connection is lost while the response body is being
+        received, the upstream connection is closed.
+        """
+        request = StreamingRequest([])
+        self.resource.render(request)
+        response, transport = self.respond(self.agent.requests[0][4])
+        request.processingFailed(Failure(Exception("Connection lost")))
+        self.assertEqual('stopped', transport.producerState)
+        response._bodyDataReceived(b'late')
+        response._bodyDataFinished()
+        self.assertEqual([], request.written)
+        self.assertEqual(0, self.resource._upstreams[0].active)
+
+
+    def test_leastActive(self):
+        """
+        Requests are forwarded to the upstream server with the fewest
+        requests in progress, in turn when several have as few.
+        """
+        for i in range(3):
+            self.resource.render(StreamingRequest([]))
+        self.assertEqual(
+            [b'http://a:80/base', b'http://b:80/base', b'http://a:80/base'],
+            [uri for (method, uri, headers, body, d) in self.agent.requests])
+        for (method, uri, headers, body, d) in self.agent.requests[::2]:
+            response, transport = self.respond(d)
+            response._bodyDataFinished()
+        self.resource.render(StreamingRequest([]))
+        self.resource.render(StreamingRequest([]))
+        self.assertEqual(
+            [b'http://a:80/base', b'http://a:80/base'],
+            [uri for (method, uri, headers, body, d)
+             in self.agent.requests[3:]])
+
+
+    def test_badGateway(self):
+        """
+        If no response is received from the upstream server, a I{502 Bad
+        Gateway} error is returned and the server is not chosen again for
+        C{retryInterval} seconds.
+        """
+        request = StreamingRequest([])
+        self.resource.render(request)
+        self.agent.requests[0][4].errback(ConnectionRefusedError())
+        self.assertEqual(1, len(self.flushLoggedErrors(ConnectionRefusedError)))
+        self.assertEqual(502, request.responseCode)
+        self.assertEqual(1, request.finished)
+
+        for i in range(2):
+            self.resource.render(StreamingRequest([]))
+        self.assertEqual(
+            [b'http://b:80/base', b'http://b:80/base'],
+            [uri for (method, uri, headers, body, d)
+             in self.agent.requests[1:]])
+        self.clock.advance(self.resource.retryInterval)
+        self.resource.render(StreamingRequest([]))
+        self.assertEqual(b'http://a:80/base', self.agent.requests[3][1])
+
+
+    def test_allDown(self):
+        """
+        If no upstream server is available, requests are forwarded to all of
+        them.
+        """
+        for upstream in self.resource._upstreams:
+            upstream.downUntil = float('inf')
+        self.resource.render(StreamingRequest([]))
+        self.resource.render(StreamingRequest([]))
+        self.assertEqual(
+            [b'http://a:80/base', b'http://b:80/base'],
+            [uri for (method, uri, headers, body, d) in self.agent.requests])
+
+
+    def test_healthChecks(self):
+        """
+        L{StreamingReverseProxyResource.startHealthChecks} requests the health
+        check path from every upstream server every C{healthCheckInterval}
+        seconds, and a server is not chosen from the time it fails a check
+        until it passes one.
+        """
+        self.resource.startHealthChecks()
+        self.addCleanup(self.resource.stopHealthChecks)
+        self.assertEqual(
+            [(b'GET', b'http://a:80/health'), (b'GET', b'http://b:80/health')],
+            [request[:2] for request in self.agent.requests])
+        response, transport = self.respond(self.agent.requests[0][4], 200)
+        response._bodyDataFinished()
+        self.respond(self.agent.requests[1][4], 503)
+
+        del self.agent.requests[:]
+        self.resource.render(StreamingRequest([]))
+        self.resource.render(StreamingRequest([]))
+        self.assertEqual(
+            [b'http://a:80/base', b'http://a:80/base'],
+            [uri for (method, uri, headers, body, d) in self.agent.requests])
+
+        del self.agent.requests[:]
+        self.clock.advance(self.resource.healthCheckInterval)
+        self.assertEqual(2, len(self.agent.requests))
+        self.agent.requests[0][4].errback(ResponseNeverReceived([]))
+        self.respond(self.agent.requests[1][4], 200)
+        self.assertEqual(float('inf'), self.resource._upstreams[0].downUntil)
+        self.assertEqual(0, self.resource._upstreams[1].downUntil)
+
+
+    def test_healthCheckTimeout(self):
+        """
+        A health check which takes longer than C{healthCheckInterval} is
+        cancelled, and fails.
+        """
+        self.resource.startHealthChecks()
+        self.resource.stopHealthChecks()
+        self.clock.advance(self.resource.healthCheckInterval)
+        for upstream in self.resource._upstreams:
+            self.assertEqual(float('inf'), upstream.downUntil)
@@ -0,0 +1,232 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.web.router}.
+"""
+
+from __future__ import division, absolute_import
+
+from twisted.trial.unittest import SynchronousTestCase
+
+from twisted.web.resource import Resource, NoResource, getChildForRequest
+from twisted.web.router import Router
+from twisted.web.test.requesthelper import DummyRequest
+
+
+
+class LeafResource(Resource):
+    """
+    A leaf resource.
+    """
+    isLeaf = True
+
+
+
+class CountingResource(Resource):
+    """
+    A resource which counts the calls to its C{getChildWithDefault}.
+
+    @ivar lookups: The segments it has been called with.
+    """
+
+    def __init__(self):
+        Resource.__init__(self)
+        self.lookups = []
+
+
+    def getChildWithDefault(self, path, request):
+        self.lookups.append(path)
+        return Resource.getChildWithDefault(self, path, request)
+
+
+
+class RouterTests(SynchronousTestCase):
+    """
+    Tests for L{Router}.
+    """
+
+    def setUp(self):
+        self.router = Router()
+
+
+    def resolve(self, path):
+        """
+        Find the resource for a request for C{path} below C{self.router}.
+
+        @return: A 2-tuple of the resource found and the request.
+        """
+        request = DummyRequest(path[1:].split(b'/'))
+        return getChildForRequest(self.router, request), request
+
+
+    def test_staticRoute(self):
+        """
+        A route without parameters is resolved in a single call, moving the
+        segments it matches to C{prepath}.
+        """
+        resource = Resource()
+        self.router.addRoute(b"/a/b/c", resource)
+        request = DummyRequest([b"b", b"c", b"d"])
+        request.prepath = [b"a"]
+        self.assertIs(
+            resource, self.router.getChildWithDefault(b"a", request))
+        self.assertEqual(([b"a", b"b", b"c"], [b"d"]),
+                         (request.prepath, request.postpath))
+
+
+    def test_parameters(self):
+        """
+        Parameters of a route match any segment, and are added to the
+        request's C{routeArguments}.
+        """
+        resource = Resource()
+        self.router.addRoute(b"/users/{user}/posts/{post}", resource)
+        found, request = self.resolve(b"/users/alice/posts/7")
+        self.assertIs(resource, found)
+        self.assertEqual({b"user": b"alice", b"post": b"7"},
+                         request.routeArguments)
+        self.assertEqual([], request.postpath)
+
+
+    def test_longestRoute(self):
+        """
+        A path is resolved to the longest route matching its beginning.
+        """
+        new, posts = Resource(), Resource()
+        self.router.addRoute(b"/users/new", new)
+        self.router.addRoute(b"/users/{user}/posts", posts)
+        self.assertIs(new, self.resolve(b"/users/new")[0])
+        found, request = self.resolve(b"/users/new/posts")
+        self.assertIs(posts, found)
+        self.assertEqual({b"user": b"new"}, request.routeArguments)
+        found, request = self.resolve(b"/users/new/comments")
+        self.assertIsInstance(found, NoResource)
+        self.assertFalse(hasattr(request, "routeArguments"))
+
+
+    def test_staticPreferred(self):
+        """
+        Of routes of the same length, those with static segments in the place
+        of parameters are preferred.
+        """
+        first, last, static = Resource(), Resource(), Resource()
+        self.router.addRoute(b"/{a}/x", first)
+        self.router.addRoute(b"/x/{b}", last)
+        self.router.addRoute(b"/x/x", static)
+        self.assertIs(static, self.resolve(b"/x/x")[0])
+        self.assertIs(last, self.resolve(b"/x/y")[0])
+        self.assertIs(first, self.resolve(b"/y/x")[0])
+
+
+    def test_routeOnly(self):
+        """
+        Only the segments matched by a route are consumed, and only the
+        parameters of that route are added to C{routeArguments}.
+        """
+        a, ab = Resource(), Resource()
+        self.router.addRoute(b"/a", a)
+        self.router.addRoute(b"/a/b/{x}/c", ab)
+        request = DummyRequest([b"b", b"1", b"d"])
+        request.prepath = [b"a"]
+        self.assertIs(a, self.router.getChildWithDefault(b"a", request))
+        self.assertEqual(([b"a"], [b"b", b"1", b"d"]),
+                         (request.prepath, request.postpath))
+        self.assertFalse(hasattr(request, "routeArguments"))
+
+
+    def test_staticChildren(self):
+        """
+        Segments beyond a route are looked up in the C{children} of its
+        resource without calling C{getChildWithDefault}, until one which
+        overrides it is found.
+        """
+        a, b = Resource(), Resource()
+        counting, leaf = CountingResource(), LeafResource()
+        a.putChild(b"b", b)
+        b.putChild(b"c", counting)
+        counting.putChild(b"d", leaf)
+        self.router.addRoute(b"/a", a)
+        request = DummyRequest([b"b", b"c", b"d", b"e"])
+        self.assertIs(counting, self.router.getChildWithDefault(b"a", request))
+        self.assertEqual([b"d", b"e"], request.postpath)
+        found, request = self.resolve(b"/a/b/c/d/e")
+        self.assertIs(leaf, found)
+        self.assertEqual([b"e"], request.postpath)
+        self.assertEqual([b"d"], counting.lookups)
+
+
+    def test_dynamicChildren(self):
+        """
+        Segments beyond a route which are not static children of its
+        resource are looked up with its C{getChild}.
+        """
+        class Dynamic(Resource):
+            def getChild(self, path, request):
+                return LeafResource()
+        self.router.addRoute(b"/a", Dynamic())
+        found, request = self.resolve(b"/a/anything/else")
+        self.assertIsInstance(found, LeafResource)
+        self.assertEqual([b"else"], request.postpath)
+
+
+    def test_leafRoute(self):
+        """
+        Segments beyond a route whose resource is a leaf are left in
+        C{postpath}.
+        """
+        leaf = LeafResource()
+        leaf.putChild(b"b", Resource())
+        self.router.addRoute(b"/a", leaf)
+        found, request = self.resolve(b"/a/b")
+        self.assertIs(leaf, found)
+        self.assertEqual([b"b"], request.postpath)
+
+
+    def test_noRoute(self):
+        """
+        If no route matches the beginning of a path, the router's
+        C{getChild} is called with its first segment.
+        """
+        self.router.addRoute(b"/a/b", Resource())
+        self.assertIsInstance(self.resolve(b"/a")[0], NoResource)
+        self.assertIsInstance(self.resolve(b"/b")[0], NoResource)
+
+
+    def test_putChild(self):
+        """
+        L{Router.putChild} adds a child, as a route for its segment.
+        """
+        child = Resource()
+        self.router.putChild(b"", child)
+        self.assertEqual({b"": child}, self.router.children)
+        self.assertIs(child, self.resolve(b"/")[0])
+
+
+    def test_replaceRoute(self):
+        """
+        Adding a route differing from an existing one only by the names of
+        its parameters replaces its resource.
+        """
+        self.router.addRoute(b"/a/{x}", Resource())
+        replacement = Resource()
+        self.router.addRoute(b"/a/{y}", replacement)
+        found, request = self.resolve(b"/a/1")
+        self.assertIs(replacement, found)
+        self.assertEqual({b"y": b"1"}, request.routeArguments)
+
+
+    def test_parametersOnly(self):
+        """
+        A route may be made only of parameters.
+        """
+        resource = Resource()
+        self.router.addRoute(b"/{x}", resource)
+        self.assertIs(resource, self.resolve(b"/anything")[0])
+
+
+    def test_relativeRoute(self):
+        """
+        L{Router.addRoute} raises L{ValueError} for relative paths.
+        """
+        self.assertRaises(ValueError, self.router.addRoute, b"a", Resource())
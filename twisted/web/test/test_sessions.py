@@ -0,0 +1,267 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.web.sessions}.
+"""
+
+from __future__ import division, absolute_import
+
+from zope.interface.verify import verifyObject
+
+from twisted.internet.task import Clock
+from twisted.python.compat import _PY3
+from twisted.trial.unittest import SynchronousTestCase
+from twisted.web.iweb import ISessionStore
+from twisted.web.resource import Resource
+from twisted.web.server import Request, Session, Site
+from twisted.web.sessions import MemorySessionStore, DirDBMSessionStore
+from twisted.web.test.requesthelper import DummyChannel
+
+
+
+class SessionStoreTestsMixin(object):
+    """
+    Tests for L{ISessionStore} providers used as the C{sessions} of a
+    L{Site}.
+    """
+
+    def createStore(self):
+        """
+        Create the store to test.
+        """
+        raise NotImplementedError()
+
+
+    def setUp(self):
+        self.clock = Clock()
+        self.site = Site(Resource(), reactor=self.clock)
+        self.store = self.site.sessions = self.createStore()
+        self.addCleanup(self.site.stopFactory)
+
+
+    def test_interface(self):
+        """
+        The store provides L{ISessionStore}.
+        """
+        self.assertTrue(verifyObject(ISessionStore, self.store))
+
+
+    def test_makeSession(self):
+        """
+        L{Site.makeSession} adds sessions to the store, using the reactor of
+        the site, without scheduling their expiration.
+        """
+        session = self.site.makeSession()
+        self.assertIn(session.uid, self.store)
+        self.assertEqual(1, len(self.store))
+        self.assertIs(self.clock, session._reactor)
+        self.assertIsNone(session._expireCall)
+
+
+    def test_getSession(self):
+        """
+        L{Site.getSession} gets a session from the store, attached to the
+        site.
+        """
+        uid = self.site.makeSession().uid
+        session = self.site.getSession(uid)
+        self.assertEqual(uid, session.uid)
+        self.assertIs(self.site, session.site)
+        self.assertRaises(KeyError, self.site.getSession, b'no-such-uid')
+
+
+    def test_expire(self):
+        """
+        L{Session.expire} removes a session from the store.
+        """
+        session = self.site.makeSession()
+        session.expire()
+        self.assertNotIn(session.uid, self.store)
+        self.assertEqual(0, len(self.store))
+
+
+    def test_sweep(self):
+        """
+        Sessions which have not been used for L{Session.sessionTimeout}
+        seconds are expired by a single periodic call.
+        """
+        self.site.sessionSweepInterval = 10
+        old = self.site.makeSession()
+        touched = self.site.makeSession()
+        self.clock.advance(10)
+        new = self.site.makeSession()
+        self.site.getSession(touched.uid).touch()
+        self.assertEqual(1, len(self.clock.calls))
+        self.clock.advance(Session.sessionTimeout)
+        self.assertNotIn(old.uid, self.store)
+        self.assertIn(touched.uid, self.store)
+        self.assertIn(new.uid, self.store)
+        self.clock.advance(10)
+        self.assertEqual(0, len(self.store))
+
+
+    def test_sessionTimeout(self):
+        """
+        The periodic call expires each session according to its own
+        L{Session.sessionTimeout}, as of when it was last touched.
+        """
+        self.site.sessionSweepInterval = 10
+        short = self.site.makeSession()
+        short.sessionTimeout = 20
+        short.touch()
+        default = self.site.makeSession()
+        self.clock.advance(20)
+        self.assertIn(short.uid, self.store)
+        self.clock.advance(10)
+        self.assertNotIn(short.uid, self.store)
+        self.assertIn(default.uid, self.store)
+
+
+    def test_stopFactory(self):
+        """
+        The periodic call expiring sessions stops when the site stops, and
+        starts again when sessions are used.
+        """
+        uid = self.site.makeSession().uid
+        self.site.stopFactory()
+        self.assertEqual([], self.clock.calls)
+        self.site.getSession(uid)
+        self.assertEqual(1, len(self.clock.calls))
+
+
+    def test_requestFinished(self):
+        """
+        A session used by a request is touched again when the request
+        finishes, so that the changes made to it are stored.
+        """
+        request = Request(DummyChannel(), False)
+        request.site = self.site
+        request.sitepath = []
+        session = request.getSession()
+        session.sessionNamespaces['x'] = 1
+        self.clock.advance(5)
+        request.finish()
+        stored = self.site.getSession(session.uid)
+        self.assertEqual(5, stored.lastModified)
+        self.assertEqual({'x': 1}, stored.sessionNamespaces)
+
+
+
+class MemorySessionStoreTests(SessionStoreTestsMixin, SynchronousTestCase):
+    """
+    Tests for L{MemorySessionStore}.
+    """
+
+    def createStore(self):
+        return MemorySessionStore(maxSessions=3)
+
+
+    def test_leastRecentlyUsed(self):
+        """
+        Adding a session to a full store expires the least recently used
+        session.
+        """
+        expired = []
+        a, b, c = [self.site.makeSession() for i in range(3)]
+        for session in a, b, c:
+            session.notifyOnExpire(lambda uid=session.uid: expired.append(uid))
+        self.site.getSession(a.uid).touch()
+        d = self.site.makeSession()
+        self.assertEqual([b.uid], expired)
+        self.assertEqual([c.uid, a.uid, d.uid], list(self.store))
+
+
+    def test_expiredTimeoutChanged(self):
+        """
+        L{MemorySessionStore.expired} takes a timeout changed on a session
+        into account without the session being touched again.
+        """
+        self.site.makeSession()
+        b = self.site.makeSession()
+        b.sessionTimeout = 5
+        self.assertEqual([], self.store.expired(5))
+        self.assertEqual([b.uid], self.store.expired(6))
+
+
+
+class DirDBMSessionStoreTests(SessionStoreTestsMixin, SynchronousTestCase):
+    """
+    Tests for L{DirDBMSessionStore}.
+    """
+    if _PY3:
+        skip = "twisted.persisted.dirdbm is not ported to Python 3."
+
+    def createStore(self):
+        return DirDBMSessionStore(self.mktemp())
+
+
+    def test_shared(self):
+        """
+        Sessions in a L{DirDBMSessionStore} are shared with other stores
+        using the same directory, along with their namespaces.
+        """
+        path = self.mktemp()
+        self.site.sessions = DirDBMSessionStore(path)
+        session = self.site.makeSession()
+        session.sessionNamespaces['x'] = 1
+        session.touch()
+        self.site.sessions.flush()
+
+        other = Site(Resource(), reactor=self.clock)
+        other.sessions = DirDBMSessionStore(path)
+        self.addCleanup(other.stopFactory)
+        loaded = other.getSession(session.uid)
+        self.assertEqual({'x': 1}, loaded.sessionNamespaces)
+        self.assertIs(other, loaded.site)
+        loaded.expire()
+        self.assertNotIn(session.uid, self.site.sessions)
+
+
+    def test_touchWrittenOnSweep(self):
+        """
+        A touched session is only written to the directory by the next
+        periodic call expiring sessions.
+        """
+        path = self.mktemp()
+        self.site.sessions = DirDBMSessionStore(path)
+        self.site.sessionSweepInterval = 10
+        session = self.site.makeSession()
+        session.sessionNamespaces['x'] = 1
+        session.touch()
+        self.assertIs(session, self.site.sessions[session.uid])
+
+        other = DirDBMSessionStore(path)
+        self.assertEqual({}, other[session.uid].sessionNamespaces)
+        self.clock.advance(10)
+        self.assertEqual({'x': 1}, other[session.uid].sessionNamespaces)
+
+
+    def test_touchWrittenOnStop(self):
+        """
+        The sessions touched since the last periodic call are written to the
+        directory when the site stops.
+        """
+        path = self.mktemp()
+        self.site.sessions = DirDBMSessionStore(path)
+        session = self.site.makeSession()
+        session.sessionNamespaces['x'] = 1
+        session.touch()
+        self.site.stopFactory()
+
+        other = DirDBMSessionStore(path)
+        self.assertEqual({'x': 1}, other[session.uid].sessionNamespaces)
+
+
+    def test_touchExpiredElsewhere(self):
+        """
+        A touched session which another process has expired before the next
+        flush is not written back to the directory.
+        """
+        path = self.mktemp()
+        self.site.sessions = DirDBMSessionStore(path)
+        session = self.site.makeSession()
+        session.touch()
+        del DirDBMSessionStore(path)[session.uid]
+        self.site.sessions.flush()
+        self.assertNotIn(session.uid, self.site.sessions)
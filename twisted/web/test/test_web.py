@@ -7,6 +7,7 @@ Tests for various parts of L{twisted.web}.
 
 import os
 import zlib
+from threading import Event, Timer
 
 from zope.interface import implementer
 from zope.interface.verify import verifyObject
@@ -479,6 +480,20 @@ class RequestTests(unittest.TestCase):
             verifyObject(iweb.IRequest, server.Request(DummyChannel(), True)))
 
 
+    def test_componentsCreatedLazily(self):
+        """
+        The adapter cache of a L{server.Request} is only created when a
+        component is first used.
+        """
+        request = server.Request(DummyChannel(), False)
+        self.assertIsNone(request._components)
+        self.assertIsNone(request.getComponent(iweb.IRenderable))
+        component = object()
+        request.setComponent(iweb.IRenderable, component)
+        self.assertIs(component, request.getComponent(iweb.IRenderable))
+        self.assertEqual([component], list(request._components.values()))
+
+
     def testChildLink(self):
         request = server.Request(DummyChannel(), 1)
         request.gotLength(0)
@@ -1241,6 +1256,150 @@ class HTTPFactoryAccessLogTests(AccessLogTestsMixin, unittest.TestCase):
 
 
 
+class BufferedHTTPFactoryAccessLogTests(AccessLogTestsMixin,
+                                        unittest.TestCase):
+    """
+    Tests for L{http.HTTPFactory.log} with a C{logBufferSize}.
+    """
+    linesep = b"\n"
+
+    def factory(self, *args, **kwargs):
+        return http.HTTPFactory(*args, logBufferSize=10, **kwargs)
+
+
+    def test_bufferedLogFile(self):
+        """
+        With a C{logBufferSize}, the log file is a L{http.BufferedLogFile}
+        with that capacity and the given overflow policy.
+        """
+        factory = self.factory(logPath=self.mktemp(),
+                               logOverflow=http.AccessLogOverflow.sample)
+        factory.startFactory()
+        self.addCleanup(factory.stopFactory)
+        self.assertIsInstance(factory.logFile, http.BufferedLogFile)
+        self.assertEqual((10, http.AccessLogOverflow.sample),
+                         (factory.logFile.capacity, factory.logFile.overflow))
+
+
+
+class StallingFile(object):
+    """
+    A file whose first write waits until it is told to continue.
+
+    @ivar written: The data written.
+
+    @ivar stalled: An L{Event} set when the first write starts.
+
+    @ivar resume: An L{Event} to set for the first write to complete.
+    """
+
+    def __init__(self):
+        self.written = []
+        self.stalled = Event()
+        self.resume = Event()
+        self.closed = False
+
+
+    def write(self, data):
+        if not self.stalled.is_set():
+            self.stalled.set()
+            self.resume.wait()
+        self.written.append(data)
+
+
+    def flush(self):
+        pass
+
+
+    def close(self):
+        self.closed = True
+
+
+
+class BufferedLogFileTests(unittest.TestCase):
+    """
+    Tests for L{http.BufferedLogFile}.
+    """
+
+    def stall(self, overflow, capacity=4):
+        """
+        Create a L{http.BufferedLogFile} writing to a L{StallingFile}, and
+        wait for the writer thread to stall writing a first line.
+
+        @return: The L{http.BufferedLogFile} and the L{StallingFile}.
+        """
+        stalling = StallingFile()
+        logFile = http.BufferedLogFile(stalling, capacity, overflow)
+        logFile.write(b"first\n")
+        stalling.stalled.wait()
+        return logFile, stalling
+
+
+    def test_batches(self):
+        """
+        Lines written while the writer thread is busy are written out together
+        as one batch, and L{http.BufferedLogFile.close} writes all buffered
+        lines and closes the underlying file.
+        """
+        logFile, stalling = self.stall(http.AccessLogOverflow.drop)
+        logFile.write(b"a\n")
+        logFile.write(b"b\n")
+        stalling.resume.set()
+        logFile.close()
+        self.assertEqual([b"first\n", b"a\nb\n"], stalling.written)
+        self.assertTrue(stalling.closed)
+        self.assertEqual(0, logFile.dropped)
+
+
+    def test_drop(self):
+        """
+        With L{http.AccessLogOverflow.drop}, lines written while the buffer is
+        full are discarded and counted.
+        """
+        logFile, stalling = self.stall(http.AccessLogOverflow.drop)
+        for i in range(6):
+            logFile.write(b"%d\n" % (i,))
+        stalling.resume.set()
+        logFile.close()
+        self.assertEqual([b"first\n", b"0\n1\n2\n3\n"], stalling.written)
+        self.assertEqual(2, logFile.dropped)
+
+
+    def test_sample(self):
+        """
+        With L{http.AccessLogOverflow.sample}, once the buffer is half full
+        only one out of every C{sampleRate} lines is kept.
+        """
+        logFile, stalling = self.stall(http.AccessLogOverflow.sample)
+        logFile.sampleRate = 3
+        for i in range(8):
+            logFile.write(b"%d\n" % (i,))
+        stalling.resume.set()
+        logFile.close()
+        self.assertEqual([b"first\n", b"0\n1\n4\n7\n"], stalling.written)
+        self.assertEqual(4, logFile.dropped)
+
+
+    def test_block(self):
+        """
+        With L{http.AccessLogOverflow.block}, writing a line to a full buffer
+        waits until the writer thread has made room for it.
+        """
+        logFile, stalling = self.stall(http.AccessLogOverflow.block,
+                                       capacity=1)
+        logFile.write(b"a\n")
+        # Let the writer thread go once this thread is blocked.
+        timer = Timer(0.1, stalling.resume.set)
+        timer.start()
+        logFile.write(b"b\n")
+        self.assertTrue(stalling.resume.is_set())
+        logFile.close()
+        timer.join()
+        self.assertEqual(b"first\na\nb\n", b"".join(stalling.written))
+        self.assertEqual(0, logFile.dropped)
+
+
+
 class SiteAccessLogTests(AccessLogTestsMixin, unittest.TestCase):
     """
     Tests for L{server.Site.log}.
@@ -8,6 +8,7 @@ Tests for L{twisted.web.wsgi}.
 __metaclass__ = type
 
 from sys import exc_info
+from threading import Event
 import tempfile
 import traceback
 import warnings
@@ -21,6 +22,7 @@ from twisted.python.threadable import getThreadID
 from twisted.python.threadpool import ThreadPool
 from twisted.internet.defer import Deferred, gatherResults
 from twisted.internet import reactor
+from twisted.internet.interfaces import IPushProducer
 from twisted.internet.error import ConnectionLost
 from twisted.trial.unittest import TestCase, SkipTest
 from twisted.web import http
@@ -110,8 +112,12 @@ class WSGITestsMixin:
     """
     @ivar channelFactory: A no-argument callable which will be invoked to
         create a new HTTP channel to associate with request objects.
+
+    @ivar bufferSize: The C{bufferSize} of the L{WSGIResource}s created by
+        L{lowLevelRender}.
     """
     channelFactory = DummyChannel
+    bufferSize = None
 
     def setUp(self):
         self.threadpool = SynchronousThreadPool()
@@ -159,7 +165,8 @@ class WSGITestsMixin:
                 return string.encode('iso-8859-1')
 
         root = WSGIResource(
-            self.reactor, self.threadpool, applicationFactory())
+            self.reactor, self.threadpool, applicationFactory(),
+            self.bufferSize)
         resourceSegments.reverse()
         for seg in resourceSegments:
             tmp = Resource()
@@ -2094,3 +2101,183 @@ class ApplicationTests(WSGITestsMixin, TestCase):
                 raise RuntimeError("This application had some error.")
 
         return self._connectionClosedTest(Application, responseContent)
+
+
+
+class BufferedApplicationTests(ApplicationTests):
+    """
+    Run the tests of L{ApplicationTests} against a L{WSGIResource} which
+    hands each string produced by the application to the reactor thread
+    without waiting for it to be written.
+    """
+    bufferSize = 1
+
+
+
+class BufferedWriteTests(WSGITestsMixin, TestCase):
+    """
+    Tests for the output of a L{WSGIResource} with a C{bufferSize}.
+    """
+    bufferSize = 10
+
+    def renderRecordingWrites(self, application, requestClass=Request):
+        """
+        Render a request with C{application}, recording the data written to
+        the request.
+
+        @return: A two-tuple of a L{list} of the data passed to each call of
+            the request's C{write} method and a L{Deferred} firing when the
+            request is finished.
+        """
+        writes = []
+
+        class RecordingRequest(requestClass):
+            def write(self, data):
+                writes.append(data)
+                return requestClass.write(self, data)
+
+        d, requestFactory = self.requestFactoryFactory(RecordingRequest)
+        self.lowLevelRender(
+            requestFactory, lambda: application, DummyChannel,
+            'GET', '1.1', [], [''])
+        return writes, d
+
+
+    def test_coalesced(self):
+        """
+        Strings produced by the application are written to the request in
+        batches of at least C{bufferSize} bytes, followed by the remainder.
+        """
+        def application(environ, startResponse):
+            write = startResponse('200 OK', [])
+            write(b'abc')
+            for i in range(8):
+                yield b'xyz'
+        writes, d = self.renderRecordingWrites(application)
+        self.assertEqual(
+            [b'abcxyzxyzxyz', b'xyzxyzxyzxyz', b'xyz'], writes)
+        return d
+
+
+    def test_producerRegistered(self):
+        """
+        The response is registered as the request's streaming producer while
+        its output is being written, and unregistered before the request is
+        finished.
+        """
+        producers = []
+
+        class ProducerRecordingRequest(Request):
+            def finish(self):
+                producers.append(self.producer)
+                return Request.finish(self)
+
+        def application(environ, startResponse):
+            startResponse('200 OK', [])
+            yield b'x' * 10
+            producers.append(request[0].producer)
+        request = []
+
+        def requestFactory(*a, **kw):
+            request.append(ProducerRecordingRequest(*a, **kw))
+            return request[0]
+
+        channel = DummyChannel()
+        self.lowLevelRender(
+            requestFactory, lambda: application, lambda: channel,
+            'GET', '1.1', [], [''])
+        self.assertTrue(IPushProducer.providedBy(producers[0]))
+        self.assertEqual(None, producers[1])
+        self.assertEqual([(producers[0], True)], channel.transport.producers)
+
+
+    def test_applicationExceptionBeforeFlush(self):
+        """
+        If the application raises an exception before any of its output has
+        been handed to the reactor thread, the output is discarded and the
+        response status is I{500}.
+        """
+        channel = DummyChannel()
+
+        def application(environ, startResponse):
+            startResponse('200 OK', [])
+            yield b'partial'
+            raise RuntimeError("This application had some error.")
+
+        d, requestFactory = self.requestFactoryFactory()
+        def cbRendered(ignored):
+            self.assertEqual(1, len(self.flushLoggedErrors(RuntimeError)))
+            response = channel.transport.written.getvalue()
+            self.assertTrue(
+                response.startswith(b'HTTP/1.1 500 Internal Server Error'))
+            self.assertNotIn(b'partial', response)
+        d.addCallback(cbRendered)
+
+        self.lowLevelRender(
+            requestFactory, lambda: application, lambda: channel,
+            'GET', '1.1', [], [''])
+        return d
+
+
+    def test_writeError(self):
+        """
+        If writing a batch to the request fails, the error is logged, the
+        connection is closed and the application's iteration is stopped.
+        """
+        channel = DummyChannel()
+        iterated = []
+
+        class BrokenRequest(Request):
+            def write(self, data):
+                raise RuntimeError("Cannot write")
+
+        def application(environ, startResponse):
+            startResponse('200 OK', [])
+            for i in range(3):
+                iterated.append(i)
+                yield b'x' * 10
+
+        d, requestFactory = self.requestFactoryFactory(BrokenRequest)
+        self.lowLevelRender(
+            requestFactory, lambda: application, lambda: channel,
+            'GET', '1.1', [], [''])
+        self.assertEqual(1, len(self.flushLoggedErrors(RuntimeError)))
+        self.assertTrue(channel.transport.disconnected)
+        self.assertEqual([0], iterated)
+
+
+    def test_pausedTransportBlocksApplication(self):
+        """
+        While the request's transport has paused the response, the
+        application thread does not hand it any more output.
+        """
+        self.reactor = reactor
+        self.threadpool = ThreadPool()
+        self.threadpool.start()
+        self.addCleanup(self.threadpool.stop)
+        events = []
+        paused = Event()
+
+        class PausingRequest(Request):
+            def write(self, data):
+                events.append("write")
+                if len(events) == 1:
+                    self.producer.pauseProducing()
+                    def resume():
+                        events.append("resume")
+                        self.producer.resumeProducing()
+                    reactor.callLater(0.01, resume)
+                    paused.set()
+                return Request.write(self, data)
+
+        def application(environ, startResponse):
+            startResponse('200 OK', [])
+            yield b'x' * 10
+            paused.wait()
+            yield b'y' * 10
+
+        writes, d = self.renderRecordingWrites(application, PausingRequest)
+        def cbRendered(ignored):
+            self.assertEqual(["write", "resume", "write"], events)
+            self.assertEqual([b'x' * 10, b'y' * 10], writes)
+        return d.addCallback(cbRendered)
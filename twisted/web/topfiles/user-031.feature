@@ -0,0 +1 @@
+twisted.web.wsgi.WSGIResource accepts a bufferSize argument, which hands the output of the application to the reactor thread in batches instead of one blocking call per string.
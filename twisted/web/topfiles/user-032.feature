@@ -0,0 +1 @@
+twisted.web.template.XMLString and twisted.web.template.XMLFile now flatten the static parts of a template once, and twisted.web.template.flatten buffers its output into fewer, larger writes.
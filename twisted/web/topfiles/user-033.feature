@@ -0,0 +1 @@
+twisted.web.router.Router is a resource which resolves request paths against a table of routes with parameters in a single lookup.
@@ -0,0 +1 @@
+twisted.web.http.HTTPFactory and twisted.web.server.Site accept a logBufferSize argument, which writes the access log from a separate thread through twisted.web.http.BufferedLogFile.
@@ -0,0 +1 @@
+twisted.web.proxy.StreamingReverseProxyResource forwards requests over persistent connections to one or more upstream servers, streaming the response bodies.
@@ -0,0 +1 @@
+The HTTP/2 server batches the frames it writes, and twisted.web.http.HTTPFactory accepts h2Settings and h2ConnectionWindowSize to configure its SETTINGS and connection window.
@@ -0,0 +1 @@
+twisted.web.server.Site.sessions may be a twisted.web.iweb.ISessionStore, such as the stores in twisted.web.sessions, whose expired sessions are removed by a single periodic sweep.
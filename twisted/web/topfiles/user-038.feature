@@ -0,0 +1 @@
+twisted.web.http.Request parses its args and received_cookies when they are first used, rather than for every request.
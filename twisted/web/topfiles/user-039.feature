@@ -0,0 +1 @@
+twisted.web.http.Request parses multipart/form-data bodies as they are received, hands uploaded files to Request.openUpload, and rejects bodies larger than Request.maxBodySize.
@@ -0,0 +1 @@
+twisted.web.caching.CachingResource keeps the responses rendered by the resource it wraps in a bounded cache, honouring Cache-Control and Vary.
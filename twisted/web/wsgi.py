@@ -10,10 +10,12 @@ __metaclass__ = type
 
 from collections import Sequence
 from sys import exc_info
+from threading import Condition
 from warnings import warn
 
 from zope.interface import implementer
 
+from twisted.internet.interfaces import IPushProducer
 from twisted.internet.threads import blockingCallFromThread
 from twisted.python.compat import reraise
 from twisted.python.log import msg, err
@@ -227,11 +229,20 @@ class _InputStream:
 
 
 
+@implementer(IPushProducer)
 class _WSGIResponse:
     """
     Helper for L{WSGIResource} which drives the WSGI application using a
     threadpool and hooks it up to the L{http.Request}.
 
+    When C{bufferSize} is not L{None}, the application's output is collected
+    in the application thread and handed to the reactor thread in batches of
+    at least C{bufferSize} bytes, without waiting for each batch to be
+    written.  The application thread only blocks while the request's
+    transport has paused this response, which is registered as its
+    producer, or while C{_maxPendingWrites} batches are waiting for the
+    reactor thread.
+
     @ivar started: A L{bool} indicating whether or not the response status and
         headers have been written to the request yet.  This may only be read or
         written in the WSGI application thread.
@@ -255,20 +266,50 @@ class _WSGIResponse:
     @ivar headers: A list of HTTP response headers supplied to the WSGI
         I{start_response} callable by the application.
 
+    @ivar bufferSize: The number of bytes of application output to collect
+        before handing them to the reactor thread, or L{None} to hand each
+        string to it as soon as it is produced and wait for it to be written.
+
     @ivar _requestFinished: A flag which indicates whether it is possible to
         generate more response data or not.  This is L{False} until
         L{http.Request.notifyFinish} tells us the request is done,
         then L{True}.
+
+    @ivar _buffer: The application output not yet handed to the reactor
+        thread, when C{bufferSize} is not L{None}.  This may only be used in
+        the WSGI application thread.
+
+    @ivar _condition: A L{Condition} guarding C{_paused}, C{_pendingWrites}
+        and C{_requestFinished}, which the application thread waits on for
+        the reactor thread to accept more output.
+
+    @ivar _paused: Whether the request's transport has asked for output to
+        stop.
+
+    @ivar _pendingWrites: The number of batches handed to the reactor thread
+        which it has not written yet.
+
+    @ivar _producing: Whether this response is registered as the request's
+        producer.  This may only be used in the I/O thread.
     """
 
     _requestFinished = False
+    _maxPendingWrites = 4
 
-    def __init__(self, reactor, threadpool, application, request):
+    def __init__(self, reactor, threadpool, application, request,
+                 bufferSize=None):
         self.started = False
         self.reactor = reactor
         self.threadpool = threadpool
         self.application = application
         self.request = request
+        self.bufferSize = bufferSize
+        self._buffer = []
+        self._buffered = 0
+        self._condition = Condition()
+        self._paused = False
+        self._pendingWrites = 0
+        self._producing = False
         self.request.notifyFinish().addBoth(self._finished)
 
         if request.prepath:
@@ -344,7 +385,40 @@ class _WSGIResponse:
         Record the end of the response generation for the request being
         serviced.
         """
-        self._requestFinished = True
+        with self._condition:
+            self._requestFinished = True
+            self._condition.notify_all()
+
+
+    def pauseProducing(self):
+        """
+        Stop handing buffered output to the request until
+        L{resumeProducing} is called.
+
+        This will be called in the I/O thread.
+        """
+        with self._condition:
+            self._paused = True
+
+
+    def resumeProducing(self):
+        """
+        Resume handing buffered output to the request.
+
+        This will be called in the I/O thread.
+        """
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+
+
+    def stopProducing(self):
+        """
+        Stop generating output, as the request's connection has been lost.
+
+        This will be called in the I/O thread.
+        """
+        self._finished(None)
 
 
     def startResponse(self, status, headers, excInfo=None):
@@ -420,6 +494,13 @@ class _WSGIResponse:
 
         This will be called in a non-I/O thread.
         """
+        if self.bufferSize is not None:
+            self._buffer.append(data)
+            self._buffered += len(data)
+            if self._buffered >= self.bufferSize:
+                self._flushBuffer(True)
+            return
+
         # PEP-3333 states:
         #
         #   The server or gateway must transmit the yielded bytestrings to the
@@ -457,6 +538,70 @@ class _WSGIResponse:
             self.started = True
 
 
+    def _flushBuffer(self, wait):
+        """
+        Hand the buffered output to the reactor thread without waiting for it
+        to be written.
+
+        This must be called in a non-I/O thread.
+
+        @param wait: Whether to first wait until the request's transport is
+            not paused and fewer than C{_maxPendingWrites} batches are
+            waiting to be written.
+        @type wait: L{bool}
+        """
+        data = b''.join(self._buffer)
+        del self._buffer[:]
+        self._buffered = 0
+        with self._condition:
+            while wait and not self._requestFinished and (
+                    self._paused or
+                    self._pendingWrites >= self._maxPendingWrites):
+                self._condition.wait()
+            self._pendingWrites += 1
+        self.reactor.callFromThread(self._writeBuffered, self.started, data)
+        self.started = True
+
+
+    def _writeBuffered(self, started, data):
+        """
+        Write a batch of buffered output to the request, registering this
+        response as the request's producer along with the first batch.
+
+        If the write fails, the error is logged and the connection is closed,
+        which stops the application's iteration.
+
+        This must be called in the I/O thread.
+        """
+        try:
+            if not self._requestFinished:
+                if not started:
+                    self._sendResponseHeaders()
+                    self.request.registerProducer(self, True)
+                    self._producing = True
+                self.request.write(data)
+        except:
+            err(Failure(), "WSGI response write error")
+            self._finished(None)
+            self.request.loseConnection()
+        with self._condition:
+            self._pendingWrites -= 1
+            self._condition.notify_all()
+
+
+    def _unregisterProducer(self):
+        """
+        Unregister this response as the request's producer, if it is
+        registered and the request's connection has not been lost.
+
+        This must be called in the I/O thread.
+        """
+        if self._producing:
+            self._producing = False
+            if self.request.channel is not None:
+                self.request.unregisterProducer()
+
+
     def _sendResponseHeaders(self):
         """
         Set the response code and response headers on the request object, but
@@ -503,9 +648,16 @@ class _WSGIResponse:
             close = getattr(appIterator, 'close', None)
             if close is not None:
                 close()
+            if self._buffer:
+                self._flushBuffer(False)
         except:
+            # Output which was never handed to the reactor thread is
+            # discarded, so that an error response can still be sent if the
+            # application fails before any of its output was.
+            del self._buffer[:]
             def wsgiError(started, type, value, traceback):
                 err(Failure(value, type, traceback), "WSGI application error")
+                self._unregisterProducer()
                 if started:
                     self.request.loseConnection()
                 else:
@@ -514,6 +666,7 @@ class _WSGIResponse:
             self.reactor.callFromThread(wsgiError, self.started, *exc_info())
         else:
             def wsgiFinish(started):
+                self._unregisterProducer()
                 if not self._requestFinished:
                     if not started:
                         self._sendResponseHeaders()
@@ -536,16 +689,32 @@ class WSGIResource:
         L{_WSGIResponse} to run the WSGI application object.
 
     @ivar _application: The WSGI application object.
+
+    @ivar _bufferSize: The number of bytes of application output to collect
+        before handing it to the reactor thread, or L{None} to write each
+        string the application produces separately.
     """
 
     # Further resource segments are left up to the WSGI application object to
     # handle.
     isLeaf = True
 
-    def __init__(self, reactor, threadpool, application):
+    def __init__(self, reactor, threadpool, application, bufferSize=None):
+        """
+        @param bufferSize: If not L{None}, the application's output is
+            coalesced into batches of at least this many bytes which are
+            written without blocking the application thread, unless the
+            connection cannot keep up.  This departs from PEP 3333's demand
+            that output be transmitted unbuffered, so it should not be used
+            for applications which stream output slowly, such as long
+            polling, since their output is delayed until a batch fills up or
+            the response ends.
+        @type bufferSize: L{int} or L{None}
+        """
         self._reactor = reactor
         self._threadpool = threadpool
         self._application = application
+        self._bufferSize = bufferSize
 
 
     def render(self, request):
@@ -559,7 +728,8 @@ class WSGIResource:
         will the status, headers, and the response body.
         """
         response = _WSGIResponse(
-            self._reactor, self._threadpool, self._application, request)
+            self._reactor, self._threadpool, self._application, request,
+            self._bufferSize)
         response.start()
         return NOT_DONE_YET
 